@@ -18,9 +18,113 @@ class Settings(BaseSettings):
 
     model_name: str = Field(default="gpt-4o-mini", validation_alias="MODEL_NAME")
 
+    # Shared LLM gateway (see app/services/llm.py)
+    # "openai", or "fake" for the offline stand-in in app/services/fake_llm.py
+    llm_provider: str = Field(default="openai", validation_alias="LLM_PROVIDER")
+    llm_base_url: str = Field(default="", validation_alias="LLM_BASE_URL")
+    llm_timeout_seconds: float = Field(default=60.0, validation_alias="LLM_TIMEOUT_SECONDS")
+    llm_connect_timeout_seconds: float = Field(default=10.0, validation_alias="LLM_CONNECT_TIMEOUT_SECONDS")
+    llm_max_connections: int = Field(default=20, validation_alias="LLM_MAX_CONNECTIONS")
+    llm_max_keepalive_connections: int = Field(default=10, validation_alias="LLM_MAX_KEEPALIVE_CONNECTIONS")
+    # SDK retries with exponential backoff on 429 / 5xx / connection errors
+    llm_max_retries: int = Field(default=2, validation_alias="LLM_MAX_RETRIES")
+    # How often prompts/*.yaml mtimes are re-checked for hot reload; 0 disables
+    prompt_reload_interval_seconds: float = Field(default=2.0, validation_alias="PROMPT_RELOAD_INTERVAL_SECONDS")
+
+    # Fake provider knobs (LLM_PROVIDER=fake)
+    llm_fake_latency_ms: float = Field(default=800.0, validation_alias="LLM_FAKE_LATENCY_MS")
+    # fixed | uniform | lognormal
+    llm_fake_latency_distribution: str = Field(default="lognormal", validation_alias="LLM_FAKE_LATENCY_DISTRIBUTION")
+    llm_fake_latency_sigma: float = Field(default=0.5, validation_alias="LLM_FAKE_LATENCY_SIGMA")
+    llm_fake_error_rate: float = Field(default=0.0, validation_alias="LLM_FAKE_ERROR_RATE")
+    llm_fake_stream_tokens: int = Field(default=40, validation_alias="LLM_FAKE_STREAM_TOKENS")
+    llm_fake_seed: int | None = Field(default=None, validation_alias="LLM_FAKE_SEED")
+
+    # LLM response cache (see app/services/llm_cache.py); call sites opt in
+    llm_cache_enabled: bool = Field(default=True, validation_alias="LLM_CACHE_ENABLED")
+    llm_cache_memory_entries: int = Field(default=1000, validation_alias="LLM_CACHE_MEMORY_ENTRIES")
+    # TTL for policies not listed in llm_cache.CACHE_TTLS
+    llm_cache_default_ttl_seconds: float = Field(default=86400.0, validation_alias="LLM_CACHE_DEFAULT_TTL_SECONDS")
+
     # Database path can be overridden; in Docker we usually use /app/data/intake_eval.db
     database_path: str = Field(default="intake_eval.db", validation_alias="DATABASE_PATH")
 
+    # SQLite connection pool (see app/db/database.py)
+    db_pool_size: int = Field(default=8, validation_alias="DB_POOL_SIZE")
+    # Extra short-lived connections allowed when the pool is exhausted
+    db_pool_max_overflow: int = Field(default=16, validation_alias="DB_POOL_MAX_OVERFLOW")
+    db_pool_timeout_seconds: float = Field(default=30.0, validation_alias="DB_POOL_TIMEOUT_SECONDS")
+    db_busy_timeout_ms: int = Field(default=5000, validation_alias="DB_BUSY_TIMEOUT_MS")
+    db_cache_size_kb: int = Field(default=32768, validation_alias="DB_CACHE_SIZE_KB")
+    db_mmap_size_mb: int = Field(default=256, validation_alias="DB_MMAP_SIZE_MB")
+
+    # Single-writer queue (see app/db/write_queue.py); off by default
+    db_write_queue_enabled: bool = Field(default=False, validation_alias="DB_WRITE_QUEUE")
+    db_write_flush_interval_ms: float = Field(default=5.0, validation_alias="DB_WRITE_FLUSH_MS")
+    db_write_batch_size: int = Field(default=64, validation_alias="DB_WRITE_BATCH_SIZE")
+    db_write_queue_max_depth: int = Field(default=10000, validation_alias="DB_WRITE_QUEUE_MAX_DEPTH")
+
+    # Hot/cold archival (see app/services/archiver.py)
+    archive_enabled: bool = Field(default=True, validation_alias="ARCHIVE_ENABLED")
+    # Defaults to <database>.archive.db next to the main file
+    archive_database_path: str = Field(default="", validation_alias="ARCHIVE_DATABASE_PATH")
+    archive_after_days: int = Field(default=180, validation_alias="ARCHIVE_AFTER_DAYS")
+    archive_batch_size: int = Field(default=1000, validation_alias="ARCHIVE_BATCH_SIZE")
+    archive_interval_seconds: float = Field(default=3600.0, validation_alias="ARCHIVE_INTERVAL_SECONDS")
+
+    # Online backups (see app/db/backup.py)
+    # Defaults to a backups/ directory next to the database
+    backup_dir: str = Field(default="", validation_alias="BACKUP_DIR")
+    backup_retention: int = Field(default=7, validation_alias="BACKUP_RETENTION")
+    backup_compress: bool = Field(default=True, validation_alias="BACKUP_COMPRESS")
+
+    # Durable job queue for AI work (see app/services/jobs.py)
+    jobs_enabled: bool = Field(default=True, validation_alias="JOBS_ENABLED")
+    # Worker count doubles as the global cap on concurrent AI jobs
+    job_workers: int = Field(default=4, validation_alias="JOB_WORKERS")
+    job_poll_interval_seconds: float = Field(default=1.0, validation_alias="JOB_POLL_INTERVAL_SECONDS")
+    job_lease_seconds: float = Field(default=120.0, validation_alias="JOB_LEASE_SECONDS")
+    job_max_attempts: int = Field(default=3, validation_alias="JOB_MAX_ATTEMPTS")
+    job_backoff_base_seconds: float = Field(default=5.0, validation_alias="JOB_BACKOFF_BASE_SECONDS")
+    job_backoff_max_seconds: float = Field(default=300.0, validation_alias="JOB_BACKOFF_MAX_SECONDS")
+
+    # Next-lesson pre-generation (see app/services/lesson_pregen.py)
+    lesson_pregen_enabled: bool = Field(default=True, validation_alias="LESSON_PREGEN_ENABLED")
+    # Upcoming sessions kept ready per student
+    lesson_pregen_lookahead: int = Field(default=1, validation_alias="LESSON_PREGEN_LOOKAHEAD")
+    lesson_pregen_max_age_hours: float = Field(default=24.0, validation_alias="LESSON_PREGEN_MAX_AGE_HOURS")
+    # "full": any input change invalidates; "plan": only profile/level/topic changes do
+    lesson_pregen_match: str = Field(default="full", validation_alias="LESSON_PREGEN_MATCH")
+
+    # Lesson prompt context (see app/services/lesson_context.py)
+    # Newest progress entries sent in full; older ones are summarised per skill
+    lesson_context_recent: int = Field(default=5, validation_alias="LESSON_CONTEXT_RECENT")
+    # Estimated tokens for progress history and previous topics together
+    lesson_context_token_budget: int = Field(default=1500, validation_alias="LESSON_CONTEXT_TOKEN_BUDGET")
+
+    # Coalescing of duplicate generation requests (see app/services/single_flight.py)
+    single_flight_enabled: bool = Field(default=True, validation_alias="SINGLE_FLIGHT_ENABLED")
+    # How long a finished result is still handed to repeated requests
+    single_flight_grace_seconds: float = Field(default=2.0, validation_alias="SINGLE_FLIGHT_GRACE_SECONDS")
+
+    # Recall quiz prefetch on /check (see app/services/recall_prefetch.py)
+    recall_prefetch_enabled: bool = Field(default=True, validation_alias="RECALL_PREFETCH_ENABLED")
+    recall_prefetch_ttl_seconds: float = Field(default=300.0, validation_alias="RECALL_PREFETCH_TTL_SECONDS")
+    recall_prefetch_max_entries: int = Field(default=1000, validation_alias="RECALL_PREFETCH_MAX_ENTRIES")
+
+    # Recall question bank (see app/services/recall_bank.py)
+    recall_bank_enabled: bool = Field(default=True, validation_alias="RECALL_BANK_ENABLED")
+    recall_bank_max_variants: int = Field(default=3, validation_alias="RECALL_BANK_MAX_VARIANTS")
+    recall_bank_max_uses: int = Field(default=3, validation_alias="RECALL_BANK_MAX_USES")
+    recall_bank_reuse_after_days: float = Field(default=3.0, validation_alias="RECALL_BANK_REUSE_AFTER_DAYS")
+
+    # Game content pools (see app/services/game_content.py)
+    game_pool_enabled: bool = Field(default=True, validation_alias="GAME_POOL_ENABLED")
+    # Unserved items kept ready per game type and level
+    game_pool_target: int = Field(default=24, validation_alias="GAME_POOL_TARGET")
+    game_pool_max_items: int = Field(default=500, validation_alias="GAME_POOL_MAX_ITEMS")
+    game_pool_refill_interval_seconds: float = Field(default=600.0, validation_alias="GAME_POOL_REFILL_INTERVAL_SECONDS")
+
     jwt_secret: str = Field(default="", validation_alias="JWT_SECRET")
     env: str = Field(default="dev", validation_alias="ENV")
     cors_origins: str = Field(default="", validation_alias="CORS_ORIGINS")
@@ -38,6 +142,18 @@ def _load_settings() -> Settings:
     if not s.api_key:
         s.api_key = os.getenv("API_KEY", "").strip()
 
+    # The offline fake provider needs no key
+    if s.llm_provider == "fake" and not s.api_key:
+        s.api_key = "fake-key"
+
+    if s.llm_provider not in ("openai", "fake"):
+        print(f"ERROR: LLM_PROVIDER must be 'openai' or 'fake', got {s.llm_provider!r}.", file=sys.stderr)
+        sys.exit(1)
+
+    if s.lesson_pregen_match not in ("full", "plan"):
+        print(f"ERROR: LESSON_PREGEN_MATCH must be 'full' or 'plan', got {s.lesson_pregen_match!r}.", file=sys.stderr)
+        sys.exit(1)
+
     if not s.api_key:
         print(
             "ERROR: OpenAI key not set. Provide OPENAI_API_KEY or API_KEY in environment/.env",
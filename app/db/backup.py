@@ -0,0 +1,267 @@
+"""Online backups using SQLite's backup API.
+
+``create_backup`` copies the live database in a single backup step. A
+stepwise copy restarts whenever another connection commits, so under
+classroom write load it may never finish. A single step runs inside one
+read transaction instead: in WAL mode that is a consistent snapshot, and
+writers keep committing to the -wal file meanwhile. The copy is
+integrity-checked and optionally gzipped, then moved into place
+atomically. Older backups beyond ``BACKUP_RETENTION`` are rotated out. The
+archive database (see app/services/archiver.py) is backed up alongside
+when it exists.
+
+Usage (from the project root):
+    python -m app.db.backup create [--no-compress]
+    python -m app.db.backup list
+    python -m app.db.backup verify <file>
+    python -m app.db.backup restore <file> --yes   # app must be stopped
+"""
+
+import asyncio
+import gzip
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from app.config import settings
+from app.db.timestamps import utc_now
+
+_BACKUP_SUFFIXES = (".db", ".db.gz")
+_lock = threading.Lock()
+
+
+class BackupError(RuntimeError):
+    """Raised when a backup cannot be created, verified or restored."""
+
+
+def backup_dir() -> Path:
+    if settings.backup_dir:
+        return Path(settings.backup_dir)
+    return Path(settings.database_path).parent / "backups"
+
+
+def _online_copy(source_path: str, dest_path: Path) -> int:
+    """Snapshot ``source_path`` into ``dest_path``; returns page count."""
+    pages_total = 0
+
+    def progress(_status, remaining, total):
+        nonlocal pages_total
+        pages_total = total
+
+    src = sqlite3.connect(source_path)
+    dst = sqlite3.connect(dest_path)
+    try:
+        src.execute(f"PRAGMA busy_timeout = {int(settings.db_busy_timeout_ms)}")
+        # pages=-1: the whole file in one step, never restarted by writers
+        src.backup(dst, pages=-1, progress=progress)
+        # A standalone copy should not depend on a -wal file
+        dst.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        dst.close()
+        src.close()
+    return pages_total
+
+
+def _integrity_check(path: Path) -> dict:
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        result = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+        tables = [
+            row[0]
+            for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+                "AND sql NOT LIKE 'CREATE VIRTUAL TABLE%' AND name NOT LIKE '%_fts_%' ORDER BY name"
+            )
+        ]
+        counts = {t: conn.execute(f'SELECT COUNT(*) FROM "{t}"').fetchone()[0] for t in tables}
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+    except sqlite3.DatabaseError as exc:
+        return {"ok": False, "errors": [str(exc)], "schema_version": None, "row_counts": {}}
+    finally:
+        conn.close()
+    return {
+        "ok": result == ["ok"],
+        "errors": [] if result == ["ok"] else result,
+        "schema_version": version,
+        "row_counts": counts,
+    }
+
+
+def _gzip(path: Path) -> Path:
+    target = path.with_name(path.name + ".gz")
+    with open(path, "rb") as f_in, gzip.open(target, "wb", compresslevel=6) as f_out:
+        shutil.copyfileobj(f_in, f_out, length=1024 * 1024)
+    path.unlink()
+    return target
+
+
+def _backup_one(source_path: str, stem: str, dest_dir: Path, compress: bool) -> dict:
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(dir=dest_dir) as tmp:
+        tmp_path = Path(tmp) / f"{stem}.db"
+        pages = _online_copy(source_path, tmp_path)
+        check = _integrity_check(tmp_path)
+        if not check["ok"]:
+            raise BackupError(f"Backup of {source_path} failed integrity check: {check['errors'][:3]}")
+        if compress:
+            tmp_path = _gzip(tmp_path)
+        final = dest_dir / tmp_path.name
+        tmp_path.replace(final)
+    return {
+        "file": final.name,
+        "path": str(final),
+        "bytes": final.stat().st_size,
+        "pages": pages,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        "schema_version": check["schema_version"],
+    }
+
+
+def create_backup(compress: bool | None = None) -> dict:
+    """Back up the main (and archive) database; blocking, run in a thread."""
+    from app.services.archiver import archive_database_path
+
+    compress = settings.backup_compress if compress is None else compress
+    if not _lock.acquire(blocking=False):
+        raise BackupError("A backup is already in progress")
+    try:
+        dest_dir = backup_dir()
+        dest_dir.mkdir(parents=True, exist_ok=True)
+        stamp = utc_now().strftime("%Y%m%dT%H%M%SZ")
+        main = Path(settings.database_path)
+        files = [_backup_one(str(main), f"{main.stem}-{stamp}", dest_dir, compress)]
+        archive = Path(archive_database_path())
+        if archive.exists():
+            files.append(_backup_one(str(archive), f"{archive.stem}-{stamp}", dest_dir, compress))
+        removed = rotate_backups()
+        return {"created": files, "rotated": removed}
+    finally:
+        _lock.release()
+
+
+def list_backups() -> list[dict]:
+    dest_dir = backup_dir()
+    if not dest_dir.exists():
+        return []
+    found = [p for p in dest_dir.iterdir() if p.is_file() and p.name.endswith(_BACKUP_SUFFIXES)]
+    found.sort(key=lambda p: p.name, reverse=True)
+    return [{"file": p.name, "path": str(p), "bytes": p.stat().st_size} for p in found]
+
+
+def rotate_backups() -> list[str]:
+    """Keep the newest ``BACKUP_RETENTION`` backups of each database file."""
+    keep = max(1, settings.backup_retention)
+    by_db: dict[str, list[dict]] = {}
+    for entry in list_backups():
+        # <stem>-YYYYmmddTHHMMSSZ.db[.gz]
+        by_db.setdefault(entry["file"].rsplit("-", 1)[0], []).append(entry)
+    removed = []
+    for entries in by_db.values():
+        for entry in entries[keep:]:
+            Path(entry["path"]).unlink(missing_ok=True)
+            removed.append(entry["file"])
+    return removed
+
+
+def resolve_backup(name_or_path: str) -> Path:
+    path = Path(name_or_path)
+    if not path.is_absolute() and path.parent == Path("."):
+        path = backup_dir() / path
+    if not path.exists() or not path.name.endswith(_BACKUP_SUFFIXES):
+        raise BackupError(f"Backup not found: {name_or_path}")
+    return path
+
+
+def _with_plain_copy(path: Path, fn):
+    """Call ``fn`` with an uncompressed path to the backup."""
+    if path.suffix != ".gz":
+        return fn(path)
+    with tempfile.TemporaryDirectory() as tmp:
+        plain = Path(tmp) / path.stem
+        with gzip.open(path, "rb") as f_in, open(plain, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out, length=1024 * 1024)
+        return fn(plain)
+
+
+def verify_backup(name_or_path: str) -> dict:
+    path = resolve_backup(name_or_path)
+    try:
+        result = _with_plain_copy(path, _integrity_check)
+    except (OSError, EOFError) as exc:
+        result = {"ok": False, "errors": [str(exc)], "schema_version": None, "row_counts": {}}
+    return {"file": path.name, **result}
+
+
+def restore_backup(name_or_path: str, target: str | None = None) -> dict:
+    """Verify a backup, then copy it over ``target`` (the live DB by default).
+
+    Uses the backup API in the other direction, so the target's -wal/-shm
+    state stays consistent. Stop the app first: open connections would keep
+    serving their old snapshot.
+    """
+    path = resolve_backup(name_or_path)
+    target = target or settings.database_path
+
+    def _restore(plain: Path) -> dict:
+        check = _integrity_check(plain)
+        if not check["ok"]:
+            raise BackupError(f"Refusing to restore {path.name}: integrity check failed: {check['errors'][:3]}")
+        src = sqlite3.connect(f"file:{plain}?mode=ro", uri=True)
+        dst = sqlite3.connect(target)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+            src.close()
+        return {"restored": path.name, "target": target, "schema_version": check["schema_version"]}
+
+    return _with_plain_copy(path, _restore)
+
+
+async def create_backup_async(compress: bool | None = None) -> dict:
+    return await asyncio.to_thread(create_backup, compress)
+
+
+def main(argv: list[str]) -> int:
+    usage = "usage: python -m app.db.backup create [--no-compress] | list | verify <file> | restore <file> --yes"
+    if not argv:
+        print(usage, file=sys.stderr)
+        return 2
+    command, args = argv[0], argv[1:]
+    try:
+        if command == "create":
+            result = create_backup(compress=False if "--no-compress" in args else None)
+            for f in result["created"]:
+                print(f"created {f['path']} ({f['bytes']} bytes, {f['pages']} pages, {f['duration_ms']} ms)")
+            for name in result["rotated"]:
+                print(f"rotated out {name}")
+        elif command == "list":
+            for entry in list_backups():
+                print(f"{entry['file']:<48} {entry['bytes']:>12}")
+        elif command == "verify" and len(args) == 1:
+            result = verify_backup(args[0])
+            print(f"{result['file']}: {'ok' if result['ok'] else 'FAILED'} (schema version {result['schema_version']})")
+            for error in result["errors"]:
+                print(f"  {error}")
+            return 0 if result["ok"] else 1
+        elif command == "restore" and args and args[0] != "--yes":
+            if "--yes" not in args:
+                print(f"This overwrites {settings.database_path}. Stop the app and re-run with --yes.", file=sys.stderr)
+                return 2
+            result = restore_backup(args[0])
+            print(f"restored {result['restored']} into {result['target']}")
+        else:
+            print(usage, file=sys.stderr)
+            return 2
+    except BackupError as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,14 +1,228 @@
+import asyncio
+import time
 import aiosqlite
+from contextlib import asynccontextmanager
 from pathlib import Path
 from app.config import settings
 
-SCHEMA_PATH = Path(__file__).parent / "schema.sql"
 
+class PoolTimeoutError(RuntimeError):
+    """Raised when no connection becomes available within the pool timeout."""
 
-async def get_db() -> aiosqlite.Connection:
-    db = await aiosqlite.connect(settings.database_path)
-    db.row_factory = aiosqlite.Row
-    return db
+
+class ConnectionPool:
+    """Pool of pre-configured aiosqlite connections.
+
+    Each aiosqlite connection owns a background thread, so opening one per
+    query is expensive. The pool opens connections lazily up to ``size`` and
+    keeps them for reuse. When all of them are checked out, up to
+    ``max_overflow`` extra connections are opened and closed again on
+    release, so helpers that still grab their own connection while the
+    caller holds one cannot deadlock the pool.
+    """
+
+    def __init__(
+        self,
+        database_path: str,
+        size: int = 8,
+        max_overflow: int = 16,
+        timeout: float = 30.0,
+    ):
+        self.database_path = database_path
+        self.size = max(1, size)
+        self.max_overflow = max(0, max_overflow)
+        self.timeout = timeout
+        self._idle: asyncio.Queue | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pooled = 0
+        self._overflow = 0
+        self._in_use = 0
+        # Stats
+        self._opened_total = 0
+        self._acquired_total = 0
+        self._waited_total = 0
+        self._wait_ms_total = 0.0
+        self._wait_ms_max = 0.0
+
+    async def _connect(self) -> aiosqlite.Connection:
+        db = await aiosqlite.connect(self.database_path)
+        db.row_factory = aiosqlite.Row
+        await db.execute("PRAGMA journal_mode = WAL")
+        await db.execute("PRAGMA synchronous = NORMAL")
+        await db.execute(f"PRAGMA busy_timeout = {int(settings.db_busy_timeout_ms)}")
+        # Negative cache_size is interpreted as KiB
+        await db.execute(f"PRAGMA cache_size = -{int(settings.db_cache_size_kb)}")
+        await db.execute(f"PRAGMA mmap_size = {int(settings.db_mmap_size_mb) * 1024 * 1024}")
+        await db.execute("PRAGMA temp_store = MEMORY")
+        self._opened_total += 1
+        return db
+
+    def _bind_loop(self) -> None:
+        """Connections belong to the event loop they were opened on.
+
+        If the pool is used from a new loop (e.g. a second ``asyncio.run``
+        in a script), stop the connections left over from the old one.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._idle is not None:
+            while not self._idle.empty():
+                self._idle.get_nowait().stop()
+        self._idle = asyncio.Queue()
+        self._loop = loop
+        self._pooled = 0
+        self._overflow = 0
+        self._in_use = 0
+
+    async def _checkout(self) -> tuple[aiosqlite.Connection, bool]:
+        """Return ``(connection, is_overflow)``."""
+        self._bind_loop()
+
+        if not self._idle.empty():
+            return self._idle.get_nowait(), False
+        if self._pooled < self.size:
+            self._pooled += 1
+            try:
+                return await self._connect(), False
+            except Exception:
+                self._pooled -= 1
+                raise
+        if self._overflow < self.max_overflow:
+            self._overflow += 1
+            try:
+                return await self._connect(), True
+            except Exception:
+                self._overflow -= 1
+                raise
+
+        # Everything is checked out: wait for a pooled connection to come back
+        started = time.perf_counter()
+        try:
+            db = await asyncio.wait_for(self._idle.get(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise PoolTimeoutError(
+                f"No database connection available after {self.timeout}s "
+                f"(size={self.size}, max_overflow={self.max_overflow})"
+            )
+        waited_ms = (time.perf_counter() - started) * 1000
+        self._waited_total += 1
+        self._wait_ms_total += waited_ms
+        self._wait_ms_max = max(self._wait_ms_max, waited_ms)
+        return db, False
+
+    async def checkout(self) -> tuple[aiosqlite.Connection, bool]:
+        db, overflow = await self._checkout()
+        self._in_use += 1
+        self._acquired_total += 1
+        return db, overflow
+
+    async def release(self, db: aiosqlite.Connection, overflow: bool = False) -> None:
+        if self._loop is not asyncio.get_running_loop():
+            # Checked out before the pool was rebound to another loop
+            await db.close()
+            return
+
+        self._in_use -= 1
+        healthy = True
+        try:
+            # Never hand out a connection with a half-finished transaction
+            if db.in_transaction:
+                await db.rollback()
+        except Exception:
+            healthy = False
+
+        if overflow or not healthy:
+            if overflow:
+                self._overflow -= 1
+            else:
+                self._pooled -= 1
+            await db.close()
+            return
+
+        self._idle.put_nowait(db)
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Async context manager yielding a pooled connection."""
+        db, overflow = await self.checkout()
+        try:
+            yield db
+        finally:
+            await self.release(db, overflow)
+
+    async def close(self) -> None:
+        if self._idle is not None:
+            same_loop = self._loop is asyncio.get_running_loop()
+            while not self._idle.empty():
+                db = self._idle.get_nowait()
+                if same_loop:
+                    await db.close()
+                else:
+                    # Opened on a loop that is gone; just end its thread
+                    db.stop()
+        self._idle = None
+        self._loop = None
+        self._pooled = 0
+        self._overflow = 0
+        self._in_use = 0
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "max_overflow": self.max_overflow,
+            "open": self._pooled + self._overflow,
+            "in_use": self._in_use,
+            "idle": self._idle.qsize() if self._idle is not None else 0,
+            "overflow_in_use": self._overflow,
+            "connections_opened": self._opened_total,
+            "acquired_total": self._acquired_total,
+            "waited_total": self._waited_total,
+            "wait_ms_total": round(self._wait_ms_total, 2),
+            "wait_ms_max": round(self._wait_ms_max, 2),
+            "wait_ms_avg": round(self._wait_ms_total / self._waited_total, 2) if self._waited_total else 0.0,
+        }
+
+
+class PooledConnection:
+    """Connection handle returned by ``get_db()``.
+
+    Behaves like ``aiosqlite.Connection``; ``close()`` hands the connection
+    back to the pool instead of tearing down its thread.
+    """
+
+    def __init__(self, pool: ConnectionPool, db: aiosqlite.Connection, overflow: bool):
+        self._pool = pool
+        self._db = db
+        self._overflow = overflow
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+    async def close(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        await self._pool.release(self._db, self._overflow)
+
+
+db_pool = ConnectionPool(
+    settings.database_path,
+    size=settings.db_pool_size,
+    max_overflow=settings.db_pool_max_overflow,
+    timeout=settings.db_pool_timeout_seconds,
+)
+
+
+async def get_db() -> PooledConnection:
+    """Check out a pooled connection. Callers must ``await db.close()``."""
+    db, overflow = await db_pool.checkout()
+    return PooledConnection(db_pool, db, overflow)
+
+
+async def close_db():
+    await db_pool.close()
 
 
 async def init_db():
@@ -16,61 +230,10 @@ async def init_db():
     db_path = Path(settings.database_path)
     db_path.parent.mkdir(parents=True, exist_ok=True)
 
-    db = await get_db()
-    try:
-        schema = SCHEMA_PATH.read_text()
-        await db.executescript(schema)
-        await db.commit()
-
-        # Run migrations for existing databases
-        await _run_migrations(db)
-    finally:
-        await db.close()
-
-
-async def _run_migrations(db):
-    """Add columns to existing tables if they don't exist yet."""
-    migrations = [
-        ("students", "role", "ALTER TABLE students ADD COLUMN role TEXT NOT NULL DEFAULT 'student'"),
-        ("students", "email", "ALTER TABLE students ADD COLUMN email TEXT UNIQUE"),
-        ("students", "password_hash", "ALTER TABLE students ADD COLUMN password_hash TEXT"),
-        ("students", "total_xp", "ALTER TABLE students ADD COLUMN total_xp INTEGER DEFAULT 0"),
-        ("students", "xp_level", "ALTER TABLE students ADD COLUMN xp_level INTEGER DEFAULT 1"),
-        ("students", "streak", "ALTER TABLE students ADD COLUMN streak INTEGER DEFAULT 0"),
-        ("students", "freeze_tokens", "ALTER TABLE students ADD COLUMN freeze_tokens INTEGER DEFAULT 0"),
-        ("students", "last_activity_date", "ALTER TABLE students ADD COLUMN last_activity_date TEXT"),
-        ("students", "avatar_id", "ALTER TABLE students ADD COLUMN avatar_id TEXT DEFAULT 'default'"),
-        ("students", "theme_preference", "ALTER TABLE students ADD COLUMN theme_preference TEXT DEFAULT 'light'"),
-        ("students", "display_title", "ALTER TABLE students ADD COLUMN display_title TEXT"),
-        ("students", "exam_target", "ALTER TABLE students ADD COLUMN exam_target TEXT"),
-        ("achievements", "category", "ALTER TABLE achievements ADD COLUMN category TEXT DEFAULT 'progress'"),
-        ("achievements", "xp_reward", "ALTER TABLE achievements ADD COLUMN xp_reward INTEGER DEFAULT 0"),
-        ("achievements", "icon", "ALTER TABLE achievements ADD COLUMN icon TEXT"),
-        # Session notes columns
-        ("sessions", "teacher_notes", "ALTER TABLE sessions ADD COLUMN teacher_notes TEXT"),
-        ("sessions", "homework", "ALTER TABLE sessions ADD COLUMN homework TEXT"),
-        ("sessions", "session_summary", "ALTER TABLE sessions ADD COLUMN session_summary TEXT"),
-        ("sessions", "updated_at", "ALTER TABLE sessions ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"),
-        # Math-specific columns
-        ("lessons", "math_domain", "ALTER TABLE lessons ADD COLUMN math_domain TEXT"),
-        ("learning_points", "math_domain", "ALTER TABLE learning_points ADD COLUMN math_domain TEXT"),
-    ]
-
-    for table, column, sql in migrations:
-        cursor = await db.execute(f"PRAGMA table_info({table})")
-        columns = [row[1] for row in await cursor.fetchall()]
-        if column not in columns:
-            await db.execute(sql)
-            await db.commit()
-
-    # Rename columns from English-tutoring era to math-tutoring names
-    renames = [
-        ("learning_points", "polish_explanation", "explanation"),
-        ("learning_points", "example_sentence", "example_problem"),
-    ]
-    for table, old_col, new_col in renames:
-        cursor = await db.execute(f"PRAGMA table_info({table})")
-        columns = [row[1] for row in await cursor.fetchall()]
-        if old_col in columns and new_col not in columns:
-            await db.execute(f"ALTER TABLE {table} RENAME COLUMN {old_col} TO {new_col}")
-            await db.commit()
+    # Imported here: the migration runner itself imports this module.
+    from app.db.indexes import check_query_plans
+    from app.db.migrate import apply_migrations
+
+    async with db_pool.acquire() as db:
+        await apply_migrations(db)
+        await check_query_plans(db)
@@ -0,0 +1,84 @@
+"""Query-plan checks for the per-student and time-window indexes.
+
+Nearly every route filters on ``student_id`` and then narrows by a
+timestamp (``created_at``, ``completed_at``, ``played_at``,
+``next_review_date``...). The composite indexes of migration
+0003_index_pack.sql put ``student_id`` first and the time column second,
+so those lookups become index range scans. Some include a trailing
+value column (e.g. ``xp_log.amount``) so that sums can be answered from
+the index alone. Partial indexes cover the common
+``status = 'completed'`` / ``role = 'teacher'`` filters.
+
+``HOT_QUERIES`` lists representative queries from the routes. At startup
+``check_query_plans`` runs ``EXPLAIN QUERY PLAN`` on each one and logs a
+warning for any that still scans a whole table.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (label, SQL, params) — representative hot-path queries; must not full-scan.
+HOT_QUERIES = [
+    ("weekly xp (gamification)",
+     "SELECT COALESCE(SUM(amount), 0) FROM xp_log WHERE student_id = ? AND created_at >= datetime('now', '-7 days')",
+     (1,)),
+    ("recent xp history",
+     "SELECT * FROM xp_log WHERE student_id = ? ORDER BY created_at DESC LIMIT 20", (1,)),
+    ("weekly lessons",
+     "SELECT COUNT(*) FROM progress WHERE student_id = ? AND completed_at >= datetime('now', '-7 days')", (1,)),
+    ("progress history",
+     "SELECT * FROM progress WHERE student_id = ? ORDER BY completed_at", (1,)),
+    ("lesson progress lookup",
+     "SELECT id FROM progress WHERE lesson_id = ? AND student_id = ?", (1, 1)),
+    ("lessons by session",
+     "SELECT * FROM lessons WHERE student_id = ? ORDER BY session_number", (1,)),
+    ("latest learner profile",
+     "SELECT * FROM learner_profiles WHERE student_id = ? ORDER BY created_at DESC LIMIT 1", (1,)),
+    ("latest completed assessment",
+     "SELECT * FROM assessments WHERE student_id = ? AND status = 'completed' ORDER BY updated_at DESC LIMIT 1",
+     (1,)),
+    ("due concept cards",
+     "SELECT * FROM math_concept_cards WHERE student_id = ? AND next_review <= CURRENT_TIMESTAMP "
+     "ORDER BY next_review LIMIT 20", (1,)),
+    ("due learning points",
+     "SELECT * FROM learning_points WHERE student_id = ? AND next_review_date <= datetime('now')", (1,)),
+    ("best recall",
+     "SELECT MAX(overall_score) FROM recall_sessions WHERE student_id = ? AND status = 'completed'", (1,)),
+    ("active challenges",
+     "SELECT * FROM daily_challenges WHERE student_id = ? AND expires_at > ? ORDER BY id", (1, "")),
+    ("game history",
+     "SELECT * FROM game_scores WHERE student_id = ? ORDER BY played_at DESC LIMIT 20", (1,)),
+    ("game bests",
+     "SELECT game_type, MAX(score), COUNT(*) FROM game_scores WHERE student_id = ? GROUP BY game_type", (1,)),
+    ("student sessions",
+     "SELECT * FROM sessions WHERE student_id = ? AND status IN ('requested','confirmed') ORDER BY scheduled_at",
+     (1,)),
+    ("teacher session queue",
+     "SELECT * FROM sessions WHERE status = ? ORDER BY scheduled_at", ("requested",)),
+    ("teacher availability",
+     "SELECT start_at, end_at FROM teacher_availability WHERE teacher_id = ? AND is_available = 1 "
+     "ORDER BY start_at", (1,)),
+    ("teacher list",
+     "SELECT id, name FROM students WHERE role = 'teacher' ORDER BY name", ()),
+    ("skill stats",
+     "SELECT skill, AVG(score) FROM skill_observations WHERE student_id = ? AND source IN ('improved', 'struggling') "
+     "GROUP BY skill", (1,)),
+    ("all-time leaderboard",
+     "SELECT id, name, total_xp FROM students ORDER BY total_xp DESC LIMIT 20", ()),
+    ("streak leaderboard",
+     "SELECT id, name, streak FROM students WHERE streak > 0 ORDER BY streak DESC LIMIT 20", ()),
+]
+
+
+async def check_query_plans(db) -> list[str]:
+    """Return (and log) the labels of hot queries whose plan full-scans a table."""
+    offenders = []
+    for label, sql, params in HOT_QUERIES:
+        cursor = await db.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        details = [row[3] for row in await cursor.fetchall()]
+        scans = [d for d in details if d.startswith("SCAN ") and " USING " not in d]
+        if scans:
+            offenders.append(label)
+            logger.warning("Query plan full-scans for %r: %s", label, "; ".join(scans))
+    return offenders
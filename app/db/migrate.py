@@ -0,0 +1,241 @@
+"""Versioned schema migrations.
+
+Migrations live in ``app/db/migrations`` as ``NNNN_name.sql`` or
+``NNNN_name.py`` (the latter defining ``async def up(db)``) and are applied
+in version order, each in its own transaction together with its
+``schema_migrations`` row. ``PRAGMA user_version`` mirrors the highest
+applied version, so a database that is already current costs one pragma
+read at startup.
+
+Usage (from the project root):
+    python -m app.db.migrate status   # applied / pending / changed
+    python -m app.db.migrate plan     # what `up` would apply
+    python -m app.db.migrate up       # apply pending migrations
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+_FILENAME_RE = re.compile(r"^(\d{4})_(\w+)\.(sql|py)$")
+
+logger = logging.getLogger(__name__)
+
+
+class MigrationError(RuntimeError):
+    """Raised when a migration fails or an applied migration was edited."""
+
+
+class Migration:
+    def __init__(self, version: int, name: str, path: Path):
+        self.version = version
+        self.name = name
+        self.path = path
+        self.checksum = hashlib.sha256(path.read_bytes().replace(b"\r\n", b"\n")).hexdigest()
+
+    def __repr__(self) -> str:
+        return f"Migration({self.version:04d}_{self.name})"
+
+    async def run(self, db) -> None:
+        if self.path.suffix == ".sql":
+            # executescript() would COMMIT our transaction first, so run the
+            # statements one by one inside it.
+            for statement in split_sql(self.path.read_text()):
+                await db.execute(statement)
+            return
+
+        spec = importlib.util.spec_from_file_location(
+            f"app.db.migrations.m{self.version:04d}_{self.name}", self.path
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        await module.up(db)
+
+
+def split_sql(script: str) -> list[str]:
+    """Split a SQL script into complete statements (trigger bodies stay whole)."""
+    statements = []
+    buffer = ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            if buffer.strip():
+                statements.append(buffer.strip())
+            buffer = ""
+    if buffer.strip() and not all(
+        ln.strip().startswith("--") or not ln.strip() for ln in buffer.splitlines()
+    ):
+        raise MigrationError(f"Incomplete SQL statement at end of script: {buffer.strip()[:80]!r}")
+    return statements
+
+
+def discover_migrations() -> list[Migration]:
+    migrations = []
+    seen = {}
+    for path in sorted(MIGRATIONS_DIR.iterdir()):
+        match = _FILENAME_RE.match(path.name)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in seen:
+            raise MigrationError(f"Duplicate migration version {version:04d}: {seen[version]} and {path.name}")
+        seen[version] = path.name
+        migrations.append(Migration(version, match.group(2), path))
+    return sorted(migrations, key=lambda m: m.version)
+
+
+async def _ensure_table(db) -> None:
+    await db.execute(
+        """CREATE TABLE IF NOT EXISTS schema_migrations (
+               version INTEGER PRIMARY KEY,
+               name TEXT NOT NULL,
+               checksum TEXT NOT NULL,
+               applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+               duration_ms INTEGER
+           )"""
+    )
+    await db.commit()
+
+
+async def applied_migrations(db) -> dict[int, dict]:
+    await _ensure_table(db)
+    cursor = await db.execute(
+        "SELECT version, name, checksum, applied_at, duration_ms FROM schema_migrations ORDER BY version"
+    )
+    return {row["version"]: dict(row) for row in await cursor.fetchall()}
+
+
+def _check_checksums(migrations: list[Migration], applied: dict[int, dict]) -> None:
+    changed = [
+        m for m in migrations
+        if m.version in applied and applied[m.version]["checksum"] != m.checksum
+    ]
+    if changed:
+        names = ", ".join(m.path.name for m in changed)
+        raise MigrationError(
+            f"Applied migrations were modified after being applied: {names}. "
+            "Add a new migration instead of editing an applied one."
+        )
+
+
+async def pending_migrations(db) -> list[Migration]:
+    migrations = discover_migrations()
+    applied = await applied_migrations(db)
+    _check_checksums(migrations, applied)
+    return [m for m in migrations if m.version not in applied]
+
+
+async def apply_migrations(db) -> list[Migration]:
+    """Apply every pending migration; return the ones applied by this call."""
+    migrations = discover_migrations()
+    if not migrations:
+        return []
+    latest = migrations[-1].version
+
+    # Fast path: nothing to do on an up-to-date database.
+    cursor = await db.execute("PRAGMA user_version")
+    current = (await cursor.fetchone())[0]
+    if current >= latest:
+        if current > latest:
+            logger.warning("Database schema version %d is newer than this code (%d)", current, latest)
+        return []
+
+    applied = await applied_migrations(db)
+    _check_checksums(migrations, applied)
+
+    done = []
+    for migration in migrations:
+        if migration.version in applied:
+            continue
+        started = time.perf_counter()
+        try:
+            # IMMEDIATE takes the write lock up front, so concurrent workers
+            # booting at the same time queue up instead of racing.
+            await db.execute("BEGIN IMMEDIATE")
+            cursor = await db.execute(
+                "SELECT 1 FROM schema_migrations WHERE version = ?", (migration.version,)
+            )
+            if await cursor.fetchone():
+                await db.rollback()
+                continue
+            await migration.run(db)
+            duration_ms = int((time.perf_counter() - started) * 1000)
+            await db.execute(
+                "INSERT INTO schema_migrations (version, name, checksum, duration_ms) VALUES (?, ?, ?, ?)",
+                (migration.version, migration.name, migration.checksum, duration_ms),
+            )
+            await db.execute(f"PRAGMA user_version = {migration.version}")
+            await db.commit()
+        except Exception as exc:
+            await db.rollback()
+            raise MigrationError(f"Migration {migration.path.name} failed: {exc}") from exc
+        logger.info("Applied migration %s in %d ms", migration.path.name, duration_ms)
+        done.append(migration)
+
+    # Versions applied by another process still need user_version to catch up.
+    await db.execute(f"PRAGMA user_version = {latest}")
+    await db.commit()
+    return done
+
+
+async def _status(db) -> None:
+    applied = await applied_migrations(db)
+    for m in discover_migrations():
+        row = applied.get(m.version)
+        if row is None:
+            state = "pending"
+        elif row["checksum"] != m.checksum:
+            state = f"CHANGED (applied {row['applied_at']})"
+        else:
+            state = f"applied {row['applied_at']} ({row['duration_ms']} ms)"
+        print(f"{m.version:04d}  {m.name:<32} {state}")
+
+
+async def _plan(db) -> None:
+    pending = await pending_migrations(db)
+    if not pending:
+        print("Database is up to date.")
+        return
+    for m in pending:
+        print(f"would apply {m.path.name}")
+
+
+async def _up(db) -> None:
+    done = await apply_migrations(db)
+    if not done:
+        print("Database is up to date.")
+    for m in done:
+        print(f"applied {m.path.name}")
+
+
+async def main(argv: list[str]) -> int:
+    from app.db.database import close_db, db_pool
+
+    commands = {"status": _status, "plan": _plan, "up": _up}
+    if len(argv) != 1 or argv[0] not in commands:
+        print("usage: python -m app.db.migrate status|plan|up", file=sys.stderr)
+        return 2
+
+    Path(db_pool.database_path).parent.mkdir(parents=True, exist_ok=True)
+    try:
+        async with db_pool.acquire() as db:
+            await commands[argv[0]](db)
+    except MigrationError as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        await close_db()
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    sys.exit(asyncio.run(main(sys.argv[1:])))
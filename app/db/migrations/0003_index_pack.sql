@@ -0,0 +1,42 @@
+-- Composite, covering and partial indexes for per-student and time-window
+-- queries. app/db/indexes.py checks at startup that the hot queries use them.
+
+-- XP / gamification
+CREATE INDEX IF NOT EXISTS idx_xp_log_student_created ON xp_log(student_id, created_at, amount);
+CREATE INDEX IF NOT EXISTS idx_achievements_student_earned ON achievements(student_id, earned_at);
+CREATE INDEX IF NOT EXISTS idx_daily_challenges_student_expires ON daily_challenges(student_id, expires_at);
+CREATE INDEX IF NOT EXISTS idx_game_scores_student_played ON game_scores(student_id, played_at);
+CREATE INDEX IF NOT EXISTS idx_game_scores_student_type ON game_scores(student_id, game_type, score);
+CREATE INDEX IF NOT EXISTS idx_students_total_xp ON students(total_xp DESC);
+CREATE INDEX IF NOT EXISTS idx_students_streak_active ON students(streak DESC) WHERE streak > 0;
+
+-- Lessons / progress
+CREATE INDEX IF NOT EXISTS idx_lessons_student_session ON lessons(student_id, session_number);
+CREATE INDEX IF NOT EXISTS idx_progress_student_completed ON progress(student_id, completed_at, score);
+CREATE INDEX IF NOT EXISTS idx_progress_lesson_student ON progress(lesson_id, student_id);
+CREATE INDEX IF NOT EXISTS idx_learner_profiles_student_created ON learner_profiles(student_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_learning_paths_student_status ON learning_paths(student_id, status);
+
+-- Assessments
+CREATE INDEX IF NOT EXISTS idx_assessments_student_created ON assessments(student_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_assessments_student_completed ON assessments(student_id, updated_at) WHERE status = 'completed';
+
+-- Spaced repetition
+CREATE INDEX IF NOT EXISTS idx_concept_cards_student_next_review ON math_concept_cards(student_id, next_review);
+CREATE INDEX IF NOT EXISTS idx_concept_cards_student_concept ON math_concept_cards(student_id, concept);
+CREATE INDEX IF NOT EXISTS idx_learning_points_student_next_review ON learning_points(student_id, next_review_date);
+CREATE INDEX IF NOT EXISTS idx_learning_points_lesson ON learning_points(lesson_id);
+CREATE INDEX IF NOT EXISTS idx_recall_sessions_student_completed ON recall_sessions(student_id, overall_score) WHERE status = 'completed';
+
+-- Scheduling
+CREATE INDEX IF NOT EXISTS idx_sessions_student_status ON sessions(student_id, status, scheduled_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_student_created ON sessions(student_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_teacher_status ON sessions(teacher_id, status, scheduled_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_status_scheduled ON sessions(status, scheduled_at);
+CREATE INDEX IF NOT EXISTS idx_teacher_availability_teacher ON teacher_availability(teacher_id, start_at) WHERE is_available = 1;
+CREATE INDEX IF NOT EXISTS idx_teacher_availability_start ON teacher_availability(start_at) WHERE is_available = 1;
+CREATE INDEX IF NOT EXISTS idx_students_teachers ON students(name) WHERE role = 'teacher';
+
+-- Let the planner see real selectivity; cheap, bounded by analysis_limit.
+PRAGMA analysis_limit = 400;
+PRAGMA optimize;
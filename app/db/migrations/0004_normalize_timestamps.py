@@ -0,0 +1,62 @@
+"""Backfill: rewrite ISO-8601 timestamps written from Python into the
+canonical ``YYYY-MM-DD HH:MM:SS`` UTC form (see app/db/timestamps.py).
+
+The column list and the UPDATE are copied here rather than imported, so
+what this migration does on a new database never changes.
+"""
+
+# (table, column) pairs stored in the canonical format
+TIMESTAMP_COLUMNS = [
+    ("students", "created_at"),
+    ("learner_profiles", "created_at"),
+    ("lessons", "created_at"),
+    ("progress", "completed_at"),
+    ("assessments", "created_at"),
+    ("assessments", "updated_at"),
+    ("learning_paths", "created_at"),
+    ("learning_paths", "updated_at"),
+    ("achievements", "earned_at"),
+    ("math_concept_cards", "next_review"),
+    ("math_concept_cards", "created_at"),
+    ("learning_points", "next_review_date"),
+    ("learning_points", "created_at"),
+    ("recall_sessions", "created_at"),
+    ("recall_sessions", "completed_at"),
+    ("daily_challenges", "expires_at"),
+    ("daily_challenges", "created_at"),
+    ("xp_log", "created_at"),
+    ("game_scores", "played_at"),
+    ("sessions", "created_at"),
+    ("sessions", "updated_at"),
+    ("teacher_availability", "created_at"),
+    ("teacher_invites", "expires_at"),
+    ("teacher_invites", "used_at"),
+    ("teacher_invites", "created_at"),
+]
+
+BATCH_SIZE = 5000
+
+
+async def up(db):
+    """Rewrite legacy-format values, in rowid ranges of ``BATCH_SIZE`` rows.
+
+    Values SQLite cannot parse are left untouched.
+    """
+    for table, column in TIMESTAMP_COLUMNS:
+        cursor = await db.execute(f"PRAGMA table_info({table})")
+        if column not in [row[1] for row in await cursor.fetchall()]:
+            continue
+        cursor = await db.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table}")
+        lo, hi = await cursor.fetchone()
+        if lo is None:
+            continue
+        for start in range(lo, hi + 1, BATCH_SIZE):
+            await db.execute(
+                f"""UPDATE {table}
+                    SET {column} = strftime('%Y-%m-%d %H:%M:%S', {column})
+                    WHERE rowid BETWEEN ? AND ?
+                      AND {column} IS NOT NULL
+                      AND strftime('%Y-%m-%d %H:%M:%S', {column}) IS NOT NULL
+                      AND {column} <> strftime('%Y-%m-%d %H:%M:%S', {column})""",
+                (start, start + BATCH_SIZE - 1),
+            )
@@ -0,0 +1,40 @@
+-- One row per (progress entry, skill) instead of JSON arrays on progress,
+-- so per-skill averages are a single indexed GROUP BY.
+CREATE TABLE IF NOT EXISTS skill_observations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id INTEGER NOT NULL,
+    progress_id INTEGER,
+    skill TEXT NOT NULL,
+    score REAL NOT NULL,
+    source TEXT NOT NULL,  -- 'improved' | 'struggling' | 'difficulty'
+    observed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (student_id) REFERENCES students(id),
+    FOREIGN KEY (progress_id) REFERENCES progress(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_skill_observations_student_skill
+    ON skill_observations(student_id, skill, observed_at, score);
+CREATE INDEX IF NOT EXISTS idx_skill_observations_progress
+    ON skill_observations(progress_id);
+
+-- Backfill from existing progress rows
+INSERT INTO skill_observations (student_id, progress_id, skill, score, source, observed_at)
+SELECT p.student_id, p.id, j.value, COALESCE(p.score, 0), 'improved', p.completed_at
+FROM progress p,
+     json_each(CASE WHEN json_valid(p.areas_improved) THEN p.areas_improved ELSE '[]' END) j
+WHERE j.type = 'text'
+ORDER BY p.completed_at, p.id;
+
+INSERT INTO skill_observations (student_id, progress_id, skill, score, source, observed_at)
+SELECT p.student_id, p.id, j.value, MAX(0, COALESCE(p.score, 0) - 20), 'struggling', p.completed_at
+FROM progress p,
+     json_each(CASE WHEN json_valid(p.areas_struggling) THEN p.areas_struggling ELSE '[]' END) j
+WHERE j.type = 'text'
+ORDER BY p.completed_at, p.id;
+
+INSERT INTO skill_observations (student_id, progress_id, skill, score, source, observed_at)
+SELECT p.student_id, p.id, 'level_' || l.difficulty, p.score, 'difficulty', p.completed_at
+FROM progress p
+JOIN lessons l ON l.id = p.lesson_id
+WHERE p.score IS NOT NULL AND l.difficulty IS NOT NULL AND l.difficulty <> ''
+ORDER BY p.completed_at, p.id;
@@ -0,0 +1,95 @@
+-- Full-text search over student names and learning content.
+--
+-- Each FTS5 table uses the source row id as its rowid and is kept in sync by
+-- triggers. unicode61 with remove_diacritics folds most Polish letters
+-- (ą ć ę ń ó ś ź ż) but not ł/Ł, which have no Unicode decomposition, so
+-- the triggers fold those explicitly; app/services/search.py applies the
+-- same folding to queries. prefix='2 3' keeps short prefix queries cheap.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5(
+    name,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS students_fts_ai AFTER INSERT ON students BEGIN
+    INSERT INTO students_fts (rowid, name) VALUES (new.id, replace(replace(new.name, 'ł', 'l'), 'Ł', 'L'));
+END;
+
+CREATE TRIGGER IF NOT EXISTS students_fts_ad AFTER DELETE ON students BEGIN
+    DELETE FROM students_fts WHERE rowid = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS students_fts_au AFTER UPDATE OF name ON students BEGIN
+    DELETE FROM students_fts WHERE rowid = old.id;
+    INSERT INTO students_fts (rowid, name) VALUES (new.id, replace(replace(new.name, 'ł', 'l'), 'Ł', 'L'));
+END;
+
+INSERT INTO students_fts (rowid, name)
+SELECT id, replace(replace(name, 'ł', 'l'), 'Ł', 'L') FROM students;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS lessons_fts USING fts5(
+    objective, student_id UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS lessons_fts_ai AFTER INSERT ON lessons BEGIN
+    INSERT INTO lessons_fts (rowid, objective, student_id) VALUES (new.id, replace(replace(new.objective, 'ł', 'l'), 'Ł', 'L'), new.student_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS lessons_fts_ad AFTER DELETE ON lessons BEGIN
+    DELETE FROM lessons_fts WHERE rowid = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS lessons_fts_au AFTER UPDATE OF objective, student_id ON lessons BEGIN
+    DELETE FROM lessons_fts WHERE rowid = old.id;
+    INSERT INTO lessons_fts (rowid, objective, student_id) VALUES (new.id, replace(replace(new.objective, 'ł', 'l'), 'Ł', 'L'), new.student_id);
+END;
+
+INSERT INTO lessons_fts (rowid, objective, student_id)
+SELECT id, replace(replace(objective, 'ł', 'l'), 'Ł', 'L'), student_id FROM lessons;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS learning_points_fts USING fts5(
+    content, student_id UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS learning_points_fts_ai AFTER INSERT ON learning_points BEGIN
+    INSERT INTO learning_points_fts (rowid, content, student_id) VALUES (new.id, replace(replace(new.content, 'ł', 'l'), 'Ł', 'L'), new.student_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS learning_points_fts_ad AFTER DELETE ON learning_points BEGIN
+    DELETE FROM learning_points_fts WHERE rowid = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS learning_points_fts_au AFTER UPDATE OF content, student_id ON learning_points BEGIN
+    DELETE FROM learning_points_fts WHERE rowid = old.id;
+    INSERT INTO learning_points_fts (rowid, content, student_id) VALUES (new.id, replace(replace(new.content, 'ł', 'l'), 'Ł', 'L'), new.student_id);
+END;
+
+INSERT INTO learning_points_fts (rowid, content, student_id)
+SELECT id, replace(replace(content, 'ł', 'l'), 'Ł', 'L'), student_id FROM learning_points;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS concept_cards_fts USING fts5(
+    concept, formula, student_id UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS concept_cards_fts_ai AFTER INSERT ON math_concept_cards BEGIN
+    INSERT INTO concept_cards_fts (rowid, concept, formula, student_id) VALUES (new.id, replace(replace(new.concept, 'ł', 'l'), 'Ł', 'L'), replace(replace(new.formula, 'ł', 'l'), 'Ł', 'L'), new.student_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS concept_cards_fts_ad AFTER DELETE ON math_concept_cards BEGIN
+    DELETE FROM concept_cards_fts WHERE rowid = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS concept_cards_fts_au AFTER UPDATE OF concept, formula, student_id ON math_concept_cards BEGIN
+    DELETE FROM concept_cards_fts WHERE rowid = old.id;
+    INSERT INTO concept_cards_fts (rowid, concept, formula, student_id) VALUES (new.id, replace(replace(new.concept, 'ł', 'l'), 'Ł', 'L'), replace(replace(new.formula, 'ł', 'l'), 'Ł', 'L'), new.student_id);
+END;
+
+INSERT INTO concept_cards_fts (rowid, concept, formula, student_id)
+SELECT id, replace(replace(concept, 'ł', 'l'), 'Ł', 'L'), replace(replace(formula, 'ł', 'l'), 'Ł', 'L'), student_id FROM math_concept_cards;
@@ -0,0 +1,20 @@
+-- Per-student rollups of recall sessions moved out of the hot tables by
+-- app/services/archiver.py, so totals and bests stay exact after archival.
+-- xp_log needs none: lifetime XP lives on students.total_xp and the weekly
+-- readers only look back seven days, well inside the archive horizon.
+
+CREATE TABLE IF NOT EXISTS recall_rollups (
+    student_id INTEGER PRIMARY KEY,
+    sessions_completed INTEGER NOT NULL DEFAULT 0,
+    score_total REAL NOT NULL DEFAULT 0,
+    best_score REAL,
+    last_completed_at TIMESTAMP,
+    FOREIGN KEY (student_id) REFERENCES students(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_learning_paths_superseded
+    ON learning_paths(updated_at) WHERE status = 'superseded';
+CREATE INDEX IF NOT EXISTS idx_recall_sessions_created
+    ON recall_sessions(created_at);
+CREATE INDEX IF NOT EXISTS idx_xp_log_created
+    ON xp_log(created_at);
@@ -0,0 +1,14 @@
+-- Persistent tier of the LLM response cache (app/services/llm_cache.py).
+-- key is a SHA-256 of (model, messages, temperature, response_format).
+
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    prompt TEXT NOT NULL,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    expires_at TIMESTAMP NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_cache_expires ON llm_cache(expires_at);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_prompt ON llm_cache(prompt);
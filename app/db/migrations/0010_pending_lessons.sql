@@ -0,0 +1,15 @@
+-- Pre-generated upcoming lessons (app/services/lesson_pregen.py).
+-- A row is served by POST /api/lessons/{id}/generate only while its
+-- fingerprint still matches the student's current lesson inputs.
+
+CREATE TABLE IF NOT EXISTS pending_lessons (
+    student_id INTEGER NOT NULL,
+    session_number INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    objective TEXT,
+    content TEXT NOT NULL,
+    difficulty TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (student_id, session_number),
+    FOREIGN KEY (student_id) REFERENCES students(id)
+);
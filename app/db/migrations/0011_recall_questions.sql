@@ -0,0 +1,19 @@
+-- Recall question bank (app/services/recall_bank.py).
+-- Questions written by generate_recall_questions are kept per learning
+-- point and reused by later recall sessions instead of asking the model
+-- again.
+
+CREATE TABLE IF NOT EXISTS recall_questions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    learning_point_id INTEGER NOT NULL,
+    question_type TEXT NOT NULL,
+    question_text TEXT NOT NULL,
+    options TEXT,
+    correct_answer TEXT,
+    hint TEXT,
+    times_used INTEGER NOT NULL DEFAULT 0,
+    last_used_at TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (learning_point_id, question_text),
+    FOREIGN KEY (learning_point_id) REFERENCES learning_points(id)
+);
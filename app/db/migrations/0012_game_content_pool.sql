@@ -0,0 +1,28 @@
+-- Pre-filled content pool for the error-hunt and concept-match games
+-- (app/services/game_content.py). A background refiller keeps a number of
+-- unserved items per game type and level, so game requests never wait on
+-- the model. game_content_served records what each student has seen.
+
+CREATE TABLE IF NOT EXISTS game_content (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    game_type TEXT NOT NULL,
+    level TEXT NOT NULL,
+    content TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    source TEXT NOT NULL DEFAULT 'model',
+    times_served INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (game_type, level, content_hash)
+);
+
+CREATE INDEX IF NOT EXISTS idx_game_content_pool
+    ON game_content(game_type, level, times_served);
+
+CREATE TABLE IF NOT EXISTS game_content_served (
+    student_id INTEGER NOT NULL,
+    content_id INTEGER NOT NULL,
+    served_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (student_id, content_id),
+    FOREIGN KEY (student_id) REFERENCES students(id),
+    FOREIGN KEY (content_id) REFERENCES game_content(id)
+);
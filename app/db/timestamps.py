@@ -0,0 +1,58 @@
+"""Canonical timestamp representation for the database.
+
+Every system-generated time column holds UTC text in exactly one format,
+``YYYY-MM-DD HH:MM:SS``. That is what ``CURRENT_TIMESTAMP`` and
+``datetime('now', ...)`` produce, so lexicographic comparisons in SQL and
+index range scans order rows correctly. Python code must write through
+``to_db_timestamp``/``db_now`` instead of ``datetime.isoformat()``, whose
+``T`` separator and microseconds sort differently from SQLite's own output.
+
+User-entered schedule times (``sessions.scheduled_at``,
+``teacher_availability.start_at``/``end_at``) are ISO strings chosen by the
+client and are deliberately left out of this. Values written before this
+convention were rewritten by migration 0004_normalize_timestamps.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+
+DB_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def utc_now() -> datetime:
+    """Current UTC time as a naive datetime (the convention used throughout)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def to_db_timestamp(value: datetime | date | str | None) -> str | None:
+    """Format a datetime/date/ISO string as canonical UTC ``YYYY-MM-DD HH:MM:SS``.
+
+    Aware datetimes are converted to UTC; naive ones are assumed to be UTC
+    already.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = parse_db_timestamp(value)
+    elif not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime(DB_TIMESTAMP_FORMAT)
+
+
+def db_now(offset: timedelta | None = None) -> str:
+    """Canonical timestamp for now (plus ``offset``), e.g. for expiry columns."""
+    now = utc_now()
+    if offset is not None:
+        now += offset
+    return now.strftime(DB_TIMESTAMP_FORMAT)
+
+
+def parse_db_timestamp(value: str | None) -> datetime | None:
+    """Parse a stored timestamp (canonical or legacy ISO) into naive UTC."""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
@@ -0,0 +1,64 @@
+"""Request-scoped unit of work: one connection, one transaction.
+
+Service functions accept an optional ``uow``. When given, they run their
+statements on the shared connection and leave committing to the owner;
+when omitted, they open their own unit of work and commit on exit, which
+keeps them usable from scripts and background tasks.
+"""
+
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+from app.db.database import db_pool
+
+
+class UnitOfWork:
+    """Carries a single connection (and its open transaction) through a request."""
+
+    def __init__(self, db: aiosqlite.Connection):
+        self.db = db
+        self.commits = 0
+
+    async def execute(self, sql: str, parameters=()):
+        return await self.db.execute(sql, parameters)
+
+    async def commit(self) -> None:
+        await self.db.commit()
+        self.commits += 1
+
+    async def rollback(self) -> None:
+        await self.db.rollback()
+
+
+@asynccontextmanager
+async def unit_of_work(parent: UnitOfWork | None = None):
+    """Yield ``parent`` as-is, or a new unit of work that commits on success.
+
+    Nested service calls pass their ``uow`` through here so that only the
+    outermost owner commits.
+    """
+    if parent is not None:
+        yield parent
+        return
+
+    async with db_pool.acquire() as db:
+        uow = UnitOfWork(db)
+        try:
+            yield uow
+        except BaseException:
+            await uow.rollback()
+            raise
+        await uow.commit()
+
+
+async def get_uow():
+    """FastAPI dependency providing a request-scoped unit of work.
+
+    Routes call ``await uow.commit()`` once before returning, so the write
+    is durable before the response is sent. Anything left uncommitted
+    (e.g. after an HTTPException) is rolled back when the connection goes
+    back to the pool.
+    """
+    async with db_pool.acquire() as db:
+        yield UnitOfWork(db)
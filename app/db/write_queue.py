@@ -0,0 +1,230 @@
+"""Optional single-writer queue (write-behind mode).
+
+SQLite serialises writers anyway. When many requests each open a short
+write transaction, they spend their time contending for the file lock.
+With ``DB_WRITE_QUEUE=1`` those writes are handed to a single writer
+task instead. It drains the queue every ``DB_WRITE_FLUSH_MS``, runs up to
+``DB_WRITE_BATCH_SIZE`` writes in one transaction and resolves each
+caller's future with its own result.
+
+Each queued write runs inside its own SAVEPOINT. A write that raises is
+rolled back on its own and its caller gets the exception; the rest of the
+batch still commits. If the COMMIT itself fails, every caller in the
+batch gets the error.
+
+When the queue is disabled or not running (scripts, tests without the app
+lifespan), ``run_write``/``execute_write`` fall back to a regular unit of
+work, so callers never need to check the mode.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from app.config import settings
+from app.db.database import ConnectionPool, db_pool
+from app.db.unit_of_work import UnitOfWork, unit_of_work
+
+logger = logging.getLogger(__name__)
+
+WriteFn = Callable[[UnitOfWork], Awaitable[Any]]
+
+
+class WriteResult:
+    """Outcome of a single queued statement."""
+
+    def __init__(self, lastrowid: int | None, rowcount: int):
+        self.lastrowid = lastrowid
+        self.rowcount = rowcount
+
+    def __repr__(self) -> str:
+        return f"WriteResult(lastrowid={self.lastrowid}, rowcount={self.rowcount})"
+
+
+class _BatchUnitOfWork(UnitOfWork):
+    """Unit of work handed to queued writes: the writer owns the commit."""
+
+    async def commit(self) -> None:
+        pass
+
+    async def rollback(self) -> None:
+        raise RuntimeError("Queued writes cannot roll back the shared batch; raise instead")
+
+
+class WriteQueue:
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        enabled: bool = False,
+        flush_interval_ms: float = 5.0,
+        batch_size: int = 64,
+        max_depth: int = 10000,
+    ):
+        self.pool = pool
+        self.enabled = enabled
+        self.flush_interval = max(0.0, flush_interval_ms) / 1000
+        self.batch_size = max(1, batch_size)
+        self.max_depth = max_depth
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        # Stats
+        self._max_depth_seen = 0
+        self._writes = 0
+        self._failed = 0
+        self._batches = 0
+        self._batch_ms_total = 0.0
+        self._batch_ms_max = 0.0
+
+    @property
+    def running(self) -> bool:
+        return (
+            self._task is not None
+            and not self._task.done()
+            and self._task.get_loop() is asyncio.get_running_loop()
+        )
+
+    async def start(self) -> None:
+        if not self.enabled or self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_depth)
+        self._task = asyncio.create_task(self._run(), name="db-write-queue")
+
+    async def stop(self) -> None:
+        """Flush everything already queued, then stop the writer."""
+        if not self.running:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, fn: WriteFn) -> Any:
+        """Run ``fn(uow)`` on the writer connection and return its result.
+
+        ``fn`` must not commit, and must not call ``run_write`` itself (it
+        would wait on the queue it is blocking).
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((fn, future))
+        self._max_depth_seen = max(self._max_depth_seen, self._queue.qsize())
+        return await future
+
+    async def _run(self) -> None:
+        async with self.pool.acquire() as db:
+            stopping = False
+            while not stopping:
+                item = await self._queue.get()
+                if item is None:
+                    break
+                batch = [item]
+                if self.flush_interval:
+                    # Give concurrent writers a moment to join this batch
+                    await asyncio.sleep(self.flush_interval)
+                while len(batch) < self.batch_size and not self._queue.empty():
+                    item = self._queue.get_nowait()
+                    if item is None:
+                        stopping = True
+                        break
+                    batch.append(item)
+                try:
+                    await self._flush(db, batch)
+                except Exception:
+                    logger.exception("Write queue batch failed")
+            # Drain anything that raced in behind the stop sentinel
+            leftovers = []
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not None:
+                    leftovers.append(item)
+            if leftovers:
+                try:
+                    await self._flush(db, leftovers)
+                except Exception:
+                    logger.exception("Write queue batch failed")
+
+    async def _flush(self, db, batch: list) -> None:
+        started = time.perf_counter()
+        uow = _BatchUnitOfWork(db)
+        outcomes = []
+        try:
+            await db.execute("BEGIN IMMEDIATE")
+            for fn, future in batch:
+                if future.cancelled():
+                    outcomes.append(None)
+                    continue
+                await db.execute("SAVEPOINT queued_write")
+                try:
+                    result = await fn(uow)
+                except Exception as exc:
+                    await db.execute("ROLLBACK TO queued_write")
+                    await db.execute("RELEASE queued_write")
+                    outcomes.append((False, exc))
+                    continue
+                await db.execute("RELEASE queued_write")
+                outcomes.append((True, result))
+            await db.commit()
+        except Exception as exc:
+            if db.in_transaction:
+                await db.rollback()
+            self._failed += len(batch)
+            for _fn, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            raise
+
+        for (_fn, future), outcome in zip(batch, outcomes):
+            if outcome is None or future.done():
+                continue
+            ok, value = outcome
+            if ok:
+                future.set_result(value)
+            else:
+                self._failed += 1
+                future.set_exception(value)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._writes += len(batch)
+        self._batches += 1
+        self._batch_ms_total += elapsed_ms
+        self._batch_ms_max = max(self._batch_ms_max, elapsed_ms)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None and not self._task.done(),
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self._max_depth_seen,
+            "writes": self._writes,
+            "failed": self._failed,
+            "batches": self._batches,
+            "avg_batch_size": round(self._writes / self._batches, 2) if self._batches else 0.0,
+            "avg_batch_ms": round(self._batch_ms_total / self._batches, 2) if self._batches else 0.0,
+            "max_batch_ms": round(self._batch_ms_max, 2),
+        }
+
+
+write_queue = WriteQueue(
+    db_pool,
+    enabled=settings.db_write_queue_enabled,
+    flush_interval_ms=settings.db_write_flush_interval_ms,
+    batch_size=settings.db_write_batch_size,
+    max_depth=settings.db_write_queue_max_depth,
+)
+
+
+async def run_write(fn: WriteFn) -> Any:
+    """Run ``fn(uow)`` through the write queue, or in its own unit of work."""
+    if write_queue.running:
+        return await write_queue.submit(fn)
+    async with unit_of_work() as uow:
+        return await fn(uow)
+
+
+async def execute_write(sql: str, parameters=()) -> WriteResult:
+    """Execute one write statement; returns its lastrowid and rowcount."""
+
+    async def _execute(uow: UnitOfWork) -> WriteResult:
+        cursor = await uow.execute(sql, parameters)
+        return WriteResult(cursor.lastrowid, cursor.rowcount)
+
+    return await run_write(_execute)
@@ -2,11 +2,24 @@
 Admin-only endpoints protected by X-Admin-Secret header.
 """
 
+import asyncio
 import secrets
-from datetime import datetime, timedelta
+from datetime import timedelta
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel, EmailStr
-from app.db.database import get_db
+from app.db.backup import BackupError, create_backup_async, list_backups, verify_backup
+from app.db.database import get_db, db_pool
+from app.db.timestamps import db_now, parse_db_timestamp, to_db_timestamp, utc_now
+from app.db.write_queue import write_queue
+from app.services.archiver import archiver
+from app.services.game_content import game_content_pool
+from app.services.jobs import job_pool
+from app.services.lesson_pregen import lesson_pregen
+from app.services.llm import llm
+from app.services.llm_cache import llm_cache
+from app.services.prompts import prompts
+from app.services.recall_prefetch import recall_prefetch
+from app.services.single_flight import single_flight
 from app.config import settings
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
@@ -67,15 +80,15 @@ async def create_teacher_invite(body: CreateInviteRequest, request: Request):
         # Generate secure token
         token = secrets.token_urlsafe(32)
         if body.expires_seconds is not None:
-            expires_at = datetime.utcnow() + timedelta(seconds=body.expires_seconds)
+            expires_at = utc_now() + timedelta(seconds=body.expires_seconds)
         else:
-            expires_at = datetime.utcnow() + timedelta(days=body.expires_days)
+            expires_at = utc_now() + timedelta(days=body.expires_days)
 
         # Insert invite
         await db.execute(
             """INSERT INTO teacher_invites (email, token, expires_at, created_at)
                VALUES (?, ?, ?, ?)""",
-            (body.email.lower(), token, expires_at.isoformat(), datetime.utcnow().isoformat()),
+            (body.email.lower(), token, to_db_timestamp(expires_at), db_now()),
         )
         await db.commit()
 
@@ -86,7 +99,7 @@ async def create_teacher_invite(body: CreateInviteRequest, request: Request):
             email=body.email.lower(),
             token=token,
             invite_url=invite_url,
-            expires_at=expires_at.isoformat(),
+            expires_at=to_db_timestamp(expires_at),
         )
     finally:
         await db.close()
@@ -117,10 +130,126 @@ async def list_teacher_invites(request: Request):
                 "expires_at": row["expires_at"],
                 "used_at": row["used_at"],
                 "created_at": row["created_at"],
-                "is_expired": datetime.fromisoformat(row["expires_at"]) < datetime.utcnow(),
+                "is_expired": parse_db_timestamp(row["expires_at"]) < utc_now(),
                 "is_used": row["used_at"] is not None,
             })
 
         return {"invites": invites}
     finally:
         await db.close()
+
+
+@router.get("/db/pool")
+async def get_db_pool_stats(request: Request):
+    """Connection pool and write queue statistics.
+
+    Requires X-Admin-Secret header.
+    """
+    _require_admin_secret(request)
+    return {"pool": db_pool.stats(), "write_queue": write_queue.stats()}
+
+
+@router.get("/llm")
+async def get_llm_stats(request: Request):
+    """LLM gateway settings, call statistics and loaded prompts.
+
+    Requires X-Admin-Secret header.
+    """
+    _require_admin_secret(request)
+    return {"llm": llm.stats(), "prompts": prompts.stats()}
+
+
+@router.get("/llm/cache")
+async def get_llm_cache_stats(request: Request):
+    """LLM response cache hit/miss counters and entries per prompt.
+
+    Requires X-Admin-Secret header.
+    """
+    _require_admin_secret(request)
+    return {"cache": await llm_cache.stats()}
+
+
+@router.post("/llm/cache/purge")
+async def purge_llm_cache(request: Request, prompt: str | None = None, expired_only: bool = False):
+    """Delete cached LLM responses: all, one prompt's, or only expired ones.
+
+    Requires X-Admin-Secret header.
+    """
+    _require_admin_secret(request)
+    removed = await llm_cache.purge(prompt=prompt, expired_only=expired_only)
+    return {"removed": removed, "cache": await llm_cache.stats()}
+
+
+@router.get("/archive")
+async def get_archive_status(request: Request):
+    """Archival settings and the outcome of the last run.
+
+    Requires X-Admin-Secret header.
+    """
+    _require_admin_secret(request)
+    return {"archive": archiver.stats()}
+
+
+@router.post("/archive/run")
+async def run_archive(request: Request):
+    """Run an archival pass now and return rows moved per table.
+
+    Requires X-Admin-Secret header.
+    """
+    _require_admin_secret(request)
+    moved = await archiver.run_once()
+    return {"moved": moved, "archive": archiver.stats()}
+
+
+@router.get("/backups")
+async def get_backups(request: Request):
+    """List backup files, newest first.
+
+    Requires X-Admin-Secret header.
+    """
+    _require_admin_secret(request)
+    return {"backups": list_backups()}
+
+
+@router.post("/backups")
+async def create_db_backup(request: Request, compress: bool | None = None):
+    """Take an online backup of the database (and archive database).
+
+    Requires X-Admin-Secret header.
+    """
+    _require_admin_secret(request)
+    try:
+        return await create_backup_async(compress)
+    except BackupError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+
+@router.post("/backups/{name}/verify")
+async def verify_db_backup(name: str, request: Request):
+    """Run an integrity check against a backup file.
+
+    Requires X-Admin-Secret header.
+    """
+    _require_admin_secret(request)
+    if "/" in name or "\\" in name:
+        raise HTTPException(status_code=400, detail="Invalid backup name")
+    try:
+        return await asyncio.to_thread(verify_backup, name)
+    except BackupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+
+@router.get("/jobs")
+async def get_job_stats(request: Request):
+    """Job worker pool state, job counts by status, speculative AI work and coalesced requests.
+
+    Requires X-Admin-Secret header.
+    """
+    _require_admin_secret(request)
+    return {
+        "jobs": await job_pool.stats(),
+        "lesson_pregen": await lesson_pregen.stats(),
+        "recall_prefetch": recall_prefetch.stats(),
+        "game_content": await game_content_pool.stats(),
+        "single_flight": single_flight.stats(),
+    }
@@ -1,7 +1,7 @@
-import json
 from fastapi import APIRouter, HTTPException
 from app.db.database import get_db
 from app.services.achievement_checker import check_achievements
+from app.services.progress_tracker import AREA_SOURCES, get_skill_stats
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 
@@ -10,42 +10,14 @@ router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 async def get_skill_analytics(student_id: int):
     db = await get_db()
     try:
-        cursor = await db.execute(
-            "SELECT * FROM progress WHERE student_id = ? ORDER BY completed_at",
-            (student_id,),
-        )
-        rows = await cursor.fetchall()
-
-        skill_data: dict[str, list[float]] = {}
-        for row in rows:
-            score = row["score"] or 0.0
-            areas_improved = json.loads(row["areas_improved"]) if row["areas_improved"] else []
-            areas_struggling = json.loads(row["areas_struggling"]) if row["areas_struggling"] else []
-
-            for area in areas_improved:
-                skill_data.setdefault(area, []).append(score)
-            for area in areas_struggling:
-                skill_data.setdefault(area, []).append(max(0, score - 20))
-
-        # Also pull lesson content for topic-based skills
-        cursor = await db.execute(
-            "SELECT l.content, p.score FROM lessons l JOIN progress p ON l.id = p.lesson_id WHERE l.student_id = ? AND p.score IS NOT NULL",
-            (student_id,),
-        )
-        lesson_rows = await cursor.fetchall()
-        for lr in lesson_rows:
-            if lr["content"]:
-                content = json.loads(lr["content"])
-                difficulty = content.get("difficulty", "")
-                if difficulty:
-                    skill_data.setdefault(f"level_{difficulty}", []).append(lr["score"] or 0)
+        stats = await get_skill_stats(db, student_id, sources=AREA_SOURCES + ("difficulty",))
 
         skills = {}
-        for skill, scores in skill_data.items():
+        for skill, st in stats.items():
             skills[skill] = {
-                "average": round(sum(scores) / len(scores), 1),
-                "count": len(scores),
-                "trend": "improving" if len(scores) >= 2 and scores[-1] > scores[0] else "stable",
+                "average": round(st["average"], 1),
+                "count": st["count"],
+                "trend": "improving" if st["count"] >= 2 and st["last"] > st["first"] else "stable",
             }
 
         return {"student_id": student_id, "skills": skills}
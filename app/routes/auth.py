@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel, field_validator
 from app.db.database import get_db
+from app.db.timestamps import db_now, parse_db_timestamp, utc_now
 from app.config import settings
 from app.middleware.rate_limit import auth_limiter
 
@@ -265,8 +266,7 @@ async def teacher_register(body: TeacherRegisterRequest, request: Request):
             raise HTTPException(status_code=400, detail="Invite token has already been used")
 
         # Check expiry
-        expires_at = datetime.fromisoformat(invite["expires_at"].replace("Z", "+00:00"))
-        if datetime.now(expires_at.tzinfo if expires_at.tzinfo else None) > expires_at:
+        if utc_now() > parse_db_timestamp(invite["expires_at"]):
             raise HTTPException(status_code=400, detail="Invite token has expired")
 
         # Verify email matches (case-insensitive)
@@ -295,7 +295,7 @@ async def teacher_register(body: TeacherRegisterRequest, request: Request):
         # Mark invite as used
         await db.execute(
             "UPDATE teacher_invites SET used_at = ? WHERE id = ?",
-            (datetime.utcnow().isoformat(), invite["id"]),
+            (db_now(), invite["id"]),
         )
         await db.commit()
 
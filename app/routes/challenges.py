@@ -1,8 +1,10 @@
 import json
 import random
-from datetime import datetime, timedelta
-from fastapi import APIRouter, HTTPException
+from datetime import timedelta
+from fastapi import APIRouter, Depends, HTTPException
 from app.db.database import get_db
+from app.db.timestamps import to_db_timestamp, utc_now
+from app.db.unit_of_work import UnitOfWork, get_uow, unit_of_work
 from app.services.xp_engine import award_xp, XP_AWARDS
 
 router = APIRouter(prefix="/api/challenges", tags=["challenges"])
@@ -23,20 +25,20 @@ CHALLENGE_TEMPLATES = [
 async def get_today_challenges(student_id: int):
     db = await get_db()
     try:
-        now = datetime.utcnow()
+        now = utc_now()
         today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
 
         # Check if challenges exist for today
         cursor = await db.execute(
             "SELECT * FROM daily_challenges WHERE student_id = ? AND expires_at > ? ORDER BY id",
-            (student_id, now.isoformat()),
+            (student_id, to_db_timestamp(now)),
         )
         challenges = await cursor.fetchall()
 
         if len(challenges) == 0:
             # Generate 3 new challenges
             templates = random.sample(CHALLENGE_TEMPLATES, min(3, len(CHALLENGE_TEMPLATES)))
-            expires = (today_start + timedelta(days=1)).isoformat()
+            expires = to_db_timestamp(today_start + timedelta(days=1))
 
             for tmpl in templates:
                 await db.execute(
@@ -50,7 +52,7 @@ async def get_today_challenges(student_id: int):
 
             cursor = await db.execute(
                 "SELECT * FROM daily_challenges WHERE student_id = ? AND expires_at > ? ORDER BY id",
-                (student_id, now.isoformat()),
+                (student_id, to_db_timestamp(now)),
             )
             challenges = await cursor.fetchall()
 
@@ -90,87 +92,87 @@ async def get_today_challenges(student_id: int):
 
 
 @router.post("/{challenge_id}/claim")
-async def claim_challenge(challenge_id: int):
-    db = await get_db()
-    try:
-        cursor = await db.execute(
-            "SELECT * FROM daily_challenges WHERE id = ?", (challenge_id,)
-        )
-        challenge = await cursor.fetchone()
-        if not challenge:
-            raise HTTPException(status_code=404, detail="Challenge not found")
+async def claim_challenge(challenge_id: int, uow: UnitOfWork = Depends(get_uow)):
+    db = uow.db
+    cursor = await db.execute(
+        "SELECT * FROM daily_challenges WHERE id = ?", (challenge_id,)
+    )
+    challenge = await cursor.fetchone()
+    if not challenge:
+        raise HTTPException(status_code=404, detail="Challenge not found")
 
-        if not challenge["completed"]:
-            raise HTTPException(status_code=400, detail="Challenge not yet completed")
+    if not challenge["completed"]:
+        raise HTTPException(status_code=400, detail="Challenge not yet completed")
 
-        if challenge["claimed"]:
-            raise HTTPException(status_code=400, detail="Already claimed")
+    if challenge["claimed"]:
+        raise HTTPException(status_code=400, detail="Already claimed")
 
-        student_id = challenge["student_id"]
+    student_id = challenge["student_id"]
 
-        await db.execute(
-            "UPDATE daily_challenges SET claimed = 1 WHERE id = ?", (challenge_id,)
-        )
-        await db.commit()
+    await db.execute(
+        "UPDATE daily_challenges SET claimed = 1 WHERE id = ?", (challenge_id,)
+    )
 
-        # Award XP
-        xp_result = await award_xp(
-            student_id, challenge["reward_xp"], "daily_challenge", challenge["title"]
-        )
+    # Award XP
+    xp_result = await award_xp(
+        student_id, challenge["reward_xp"], "daily_challenge", challenge["title"], uow=uow
+    )
+    await uow.commit()
 
-        return {"claimed": True, "xp_result": xp_result}
-    finally:
-        await db.close()
+    return {"claimed": True, "xp_result": xp_result}
 
 
 @router.post("/{student_id}/claim-bonus")
-async def claim_bonus(student_id: int):
-    db = await get_db()
-    try:
-        now = datetime.utcnow()
-        cursor = await db.execute(
-            "SELECT * FROM daily_challenges WHERE student_id = ? AND expires_at > ?",
-            (student_id, now.isoformat()),
-        )
-        challenges = await cursor.fetchall()
-
-        if not challenges:
-            raise HTTPException(status_code=404, detail="No challenges found")
-
-        all_completed = all(ch["completed"] == 1 for ch in challenges)
-        if not all_completed:
-            raise HTTPException(status_code=400, detail="Not all challenges completed")
-
-        all_claimed = all(ch["claimed"] == 1 for ch in challenges)
-        if all_claimed:
-            raise HTTPException(status_code=400, detail="Bonus already claimed")
-
-        # Mark all as claimed
-        for ch in challenges:
-            if not ch["claimed"]:
-                await db.execute(
-                    "UPDATE daily_challenges SET claimed = 1 WHERE id = ?", (ch["id"],)
-                )
-        await db.commit()
+async def claim_bonus(student_id: int, uow: UnitOfWork = Depends(get_uow)):
+    db = uow.db
+    now = utc_now()
+    cursor = await db.execute(
+        "SELECT * FROM daily_challenges WHERE student_id = ? AND expires_at > ?",
+        (student_id, to_db_timestamp(now)),
+    )
+    challenges = await cursor.fetchall()
+
+    if not challenges:
+        raise HTTPException(status_code=404, detail="No challenges found")
+
+    all_completed = all(ch["completed"] == 1 for ch in challenges)
+    if not all_completed:
+        raise HTTPException(status_code=400, detail="Not all challenges completed")
+
+    all_claimed = all(ch["claimed"] == 1 for ch in challenges)
+    if all_claimed:
+        raise HTTPException(status_code=400, detail="Bonus already claimed")
+
+    # Mark all as claimed
+    for ch in challenges:
+        if not ch["claimed"]:
+            await db.execute(
+                "UPDATE daily_challenges SET claimed = 1 WHERE id = ?", (ch["id"],)
+            )
 
-        xp_result = await award_xp(
-            student_id, XP_AWARDS["daily_challenge_bonus"], "daily_challenge_bonus", "All daily challenges completed"
-        )
+    xp_result = await award_xp(
+        student_id, XP_AWARDS["daily_challenge_bonus"], "daily_challenge_bonus", "All daily challenges completed",
+        uow=uow,
+    )
+    await uow.commit()
 
-        return {"bonus_claimed": True, "xp_result": xp_result}
-    finally:
-        await db.close()
+    return {"bonus_claimed": True, "xp_result": xp_result}
 
 
-async def update_challenge_progress(student_id: int, challenge_type: str, increment: int = 1):
+async def update_challenge_progress(
+    student_id: int,
+    challenge_type: str,
+    increment: int = 1,
+    uow: UnitOfWork | None = None,
+):
     """Called by other routes when a relevant action happens."""
-    db = await get_db()
-    try:
-        now = datetime.utcnow()
+    async with unit_of_work(uow) as uow:
+        db = uow.db
+        now = utc_now()
         cursor = await db.execute(
             """SELECT * FROM daily_challenges
                WHERE student_id = ? AND challenge_type = ? AND expires_at > ? AND completed = 0""",
-            (student_id, challenge_type, now.isoformat()),
+            (student_id, challenge_type, to_db_timestamp(now)),
         )
         challenges = await cursor.fetchall()
 
@@ -181,8 +183,3 @@ async def update_challenge_progress(student_id: int, challenge_type: str, increm
                 "UPDATE daily_challenges SET progress = ?, completed = ? WHERE id = ?",
                 (new_progress, completed, ch["id"]),
             )
-
-        if challenges:
-            await db.commit()
-    finally:
-        await db.close()
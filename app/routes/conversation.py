@@ -1,30 +1,17 @@
 import json
-import yaml
-from pathlib import Path
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
-from openai import AsyncOpenAI
-from app.config import settings
+from app.services.llm import llm
+from app.services.prompts import prompts
 from app.db.database import get_db
+from app.db.write_queue import run_write
 from app.services.xp_engine import award_xp
 from app.routes.challenges import update_challenge_progress
 
 router = APIRouter(prefix="/api/conversation", tags=["problem_solving"])
 
-PROMPTS_DIR = Path(__file__).parent.parent.parent / "prompts"
-
-_conversation_prompt = None
-
-
-def _load_prompt():
-    global _conversation_prompt
-    if _conversation_prompt is None:
-        with open(PROMPTS_DIR / "conversation_partner.yaml", "r") as f:
-            _conversation_prompt = yaml.safe_load(f)
-    return _conversation_prompt
-
 
 class ChatMessage(BaseModel):
     message: str
@@ -43,8 +30,7 @@ async def get_scenarios(student_id: int):
             raise HTTPException(status_code=404, detail="Student not found")
 
         level = student["current_level"] or "podstawowy"
-        prompt_data = _load_prompt()
-        scenarios = prompt_data.get("scenarios", {})
+        scenarios = prompts.data("conversation_partner").get("scenarios", {})
 
         # Map level to scenario bracket
         if level == "podstawowy":
@@ -91,11 +77,9 @@ async def chat(student_id: int, msg: ChatMessage):
     finally:
         await db.close()
 
-    prompt_data = _load_prompt()
-    system_prompt = prompt_data["system_prompt"]
-    user_template = prompt_data["user_template"]
+    template = prompts.get("conversation_partner")
 
-    context = user_template.format(
+    context = template.render(
         level=level,
         name=name,
         scenario_title=msg.scenario_title or "Free conversation",
@@ -104,30 +88,23 @@ async def chat(student_id: int, msg: ChatMessage):
     )
 
     messages = [
-        {"role": "system", "content": system_prompt + "\n\n" + context},
+        {"role": "system", "content": template.system_prompt + "\n\n" + context},
     ]
     for h in msg.history:
         messages.append({"role": h.get("role", "user"), "content": h.get("content", "")})
     messages.append({"role": "user", "content": msg.message})
 
     # Award XP for problem solving practice (every message)
-    await award_xp(student_id, 25, "problem_solving", msg.scenario_title or "Free conversation")
-    await update_challenge_progress(student_id, "practice_problem_solving")
+    async def _record_practice(uow):
+        await award_xp(student_id, 25, "problem_solving", msg.scenario_title or "Free conversation", uow=uow)
+        await update_challenge_progress(student_id, "practice_problem_solving", uow=uow)
 
-    client = AsyncOpenAI(api_key=settings.api_key)
+    await run_write(_record_practice)
 
     async def generate():
-        stream = await client.chat.completions.create(
-            model=settings.model_name,
-            messages=messages,
-            temperature=0.8,
-            stream=True,
-        )
-
-        async for chunk in stream:
-            if chunk.choices[0].delta.content:
-                data = json.dumps({"content": chunk.choices[0].delta.content})
-                yield f"data: {data}\n\n"
+        async for delta in llm.stream(messages, temperature=0.8):
+            data = json.dumps({"content": delta})
+            yield f"data: {data}\n\n"
 
         yield "data: [DONE]\n\n"
 
@@ -1,14 +1,46 @@
 import json
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query
 from app.models.student import LearnerProfileResponse
 from app.services.diagnostic_agent import run_diagnostic
+from app.services.single_flight import single_flight
 from app.db.database import get_db
+from app.routes.jobs import accepted
+from app.services.jobs import enqueue, job_handler
 
 router = APIRouter(prefix="/api", tags=["diagnostic"])
 
 
 @router.post("/diagnostic/{student_id}", response_model=LearnerProfileResponse)
-async def create_diagnostic(student_id: int):
+async def create_diagnostic(
+    student_id: int,
+    run_async: bool = Query(False, alias="async"),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
+):
+    """Run the AI diagnostic on the student's intake data.
+
+    With ``?async=true`` it runs as a background job and the response is
+    202 with the job id (see /api/jobs).
+    """
+    if run_async:
+        job = await enqueue(
+            "diagnostic.run", {"student_id": student_id},
+            student_id=student_id, idempotency_key=idempotency_key,
+        )
+        return accepted(job)
+    return await _coalesced_diagnostic(student_id)
+
+
+@job_handler("diagnostic.run")
+async def _create_diagnostic_job(payload: dict) -> dict:
+    profile = await _coalesced_diagnostic(payload["student_id"])
+    return profile.model_dump()
+
+
+async def _coalesced_diagnostic(student_id: int) -> LearnerProfileResponse:
+    return await single_flight.run("diagnostic.run", student_id, lambda: _create_diagnostic(student_id))
+
+
+async def _create_diagnostic(student_id: int) -> LearnerProfileResponse:
     db = await get_db()
     try:
         cursor = await db.execute("SELECT * FROM students WHERE id = ?", (student_id,))
@@ -2,12 +2,14 @@ import json
 import yaml
 import random
 from pathlib import Path
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional
-from openai import AsyncOpenAI
-from app.config import settings
+from app.services.llm import llm
+from app.services import equation_builder, speed_calc
+from app.services.game_content import game_content_pool, generate_concept_pairs, generate_error_solutions
 from app.db.database import get_db
+from app.db.unit_of_work import UnitOfWork, get_uow
 from app.services.xp_engine import award_xp
 from app.routes.challenges import update_challenge_progress
 
@@ -16,15 +18,36 @@ router = APIRouter(prefix="/api/games", tags=["games"])
 PROMPTS_DIR = Path(__file__).parent.parent.parent / "prompts"
 
 
+SPEED_CALC_PROBLEMS = 8
+EQUATION_BUILDER_EQUATIONS = 5
+CONCEPT_MATCH_PAIRS = 8
+ERROR_HUNT_SOLUTIONS = 6
+
+
 class GameSubmission(BaseModel):
     game_type: str
     score: int
     data: Optional[dict] = None
 
 
+class EquationCheck(BaseModel):
+    equation: str
+    parts: list[str]
+
+
+class SpeedCalcCheck(BaseModel):
+    seed: int
+    level: Optional[str] = None
+    answers: list[str]
+
+
 @router.get("/{student_id}/concept-match")
 async def generate_concept_match(student_id: int):
-    """Generate a math concept matching game from the student's concept cards."""
+    """Generate a math concept matching game from the student's concept cards.
+
+    Students with fewer than 4 cards get pairs from the pre-filled content
+    pool (app/services/game_content.py) instead.
+    """
     db = await get_db()
     try:
         cursor = await db.execute(
@@ -36,14 +59,17 @@ async def generate_concept_match(student_id: int):
 
         # Get math concept cards
         cursor = await db.execute(
-            "SELECT concept, formula FROM math_concept_cards WHERE student_id = ? ORDER BY RANDOM() LIMIT 8",
-            (student_id,),
+            "SELECT concept, formula FROM math_concept_cards WHERE student_id = ? ORDER BY RANDOM() LIMIT ?",
+            (student_id, CONCEPT_MATCH_PAIRS),
         )
         cards = await cursor.fetchall()
 
         if len(cards) < 4:
-            # Generate fallback pairs using AI
-            pairs = await _generate_concept_pairs(student["current_level"] or "podstawowy", 8)
+            level = student["current_level"] or "podstawowy"
+            if game_content_pool.enabled:
+                pairs = await game_content_pool.draw(student_id, "concept_match", level, CONCEPT_MATCH_PAIRS)
+            else:
+                pairs = await generate_concept_pairs(level, CONCEPT_MATCH_PAIRS)
         else:
             pairs = [{"concept": c["concept"], "formula": c["formula"]} for c in cards]
 
@@ -64,8 +90,17 @@ async def generate_concept_match(student_id: int):
 
 
 @router.get("/{student_id}/equation-builder")
-async def generate_equation_builder(student_id: int):
-    """Generate an equation building game."""
+async def generate_equation_builder(
+    student_id: int,
+    seed: Optional[int] = Query(None, description="Replay a previous game"),
+    flavour: bool = Query(False, description="Let the AI write the equations instead"),
+):
+    """Generate an equation building game.
+
+    Equations are generated locally from ``seed`` (returned in the response).
+    POST /equation-builder/check accepts any equivalent arrangement of the
+    parts. ``?flavour=true`` uses the AI instead.
+    """
     db = await get_db()
     try:
         cursor = await db.execute(
@@ -74,22 +109,41 @@ async def generate_equation_builder(student_id: int):
         student = await cursor.fetchone()
         if not student:
             raise HTTPException(status_code=404, detail="Student not found")
+    finally:
+        await db.close()
 
-        level = student["current_level"] or "podstawowy"
-        equations = await _generate_equations(level, 5)
-
+    level = student["current_level"] or "podstawowy"
+    if flavour:
+        equations = await _generate_equations(level, EQUATION_BUILDER_EQUATIONS)
+        for eq in equations:
+            # Re-split with the local tokenizer so parts are always consistent
+            eq["parts"] = equation_builder.normalize_parts(eq.get("equation", "")) or eq.get("parts", [])
         return {
             "game_type": "equation_builder",
             "equations": equations,
             "time_limit": 120,
         }
-    finally:
-        await db.close()
+
+    seed = speed_calc.new_seed() if seed is None else seed
+    equations = equation_builder.generate_equations(level, EQUATION_BUILDER_EQUATIONS, seed)
+    return {
+        "game_type": "equation_builder",
+        "equations": [eq.to_dict(i) for i, eq in enumerate(equations)],
+        "time_limit": 120,
+        "seed": seed,
+        "level": level,
+    }
+
+
+@router.post("/{student_id}/equation-builder/check")
+async def check_equation_builder(student_id: int, body: EquationCheck):
+    """Check an arrangement of an equation's parts; any equivalent ordering counts."""
+    return {"correct": equation_builder.check_arrangement(body.equation, body.parts)}
 
 
 @router.get("/{student_id}/error-hunt")
 async def generate_error_hunt(student_id: int):
-    """Generate a math error hunting game."""
+    """Generate a math error hunting game from the pre-filled content pool."""
     db = await get_db()
     try:
         cursor = await db.execute(
@@ -100,7 +154,10 @@ async def generate_error_hunt(student_id: int):
             raise HTTPException(status_code=404, detail="Student not found")
 
         level = student["current_level"] or "podstawowy"
-        solutions = await _generate_error_solutions(level, 6)
+        if game_content_pool.enabled:
+            solutions = await game_content_pool.draw(student_id, "error_hunt", level, ERROR_HUNT_SOLUTIONS)
+        else:
+            solutions = await generate_error_solutions(level, ERROR_HUNT_SOLUTIONS)
 
         return {
             "game_type": "error_hunt",
@@ -112,8 +169,17 @@ async def generate_error_hunt(student_id: int):
 
 
 @router.get("/{student_id}/speed-calc")
-async def generate_speed_calc(student_id: int):
-    """Generate a speed calculation game."""
+async def generate_speed_calc(
+    student_id: int,
+    seed: Optional[int] = Query(None, description="Replay a previous game"),
+    flavour: bool = Query(False, description="Let the AI write the problems instead"),
+):
+    """Generate a speed calculation game.
+
+    Problems are generated locally from ``seed`` (returned in the response);
+    answers can be graded with POST /speed-calc/check. ``?flavour=true``
+    uses the AI instead, with no seed and no server-side checking.
+    """
     db = await get_db()
     try:
         cursor = await db.execute(
@@ -122,52 +188,77 @@ async def generate_speed_calc(student_id: int):
         student = await cursor.fetchone()
         if not student:
             raise HTTPException(status_code=404, detail="Student not found")
+    finally:
+        await db.close()
 
-        level = student["current_level"] or "podstawowy"
-        problems = await _generate_calc_problems(level, 8)
-
+    level = student["current_level"] or "podstawowy"
+    if flavour:
         return {
             "game_type": "speed_calc",
-            "problems": problems,
+            "problems": await _generate_calc_problems(level, SPEED_CALC_PROBLEMS),
             "time_limit": 90,
         }
-    finally:
-        await db.close()
+
+    seed = speed_calc.new_seed() if seed is None else seed
+    problems = speed_calc.generate_problems(level, SPEED_CALC_PROBLEMS, seed)
+    return {
+        "game_type": "speed_calc",
+        "problems": [p.to_dict(i) for i, p in enumerate(problems)],
+        "time_limit": 90,
+        "seed": seed,
+        "level": level,
+    }
+
+
+@router.post("/{student_id}/speed-calc/check")
+async def check_speed_calc(student_id: int, body: SpeedCalcCheck):
+    """Grade answers to a procedural speed-calc game, identified by its seed."""
+    level = body.level
+    if level is None:
+        db = await get_db()
+        try:
+            cursor = await db.execute(
+                "SELECT current_level FROM students WHERE id = ?", (student_id,)
+            )
+            student = await cursor.fetchone()
+        finally:
+            await db.close()
+        if not student:
+            raise HTTPException(status_code=404, detail="Student not found")
+        level = student["current_level"] or "podstawowy"
+    return speed_calc.check_answers(level, body.seed, body.answers, SPEED_CALC_PROBLEMS)
 
 
 @router.post("/{student_id}/submit")
-async def submit_game_score(student_id: int, submission: GameSubmission):
-    db = await get_db()
-    try:
-        # Calculate XP based on score
-        if submission.score >= 90:
-            xp = 50
-        elif submission.score >= 70:
-            xp = 30
-        elif submission.score >= 50:
-            xp = 20
-        else:
-            xp = 15
+async def submit_game_score(student_id: int, submission: GameSubmission, uow: UnitOfWork = Depends(get_uow)):
+    # Calculate XP based on score
+    if submission.score >= 90:
+        xp = 50
+    elif submission.score >= 70:
+        xp = 30
+    elif submission.score >= 50:
+        xp = 20
+    else:
+        xp = 15
+
+    await uow.execute(
+        "INSERT INTO game_scores (student_id, game_type, score, xp_earned, data) VALUES (?, ?, ?, ?, ?)",
+        (student_id, submission.game_type, submission.score, xp,
+         json.dumps(submission.data) if submission.data else None),
+    )
 
-        await db.execute(
-            "INSERT INTO game_scores (student_id, game_type, score, xp_earned, data) VALUES (?, ?, ?, ?, ?)",
-            (student_id, submission.game_type, submission.score, xp,
-             json.dumps(submission.data) if submission.data else None),
-        )
-        await db.commit()
+    xp_result = await award_xp(student_id, xp, "game_complete", f"{submission.game_type}: {submission.score}%", uow=uow)
 
-        xp_result = await award_xp(student_id, xp, "game_complete", f"{submission.game_type}: {submission.score}%")
+    # Update challenge progress
+    await update_challenge_progress(student_id, "play_game", uow=uow)
 
-        # Update challenge progress
-        await update_challenge_progress(student_id, "play_game")
+    await uow.commit()
 
-        return {
-            "score": submission.score,
-            "xp_earned": xp,
-            "xp_result": xp_result,
-        }
-    finally:
-        await db.close()
+    return {
+        "score": submission.score,
+        "xp_earned": xp,
+        "xp_result": xp_result,
+    }
 
 
 @router.get("/{student_id}/history")
@@ -200,61 +291,25 @@ async def get_game_history(student_id: int):
         await db.close()
 
 
-async def _generate_concept_pairs(level: str, count: int) -> list[dict]:
-    client = AsyncOpenAI(api_key=settings.api_key)
-    response = await client.chat.completions.create(
-        model=settings.model_name,
-        messages=[
-            {"role": "system", "content": "Jestes pomocnikiem do nauki matematyki. Generujesz pary: pojecie matematyczne i jego wzor lub definicja. Odpowiadaj w formacie JSON."},
-            {"role": "user", "content": f"Wygeneruj {count} par matematycznych pojec z ich wzorami lub definicjami dla poziomu: {level}. Kazda para to pojecie i odpowiadajacy mu wzor/definicja. Zwroc JSON: {{\"pairs\": [{{\"concept\": \"Pole kola\", \"formula\": \"P = pi * r^2\"}}]}}"},
-        ],
-        response_format={"type": "json_object"},
-        temperature=0.8,
-    )
-    data = json.loads(response.choices[0].message.content)
-    return data.get("pairs", [])[:count]
-
-
 async def _generate_equations(level: str, count: int) -> list[dict]:
-    client = AsyncOpenAI(api_key=settings.api_key)
-    response = await client.chat.completions.create(
-        model=settings.model_name,
-        messages=[
+    data = await llm.complete_json(
+        [
             {"role": "system", "content": "Jestes pomocnikiem do nauki matematyki. Generujesz rownania i wyrazenia matematyczne do gry polegajacej na ukladaniu czesci w poprawnej kolejnosci. Odpowiadaj w formacie JSON."},
             {"role": "user", "content": f"Wygeneruj {count} rownan lub wyrazen matematycznych dla poziomu: {level}. Kazde rownanie powinno skladac sie z 4-8 czesci do ulozenia we wlasciwej kolejnosci. Zwroc JSON: {{\"equations\": [{{\"equation\": \"2x + 3 = 7\", \"parts\": [\"2x\", \"+\", \"3\", \"=\", \"7\"], \"hint\": \"Rownanie liniowe z jedna niewiadoma\"}}]}}"},
         ],
-        response_format={"type": "json_object"},
         temperature=0.8,
+        cache="game_equations",
     )
-    data = json.loads(response.choices[0].message.content)
     return data.get("equations", [])[:count]
 
 
-async def _generate_error_solutions(level: str, count: int) -> list[dict]:
-    client = AsyncOpenAI(api_key=settings.api_key)
-    response = await client.chat.completions.create(
-        model=settings.model_name,
-        messages=[
-            {"role": "system", "content": "Jestes pomocnikiem do nauki matematyki. Generujesz rozwiazania zadan matematycznych - niektore z celowymi bledami, a niektore poprawne. Uczen musi znalezc bledy. Odpowiadaj w formacie JSON."},
-            {"role": "user", "content": f"Wygeneruj {count} rozwiazan zadan matematycznych dla poziomu: {level}. Czesc powinna zawierac typowe bledy (np. zly znak, bledne obliczenia, zla kolejnosc dzialan), a czesc powinna byc poprawna. Zwroc JSON: {{\"solutions\": [{{\"problem\": \"Oblicz: 3 * (2 + 4)\", \"shown_solution\": \"3 * 2 + 4 = 10\", \"has_error\": true, \"correct_solution\": \"3 * (2 + 4) = 3 * 6 = 18\", \"explanation\": \"Najpierw wykonujemy dzialanie w nawiasie, potem mnozenie\"}}]}}"},
-        ],
-        response_format={"type": "json_object"},
-        temperature=0.7,
-    )
-    data = json.loads(response.choices[0].message.content)
-    return data.get("solutions", [])[:count]
-
-
 async def _generate_calc_problems(level: str, count: int) -> list[dict]:
-    client = AsyncOpenAI(api_key=settings.api_key)
-    response = await client.chat.completions.create(
-        model=settings.model_name,
-        messages=[
+    data = await llm.complete_json(
+        [
             {"role": "system", "content": "Jestes pomocnikiem do nauki matematyki. Generujesz szybkie zadania do rachunku pamieciowego. Odpowiadaj w formacie JSON."},
             {"role": "user", "content": f"Wygeneruj {count} krotkich zadan do szybkiego rachunku pamieciowego dla poziomu: {level}. Zadania powinny byc mozliwe do rozwiazania w glowie w kilka sekund. Zwroc JSON: {{\"problems\": [{{\"problem\": \"15 * 4\", \"answer\": \"60\", \"hint\": \"Pomnoz 15 razy 4\"}}]}}"},
         ],
-        response_format={"type": "json_object"},
         temperature=0.8,
+        cache="game_calc_problems",
     )
-    data = json.loads(response.choices[0].message.content)
     return data.get("problems", [])[:count]
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
 from app.db.database import get_db
+from app.db.write_queue import run_write
 from app.services.xp_engine import get_student_xp_profile, award_xp, update_streak
 from app.services.achievement_checker import check_achievements, ACHIEVEMENT_DEFINITIONS
 
@@ -142,8 +143,10 @@ async def trigger_achievement_check(student_id: int, body: dict = None):
 @router.post("/{student_id}/activity")
 async def record_activity(student_id: int):
     """Record that a student was active today. Updates streak."""
-    streak_result = await update_streak(student_id)
-    achievements = await check_achievements(student_id)
+    async def _record(uow):
+        return await update_streak(student_id, uow=uow), await check_achievements(student_id, uow=uow)
+
+    streak_result, achievements = await run_write(_record)
     return {
         "streak": streak_result,
         "new_achievements": [
@@ -0,0 +1,74 @@
+"""Status and completion stream for background jobs (app/services/jobs.py)."""
+
+import json
+import time
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.services.jobs import TERMINAL_STATUSES, get_job, job_pool
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+# Fallback re-check when the job runs in another process
+_EVENTS_POLL_SECONDS = 1.0
+_EVENTS_MAX_SECONDS = 600
+
+
+def _public(job: dict) -> dict:
+    return {
+        "id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "max_attempts": job["max_attempts"],
+        "student_id": job["student_id"],
+        "result": job["result"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
+
+
+def accepted(job: dict) -> JSONResponse:
+    """202 response for a route that enqueued ``job`` instead of running inline."""
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job["id"],
+            "status": job["status"],
+            "status_url": f"/api/jobs/{job['id']}",
+            "events_url": f"/api/jobs/{job['id']}/events",
+        },
+    )
+
+
+@router.get("/{job_id}")
+async def get_job_status(job_id: int):
+    job = await get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _public(job)
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: int):
+    """Server-sent events: one ``status`` event per state change, ending at completion."""
+    job = await get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def generate():
+        deadline = time.monotonic() + _EVENTS_MAX_SECONDS
+        current, last = job, None
+        while True:
+            state = (current["status"], current["attempts"])
+            if state != last:
+                last = state
+                yield f"event: status\ndata: {json.dumps(_public(current))}\n\n"
+            if current["status"] in TERMINAL_STATUSES or time.monotonic() > deadline:
+                break
+            await job_pool.wait_for_change(_EVENTS_POLL_SECONDS)
+            current = await get_job(job_id) or current
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(generate(), media_type="text/event-stream")
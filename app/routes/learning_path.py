@@ -1,9 +1,12 @@
 import json
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional
 from app.db.database import get_db
 from app.services.learning_path_generator import generate_learning_path
+from app.services.single_flight import single_flight
+from app.routes.jobs import accepted
+from app.services.jobs import enqueue, job_handler
 
 router = APIRouter(prefix="/api/learning-path", tags=["learning_path"])
 
@@ -15,8 +18,35 @@ class WeekUpdate(BaseModel):
 
 
 @router.post("/{student_id}/generate")
-async def generate_path(student_id: int):
-    """Generate a 12-week learning path using assessment + profile data."""
+async def generate_path(
+    student_id: int,
+    run_async: bool = Query(False, alias="async"),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
+):
+    """Generate a 12-week learning path using assessment + profile data.
+
+    With ``?async=true`` it runs as a background job and the response is
+    202 with the job id (see /api/jobs).
+    """
+    if run_async:
+        job = await enqueue(
+            "learning_path.generate", {"student_id": student_id},
+            student_id=student_id, idempotency_key=idempotency_key,
+        )
+        return accepted(job)
+    return await _coalesced_generate_path(student_id)
+
+
+@job_handler("learning_path.generate")
+async def _generate_path_job(payload: dict) -> dict:
+    return await _coalesced_generate_path(payload["student_id"])
+
+
+async def _coalesced_generate_path(student_id: int) -> dict:
+    return await single_flight.run("learning_path.generate", student_id, lambda: _generate_path(student_id))
+
+
+async def _generate_path(student_id: int) -> dict:
     db = await get_db()
     try:
         # Get student
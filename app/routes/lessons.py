@@ -1,154 +1,172 @@
+import asyncio
 import json
-from datetime import datetime, timedelta
-from fastapi import APIRouter, HTTPException
+from datetime import timedelta
+from typing import Any, Callable
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from app.models.lesson import LessonResponse, LessonContent
-from app.services.lesson_generator import generate_lesson
+from app.services.lesson_generator import LESSON_PHASES, generate_lesson, load_lesson_inputs, stream_lesson
+from app.services.lesson_pregen import lesson_pregen
 from app.services.learning_point_extractor import extract_learning_points
+from app.services.single_flight import single_flight
 from app.db.database import get_db
+from app.db.timestamps import db_now
+from app.routes.jobs import accepted
+from app.services.jobs import enqueue, job_handler
 
 router = APIRouter(prefix="/api", tags=["lessons"])
 
 
 @router.post("/lessons/{student_id}/generate", response_model=LessonResponse)
 async def generate_next_lesson(student_id: int):
+    # A double-click gets the same lesson instead of a second one for the same session
+    return await single_flight.run("lessons.generate", student_id, lambda: _generate_next_lesson(student_id))
+
+
+async def _generate_next_lesson(
+    student_id: int, on_event: Callable[[str, Any], None] | None = None
+) -> LessonResponse:
+    """Create the next session's lesson; with ``on_event``, stream fields to it as the model writes them."""
     db = await get_db()
     try:
-        # Verify student exists
-        cursor = await db.execute("SELECT * FROM students WHERE id = ?", (student_id,))
-        student = await cursor.fetchone()
-        if not student:
+        inputs = await load_lesson_inputs(db, student_id)
+        if inputs is None:
             raise HTTPException(status_code=404, detail="Student not found")
+        session_number = inputs["session_number"]
+
+        # Serve the pre-generated lesson if its inputs are unchanged; it is
+        # only gone once the lesson saved from it is committed
+        lesson_content = await lesson_pregen.take(db, inputs)
+        if lesson_content is None:
+            # Don't hold the write lock from the pending-slot cleanup across the AI call
+            await db.commit()
 
-        # Get learner profile
-        cursor = await db.execute(
-            "SELECT * FROM learner_profiles WHERE student_id = ? ORDER BY created_at DESC LIMIT 1",
-            (student_id,),
-        )
-        profile_row = await cursor.fetchone()
-        if not profile_row:
-            # Fallback: build a default profile from student data so lessons can still be generated
-            current_level = student["current_level"] or "podstawowy"
-            problem_areas = []
-            if student["problem_areas"]:
-                try:
-                    problem_areas = json.loads(student["problem_areas"])
-                except (json.JSONDecodeError, TypeError):
-                    problem_areas = [student["problem_areas"]]
-
-            profile_data = {
-                "gaps": [{"area": area, "severity": "medium", "description": f"Zgloszony problem: {area}"} for area in problem_areas],
-                "priorities": problem_areas or ["arytmetyka", "algebra"],
-                "profile_summary": f"Profil domyslny (diagnostyka nie zostala ukonczona). Poziom: {current_level}.",
-                "recommended_start_level": current_level if current_level != "pending" else "podstawowy",
-            }
-        else:
-            profile_data = {
-                "gaps": json.loads(profile_row["gaps"]) if profile_row["gaps"] else [],
-                "priorities": json.loads(profile_row["priorities"]) if profile_row["priorities"] else [],
-                "profile_summary": profile_row["profile_summary"] or "",
-                "recommended_start_level": profile_row["recommended_start_level"],
-            }
-
-        # Get progress history
-        cursor = await db.execute(
-            "SELECT * FROM progress WHERE student_id = ? ORDER BY completed_at DESC",
-            (student_id,),
-        )
-        progress_rows = await cursor.fetchall()
-        progress_history = [
-            {
-                "lesson_id": row["lesson_id"],
-                "score": row["score"],
-                "areas_improved": json.loads(row["areas_improved"]) if row["areas_improved"] else [],
-                "areas_struggling": json.loads(row["areas_struggling"]) if row["areas_struggling"] else [],
-            }
-            for row in progress_rows
-        ]
-
-        # Get existing lessons for session count and topic history
-        cursor = await db.execute(
-            "SELECT objective, content FROM lessons WHERE student_id = ? ORDER BY session_number",
-            (student_id,),
-        )
-        lesson_rows = await cursor.fetchall()
-        session_number = len(lesson_rows) + 1
-
-        # Extract previous lesson topics from objectives
-        previous_topics = []
-        for lr in lesson_rows:
-            obj = lr["objective"] or ""
-            if lr["content"]:
-                try:
-                    c = json.loads(lr["content"])
-                    obj = c.get("objective", obj)
-                except (json.JSONDecodeError, TypeError):
-                    pass
-            if obj:
-                previous_topics.append(obj)
-
-        # Check for recall weak areas from most recent completed recall session
-        recall_weak_areas = None
-        cursor = await db.execute(
-            """SELECT weak_areas FROM recall_sessions
-               WHERE student_id = ? AND status = 'completed'
-               ORDER BY completed_at DESC LIMIT 1""",
-            (student_id,),
-        )
-        recall_row = await cursor.fetchone()
-        if recall_row and recall_row["weak_areas"]:
             try:
-                recall_weak_areas = json.loads(recall_row["weak_areas"])
-                if not recall_weak_areas:
-                    recall_weak_areas = None
-            except (json.JSONDecodeError, TypeError):
-                recall_weak_areas = None
+                if on_event is None:
+                    lesson_content = await generate_lesson(**inputs)
+                else:
+                    lesson_content = await _stream_lesson_content(inputs, on_event)
+            except Exception as exc:
+                import traceback
+                traceback.print_exc()
+                raise HTTPException(
+                    status_code=502,
+                    detail=f"Lesson generation AI call failed: {str(exc)[:200]}"
+                )
 
-        # Generate lesson
-        try:
-            lesson_content = await generate_lesson(
-                student_id=student_id,
-                profile=profile_data,
-                progress_history=progress_history,
-                session_number=session_number,
-                current_level=student["current_level"] or "podstawowy",
-                previous_topics=previous_topics,
-                recall_weak_areas=recall_weak_areas,
-            )
-        except Exception as exc:
-            import traceback
-            traceback.print_exc()
-            raise HTTPException(
-                status_code=502,
-                detail=f"Lesson generation AI call failed: {str(exc)[:200]}"
-            )
+        return await _save_lesson(db, student_id, session_number, lesson_content)
+    finally:
+        await db.close()
 
-        # Save to database
-        cursor = await db.execute(
-            """INSERT INTO lessons (student_id, session_number, objective, content, difficulty, status)
-               VALUES (?, ?, ?, ?, ?, 'generated')""",
-            (
-                student_id,
-                session_number,
-                lesson_content.objective,
-                json.dumps(lesson_content.model_dump()),
-                lesson_content.difficulty,
-            ),
-        )
-        await db.commit()
-        lesson_id = cursor.lastrowid
 
-        return LessonResponse(
-            id=lesson_id,
-            student_id=student_id,
-            session_number=session_number,
-            objective=lesson_content.objective,
-            content=lesson_content,
-            difficulty=lesson_content.difficulty,
-            status="generated",
-        )
+async def _save_lesson(db, student_id: int, session_number: int, lesson_content: LessonContent) -> LessonResponse:
+    cursor = await db.execute(
+        """INSERT INTO lessons (student_id, session_number, objective, content, difficulty, status)
+           VALUES (?, ?, ?, ?, ?, 'generated')""",
+        (
+            student_id,
+            session_number,
+            lesson_content.objective,
+            json.dumps(lesson_content.model_dump()),
+            lesson_content.difficulty,
+        ),
+    )
+    await db.commit()
+    return LessonResponse(
+        id=cursor.lastrowid,
+        student_id=student_id,
+        session_number=session_number,
+        objective=lesson_content.objective,
+        content=lesson_content,
+        difficulty=lesson_content.difficulty,
+        status="generated",
+    )
+
+
+# Top-level lesson fields sent as ``meta`` events while streaming
+_STREAM_META_FIELDS = ("objective", "difficulty", "math_domain")
+
+# Streamed generations outlive the request that started them
+_detached: set[asyncio.Task] = set()
+
+
+async def _stream_lesson_content(inputs: dict, on_event: Callable[[str, Any], None]) -> LessonContent:
+    async for key, value in stream_lesson(**inputs):
+        if key == "lesson":
+            return value
+        if key in LESSON_PHASES:
+            on_event("phase", {"phase": key, "content": value.model_dump()})
+        elif key in _STREAM_META_FIELDS:
+            on_event("meta", {key: value})
+    raise RuntimeError("Lesson stream ended without a lesson")
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/lessons/{student_id}/generate/stream")
+async def stream_next_lesson(student_id: int):
+    """Server-sent events version of POST /lessons/{student_id}/generate.
+
+    Events, in order: ``meta`` for the objective, difficulty and domain,
+    and one ``phase`` per lesson phase as soon as the model has written it,
+    then ``lesson`` with the saved lesson (the /generate response). On
+    failure an ``error`` event replaces ``lesson``. The stream ends with
+    ``data: [DONE]``.
+
+    Generation and saving run in a detached task under the same
+    single-flight key as /generate, so a client that disconnects still gets
+    its lesson saved, and a concurrent /generate does not create the same
+    session twice. A request that joins a generation already in flight gets
+    all ``meta`` and ``phase`` events at once when it finishes.
+    """
+    db = await get_db()
+    try:
+        cursor = await db.execute("SELECT 1 FROM students WHERE id = ?", (student_id,))
+        if await cursor.fetchone() is None:
+            raise HTTPException(status_code=404, detail="Student not found")
     finally:
         await db.close()
 
+    events: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(single_flight.run(
+        "lessons.generate",
+        student_id,
+        lambda: _generate_next_lesson(student_id, lambda event, data: events.put_nowait((event, data))),
+    ))
+    _detached.add(task)
+    task.add_done_callback(_detached.discard)
+    task.add_done_callback(lambda _task: events.put_nowait(None))
+
+    async def generate():
+        sent = set()
+        while (item := await events.get()) is not None:
+            event, data = item
+            sent.add(data["phase"] if event == "phase" else next(iter(data)))
+            yield _sse(event, data)
+        try:
+            lesson = task.result()
+        except HTTPException as exc:
+            yield _sse("error", {"detail": exc.detail})
+        except Exception as exc:
+            import traceback
+            traceback.print_exception(exc)
+            yield _sse("error", {"detail": f"Lesson generation failed: {str(exc)[:200]}"})
+        else:
+            # Whatever this request did not see streamed: a pending lesson,
+            # or a generation it joined
+            for field in _STREAM_META_FIELDS:
+                if field not in sent:
+                    yield _sse("meta", {field: getattr(lesson.content, field)})
+            for phase in LESSON_PHASES:
+                if phase not in sent and getattr(lesson.content, phase) is not None:
+                    yield _sse("phase", {"phase": phase, "content": getattr(lesson.content, phase).model_dump()})
+            yield _sse("lesson", lesson.model_dump())
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(generate(), media_type="text/event-stream")
+
 
 @router.get("/lessons/{student_id}", response_model=list[LessonResponse])
 async def list_lessons(student_id: int):
@@ -212,7 +230,43 @@ async def get_lesson(student_id: int, lesson_id: int):
 
 
 @router.post("/lessons/{lesson_id}/complete")
-async def complete_lesson(lesson_id: int):
+async def complete_lesson(
+    lesson_id: int,
+    run_async: bool = Query(False, alias="async"),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
+):
+    """Extract learning points from a finished lesson.
+
+    With ``?async=true`` the AI extraction runs as a background job and the
+    response is 202 with the job id (see /api/jobs).
+    """
+    if not run_async:
+        return await _complete_lesson(lesson_id)
+
+    db = await get_db()
+    try:
+        cursor = await db.execute("SELECT student_id FROM lessons WHERE id = ?", (lesson_id,))
+        lesson = await cursor.fetchone()
+    finally:
+        await db.close()
+    if not lesson:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    job = await enqueue(
+        "lessons.complete",
+        {"lesson_id": lesson_id},
+        student_id=lesson["student_id"],
+        # Completing a lesson twice would extract its points twice
+        idempotency_key=idempotency_key or f"lesson:{lesson_id}",
+    )
+    return accepted(job)
+
+
+@job_handler("lessons.complete")
+async def _complete_lesson_job(payload: dict) -> dict:
+    return await _complete_lesson(payload["lesson_id"])
+
+
+async def _complete_lesson(lesson_id: int) -> dict:
     db = await get_db()
     try:
         cursor = await db.execute("SELECT * FROM lessons WHERE id = ?", (lesson_id,))
@@ -241,7 +295,7 @@ async def complete_lesson(lesson_id: int):
         points = await extract_learning_points(content, student_level)
 
         # Insert each point into learning_points table
-        tomorrow = (datetime.utcnow() + timedelta(days=1)).isoformat()
+        tomorrow = db_now(timedelta(days=1))
         inserted_points = []
         for p in points:
             cursor = await db.execute(
@@ -266,6 +320,8 @@ async def complete_lesson(lesson_id: int):
 
         await db.commit()
 
+        await lesson_pregen.schedule(student_id)
+
         return {
             "lesson_id": lesson_id,
             "points_extracted": len(inserted_points),
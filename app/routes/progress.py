@@ -1,77 +1,86 @@
 import json
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from app.models.lesson import ProgressEntry, ProgressResponse, ProgressSummary
 from app.db.database import get_db
+from app.db.unit_of_work import UnitOfWork, get_uow
 from app.services.xp_engine import award_xp, update_streak
 from app.services.achievement_checker import check_achievements
+from app.services.progress_tracker import get_skill_stats, record_skill_observations
 from app.routes.challenges import update_challenge_progress
 
 router = APIRouter(prefix="/api", tags=["progress"])
 
 
 @router.post("/progress/{lesson_id}", response_model=ProgressResponse)
-async def submit_progress(lesson_id: int, entry: ProgressEntry):
-    db = await get_db()
-    try:
-        # Verify lesson exists
-        cursor = await db.execute("SELECT * FROM lessons WHERE id = ?", (lesson_id,))
-        lesson = await cursor.fetchone()
-        if not lesson:
-            raise HTTPException(status_code=404, detail="Lesson not found")
-
-        # Prevent duplicate progress submissions
-        cursor = await db.execute(
-            "SELECT id FROM progress WHERE lesson_id = ? AND student_id = ?",
-            (lesson_id, entry.student_id),
-        )
-        if await cursor.fetchone():
-            raise HTTPException(status_code=409, detail="Progress already submitted for this lesson")
-
-        cursor = await db.execute(
-            """INSERT INTO progress (student_id, lesson_id, score, notes, areas_improved, areas_struggling)
-               VALUES (?, ?, ?, ?, ?, ?)""",
-            (
-                entry.student_id,
-                lesson_id,
-                entry.score,
-                entry.notes,
-                json.dumps(entry.areas_improved),
-                json.dumps(entry.areas_struggling),
-            ),
-        )
-        await db.commit()
-
-        # Update lesson status
-        await db.execute("UPDATE lessons SET status = 'completed' WHERE id = ?", (lesson_id,))
-        await db.commit()
-
-        # Award XP for lesson completion
-        xp_amount = 50
-        if entry.score and entry.score >= 90:
-            xp_amount = 75  # Bonus for high score
-        await award_xp(entry.student_id, xp_amount, "lesson_complete", f"Lesson {lesson_id}: {entry.score}%")
-
-        # Update streak and check achievements
-        await update_streak(entry.student_id)
-        await check_achievements(entry.student_id, {"action": "lesson_complete", "score": entry.score})
-
-        # Update challenge progress
-        await update_challenge_progress(entry.student_id, "complete_lesson")
-        if entry.score and entry.score >= 90:
-            await update_challenge_progress(entry.student_id, "high_score")
-
-        progress_id = cursor.lastrowid
-        return ProgressResponse(
-            id=progress_id,
-            student_id=entry.student_id,
-            lesson_id=lesson_id,
-            score=entry.score,
-            notes=entry.notes,
-            areas_improved=entry.areas_improved,
-            areas_struggling=entry.areas_struggling,
-        )
-    finally:
-        await db.close()
+async def submit_progress(lesson_id: int, entry: ProgressEntry, uow: UnitOfWork = Depends(get_uow)):
+    db = uow.db
+    # Verify lesson exists
+    cursor = await db.execute("SELECT * FROM lessons WHERE id = ?", (lesson_id,))
+    lesson = await cursor.fetchone()
+    if not lesson:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+
+    # Prevent duplicate progress submissions
+    cursor = await db.execute(
+        "SELECT id FROM progress WHERE lesson_id = ? AND student_id = ?",
+        (lesson_id, entry.student_id),
+    )
+    if await cursor.fetchone():
+        raise HTTPException(status_code=409, detail="Progress already submitted for this lesson")
+
+    cursor = await db.execute(
+        """INSERT INTO progress (student_id, lesson_id, score, notes, areas_improved, areas_struggling)
+           VALUES (?, ?, ?, ?, ?, ?)""",
+        (
+            entry.student_id,
+            lesson_id,
+            entry.score,
+            entry.notes,
+            json.dumps(entry.areas_improved),
+            json.dumps(entry.areas_struggling),
+        ),
+    )
+    progress_id = cursor.lastrowid
+    await record_skill_observations(
+        db,
+        entry.student_id,
+        progress_id,
+        entry.score,
+        entry.areas_improved,
+        entry.areas_struggling,
+        difficulty=lesson["difficulty"] if entry.score is not None else None,
+    )
+
+    # Update lesson status
+    await db.execute("UPDATE lessons SET status = 'completed' WHERE id = ?", (lesson_id,))
+
+    # Award XP for lesson completion
+    xp_amount = 50
+    if entry.score and entry.score >= 90:
+        xp_amount = 75  # Bonus for high score
+    await award_xp(entry.student_id, xp_amount, "lesson_complete", f"Lesson {lesson_id}: {entry.score}%", uow=uow)
+
+    # Update streak and check achievements
+    await update_streak(entry.student_id, uow=uow)
+    await check_achievements(entry.student_id, {"action": "lesson_complete", "score": entry.score}, uow=uow)
+
+    # Update challenge progress
+    await update_challenge_progress(entry.student_id, "complete_lesson", uow=uow)
+    if entry.score and entry.score >= 90:
+        await update_challenge_progress(entry.student_id, "high_score", uow=uow)
+
+    # The whole XP/streak/achievement cascade lands in one transaction
+    await uow.commit()
+
+    return ProgressResponse(
+        id=progress_id,
+        student_id=entry.student_id,
+        lesson_id=lesson_id,
+        score=entry.score,
+        notes=entry.notes,
+        areas_improved=entry.areas_improved,
+        areas_struggling=entry.areas_struggling,
+    )
 
 
 @router.get("/progress/{student_id}", response_model=ProgressSummary)
@@ -86,7 +95,6 @@ async def get_progress(student_id: int):
 
         entries = []
         total_score = 0.0
-        skill_scores: dict[str, list[float]] = {}
 
         for row in rows:
             areas_improved = json.loads(row["areas_improved"]) if row["areas_improved"] else []
@@ -107,21 +115,16 @@ async def get_progress(student_id: int):
             )
             total_score += score
 
-            for area in areas_improved:
-                skill_scores.setdefault(area, []).append(score)
-            for area in areas_struggling:
-                skill_scores.setdefault(area, []).append(max(0, score - 20))
-
         total_lessons = len(entries)
         avg_score = total_score / total_lessons if total_lessons > 0 else 0.0
-        skill_averages = {k: sum(v) / len(v) for k, v in skill_scores.items()}
+        skill_stats = await get_skill_stats(db, student_id)
 
         return ProgressSummary(
             student_id=student_id,
             total_lessons=total_lessons,
             average_score=round(avg_score, 1),
             entries=entries,
-            skill_averages={k: round(v, 1) for k, v in skill_averages.items()},
+            skill_averages={k: round(v["average"], 1) for k, v in skill_stats.items()},
         )
     finally:
         await db.close()
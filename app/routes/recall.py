@@ -1,13 +1,18 @@
 import json
 from datetime import datetime
 from fastapi import APIRouter, HTTPException
-from app.db.database import get_db
+from app.db.database import db_pool, get_db
+from app.db.unit_of_work import unit_of_work
 from app.services.recall_generator import (
+    QUIZ_POINTS,
     get_points_due_for_review,
-    generate_recall_questions,
     evaluate_recall_answers,
     update_review_schedule,
 )
+from app.services.lesson_pregen import lesson_pregen
+from app.services.recall_bank import build_recall_quiz, mark_used
+from app.services.recall_prefetch import recall_prefetch
+from app.services.single_flight import single_flight
 from app.services.xp_engine import award_xp
 from app.routes.challenges import update_challenge_progress
 
@@ -18,6 +23,16 @@ router = APIRouter(prefix="/api/recall", tags=["recall"])
 async def check_recall(student_id: int):
     points = await get_points_due_for_review(student_id)
     count = len(points)
+    if points and recall_prefetch.enabled:
+        # Most students start the quiz right after this; have it ready
+        db = await get_db()
+        try:
+            cursor = await db.execute("SELECT current_level FROM students WHERE id = ?", (student_id,))
+            student = await cursor.fetchone()
+        finally:
+            await db.close()
+        if student:
+            recall_prefetch.prefetch(student_id, points[:QUIZ_POINTS], student["current_level"])
     estimated_minutes = max(1, round(count * 0.5))
     return {
         "has_pending_recall": count > 0,
@@ -28,6 +43,11 @@ async def check_recall(student_id: int):
 
 @router.post("/{student_id}/start")
 async def start_recall(student_id: int):
+    # Repeated clicks join the same session instead of opening another one
+    return await single_flight.run("recall.start", student_id, lambda: _start_recall(student_id))
+
+
+async def _start_recall(student_id: int) -> dict:
     db = await get_db()
     try:
         # Verify student exists
@@ -48,10 +68,12 @@ async def start_recall(student_id: int):
             }
 
         # Limit to 5 points for the quiz
-        quiz_points = points[:5]
+        quiz_points = points[:QUIZ_POINTS]
 
-        # Generate questions
-        result = await generate_recall_questions(quiz_points, student_level)
+        # Reuse banked questions and generate the rest, unless /check already did
+        result = await recall_prefetch.take(student_id, quiz_points, student_level)
+        if result is None:
+            result = await build_recall_quiz(quiz_points, student_level)
         questions = result.get("questions", [])
         encouragement = result.get("encouragement", "Rozgrzejmy sie!")
 
@@ -61,6 +83,7 @@ async def start_recall(student_id: int):
                VALUES (?, ?, 'in_progress')""",
             (student_id, json.dumps(questions)),
         )
+        await mark_used(db, questions)
         await db.commit()
         session_id = cursor.lastrowid
 
@@ -75,9 +98,9 @@ async def start_recall(student_id: int):
 
 @router.post("/{session_id}/submit")
 async def submit_recall(session_id: int, body: dict):
-    db = await get_db()
-    try:
-        # Fetch session
+    # Read what the evaluation needs, then give the connection back: the
+    # model call takes seconds and must not hold a pooled connection.
+    async with db_pool.acquire() as db:
         cursor = await db.execute(
             "SELECT * FROM recall_sessions WHERE id = ?", (session_id,)
         )
@@ -99,21 +122,29 @@ async def submit_recall(session_id: int, body: dict):
         student = await cursor.fetchone()
         student_level = student["current_level"] if student else "podstawowy"
 
-        # AI evaluate
-        evaluation = await evaluate_recall_answers(questions, answers, student_level)
+        point_ids = [q["point_id"] for q in questions if q.get("point_id")]
+        cursor = await db.execute(
+            f"SELECT id, content FROM learning_points WHERE id IN ({','.join('?' * len(point_ids))})",
+            point_ids,
+        )
+        topics = {row["id"]: row["content"] for row in await cursor.fetchall()}
+
+    # AI evaluate
+    evaluation = await evaluate_recall_answers(questions, answers, student_level, topics=topics)
 
-        overall_score = evaluation.get("overall_score", 0)
-        evaluations = evaluation.get("evaluations", [])
-        weak_areas = evaluation.get("weak_areas", [])
-        encouragement = evaluation.get("encouragement", "")
+    overall_score = evaluation.get("overall_score", 0)
+    evaluations = evaluation.get("evaluations", [])
+    weak_areas = evaluation.get("weak_areas", [])
+    encouragement = evaluation.get("encouragement", "")
 
-        # Update session
-        await db.execute(
+    async with unit_of_work() as uow:
+        # Update session; a concurrent submit may have completed it meanwhile
+        cursor = await uow.execute(
             """UPDATE recall_sessions
                SET answers = ?, overall_score = ?, evaluations = ?,
                    weak_areas = ?, status = 'completed',
                    completed_at = datetime('now')
-               WHERE id = ?""",
+               WHERE id = ? AND status != 'completed'""",
             (
                 json.dumps(answers),
                 overall_score,
@@ -122,29 +153,31 @@ async def submit_recall(session_id: int, body: dict):
                 session_id,
             ),
         )
-        await db.commit()
+        if cursor.rowcount == 0:
+            raise HTTPException(status_code=400, detail="Session already completed")
 
         # Update review schedules for each evaluated point
         for ev in evaluations:
             point_id = ev.get("point_id")
             score = ev.get("score", 0)
             if point_id:
-                await update_review_schedule(point_id, score)
+                await update_review_schedule(point_id, score, uow=uow)
 
         # Award XP for recall completion
         if overall_score >= 100:
-            await award_xp(student_id, 30, "perfect_recall", f"Perfect recall session {session_id}")
-            await update_challenge_progress(student_id, "perfect_recall")
+            await award_xp(student_id, 30, "perfect_recall", f"Perfect recall session {session_id}", uow=uow)
+            await update_challenge_progress(student_id, "perfect_recall", uow=uow)
         else:
-            await award_xp(student_id, 15, "recall_complete", f"Recall session {session_id}: {overall_score}%")
+            await award_xp(student_id, 15, "recall_complete", f"Recall session {session_id}: {overall_score}%", uow=uow)
         if overall_score >= 80:
-            await update_challenge_progress(student_id, "perfect_recall")
+            await update_challenge_progress(student_id, "perfect_recall", uow=uow)
 
-        return {
-            "overall_score": overall_score,
-            "evaluations": evaluations,
-            "weak_areas": weak_areas,
-            "encouragement": encouragement,
-        }
-    finally:
-        await db.close()
+    # New weak areas change the next lesson's inputs
+    await lesson_pregen.schedule(student_id)
+
+    return {
+        "overall_score": overall_score,
+        "evaluations": evaluations,
+        "weak_areas": weak_areas,
+        "encouragement": encouragement,
+    }
@@ -5,6 +5,8 @@ from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from app.db.database import get_db
 from app.routes.auth import get_current_user
+from app.services.progress_tracker import record_skill_observations
+from app.services.search import match_student_ids_clause
 from app.services.availability_validator import (
     get_teacher_availability_windows,
     is_booking_available
@@ -196,8 +198,9 @@ async def student_submit_progress(body: StudentProgressEntry, request: Request):
     # Validate lesson_id exists
     db = await get_db()
     try:
-        cur = await db.execute("SELECT id FROM lessons WHERE id = ?", (body.lesson_id,))
-        if not await cur.fetchone():
+        cur = await db.execute("SELECT id, difficulty FROM lessons WHERE id = ?", (body.lesson_id,))
+        lesson = await cur.fetchone()
+        if not lesson:
             raise HTTPException(status_code=404, detail="Lesson not found")
 
         # Prevent duplicate submissions
@@ -219,8 +222,11 @@ async def student_submit_progress(body: StudentProgressEntry, request: Request):
                VALUES (?, ?, ?, ?, ?, ?)""",
             (student_id, body.lesson_id, body.score, body.notes, skill_tags_json, None),
         )
-        await db.commit()
         progress_id = cur.lastrowid
+        await record_skill_observations(
+            db, student_id, progress_id, body.score, body.skill_tags, None, difficulty=lesson["difficulty"]
+        )
+        await db.commit()
 
         # Update lesson status to completed
         await db.execute("UPDATE lessons SET status = 'completed' WHERE id = ?", (body.lesson_id,))
@@ -727,10 +733,11 @@ async def teacher_student_list(
         """
         params = []
 
-        # Search filter
+        # Search filter (FTS prefix match on name, diacritic-insensitive)
         if q:
-            base_query += " AND LOWER(s.name) LIKE ?"
-            params.append(f"%{q.lower()}%")
+            clause, clause_params = match_student_ids_clause(q)
+            base_query += clause
+            params.extend(clause_params)
 
         # Needs assessment filter
         if needs_assessment == 1:
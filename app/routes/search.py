@@ -0,0 +1,41 @@
+"""Teacher search across students, lessons, learning points and concept cards."""
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from app.db.database import get_db
+from app.routes.scheduling import _require_teacher
+from app.services.search import SEARCH_SOURCES, search
+
+router = APIRouter(tags=["search"])
+
+
+@router.get("/api/teacher/search")
+async def teacher_search(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    types: str | None = None,
+    student_id: int | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    """Teacher-only: ranked full-text search.
+
+    Query params:
+    - q: free text; every word is matched as a prefix, diacritics ignored
+    - types: comma-separated subset of student,lesson,learning_point,concept_card
+    - student_id: restrict results to one student
+    - limit / offset: pagination (response includes has_more)
+    """
+    await _require_teacher(request)
+
+    kinds = None
+    if types:
+        kinds = [t.strip() for t in types.split(",") if t.strip()]
+        unknown = [t for t in kinds if t not in SEARCH_SOURCES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown search types: {', '.join(unknown)}")
+
+    db = await get_db()
+    try:
+        return await search(db, q, kinds=kinds, student_id=student_id, limit=limit, offset=offset)
+    finally:
+        await db.close()
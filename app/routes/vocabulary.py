@@ -1,8 +1,9 @@
 import json
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Optional
 from app.db.database import get_db
+from app.db.unit_of_work import UnitOfWork, get_uow
 from app.services.srs_engine import sm2_update
 from app.services.xp_engine import award_xp
 from app.routes.challenges import update_challenge_progress
@@ -55,69 +56,66 @@ async def get_due_cards(student_id: int):
 
 
 @router.post("/{student_id}/add")
-async def add_card(student_id: int, card: ConceptCard):
-    db = await get_db()
-    try:
-        # Check for duplicate
-        cursor = await db.execute(
-            "SELECT id FROM math_concept_cards WHERE student_id = ? AND concept = ?",
-            (student_id, card.concept),
-        )
-        if await cursor.fetchone():
-            raise HTTPException(status_code=409, detail="Card already exists for this concept")
-
-        cursor = await db.execute(
-            "INSERT INTO math_concept_cards (student_id, concept, formula, explanation, example, math_domain) VALUES (?, ?, ?, ?, ?, ?)",
-            (student_id, card.concept, card.formula, card.explanation, card.example, card.math_domain),
-        )
-        await db.commit()
-
-        # Update challenge progress for adding concept
-        await update_challenge_progress(student_id, "concept_add")
+async def add_card(student_id: int, card: ConceptCard, uow: UnitOfWork = Depends(get_uow)):
+    db = uow.db
+    # Check for duplicate
+    cursor = await db.execute(
+        "SELECT id FROM math_concept_cards WHERE student_id = ? AND concept = ?",
+        (student_id, card.concept),
+    )
+    if await cursor.fetchone():
+        raise HTTPException(status_code=409, detail="Card already exists for this concept")
 
-        return {"id": cursor.lastrowid, "concept": card.concept, "status": "added"}
-    finally:
-        await db.close()
+    cursor = await db.execute(
+        "INSERT INTO math_concept_cards (student_id, concept, formula, explanation, example, math_domain) VALUES (?, ?, ?, ?, ?, ?)",
+        (student_id, card.concept, card.formula, card.explanation, card.example, card.math_domain),
+    )
+    card_id = cursor.lastrowid
 
+    # Update challenge progress for adding concept
+    await update_challenge_progress(student_id, "concept_add", uow=uow)
 
-@router.post("/{student_id}/review")
-async def submit_review(student_id: int, review: ReviewSubmission):
-    db = await get_db()
-    try:
-        cursor = await db.execute(
-            "SELECT * FROM math_concept_cards WHERE id = ? AND student_id = ?",
-            (review.card_id, student_id),
-        )
-        card = await cursor.fetchone()
-        if not card:
-            raise HTTPException(status_code=404, detail="Card not found")
-
-        updated = sm2_update(
-            ease_factor=card["ease_factor"],
-            interval_days=card["interval_days"],
-            repetitions=card["repetitions"],
-            quality=review.quality,
-        )
+    await uow.commit()
 
-        await db.execute(
-            "UPDATE math_concept_cards SET ease_factor = ?, interval_days = ?, repetitions = ?, next_review = ?, review_count = review_count + 1 WHERE id = ?",
-            (
-                updated["ease_factor"],
-                updated["interval_days"],
-                updated["repetitions"],
-                updated["next_review"],
-                review.card_id,
-            ),
-        )
-        await db.commit()
+    return {"id": card_id, "concept": card.concept, "status": "added"}
 
-        # Award XP for concept review
-        await award_xp(student_id, 10, "concept_review", f"Reviewed: {card['concept']}")
-        await update_challenge_progress(student_id, "review_concept")
 
-        return {"card_id": review.card_id, "next_review": updated["next_review"], "interval_days": updated["interval_days"]}
-    finally:
-        await db.close()
+@router.post("/{student_id}/review")
+async def submit_review(student_id: int, review: ReviewSubmission, uow: UnitOfWork = Depends(get_uow)):
+    db = uow.db
+    cursor = await db.execute(
+        "SELECT * FROM math_concept_cards WHERE id = ? AND student_id = ?",
+        (review.card_id, student_id),
+    )
+    card = await cursor.fetchone()
+    if not card:
+        raise HTTPException(status_code=404, detail="Card not found")
+
+    updated = sm2_update(
+        ease_factor=card["ease_factor"],
+        interval_days=card["interval_days"],
+        repetitions=card["repetitions"],
+        quality=review.quality,
+    )
+
+    await db.execute(
+        "UPDATE math_concept_cards SET ease_factor = ?, interval_days = ?, repetitions = ?, next_review = ?, review_count = review_count + 1 WHERE id = ?",
+        (
+            updated["ease_factor"],
+            updated["interval_days"],
+            updated["repetitions"],
+            updated["next_review"],
+            review.card_id,
+        ),
+    )
+
+    # Award XP for concept review
+    await award_xp(student_id, 10, "concept_review", f"Reviewed: {card['concept']}", uow=uow)
+    await update_challenge_progress(student_id, "review_concept", uow=uow)
+
+    await uow.commit()
+
+    return {"card_id": review.card_id, "next_review": updated["next_review"], "interval_days": updated["interval_days"]}
 
 
 @router.get("/{student_id}/stats")
@@ -6,7 +6,15 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, RedirectResponse
 from pathlib import Path
 from contextlib import asynccontextmanager
-from app.db.database import init_db
+from app.db.database import init_db, close_db
+from app.db.write_queue import write_queue
+from app.services.archiver import archiver
+from app.services.game_content import game_content_pool
+from app.services.llm import llm
+from app.services.prompts import prompts
+from app.services.jobs import job_pool
+from app.services.recall_prefetch import recall_prefetch
+from app.services.single_flight import single_flight
 from app.middleware.auth import AuthMiddleware
 from app.config import settings
 
@@ -39,7 +47,21 @@ else:
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    prompts.load_all()
+    await llm.start()
+    await write_queue.start()
+    await archiver.start()
+    await job_pool.start()
+    await game_content_pool.start()
     yield
+    await game_content_pool.stop()
+    await single_flight.stop()
+    await recall_prefetch.stop()
+    await job_pool.stop()
+    await archiver.stop()
+    await write_queue.stop()
+    await llm.stop()
+    await close_db()
 
 
 app = FastAPI(title="Intake Eval School Math", lifespan=lifespan)
@@ -71,6 +93,8 @@ from app.routes.games import router as games_router
 from app.routes.gamification import router as gamification_router
 from app.routes.scheduling import router as scheduling_router
 from app.routes.admin import router as admin_router
+from app.routes.search import router as search_router
+from app.routes.jobs import router as jobs_router
 
 app.include_router(auth_router)
 app.include_router(intake_router)
@@ -89,6 +113,8 @@ app.include_router(games_router)
 app.include_router(gamification_router)
 app.include_router(scheduling_router)
 app.include_router(admin_router)
+app.include_router(search_router)
+app.include_router(jobs_router)
 
 
 @app.get("/health")
@@ -1,5 +1,5 @@
 import json
-from app.db.database import get_db
+from app.db.unit_of_work import UnitOfWork, unit_of_work
 from app.services.xp_engine import award_xp
 
 ACHIEVEMENT_DEFINITIONS = [
@@ -39,15 +39,20 @@ ACHIEVEMENT_DEFINITIONS = [
 ]
 
 
-async def check_achievements(student_id: int, context: dict = None) -> list[dict]:
+async def check_achievements(
+    student_id: int,
+    context: dict = None,
+    uow: UnitOfWork | None = None,
+) -> list[dict]:
     """
     Check and award any newly earned achievements.
     context: optional dict with keys like 'action', 'score', 'hour', etc.
+    uow: optional unit of work to run in; its owner commits.
     Returns list of newly earned achievement dicts.
     """
     context = context or {}
-    db = await get_db()
-    try:
+    async with unit_of_work(uow) as uow:
+        db = uow.db
         # Get existing achievements
         cursor = await db.execute(
             "SELECT type FROM achievements WHERE student_id = ?", (student_id,)
@@ -90,10 +95,14 @@ async def check_achievements(student_id: int, context: dict = None) -> list[dict
         )
         concepts_mastered = (await cursor.fetchone())["mastered"]
 
-        # Recall stats
+        # Recall stats (archived sessions live on in recall_rollups)
         cursor = await db.execute(
-            "SELECT MAX(overall_score) as max_recall FROM recall_sessions WHERE student_id = ? AND status = 'completed'",
-            (student_id,),
+            """SELECT MAX(best) as max_recall FROM (
+                   SELECT MAX(overall_score) as best FROM recall_sessions WHERE student_id = ? AND status = 'completed'
+                   UNION ALL
+                   SELECT best_score FROM recall_rollups WHERE student_id = ?
+               )""",
+            (student_id, student_id),
         )
         recall_row = await cursor.fetchone()
         max_recall = recall_row["max_recall"] if recall_row else 0
@@ -148,17 +157,12 @@ async def check_achievements(student_id: int, context: dict = None) -> list[dict
                 )
                 newly_earned.append(ach_def)
 
-        if newly_earned:
-            await db.commit()
-
-            # Award XP for each achievement
-            for ach in newly_earned:
-                if ach["xp_reward"] > 0:
-                    await award_xp(student_id, ach["xp_reward"], "achievement", ach["title"])
+        # Award XP for each achievement
+        for ach in newly_earned:
+            if ach["xp_reward"] > 0:
+                await award_xp(student_id, ach["xp_reward"], "achievement", ach["title"], uow=uow)
 
         return newly_earned
-    finally:
-        await db.close()
 
 
 def datetime_hour() -> int:
@@ -0,0 +1,253 @@
+"""Local grading of short math answers.
+
+``grade_answer`` decides without the model whether a student's answer
+matches the expected one, and returns None when it cannot tell. It
+recognises, in this order:
+
+- blank answers ("", "(no answer)", "nie wiem") as wrong;
+- multiple-choice letters ("b", "B)") mapped onto the options;
+- the same text, ignoring case and spacing between non-digits ("2 3" is
+  not "23"); picking any other of the options is wrong, even one of equal
+  value ("45 * 10^-5" when the question asks for "4.5 * 10^-4");
+- true/false words (prawda/falsz, tak/nie);
+- numbers: integers, decimals with either separator, fractions, mixed
+  numbers, percentages, scientific notation, thousands written with a
+  space ("2 500"), an optional unit ("48 cm^2") and solution lists
+  ("x = 2 lub x = -3"). Rounded decimals with two or more places are
+  accepted (2.667 for 8/3), as are values that round to an expected
+  decimal (31.42 for 31.4). Values in different units ("120 mm" for
+  "12 cm") and answers that are not a number it can read ("1e3") are
+  left to the caller;
+- expressions and equations, compared with ``math_expr.equivalent``
+  ("2(3x + 1)" for "6x + 2", "y = 3 + 2x" for "y = 2x + 3"). An expected
+  assignment ("y = 2x + 3") only matches the same assignment or its right
+  side; any other equation is left to the caller, so copying out the
+  unsolved equation is not a solution.
+
+Anything with words or functions (sqrt, pi, sin) is left to the caller:
+the recall evaluator sends it to the model, and assessment scoring falls
+back to comparing the text.
+"""
+
+import re
+from dataclasses import dataclass
+from fractions import Fraction
+
+from app.services.math_expr import MathExprError, equivalent, parse
+from app.services.speed_calc import parse_answer
+
+
+@dataclass(frozen=True)
+class Grade:
+    correct: bool
+    # what decided it: blank, text, boolean, number, expression or choice
+    method: str
+
+
+@dataclass(frozen=True)
+class _Number:
+    value: Fraction
+    unit: str | None = None
+    percent: bool = False
+    # decimal places as written, 0 for integers and fractions
+    decimals: int = 0
+
+
+_BLANK = {"", "(no answer)", "(brak odpowiedzi)", "-", "?", "nie wiem", "brak"}
+_BOOLEANS = {
+    "prawda": True, "tak": True, "true": True,
+    "falsz": False, "fałsz": False, "nie": False, "false": False,
+}
+_UNIT = re.compile(
+    r"^(?P<value>.+?)\s*(?P<unit>(?:mm|cm|dm|km|m)(?:\^?[23]|[²³])?|kg|dag|g|ml|l|zl|zł|gr|stopni|stopnie|°|h|min|s)$"
+)
+_ASSIGNMENT = re.compile(r"^([a-z])\s*=\s*([^=]+)$")
+_ALTERNATIVES = re.compile(r"\s*;\s*|\s+(?:lub|i|or|and)\s+|,\s+")
+_WORD = re.compile(r"[a-zA-Zżźćńółęąś]{2,}")
+_CHOICE_LETTER = re.compile(r"^\(?([a-h])[).]?$")
+_SPACED_DIGITS = re.compile(r"\d\s+\d")
+
+
+def _normalize(text) -> str:
+    text = str(text).strip().lower()
+    for old, new in (("−", "-"), ("·", "*"), ("×", "*"), ("²", "^2"), ("³", "^3")):
+        text = text.replace(old, new)
+    return " ".join(text.split()).rstrip(".")
+
+
+def _number(text: str) -> _Number | None:
+    percent = text.endswith("%")
+    if percent:
+        text = text[:-1].strip()
+    unit = None
+    match = _UNIT.match(text)
+    if match and not percent:
+        text = match.group("value")
+        unit = match.group("unit").replace("^", "").replace("zł", "zl").replace("stopnie", "stopni")
+        unit = "stopni" if unit == "°" else unit
+    value = parse_answer(text)
+    decimals = 0
+    if value is not None:
+        if re.fullmatch(r"-?\d+[.,]\d+", text):
+            decimals = len(re.split(r"[.,]", text)[1])
+    elif not _WORD.search(text):
+        # Numeric expressions such as "4.5 * 10^-4"
+        try:
+            expression = parse(text)
+            if expression.is_equation or expression.variables:
+                return None
+            value = expression.evaluate()
+        except (MathExprError, ZeroDivisionError):
+            return None
+    if value is None:
+        return None
+    return _Number(value, unit, percent, decimals)
+
+
+def _same_number(expected: _Number, given: _Number) -> bool | None:
+    """None when the units differ: telling needs a unit conversion."""
+    if expected.unit and given.unit and expected.unit != given.unit:
+        return None
+    # The expected value in the student's notation
+    if expected.percent == given.percent:
+        targets = [expected.value]
+    elif expected.percent:
+        # "0.375" or "37.5" for "37.5%"
+        targets = [expected.value / 100, expected.value]
+    else:
+        targets = [expected.value * 100]
+    for target in targets:
+        if given.value == target:
+            return True
+        if given.decimals >= 2 and abs(given.value - target) <= Fraction(1, 2 * 10 ** given.decimals):
+            return True
+    if expected.decimals and expected.percent == given.percent:
+        # The expected answer is itself rounded
+        return abs(given.value - expected.value) <= Fraction(1, 2 * 10 ** expected.decimals)
+    return False
+
+
+def _solutions(text: str) -> list[tuple[str | None, _Number]] | None:
+    """(variable, value) of "5", "x = 5" or "x = 2 lub x = -3"; None unless all are numbers."""
+    values = []
+    for part in _ALTERNATIVES.split(text):
+        match = _ASSIGNMENT.match(part)
+        number = _number(match.group(2).strip() if match else part)
+        if number is None:
+            return None
+        values.append((match.group(1) if match else None, number))
+    return values
+
+
+def _same_solutions(expected: list, given: list) -> bool | None:
+    if len(expected) != len(given):
+        return False
+    remaining = list(given)
+    undecided = False
+    for variable, value in expected:
+        match = None
+        for candidate in remaining:
+            if variable is None or candidate[0] is None or variable == candidate[0]:
+                same = _same_number(value, candidate[1])
+                if same:
+                    match = candidate
+                    break
+                undecided = undecided or same is None
+        if match is None:
+            return None if undecided else False
+        remaining.remove(match)
+    return True
+
+
+def _assignment(text: str) -> tuple[str, str] | None:
+    """(variable, right side) of an assignment such as "y = 2x + 3"; None for other text."""
+    match = _ASSIGNMENT.match(text)
+    if match and match.group(1) not in re.sub(r"[^a-z]", "", match.group(2)):
+        return match.group(1), match.group(2).strip()
+    return None
+
+
+def _expressions_match(expected: str, given: str) -> bool | None:
+    if _WORD.search(expected) or _WORD.search(given):
+        return None
+    expected_assignment, given_assignment = _assignment(expected), _assignment(given)
+    try:
+        if expected_assignment is not None:
+            # A solution: the same variable or a bare value, never the
+            # unsolved equation ("2x = 4" for "x = 2")
+            if given_assignment is not None:
+                if given_assignment[0] != expected_assignment[0]:
+                    return None
+                given = given_assignment[1]
+            elif "=" in given:
+                return None
+            return equivalent(expected_assignment[1], given)
+        if "=" in expected and "=" in given:
+            return equivalent(expected, given)
+        return equivalent(expected, given_assignment[1] if given_assignment else given)
+    except (MathExprError, ZeroDivisionError):
+        return None
+
+
+def _resolve_choice(answer: str, options: list[str]) -> str:
+    """Map a choice letter onto its option text; other answers are returned unchanged."""
+    if answer in options:
+        return answer
+    match = _CHOICE_LETTER.match(answer)
+    if match and ord(match.group(1)) - ord("a") < len(options):
+        return options[ord(match.group(1)) - ord("a")]
+    return answer
+
+
+def grade_answer(given, expected, options: list | None = None) -> Grade | None:
+    """Grade ``given`` against ``expected``; None when only a human or the model can tell."""
+    if expected is None:
+        return None
+    given, expected = _normalize(given), _normalize(expected)
+    if not expected:
+        return None
+    if given in _BLANK:
+        return Grade(False, "blank")
+
+    normalized_options = [_normalize(option) for option in options or []]
+    if normalized_options:
+        given = _resolve_choice(given, normalized_options)
+        expected = _resolve_choice(expected, normalized_options)
+
+    if given == expected:
+        return Grade(True, "text")
+    if given.replace(" ", "") == expected.replace(" ", "") and not (
+        _SPACED_DIGITS.search(given) or _SPACED_DIGITS.search(expected)
+    ):
+        # "2x+3" for "2x + 3", but not "2 3" for "23"
+        return Grade(True, "text")
+
+    if given in normalized_options and expected in normalized_options:
+        # Picked another option; distractors may be equal in value but not in form
+        return Grade(False, "choice")
+
+    if expected in _BOOLEANS:
+        return Grade(_BOOLEANS[expected] == _BOOLEANS[given], "boolean") if given in _BOOLEANS else None
+
+    expected_values = _solutions(expected)
+    if expected_values is not None:
+        given_values = _solutions(given)
+        if given_values is None:
+            # "1e3", "2x = 4": not a number this module can read
+            return None
+        same = _same_solutions(expected_values, given_values)
+        return None if same is None else Grade(same, "number")
+
+    matched = _expressions_match(expected, given)
+    if matched is not None:
+        return Grade(matched, "expression")
+
+    return None
+
+
+def answers_match(given, expected, options: list | None = None) -> bool:
+    """``grade_answer``, falling back to comparing the normalized text."""
+    grade = grade_answer(given, expected, options)
+    if grade is not None:
+        return grade.correct
+    return _normalize(given) == _normalize(expected)
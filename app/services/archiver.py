@@ -0,0 +1,225 @@
+"""Hot/cold archival of append-only history.
+
+Rows older than ``ARCHIVE_AFTER_DAYS`` are moved from ``xp_log``,
+``recall_sessions`` and superseded ``learning_paths`` into identically
+shaped tables in an attached archive database file. The hot tables the
+leaderboard and profile queries read stay small.
+
+A commit spanning two database files is not atomic in WAL mode, so each
+batch moves in two steps. The rows are first copied with INSERT OR IGNORE
+(keyed on the original id) and the archive is committed. A second
+transaction on the main database then deletes only rows already present
+in the archive. A run interrupted anywhere can simply be repeated: nothing
+is deleted before its copy is durable, and nothing is copied twice.
+
+Completed recall sessions are folded into ``recall_rollups`` (migration
+0007) in the same transaction that deletes them, so bests and averages
+stay exact. XP needs no rollup: lifetime totals live on
+``students.total_xp`` and weekly readers look back seven days, which is
+why the horizon never goes below ``MIN_AFTER_DAYS``.
+
+Each step is its own short transaction, and the job yields between
+batches, so classroom writes are never queued behind a long delete.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from app.config import settings
+from app.db.database import db_pool
+from app.db.timestamps import db_now
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SCHEMA = "archive"
+# The weekly leaderboard and XP summaries read the last 7 days of xp_log
+MIN_AFTER_DAYS = 7
+
+
+def archive_database_path() -> str:
+    if settings.archive_database_path:
+        return settings.archive_database_path
+    main = Path(settings.database_path)
+    return str(main.with_name(f"{main.stem}.archive{main.suffix or '.db'}"))
+
+
+# table -> (time column, extra WHERE for eligible rows, rollup statement)
+# The rollup statement folds the rows about to be deleted; ``{batch}`` is
+# replaced by the same WHERE clause the DELETE uses.
+ARCHIVE_TABLES = {
+    "xp_log": (
+        "created_at",
+        "",
+        None,
+    ),
+    "recall_sessions": (
+        "created_at",
+        # Keep each student's latest completed session hot: lesson
+        # generation reads its weak areas.
+        """AND id NOT IN (SELECT MAX(id) FROM main.recall_sessions
+                          WHERE status = 'completed' GROUP BY student_id)""",
+        """INSERT INTO main.recall_rollups (student_id, sessions_completed, score_total, best_score, last_completed_at)
+           SELECT student_id, COUNT(*), COALESCE(SUM(overall_score), 0), MAX(overall_score), MAX(completed_at)
+           {batch} AND status = 'completed'
+           GROUP BY student_id
+           ON CONFLICT (student_id) DO UPDATE SET
+               sessions_completed = sessions_completed + excluded.sessions_completed,
+               score_total = score_total + excluded.score_total,
+               best_score = MAX(COALESCE(best_score, excluded.best_score), COALESCE(excluded.best_score, best_score)),
+               last_completed_at = MAX(COALESCE(last_completed_at, excluded.last_completed_at),
+                                       COALESCE(excluded.last_completed_at, last_completed_at))""",
+    ),
+    "learning_paths": (
+        "updated_at",
+        "AND status = 'superseded'",
+        None,
+    ),
+}
+
+
+class Archiver:
+    def __init__(self, after_days: int, batch_size: int, interval_seconds: float, enabled: bool = True):
+        self.after_days = max(MIN_AFTER_DAYS, after_days)
+        self.batch_size = max(1, batch_size)
+        self.interval_seconds = interval_seconds
+        self.enabled = enabled
+        self._task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+        self.last_run: dict | None = None
+
+    async def start(self) -> None:
+        if not self.enabled or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._loop(), name="archiver")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Archival run failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def run_once(self) -> dict:
+        """Archive everything past the horizon; returns rows moved per table."""
+        async with self._lock:
+            started = time.perf_counter()
+            cutoff = db_now(-timedelta(days=self.after_days))
+            moved = {}
+            async with db_pool.acquire() as db:
+                await db.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (archive_database_path(),))
+                try:
+                    for table in ARCHIVE_TABLES:
+                        columns = await _ensure_archive_table(db, table)
+                        moved[table] = await self._archive_table(db, table, columns, cutoff)
+                finally:
+                    # A cancelled batch leaves its transaction open, and
+                    # DETACH fails while the archive is part of one
+                    if db.in_transaction:
+                        await db.rollback()
+                    await db.execute(f"DETACH DATABASE {ARCHIVE_SCHEMA}")
+            self.last_run = {
+                "cutoff": cutoff,
+                "moved": moved,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                "finished_at": db_now(),
+            }
+            if any(moved.values()):
+                logger.info("Archived %s (cutoff %s)", moved, cutoff)
+            return moved
+
+    async def _archive_table(self, db, table: str, columns: list[str], cutoff: str) -> int:
+        time_column, extra, rollup_sql = ARCHIVE_TABLES[table]
+        eligible = f"FROM main.{table} WHERE {time_column} < ? {extra}"
+        column_list = ", ".join(columns)
+        total = 0
+        while True:
+            # Step 1: copy the batch and make the archive durable
+            await db.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = await db.execute(
+                    f"SELECT MAX(id) FROM (SELECT id {eligible} ORDER BY id LIMIT ?)",
+                    (cutoff, self.batch_size),
+                )
+                max_id = (await cursor.fetchone())[0]
+                if max_id is None:
+                    await db.rollback()
+                    return total
+                await db.execute(
+                    f"INSERT OR IGNORE INTO {ARCHIVE_SCHEMA}.{table} ({column_list}) "
+                    f"SELECT {column_list} {eligible} AND id <= ?",
+                    (cutoff, max_id),
+                )
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+
+            # Step 2: drop from main only what the archive already holds
+            batch = f"{eligible} AND id <= ? AND id IN (SELECT id FROM {ARCHIVE_SCHEMA}.{table})"
+            await db.execute("BEGIN IMMEDIATE")
+            try:
+                if rollup_sql:
+                    await db.execute(rollup_sql.replace("{batch}", batch), (cutoff, max_id))
+                cursor = await db.execute(f"DELETE {batch}", (cutoff, max_id))
+                total += cursor.rowcount
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+            # Let request traffic in between batches
+            await asyncio.sleep(0)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None and not self._task.done(),
+            "archive_path": archive_database_path(),
+            "after_days": self.after_days,
+            "batch_size": self.batch_size,
+            "interval_seconds": self.interval_seconds,
+            "last_run": self.last_run,
+        }
+
+
+async def _ensure_archive_table(db, table: str) -> list[str]:
+    """Create/extend ``archive.<table>`` to match the hot table; return its columns.
+
+    ``id`` stays the primary key so re-archiving a row is a no-op.
+    """
+    cursor = await db.execute(f"PRAGMA main.table_info({table})")
+    hot = [(row["name"], row["type"], row["pk"]) for row in await cursor.fetchall()]
+    cursor = await db.execute(f"PRAGMA {ARCHIVE_SCHEMA}.table_info({table})")
+    existing = {row["name"] for row in await cursor.fetchall()}
+    if not existing:
+        definition = ", ".join(f"{name} {type_}" + (" PRIMARY KEY" if pk else "") for name, type_, pk in hot)
+        await db.execute(f"CREATE TABLE {ARCHIVE_SCHEMA}.{table} ({definition})")
+    else:
+        for name, type_, _pk in hot:
+            if name not in existing:
+                await db.execute(f"ALTER TABLE {ARCHIVE_SCHEMA}.{table} ADD COLUMN {name} {type_}")
+    await db.commit()
+    return [name for name, _type, _pk in hot]
+
+
+archiver = Archiver(
+    after_days=settings.archive_after_days,
+    batch_size=settings.archive_batch_size,
+    interval_seconds=settings.archive_interval_seconds,
+    enabled=settings.archive_enabled,
+)
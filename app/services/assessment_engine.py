@@ -1,9 +1,7 @@
-import json
 import random
-import yaml
-from pathlib import Path
-from openai import AsyncOpenAI
-from app.config import settings
+from app.services.answer_grader import answers_match
+from app.services.llm import llm
+from app.services.prompts import prompts
 from app.models.assessment import (
     Bracket,
     PlacementQuestion,
@@ -14,14 +12,9 @@ from app.models.assessment import (
     QuestionType,
 )
 
-PROMPTS_DIR = Path(__file__).parent.parent.parent / "prompts"
-
 
 class AssessmentEngine:
     _instance = None
-    _question_bank = None
-    _analyzer_prompt = None
-    _math_misconceptions = None
 
     def __new__(cls):
         if cls._instance is None:
@@ -29,22 +22,7 @@ class AssessmentEngine:
         return cls._instance
 
     def _load_question_bank(self):
-        if self._question_bank is None:
-            with open(PROMPTS_DIR / "placement_questions.yaml", "r") as f:
-                self._question_bank = yaml.safe_load(f)
-        return self._question_bank
-
-    def _load_analyzer_prompt(self):
-        if self._analyzer_prompt is None:
-            with open(PROMPTS_DIR / "assessment_analyzer.yaml", "r") as f:
-                self._analyzer_prompt = yaml.safe_load(f)
-        return self._analyzer_prompt
-
-    def _load_math_misconceptions(self):
-        if self._math_misconceptions is None:
-            with open(PROMPTS_DIR / "polish_struggles.yaml", "r") as f:
-                self._math_misconceptions = yaml.safe_load(f)
-        return self._math_misconceptions
+        return prompts.data("placement_questions")
 
     def get_placement_questions(self) -> list[PlacementQuestion]:
         bank = self._load_question_bank()
@@ -73,7 +51,7 @@ class AssessmentEngine:
             q = questions_by_id.get(answer.question_id)
             if q is None:
                 continue
-            if answer.answer.strip().lower() == str(q["correct_answer"]).strip().lower():
+            if answers_match(answer.answer, q["correct_answer"]):
                 correct_count += 1
                 max_correct_difficulty = max(max_correct_difficulty, q["difficulty"])
 
@@ -171,7 +149,7 @@ class AssessmentEngine:
             if q is None:
                 continue
 
-            is_correct = answer.answer.strip().lower() == q.correct_answer.strip().lower()
+            is_correct = answers_match(answer.answer, q.correct_answer, q.options)
             results[q.skill]["total"] += 1
             if is_correct:
                 results[q.skill]["correct"] += 1
@@ -211,8 +189,7 @@ class AssessmentEngine:
         questions: list[DiagnosticQuestion],
         answers: list[DiagnosticAnswer],
     ) -> dict:
-        prompt_data = self._load_analyzer_prompt()
-        math_misconceptions = self._load_math_misconceptions()
+        template = prompts.get("assessment_analyzer")
 
         # Build diagnostic responses text
         questions_by_id = {q.id: q for q in questions}
@@ -223,7 +200,7 @@ class AssessmentEngine:
             q = questions_by_id.get(answer.question_id)
             if q is None:
                 continue
-            is_correct = answer.answer.strip().lower() == q.correct_answer.strip().lower()
+            is_correct = answers_match(answer.answer, q.correct_answer, q.options)
             status = "CORRECT" if is_correct else "INCORRECT"
             responses_lines.append(
                 f"[{q.skill.upper()} - {q.topic}] Q: {q.question} | "
@@ -235,7 +212,7 @@ class AssessmentEngine:
                     f"got '{answer.answer}' — Question: {q.question}"
                 )
 
-        user_message = prompt_data["user_template"].format(
+        messages = template.messages(
             student_id=student_id,
             name=student_info.get("name", "Unknown"),
             age=student_info.get("age", "Not specified"),
@@ -247,26 +224,15 @@ class AssessmentEngine:
             geometria_score=f"{diagnostic_scores['geometria']['correct']}/{diagnostic_scores['geometria']['total']} ({diagnostic_scores['geometria']['score']}%)",
             overall_score=f"{diagnostic_scores['overall_score']}%",
             incorrect_details="\n".join(incorrect_lines) if incorrect_lines else "No incorrect answers.",
-            math_misconceptions=yaml.dump(
-                math_misconceptions, default_flow_style=False, allow_unicode=True
-            ),
+            math_misconceptions=prompts.fragment("math_misconceptions"),
         )
 
-        client = AsyncOpenAI(api_key=settings.api_key)
-
-        response = await client.chat.completions.create(
-            model=settings.model_name,
-            messages=[
-                {"role": "system", "content": prompt_data["system_prompt"]},
-                {"role": "user", "content": user_message},
-            ],
+        return await llm.complete_json(
+            messages,
             temperature=0.3,
-            response_format={"type": "json_object"},
+            cache="assessment_analyzer",
         )
 
-        result_text = response.choices[0].message.content
-        return json.loads(result_text)
-
 
 # Module-level singleton
 assessment_engine = AssessmentEngine()
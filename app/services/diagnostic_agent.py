@@ -1,26 +1,12 @@
-import json
-import yaml
-from pathlib import Path
-from openai import AsyncOpenAI
-from app.config import settings
+from app.services.llm import llm
+from app.services.prompts import prompts
 from app.models.student import LearnerProfile
 
-PROMPTS_DIR = Path(__file__).parent.parent.parent / "prompts"
-
-
-def load_prompt(name: str) -> dict:
-    with open(PROMPTS_DIR / name, "r") as f:
-        return yaml.safe_load(f)
-
 
 async def run_diagnostic(student_id: int, intake_data: dict) -> LearnerProfile:
-    diagnostic_prompt = load_prompt("diagnostic.yaml")
-    math_misconceptions = load_prompt("polish_struggles.yaml")
+    template = prompts.get("diagnostic")
 
-    system_prompt = diagnostic_prompt["system_prompt"]
-    user_template = diagnostic_prompt["user_template"]
-
-    user_message = user_template.format(
+    messages = template.messages(
         name=intake_data.get("name", "Unknown"),
         age=intake_data.get("age", "Not specified"),
         current_level=intake_data.get("current_level", "Unknown"),
@@ -28,24 +14,14 @@ async def run_diagnostic(student_id: int, intake_data: dict) -> LearnerProfile:
         problem_areas=", ".join(intake_data.get("problem_areas", [])),
         filler=intake_data.get("filler", "student"),
         additional_notes=intake_data.get("additional_notes", "None"),
-        math_misconceptions=yaml.dump(math_misconceptions, default_flow_style=False, allow_unicode=True),
+        math_misconceptions=prompts.fragment("math_misconceptions"),
     )
 
-    client = AsyncOpenAI(api_key=settings.api_key)
-
-    response = await client.chat.completions.create(
-        model=settings.model_name,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_message},
-        ],
+    result = await llm.complete_json(
+        messages,
         temperature=0.3,
-        response_format={"type": "json_object"},
     )
 
-    result_text = response.choices[0].message.content
-    result = json.loads(result_text)
-
     return LearnerProfile(
         student_id=student_id,
         identified_gaps=result.get("identified_gaps", []),
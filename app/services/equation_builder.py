@@ -0,0 +1,214 @@
+"""Procedural equations for the equation-builder game.
+
+Equations come from template families with random coefficients chosen so
+that every solution is a whole number:
+
+- ``linear``: ax + b = c
+- ``two_step``: ax + b = cx + d
+- ``brackets``: a(x + b) = c
+- ``fraction``: x/a + b = c
+- ``quadratic``: x² + px + q = 0 with whole roots
+
+``LEVELS`` sets the family mix, the coefficient and solution ranges, and
+whether negatives appear. Coefficient ranges widen over the game like the
+speed-calc difficulty curve. Parts come from ``math_expr.split_parts``,
+so they are tokenised the same way every time. ``check_arrangement``
+accepts any ordering of the parts that forms an equivalent equation,
+e.g. "7 = 2x + 3" for "2x + 3 = 7".
+"""
+
+import random
+from collections import Counter
+from dataclasses import dataclass
+
+from app.services.math_expr import MathExprError, equivalent, join_parts, parse, split_parts
+from app.services.speed_calc import DEFAULT_LEVEL
+
+
+@dataclass(frozen=True)
+class EquationLevel:
+    # family -> relative weight
+    mix: dict[str, float]
+    coefficients: tuple[int, int]
+    solutions: tuple[int, int]
+    allow_negative: bool = False
+    # (start, end): share of the coefficient range in play, first to last equation
+    curve: tuple[float, float] = (0.5, 1.0)
+
+
+LEVELS = {
+    "podstawowy": EquationLevel(
+        mix={"linear": 3, "brackets": 1},
+        coefficients=(2, 6),
+        solutions=(1, 10),
+    ),
+    "gimnazjalny": EquationLevel(
+        mix={"linear": 1, "two_step": 2, "brackets": 2, "fraction": 1},
+        coefficients=(2, 9),
+        solutions=(-10, 10),
+        allow_negative=True,
+    ),
+    "licealny": EquationLevel(
+        mix={"two_step": 1, "brackets": 2, "fraction": 1, "quadratic": 2},
+        coefficients=(2, 12),
+        solutions=(-12, 12),
+        allow_negative=True,
+    ),
+    "licealny_rozszerzony": EquationLevel(
+        mix={"two_step": 1, "brackets": 1, "fraction": 1, "quadratic": 3},
+        coefficients=(2, 15),
+        solutions=(-15, 15),
+        allow_negative=True,
+        curve=(0.7, 1.0),
+    ),
+}
+
+HINTS = {
+    "linear": "Rownanie liniowe z jedna niewiadoma",
+    "two_step": "Niewiadoma wystepuje po obu stronach rownania",
+    "brackets": "Rownanie z nawiasem",
+    "fraction": "Rownanie z ulamkiem",
+    "quadratic": "Rownanie kwadratowe",
+}
+
+
+@dataclass
+class Equation:
+    family: str
+    parts: list[str]
+    solutions: list[int]
+    hint: str = ""
+
+    @property
+    def equation(self) -> str:
+        return join_parts(self.parts)
+
+    def to_dict(self, index: int) -> dict:
+        return {
+            "id": index,
+            "equation": self.equation,
+            "parts": self.parts,
+            "hint": self.hint,
+            "family": self.family,
+            "solution": " lub ".join(f"x = {s}" for s in self.solutions),
+        }
+
+
+def _terms(*terms: tuple[int, str]) -> list[str]:
+    """Signed (coefficient, variable) terms as parts; zero terms are dropped."""
+    parts: list[str] = []
+    for coefficient, variable in terms:
+        if coefficient == 0:
+            continue
+        magnitude = abs(coefficient)
+        text = variable if variable and magnitude == 1 else f"{magnitude}{variable}"
+        if parts:
+            parts += ["+" if coefficient > 0 else "-", text]
+        else:
+            parts.append(text if coefficient > 0 else f"-{text}")
+    return parts or ["0"]
+
+
+class _Draw:
+    def __init__(self, rng: random.Random, spec: EquationLevel, scale: float):
+        self.rng, self.spec = rng, spec
+        low, high = spec.coefficients
+        self.high = max(low, round(low + (high - low) * scale))
+
+    def coefficient(self, signed: bool = False) -> int:
+        value = self.rng.randint(self.spec.coefficients[0], self.high)
+        return -value if signed and self.spec.allow_negative and self.rng.random() < 0.3 else value
+
+    def solution(self) -> int:
+        low, high = self.spec.solutions
+        return self.rng.randint(low, high)
+
+
+def _linear(draw: _Draw) -> tuple[list[str], list[int]]:
+    a, b, x = draw.coefficient(signed=True), draw.coefficient(signed=True), draw.solution()
+    return _terms((a, "x"), (b, "")) + ["="] + _terms((a * x + b, "")), [x]
+
+
+def _two_step(draw: _Draw) -> tuple[list[str], list[int]]:
+    a = draw.coefficient(signed=True)
+    c = draw.coefficient(signed=True)
+    while c == a:
+        c = draw.coefficient(signed=True)
+    b, x = draw.coefficient(signed=True), draw.solution()
+    d = (a - c) * x + b
+    return _terms((a, "x"), (b, "")) + ["="] + _terms((c, "x"), (d, "")), [x]
+
+
+def _brackets(draw: _Draw) -> tuple[list[str], list[int]]:
+    a, b, x = draw.coefficient(signed=True), draw.coefficient(signed=True), draw.solution()
+    a_part = _terms((a, ""))[0]
+    return [a_part, "("] + _terms((1, "x"), (b, "")) + [")", "="] + _terms((a * (x + b), "")), [x]
+
+
+def _fraction(draw: _Draw) -> tuple[list[str], list[int]]:
+    a, b = draw.coefficient(), draw.coefficient(signed=True)
+    x = a * draw.rng.randint(1, max(1, draw.spec.solutions[1] // 2))
+    if draw.spec.allow_negative and draw.rng.random() < 0.3:
+        x = -x
+    return [f"x/{a}", "+" if b > 0 else "-", str(abs(b)), "="] + _terms((x // a + b, "")), [x]
+
+
+def _quadratic(draw: _Draw) -> tuple[list[str], list[int]]:
+    r1, r2 = draw.solution(), draw.solution()
+    while r1 == r2 == 0:
+        r2 = draw.solution()
+    p, q = -(r1 + r2), r1 * r2
+    return _terms((1, "x²"), (p, "x"), (q, "")) + ["=", "0"], sorted({r1, r2})
+
+
+FAMILIES = {
+    "linear": _linear,
+    "two_step": _two_step,
+    "brackets": _brackets,
+    "fraction": _fraction,
+    "quadratic": _quadratic,
+}
+
+
+def level_spec(level: str | None) -> EquationLevel:
+    return LEVELS.get(level or DEFAULT_LEVEL, LEVELS[DEFAULT_LEVEL])
+
+
+def generate_equations(level: str | None, count: int = 5, seed: int | None = None) -> list[Equation]:
+    """``count`` equations for ``level``; the same seed always gives the same equations."""
+    spec = level_spec(level)
+    rng = random.Random(seed)
+    families, weights = list(spec.mix), list(spec.mix.values())
+    start, end = spec.curve
+
+    equations, seen = [], set()
+    for i in range(count):
+        scale = start + (end - start) * (i / (count - 1) if count > 1 else 1.0)
+        for _attempt in range(5):
+            family = rng.choices(families, weights)[0]
+            parts, solutions = FAMILIES[family](_Draw(rng, spec, scale))
+            if tuple(parts) not in seen:
+                break
+        seen.add(tuple(parts))
+        equations.append(Equation(family, parts, solutions, HINTS[family]))
+    return equations
+
+
+def normalize_parts(equation: str) -> list[str] | None:
+    """Parts of an equation written elsewhere (e.g. by the model); None if unparseable."""
+    try:
+        parse(equation)
+        return split_parts(equation)
+    except MathExprError:
+        return None
+
+
+def check_arrangement(equation: str, parts: list[str]) -> bool:
+    """True if ``parts`` uses exactly the equation's parts and forms an equivalent equation."""
+    expected = normalize_parts(equation)
+    if expected is None or Counter(p.strip() for p in parts) != Counter(expected):
+        return False
+    try:
+        return equivalent(equation, join_parts([p.strip() for p in parts]))
+    except MathExprError:
+        return False
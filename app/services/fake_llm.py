@@ -0,0 +1,394 @@
+"""In-process stand-in for the OpenAI chat-completions API.
+
+With ``LLM_PROVIDER=fake`` the gateway's httpx client is given a
+``FakeLLMTransport`` instead of a network transport. No key and no network
+are needed, so the full app can be load-tested and profiled offline.
+
+The request's system prompt is matched against the prompt registry, or the
+game generator's JSON shape is recognised, and a schema-valid reply is
+built for it. IDs in the user message (learning point ids, requested
+counts) are echoed back, so downstream code takes its normal paths.
+Streaming requests get SSE chunks.
+
+Knobs (all ``LLM_FAKE_*``):
+- latency per call: ``fixed``, ``uniform`` (0..2x mean) or ``lognormal``
+  around ``LATENCY_MS`` with ``LATENCY_SIGMA``;
+- ``ERROR_RATE``: fraction of calls answered with a 500/429 (the SDK's
+  retry policy applies as it would in production);
+- ``STREAM_TOKENS``: number of chunks a streamed reply is split into;
+- ``SEED``: makes the latency/error sequence reproducible.
+"""
+
+import asyncio
+import json
+import math
+import random
+import re
+import time
+
+import httpx
+
+from app.config import settings
+from app.services.prompts import prompts
+
+FAKE_BASE_URL = "http://fake-llm.local/v1"
+
+_LEVEL = "podstawowy"
+
+
+def _lesson(_user: str) -> dict:
+    exercise = {
+        "type": "oblicz",
+        "instruction": "Oblicz wartosc wyrazenia.",
+        "content": "3/4 + 1/8",
+        "answer": "7/8",
+        "hint": "Sprowadz ulamki do wspolnego mianownika.",
+        "solution_steps": ["3/4 = 6/8", "6/8 + 1/8 = 7/8"],
+    }
+    return {
+        "objective": "Dodawanie ulamkow o roznych mianownikach",
+        "explanation": "Aby dodac ulamki, sprowadzamy je do wspolnego mianownika.",
+        "exercises": [exercise],
+        "practice_problems": ["1/2 + 1/3", "2/5 + 1/10"],
+        "key_formulas": ["a/b + c/d = (ad + cb) / bd"],
+        "difficulty": _LEVEL,
+        "math_domain": "arytmetyka",
+        "rozgrzewka": {
+            "description": "Szybkie liczenie w pamieci",
+            "activity": "Podaj NWW liczb 4 i 6, 3 i 5, 8 i 12.",
+            "duration_minutes": 5,
+            "materials": [],
+        },
+        "wyjasnienie_tematu": {
+            "topic": "Ulamki zwykle",
+            "explanation": "Wspolny mianownik to wspolna wielokrotnosc mianownikow.",
+            "definitions": ["Mianownik - liczba pod kreska ulamkowa"],
+            "examples": ["1/2 + 1/4 = 2/4 + 1/4 = 3/4"],
+            "visual_aid": None,
+        },
+        "przyklady_rozwiazane": {
+            "exercises": [exercise],
+            "instructions": "Przeanalizuj kazdy krok.",
+            "instructions_pl": "Przeanalizuj kazdy krok.",
+        },
+        "zadania_do_praktyki": {
+            "problems": [
+                {"content": "2/3 + 1/6", "answer": "5/6", "hints": ["NWW(3, 6) = 6"], "difficulty": "latwe"},
+                {"content": "5/12 + 3/8", "answer": "19/24", "hints": ["NWW(12, 8) = 24"], "difficulty": "srednie"},
+            ],
+            "description": "Rozwiaz samodzielnie.",
+            "hints": ["Szukaj najmniejszej wspolnej wielokrotnosci."],
+            "success_criteria": "Co najmniej 2 poprawne odpowiedzi.",
+        },
+        "podsumowanie": {
+            "summary": "Dodajemy ulamki po sprowadzeniu do wspolnego mianownika.",
+            "key_formulas": ["a/b + c/d = (ad + cb) / bd"],
+            "homework": "Zadania 1-5 ze strony 42.",
+            "next_preview": "Odejmowanie ulamkow.",
+        },
+    }
+
+
+def _diagnostic(_user: str) -> dict:
+    return {
+        "identified_gaps": [{
+            "area": "ulamki",
+            "severity": "medium",
+            "description": "Myli licznik z mianownikiem przy dodawaniu.",
+            "context": "Formularz zgloszeniowy",
+        }],
+        "priority_areas": ["ulamki", "rownania liniowe"],
+        "profile_summary": "Uczen dobrze liczy, ale potrzebuje utrwalenia ulamkow.",
+        "recommended_start_level": _LEVEL,
+    }
+
+
+def _assessment(_user: str) -> dict:
+    skills = [
+        {"skill": skill, "score": score, "level": _LEVEL, "details": f"Analiza: {skill}"}
+        for skill, score in (("arytmetyka", 72.0), ("algebra", 55.0), ("geometria", 61.0))
+    ]
+    return {
+        "determined_level": _LEVEL,
+        "confidence_score": 0.8,
+        "sub_skill_breakdown": skills,
+        "weak_areas": ["ulamki", "rownania"],
+        "common_misconceptions": [{
+            "area": "ulamki",
+            "description": "Dodaje liczniki i mianowniki osobno.",
+            "evidence": "1/2 + 1/3 = 2/5",
+        }],
+        "summary": "Solidne podstawy, luki w algebrze.",
+        "recommendations": ["Powtorzyc ulamki", "Cwiczyc rownania liniowe"],
+    }
+
+
+def _learning_path(_user: str) -> dict:
+    weeks = [{
+        "week": week,
+        "theme": f"Tydzien {week}",
+        "objectives": ["Utrwalenie podstaw"],
+        "math_focus": "ulamki" if week <= 6 else "rownania",
+        "math_domain": "arytmetyka" if week <= 6 else "algebra",
+        "skills": ["obliczenia", "rozumowanie"],
+        "activities": ["Zadania z podrecznika"],
+        "homework": "Karta pracy",
+        "notes": "",
+        "is_milestone": week % 4 == 0,
+    } for week in range(1, 13)]
+    return {
+        "title": "Sciezka: od ulamkow do rownan",
+        "target_level": "gimnazjalny",
+        "current_level": _LEVEL,
+        "overview": "Dwanascie tygodni utrwalania arytmetyki i wprowadzenia algebry.",
+        "weeks": weeks,
+        "milestones": [{
+            "week": week,
+            "name": f"Sprawdzian {week // 4}",
+            "description": "Sprawdzian z materialu",
+            "success_criteria": ["70% poprawnych odpowiedzi"],
+        } for week in (4, 8, 12)],
+    }
+
+
+def _extract_points(_user: str) -> dict:
+    return {"learning_points": [
+        {
+            "point_type": "metoda",
+            "content": "Dodawanie ulamkow o roznych mianownikach",
+            "explanation": "Sprowadzamy do wspolnego mianownika, potem dodajemy liczniki.",
+            "example_problem": "1/2 + 1/3",
+            "importance_weight": 4,
+        },
+        {
+            "point_type": "wzor_formula",
+            "content": "a/b + c/d = (ad + cb) / bd",
+            "explanation": "Ogolny wzor na sume ulamkow.",
+            "example_problem": "2/3 + 1/4",
+            "importance_weight": 3,
+        },
+    ]}
+
+
+def _recall_questions(user: str) -> dict:
+    ids = [int(i) for i in re.findall(r"ID: (\d+)", user)] or [1]
+    return {
+        "questions": [{
+            "point_id": point_id,
+            "question_type": "fill_blank",
+            "question_text": "Ile wynosi 1/2 + 1/4?",
+            "options": None,
+            "correct_answer": "3/4",
+            "hint": "Wspolny mianownik to 4.",
+        } for point_id in ids],
+        "encouragement": "Dasz rade!",
+    }
+
+
+def _evaluate_recall(user: str) -> dict:
+    ids = [int(i) for i in re.findall(r"point_id=(\d+)", user)]
+    evaluations = [{
+        "point_id": point_id,
+        "score": 80 if n % 2 == 0 else 40,
+        "correct": n % 2 == 0,
+        "feedback": "Dobrze!" if n % 2 == 0 else "Sprawdz wspolny mianownik.",
+    } for n, point_id in enumerate(ids)]
+    overall = round(sum(e["score"] for e in evaluations) / len(evaluations)) if evaluations else 0
+    return {
+        "overall_score": overall,
+        "evaluations": evaluations,
+        "weak_areas": ["ulamki"] if any(not e["correct"] for e in evaluations) else [],
+        "encouragement": "Tak trzymaj!",
+    }
+
+
+def _count(user: str) -> int:
+    match = re.search(r"Wygeneruj (\d+)", user)
+    return int(match.group(1)) if match else 5
+
+
+def _game_pairs(user: str) -> dict:
+    return {"pairs": [{"concept": f"Pole kwadratu {n}", "formula": f"P = a^2 (a = {n})"}
+                      for n in range(1, _count(user) + 1)]}
+
+
+def _game_equations(user: str) -> dict:
+    return {"equations": [{
+        "equation": f"2x + {n} = {3 * n}",
+        "parts": ["2x", "+", str(n), "=", str(3 * n)],
+        "hint": "Rownanie liniowe z jedna niewiadoma",
+    } for n in range(1, _count(user) + 1)]}
+
+
+def _game_solutions(user: str) -> dict:
+    return {"solutions": [{
+        "problem": f"Oblicz: {n} * (2 + 4)",
+        "shown_solution": f"{n} * 2 + 4 = {n * 2 + 4}" if n % 2 else f"{n} * 6 = {n * 6}",
+        "has_error": bool(n % 2),
+        "correct_solution": f"{n} * 6 = {n * 6}",
+        "explanation": "Najpierw dzialanie w nawiasie.",
+    } for n in range(1, _count(user) + 1)]}
+
+
+def _game_problems(user: str) -> dict:
+    return {"problems": [{"problem": f"{n} * 4", "answer": str(n * 4), "hint": f"Pomnoz {n} razy 4"}
+                         for n in range(11, 11 + _count(user))]}
+
+
+# prompt registry name -> builder
+PROMPT_BUILDERS = {
+    "lesson_generator": _lesson,
+    "diagnostic": _diagnostic,
+    "assessment_analyzer": _assessment,
+    "learning_path": _learning_path,
+    "extract_learning_points": _extract_points,
+    "generate_recall_questions": _recall_questions,
+    "evaluate_recall": _evaluate_recall,
+}
+
+# JSON key shown in the game generator's example -> builder
+GAME_BUILDERS = {
+    '"pairs"': _game_pairs,
+    '"equations"': _game_equations,
+    '"solutions"': _game_solutions,
+    '"problems"': _game_problems,
+}
+
+CONVERSATION_REPLY = (
+    "Swietnie! Zacznijmy od tego, co juz wiesz. Jesli mamy rownanie 2x + 3 = 7, "
+    "to najpierw odejmujemy 3 od obu stron, a potem dzielimy przez 2. Ile wynosi x?"
+)
+
+
+def build_reply(messages: list[dict]) -> str:
+    """Content the fake model answers with for this conversation."""
+    system = next((m.get("content") or "" for m in messages if m.get("role") == "system"), "")
+    user = "\n".join(m.get("content") or "" for m in messages if m.get("role") == "user")
+    for name, builder in PROMPT_BUILDERS.items():
+        if system.startswith(prompts.get(name).system_prompt):
+            return json.dumps(builder(user), ensure_ascii=False)
+    for marker, builder in GAME_BUILDERS.items():
+        if marker in user:
+            return json.dumps(builder(user), ensure_ascii=False)
+    return CONVERSATION_REPLY
+
+
+def _tokens(text: str) -> int:
+    # Roughly four characters per token, like the tiktoken average for prose
+    return max(1, math.ceil(len(text) / 4))
+
+
+class FakeLLMTransport(httpx.AsyncBaseTransport):
+    def __init__(
+        self,
+        latency_ms: float = 800.0,
+        latency_distribution: str = "lognormal",
+        latency_sigma: float = 0.5,
+        error_rate: float = 0.0,
+        stream_tokens: int = 40,
+        model: str = "fake-model",
+        seed: int | None = None,
+    ):
+        self.latency_ms = max(0.0, latency_ms)
+        self.latency_distribution = latency_distribution
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.stream_tokens = max(1, stream_tokens)
+        self.model = model
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+
+    def _latency_seconds(self) -> float:
+        mean = self.latency_ms / 1000
+        if self.latency_distribution == "fixed" or mean == 0:
+            return mean
+        if self.latency_distribution == "uniform":
+            return self.random.uniform(0, 2 * mean)
+        # lognormal with the requested mean
+        mu = math.log(mean) - self.latency_sigma ** 2 / 2
+        return self.random.lognormvariate(mu, self.latency_sigma)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if not request.url.path.endswith("/chat/completions"):
+            return httpx.Response(404, json={"error": {"message": f"Not found: {request.url.path}"}})
+        body = json.loads(request.content or b"{}")
+        latency = self._latency_seconds()
+
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors += 1
+            await asyncio.sleep(latency / 4)
+            status = self.random.choice((429, 500))
+            return httpx.Response(status, json={"error": {"message": "Injected fake error", "type": "fake"}})
+
+        messages = body.get("messages", [])
+        content = build_reply(messages)
+        usage = {
+            "prompt_tokens": _tokens("".join(m.get("content") or "" for m in messages)),
+            "completion_tokens": _tokens(content),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        completion_id = f"chatcmpl-fake-{self.requests}"
+        created = int(time.time())
+
+        if body.get("stream"):
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream"},
+                content=self._stream(completion_id, created, content, latency),
+            )
+
+        await asyncio.sleep(latency)
+        return httpx.Response(200, json={
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": body.get("model", self.model),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }],
+            "usage": usage,
+        })
+
+    async def _stream(self, completion_id: str, created: int, content: str, latency: float):
+        size = max(1, math.ceil(len(content) / self.stream_tokens))
+        pieces = [content[i:i + size] for i in range(0, len(content), size)]
+        # Time to first token, then the rest spread evenly
+        await asyncio.sleep(latency / 2)
+        step = latency / 2 / max(1, len(pieces))
+        for piece in pieces:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": self.model,
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8")
+            await asyncio.sleep(step)
+        yield b"data: [DONE]\n\n"
+
+    def stats(self) -> dict:
+        return {
+            "latency_ms": self.latency_ms,
+            "latency_distribution": self.latency_distribution,
+            "error_rate": self.error_rate,
+            "stream_tokens": self.stream_tokens,
+            "requests": self.requests,
+            "injected_errors": self.errors,
+        }
+
+
+def transport_from_settings() -> FakeLLMTransport:
+    return FakeLLMTransport(
+        latency_ms=settings.llm_fake_latency_ms,
+        latency_distribution=settings.llm_fake_latency_distribution,
+        latency_sigma=settings.llm_fake_latency_sigma,
+        error_rate=settings.llm_fake_error_rate,
+        stream_tokens=settings.llm_fake_stream_tokens,
+        model=settings.model_name,
+        seed=settings.llm_fake_seed,
+    )
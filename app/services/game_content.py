@@ -0,0 +1,364 @@
+"""Pre-filled content pools for the error-hunt and concept-match games.
+
+Both games used to call the model inside the request. Now every item lives
+in ``game_content`` (migration 0012), keyed by game type and level. The
+routes only ``draw`` from the pool and never wait on the model.
+
+- ``draw`` prefers items the student has not been served yet, then the ones
+  they saw longest ago, and records what it served in
+  ``game_content_served``.
+- A background refiller keeps ``GAME_POOL_TARGET`` unserved items per game
+  type and level. It wakes every ``GAME_POOL_REFILL_INTERVAL_SECONDS``, or
+  straight away when a draw finds the pool low. It stops at
+  ``GAME_POOL_MAX_ITEMS`` per pool; past that, students cycle through what
+  is there.
+- ``prompts/game_content_seed.yaml`` is loaded into the pool first. It is
+  also served directly when a pool is still empty, e.g. on a fresh
+  database before the first refill has finished.
+
+Items are deduplicated per level on the concept (concept-match) or the
+problem and shown solution (error-hunt). Refill prompts list recent items
+so the model writes new ones.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from app.config import settings
+from app.db.database import db_pool
+from app.db.timestamps import db_now
+from app.db.write_queue import run_write
+from app.services.llm import llm
+from app.services.prompts import prompts
+from app.services.speed_calc import DEFAULT_LEVEL, LEVELS
+
+logger = logging.getLogger(__name__)
+
+# Model calls per pool per refill run
+MAX_BATCHES_PER_REFILL = 4
+# Recent items listed in the refill prompt as "do not repeat"
+AVOID_IN_PROMPT = 30
+
+
+async def generate_concept_pairs(level: str, count: int, avoid: list[str] | None = None) -> list[dict]:
+    avoid_text = f" Nie powtarzaj tych pojec: {'; '.join(avoid)}." if avoid else ""
+    data = await llm.complete_json(
+        [
+            {"role": "system", "content": "Jestes pomocnikiem do nauki matematyki. Generujesz pary: pojecie matematyczne i jego wzor lub definicja. Odpowiadaj w formacie JSON."},
+            {"role": "user", "content": f"Wygeneruj {count} par matematycznych pojec z ich wzorami lub definicjami dla poziomu: {level}. Kazda para to pojecie i odpowiadajacy mu wzor/definicja.{avoid_text} Zwroc JSON: {{\"pairs\": [{{\"concept\": \"Pole kola\", \"formula\": \"P = pi * r^2\"}}]}}"},
+        ],
+        temperature=0.8,
+    )
+    return data.get("pairs", [])[:count]
+
+
+async def generate_error_solutions(level: str, count: int, avoid: list[str] | None = None) -> list[dict]:
+    avoid_text = f" Nie powtarzaj tych zadan: {'; '.join(avoid)}." if avoid else ""
+    data = await llm.complete_json(
+        [
+            {"role": "system", "content": "Jestes pomocnikiem do nauki matematyki. Generujesz rozwiazania zadan matematycznych - niektore z celowymi bledami, a niektore poprawne. Uczen musi znalezc bledy. Odpowiadaj w formacie JSON."},
+            {"role": "user", "content": f"Wygeneruj {count} rozwiazan zadan matematycznych dla poziomu: {level}. Czesc powinna zawierac typowe bledy (np. zly znak, bledne obliczenia, zla kolejnosc dzialan), a czesc powinna byc poprawna.{avoid_text} Zwroc JSON: {{\"solutions\": [{{\"problem\": \"Oblicz: 3 * (2 + 4)\", \"shown_solution\": \"3 * 2 + 4 = 10\", \"has_error\": true, \"correct_solution\": \"3 * (2 + 4) = 3 * 6 = 18\", \"explanation\": \"Najpierw wykonujemy dzialanie w nawiasie, potem mnozenie\"}}]}}"},
+        ],
+        temperature=0.7,
+    )
+    return data.get("solutions", [])[:count]
+
+
+@dataclass(frozen=True)
+class GameSpec:
+    generate: Callable[..., Awaitable[list[dict]]]
+    # items per model call
+    batch_size: int
+    # fields every item must have
+    required: tuple[str, ...]
+    # fields that identify an item for deduplication
+    identity: tuple[str, ...]
+
+    def valid(self, item) -> bool:
+        return isinstance(item, dict) and all(item.get(field) not in (None, "") for field in self.required)
+
+    def identity_text(self, item: dict) -> str:
+        return " | ".join(str(item.get(field, "")) for field in self.identity)
+
+    def content_hash(self, item: dict) -> str:
+        normalized = " ".join(self.identity_text(item).lower().split())
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+GAMES = {
+    "concept_match": GameSpec(
+        generate=generate_concept_pairs,
+        batch_size=8,
+        required=("concept", "formula"),
+        identity=("concept",),
+    ),
+    "error_hunt": GameSpec(
+        generate=generate_error_solutions,
+        batch_size=6,
+        required=("problem", "shown_solution", "has_error"),
+        identity=("problem", "shown_solution"),
+    ),
+}
+
+
+def pool_level(level: str | None) -> str:
+    return level if level in LEVELS else DEFAULT_LEVEL
+
+
+def seed_items(game_type: str, level: str) -> list[dict]:
+    try:
+        data = prompts.data("game_content_seed")
+    except Exception:
+        logger.warning("Game content seed file is not available")
+        return []
+    items = (data.get(game_type) or {}).get(level) or []
+    return [item for item in items if GAMES[game_type].valid(item)]
+
+
+class GameContentPool:
+    def __init__(
+        self,
+        enabled: bool = True,
+        target: int = 24,
+        max_items: int = 500,
+        interval_seconds: float = 600.0,
+    ):
+        self.enabled = enabled
+        self.target = max(1, target)
+        self.max_items = max(self.target, max_items)
+        self.interval_seconds = interval_seconds
+        self._task: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+        self._requested: set[tuple[str, str]] = set()
+        self._seeded = False
+        self._draws = 0
+        self._seed_fallbacks = 0
+        self._model_calls = 0
+        self._model_failures = 0
+        self._added = 0
+        self.last_run: dict | None = None
+
+    async def start(self) -> None:
+        if not self.enabled or (self._task is not None and not self._task.done()):
+            return
+        self._wake = asyncio.Event()
+        if not self._seeded:
+            # Quick, and means no pool is empty by the first request
+            await self.seed()
+        self._task = asyncio.create_task(self._loop(), name="game-content-refiller")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Game content refill failed")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def request_refill(self, game_type: str, level: str) -> None:
+        """Ask the refiller to top up one pool soon; never blocks."""
+        self._requested.add((game_type, level))
+        self._wake.set()
+
+    async def draw(self, student_id: int, game_type: str, level: str | None, count: int) -> list[dict]:
+        """``count`` items for one game, least recently seen by the student first."""
+        spec = GAMES[game_type]
+        level = pool_level(level)
+        self._draws += 1
+        async with db_pool.acquire() as db:
+            cursor = await db.execute(
+                """SELECT c.id, c.content, c.times_served, s.served_at
+                   FROM game_content c
+                   LEFT JOIN game_content_served s ON s.content_id = c.id AND s.student_id = ?
+                   WHERE c.game_type = ? AND c.level = ?
+                   ORDER BY s.served_at IS NOT NULL, s.served_at, c.times_served, RANDOM()
+                   LIMIT ?""",
+                (student_id, game_type, level, count),
+            )
+            rows = await cursor.fetchall()
+            cursor = await db.execute(
+                """SELECT COUNT(*) FROM game_content
+                   WHERE game_type = ? AND level = ? AND times_served = 0""",
+                (game_type, level),
+            )
+            unserved = (await cursor.fetchone())[0]
+
+        items = [json.loads(row["content"]) for row in rows]
+        left = unserved - sum(row["times_served"] == 0 for row in rows)
+        if left < self.target or any(row["served_at"] for row in rows):
+            self.request_refill(game_type, level)
+
+        if len(items) < count:
+            # Pool not filled yet: top up from the seed file
+            self._seed_fallbacks += 1
+            taken = {spec.content_hash(item) for item in items}
+            extra = [item for item in seed_items(game_type, level) if spec.content_hash(item) not in taken]
+            random.shuffle(extra)
+            items += extra[:count - len(items)]
+
+        if rows:
+            await self._mark_served(student_id, [row["id"] for row in rows])
+        return items
+
+    async def _mark_served(self, student_id: int, content_ids: list[int]) -> None:
+        async def _write(uow):
+            now = db_now()
+            for content_id in content_ids:
+                await uow.execute(
+                    """INSERT INTO game_content_served (student_id, content_id, served_at) VALUES (?, ?, ?)
+                       ON CONFLICT (student_id, content_id) DO UPDATE SET served_at = excluded.served_at""",
+                    (student_id, content_id, now),
+                )
+            await uow.execute(
+                f"""UPDATE game_content SET times_served = times_served + 1
+                    WHERE id IN ({",".join("?" * len(content_ids))})""",
+                content_ids,
+            )
+
+        await run_write(_write)
+
+    async def store(self, game_type: str, level: str, items: list[dict], source: str = "model") -> int:
+        """Add new items to a pool; returns how many were not already there."""
+        spec = GAMES[game_type]
+        valid = [item for item in items if spec.valid(item)]
+        if not valid:
+            return 0
+
+        async def _insert(uow):
+            added = 0
+            now = db_now()
+            for item in valid:
+                cursor = await uow.execute(
+                    """INSERT OR IGNORE INTO game_content
+                       (game_type, level, content, content_hash, source, created_at)
+                       VALUES (?, ?, ?, ?, ?, ?)""",
+                    (game_type, level, json.dumps(item, ensure_ascii=False),
+                     spec.content_hash(item), source, now),
+                )
+                added += cursor.rowcount
+            return added
+
+        return await run_write(_insert)
+
+    async def _pool_state(self, game_type: str, level: str) -> tuple[int, int, list[str]]:
+        """(unserved items, all items, identities of the most recent items)."""
+        spec = GAMES[game_type]
+        async with db_pool.acquire() as db:
+            cursor = await db.execute(
+                """SELECT COUNT(*) AS total, COALESCE(SUM(times_served = 0), 0) AS unserved
+                   FROM game_content WHERE game_type = ? AND level = ?""",
+                (game_type, level),
+            )
+            counts = await cursor.fetchone()
+            cursor = await db.execute(
+                """SELECT content FROM game_content WHERE game_type = ? AND level = ?
+                   ORDER BY id DESC LIMIT ?""",
+                (game_type, level, AVOID_IN_PROMPT),
+            )
+            recent = [spec.identity_text(json.loads(row["content"])) for row in await cursor.fetchall()]
+        return counts["unserved"], counts["total"], recent
+
+    async def refill(self, game_type: str, level: str) -> int:
+        """Top up one pool to the target; returns the number of items added."""
+        spec = GAMES[game_type]
+        added = 0
+        for _batch in range(MAX_BATCHES_PER_REFILL):
+            unserved, total, recent = await self._pool_state(game_type, level)
+            if unserved >= self.target or total >= self.max_items:
+                break
+            self._model_calls += 1
+            try:
+                items = await spec.generate(level, spec.batch_size, recent)
+            except Exception as exc:
+                self._model_failures += 1
+                logger.warning("Game content generation failed for %s/%s: %s", game_type, level, exc)
+                break
+            new = await self.store(game_type, level, items)
+            added += new
+            if not new:
+                # The model only repeated existing items; try again next run
+                break
+        self._added += added
+        return added
+
+    async def seed(self) -> int:
+        added = 0
+        for game_type in GAMES:
+            for level in LEVELS:
+                added += await self.store(game_type, level, seed_items(game_type, level), source="seed")
+        self._seeded = True
+        return added
+
+    async def run_once(self) -> dict:
+        """Seed once, then refill requested pools first and the rest after."""
+        started = time.perf_counter()
+        seeded = 0 if self._seeded else await self.seed()
+        requested = sorted(self._requested)
+        self._requested.clear()
+        added = {}
+        for game_type, level in requested + [(g, l) for g in GAMES for l in LEVELS if (g, l) not in requested]:
+            count = await self.refill(game_type, level)
+            if count:
+                added[f"{game_type}/{level}"] = count
+        self.last_run = {
+            "seeded": seeded,
+            "added": added,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "finished_at": db_now(),
+        }
+        if added:
+            logger.info("Game content pools topped up: %s", added)
+        return added
+
+    async def stats(self) -> dict:
+        async with db_pool.acquire() as db:
+            cursor = await db.execute(
+                """SELECT game_type, level, COUNT(*) AS items, SUM(times_served = 0) AS unserved
+                   FROM game_content GROUP BY game_type, level"""
+            )
+            pools = {f"{row['game_type']}/{row['level']}": {"items": row["items"], "unserved": row["unserved"]}
+                     for row in await cursor.fetchall()}
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None and not self._task.done(),
+            "target": self.target,
+            "max_items": self.max_items,
+            "interval_seconds": self.interval_seconds,
+            "pools": pools,
+            "draws": self._draws,
+            "seed_fallbacks": self._seed_fallbacks,
+            "model_calls": self._model_calls,
+            "model_failures": self._model_failures,
+            "added": self._added,
+            "last_run": self.last_run,
+        }
+
+
+game_content_pool = GameContentPool(
+    enabled=settings.game_pool_enabled,
+    target=settings.game_pool_target,
+    max_items=settings.game_pool_max_items,
+    interval_seconds=settings.game_pool_refill_interval_seconds,
+)
@@ -0,0 +1,376 @@
+"""Durable SQLite-backed job queue and worker pool for AI work.
+
+Routes enqueue a job and return its id straight away. ``JOB_WORKERS``
+asyncio workers, started in the lifespan, claim jobs from the ``jobs``
+table (migration 0009). Request latency no longer depends on model latency,
+and AI concurrency is capped globally by the worker count.
+
+- Claiming is a single ``UPDATE ... RETURNING`` of the highest-priority
+  ready job. It sets a lease that a heartbeat extends while the handler
+  runs. If a worker dies, its lease expires, the reaper puts the job back
+  in the queue and the work is not lost.
+- A failure is retried with exponential backoff up to ``max_attempts``.
+  Errors carrying a 4xx ``status_code`` (e.g. HTTPException(404)) and
+  ``JobError`` fail the job straight away, since retrying cannot help.
+  408 and 429 are the exception: a timeout or rate limit may pass.
+- An idempotency key makes enqueueing the same logical work twice return
+  the existing job. Keys are scoped by kind and student, so one client's
+  key never matches another's job. A job that failed for good is replaced
+  by the new request instead of being returned.
+
+Handlers are ``async def handler(payload: dict) -> dict | None`` registered
+with ``@job_handler("kind")``; the returned dict is stored as the result.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import uuid
+from datetime import timedelta
+from typing import Awaitable, Callable
+
+from app.config import settings
+from app.db.database import db_pool
+from app.db.timestamps import db_now
+from app.db.write_queue import run_write
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+# 4xx statuses that are worth retrying
+RETRYABLE_STATUSES = frozenset({408, 429})
+
+JobHandler = Callable[[dict], Awaitable[dict | None]]
+_HANDLERS: dict[str, JobHandler] = {}
+
+
+class JobError(Exception):
+    """Raised by a handler for a failure that retrying cannot fix."""
+
+
+def job_handler(kind: str):
+    """Register the decorated coroutine as the handler for ``kind``."""
+
+    def decorator(fn: JobHandler) -> JobHandler:
+        _HANDLERS[kind] = fn
+        return fn
+
+    return decorator
+
+
+def _is_permanent(exc: Exception) -> bool:
+    if isinstance(exc, JobError):
+        return True
+    status = getattr(exc, "status_code", 500)
+    return status < 500 and status not in RETRYABLE_STATUSES
+
+
+def _scoped_key(kind: str, student_id: int | None, idempotency_key: str | None) -> str | None:
+    if idempotency_key is None:
+        return None
+    return f"{kind}:{student_id if student_id is not None else '-'}:{idempotency_key}"
+
+
+def _decode(row) -> dict:
+    job = dict(row)
+    for key in ("payload", "result"):
+        if job.get(key):
+            job[key] = json.loads(job[key])
+    return job
+
+
+async def enqueue(
+    kind: str,
+    payload: dict,
+    *,
+    priority: int = 0,
+    idempotency_key: str | None = None,
+    student_id: int | None = None,
+    max_attempts: int | None = None,
+) -> dict:
+    """Persist a job and wake a worker; returns the (possibly existing) job.
+
+    A job with the same key that is queued, running or succeeded is
+    returned as is; one that failed is reset and queued again.
+    """
+    if kind not in _HANDLERS:
+        raise ValueError(f"No handler registered for job kind {kind!r}")
+    now = db_now()
+    key = _scoped_key(kind, student_id, idempotency_key)
+
+    async def _insert(uow):
+        cursor = await uow.execute(
+            """INSERT INTO jobs (kind, payload, priority, max_attempts, idempotency_key, student_id,
+                                 run_after, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (idempotency_key) DO UPDATE SET
+                   payload = excluded.payload, priority = excluded.priority,
+                   max_attempts = excluded.max_attempts, status = 'queued', attempts = 0,
+                   run_after = excluded.run_after, created_at = excluded.created_at,
+                   lease_owner = NULL, lease_expires_at = NULL, result = NULL, error = NULL,
+                   started_at = NULL, finished_at = NULL
+               WHERE jobs.status = 'failed'
+               RETURNING *""",
+            (kind, json.dumps(payload), priority, max_attempts or settings.job_max_attempts,
+             key, student_id, now, now),
+        )
+        row = await cursor.fetchone()
+        if row is None:
+            cursor = await uow.execute("SELECT * FROM jobs WHERE idempotency_key = ?", (key,))
+            row = await cursor.fetchone()
+        return dict(row)
+
+    job = _decode(await run_write(_insert))
+    job_pool.notify()
+    return job
+
+
+async def get_job(job_id: int) -> dict | None:
+    async with db_pool.acquire() as db:
+        cursor = await db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        row = await cursor.fetchone()
+    return _decode(row) if row else None
+
+
+class JobWorkerPool:
+    def __init__(
+        self,
+        concurrency: int,
+        poll_interval_seconds: float = 1.0,
+        lease_seconds: float = 120.0,
+        backoff_base_seconds: float = 5.0,
+        backoff_max_seconds: float = 300.0,
+        enabled: bool = True,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.poll_interval_seconds = poll_interval_seconds
+        self.lease_seconds = lease_seconds
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.enabled = enabled
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._changed = asyncio.Condition()
+        self._in_flight = 0
+        self._succeeded = 0
+        self._failed = 0
+        self._retried = 0
+
+    @property
+    def running(self) -> bool:
+        return any(not t.done() for t in self._tasks)
+
+    async def start(self) -> None:
+        if not self.enabled or self.running:
+            return
+        # Events bind to the running loop; recreate them for this one
+        self._wakeup = asyncio.Event()
+        self._changed = asyncio.Condition()
+        self._tasks = [asyncio.create_task(self._worker(), name=f"job-worker-{i}") for i in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._reaper(), name="job-reaper"))
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if tasks:
+            # Hand our in-flight jobs back without charging them an attempt
+            async def _release(uow):
+                await uow.execute(
+                    """UPDATE jobs SET status = 'queued', lease_owner = NULL, lease_expires_at = NULL,
+                                      attempts = MAX(attempts - 1, 0)
+                       WHERE status = 'running' AND lease_owner = ?""",
+                    (self.worker_id,),
+                )
+
+            await run_write(_release)
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    async def _notify_changed(self) -> None:
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def wait_for_change(self, timeout: float) -> None:
+        """Block until any job changes state in this process, or ``timeout``."""
+        try:
+            async with self._changed:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                job = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Claiming a job failed")
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _claim(self) -> dict | None:
+        now = db_now()
+
+        async def _update(uow):
+            cursor = await uow.execute(
+                """UPDATE jobs
+                   SET status = 'running', lease_owner = ?, lease_expires_at = ?,
+                       attempts = attempts + 1, started_at = COALESCE(started_at, ?)
+                   WHERE id = (SELECT id FROM jobs WHERE status = 'queued' AND run_after <= ?
+                               ORDER BY priority DESC, run_after, id LIMIT 1)
+                   RETURNING *""",
+                (self.worker_id, db_now(timedelta(seconds=self.lease_seconds)), now, now),
+            )
+            row = await cursor.fetchone()
+            return dict(row) if row else None
+
+        row = await run_write(_update)
+        return _decode(row) if row else None
+
+    async def _heartbeat(self, job_id: int) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+
+            async def _extend(uow):
+                await uow.execute(
+                    "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                    (db_now(timedelta(seconds=self.lease_seconds)), job_id, self.worker_id),
+                )
+
+            try:
+                await run_write(_extend)
+            except Exception:
+                # A missed beat is fine while the lease lasts; try again next round
+                logger.exception("Extending the lease of job %s failed", job_id)
+
+    async def _run(self, job: dict) -> None:
+        await self._notify_changed()
+        handler = _HANDLERS.get(job["kind"])
+        self._in_flight += 1
+        heartbeat = asyncio.create_task(self._heartbeat(job["id"]))
+        try:
+            if handler is None:
+                raise JobError(f"No handler registered for job kind {job['kind']!r}")
+            result = await handler(job["payload"] or {})
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            await self._fail(job, exc, _is_permanent(exc))
+        else:
+            await self._finish(job["id"], "succeeded", result=result)
+            self._succeeded += 1
+        finally:
+            heartbeat.cancel()
+            self._in_flight -= 1
+        await self._notify_changed()
+
+    async def _finish(self, job_id: int, status: str, result: dict | None = None, error: str | None = None) -> None:
+        async def _update(uow):
+            await uow.execute(
+                """UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?,
+                                  lease_owner = NULL, lease_expires_at = NULL
+                   WHERE id = ? AND lease_owner = ?""",
+                (status, json.dumps(result) if result is not None else None, error, db_now(),
+                 job_id, self.worker_id),
+            )
+
+        await run_write(_update)
+
+    async def _fail(self, job: dict, exc: Exception, permanent: bool) -> None:
+        error = getattr(exc, "detail", None) or f"{type(exc).__name__}: {exc}"
+        if permanent or job["attempts"] >= job["max_attempts"]:
+            logger.warning("Job %s (%s) failed: %s", job["id"], job["kind"], error)
+            await self._finish(job["id"], "failed", error=str(error)[:2000])
+            self._failed += 1
+            return
+        delay = min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** (job["attempts"] - 1))
+        delay *= random.uniform(0.8, 1.2)
+        logger.info("Job %s (%s) attempt %d failed, retrying in %.1fs: %s",
+                    job["id"], job["kind"], job["attempts"], delay, error)
+
+        async def _requeue(uow):
+            await uow.execute(
+                """UPDATE jobs SET status = 'queued', run_after = ?, error = ?,
+                                  lease_owner = NULL, lease_expires_at = NULL
+                   WHERE id = ? AND lease_owner = ?""",
+                (db_now(timedelta(seconds=delay)), str(error)[:2000], job["id"], self.worker_id),
+            )
+
+        await run_write(_requeue)
+        self._retried += 1
+
+    async def _reaper(self) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, self.lease_seconds / 2))
+            try:
+                reclaimed = await self.reclaim_expired()
+                if reclaimed:
+                    logger.warning("Re-queued %d job(s) whose worker lease expired", reclaimed)
+                    self.notify()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job lease reaper failed")
+
+    async def reclaim_expired(self) -> int:
+        """Re-queue (or fail, if out of attempts) running jobs with an expired lease."""
+        now = db_now()
+
+        async def _update(uow):
+            await uow.execute(
+                """UPDATE jobs SET status = 'failed', error = 'Lease expired on final attempt',
+                                  finished_at = ?, lease_owner = NULL, lease_expires_at = NULL
+                   WHERE status = 'running' AND lease_expires_at < ? AND attempts >= max_attempts""",
+                (now, now),
+            )
+            cursor = await uow.execute(
+                """UPDATE jobs SET status = 'queued', error = 'Lease expired', run_after = ?,
+                                  lease_owner = NULL, lease_expires_at = NULL
+                   WHERE status = 'running' AND lease_expires_at < ?""",
+                (now, now),
+            )
+            return cursor.rowcount
+
+        return await run_write(_update)
+
+    async def stats(self) -> dict:
+        async with db_pool.acquire() as db:
+            cursor = await db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")
+            by_status = {row["status"]: row["n"] for row in await cursor.fetchall()}
+        return {
+            "enabled": self.enabled,
+            "running": self.running,
+            "worker_id": self.worker_id,
+            "concurrency": self.concurrency,
+            "in_flight": self._in_flight,
+            "succeeded": self._succeeded,
+            "failed": self._failed,
+            "retried": self._retried,
+            "by_status": by_status,
+            "handlers": sorted(_HANDLERS),
+        }
+
+
+job_pool = JobWorkerPool(
+    concurrency=settings.job_workers,
+    poll_interval_seconds=settings.job_poll_interval_seconds,
+    lease_seconds=settings.job_lease_seconds,
+    backoff_base_seconds=settings.job_backoff_base_seconds,
+    backoff_max_seconds=settings.job_backoff_max_seconds,
+    enabled=settings.jobs_enabled,
+)
@@ -0,0 +1,109 @@
+"""Incremental parser for a JSON object that arrives in pieces.
+
+``JsonObjectStream`` is fed the text deltas of a streamed JSON-mode
+completion. It reports each top-level member (key, value) as soon as that
+member is complete, without waiting for the rest of the object:
+
+- an object or array value is complete at its closing bracket;
+- a string, number, boolean or null value is complete at the ``,`` or
+  ``}`` that follows it.
+
+Each character is scanned once. The scanner only tracks nesting depth and
+whether it is inside a string, so the cost is linear in the response size.
+Completed members are decoded with ``json.loads``. ``finish`` decodes the
+whole text and raises ``JsonStreamError`` if it is not a valid object.
+"""
+
+import json
+from typing import Any
+
+
+class JsonStreamError(ValueError):
+    """The streamed text is not a single valid JSON object."""
+
+
+class JsonObjectStream:
+    def __init__(self):
+        self._text: list[str] = []
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        # Start of the current top-level member in the buffer, or None when
+        # the member has already been reported.
+        self._member_start: int | None = None
+
+    @property
+    def text(self) -> str:
+        return "".join(self._text) + self._buffer
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        """Add a piece of the text; returns the members completed by it."""
+        self._buffer += chunk
+        completed = []
+        buffer, pos = self._buffer, self._pos
+        while pos < len(buffer):
+            char = buffer[pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    if char != "{":
+                        raise JsonStreamError("Expected a JSON object")
+                    self._member_start = pos + 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1:
+                    # A container value of a top-level member just closed
+                    self._report(buffer[self._member_start:pos + 1], completed)
+                    self._member_start = None
+                elif self._depth == 0:
+                    if self._member_start is not None:
+                        self._report(buffer[self._member_start:pos], completed)
+                    self._member_start = None
+                elif self._depth < 0:
+                    raise JsonStreamError("Unbalanced brackets")
+            elif char == "," and self._depth == 1:
+                if self._member_start is not None:
+                    self._report(buffer[self._member_start:pos], completed)
+                self._member_start = pos + 1
+            pos += 1
+
+        # Drop text no pending member refers to
+        keep = self._member_start if self._member_start is not None else pos
+        self._text.append(buffer[:keep])
+        self._buffer = buffer[keep:]
+        self._pos = pos - keep
+        if self._member_start is not None:
+            self._member_start = 0
+        return completed
+
+    @staticmethod
+    def _report(member: str, completed: list) -> None:
+        if not member.strip():
+            return
+        try:
+            completed.extend(json.loads("{" + member + "}").items())
+        except json.JSONDecodeError:
+            # Left for finish() to report against the whole text
+            pass
+
+    def finish(self) -> dict:
+        """Decode the complete text."""
+        text = self.text
+        try:
+            result = json.loads(text)
+        except json.JSONDecodeError as exc:
+            raise JsonStreamError(f"Invalid JSON object ({len(text)} chars): {exc}") from exc
+        if not isinstance(result, dict):
+            raise JsonStreamError("Expected a JSON object")
+        return result
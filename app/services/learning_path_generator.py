@@ -1,15 +1,6 @@
 import json
-import yaml
-from pathlib import Path
-from openai import AsyncOpenAI
-from app.config import settings
-
-PROMPTS_DIR = Path(__file__).parent.parent.parent / "prompts"
-
-
-def load_prompt(name: str) -> dict:
-    with open(PROMPTS_DIR / name, "r") as f:
-        return yaml.safe_load(f)
+from app.services.llm import llm
+from app.services.prompts import prompts
 
 
 async def generate_learning_path(
@@ -27,8 +18,7 @@ async def generate_learning_path(
     Returns:
         dict with title, target_level, overview, weeks[], milestones[]
     """
-    prompt_data = load_prompt("learning_path.yaml")
-    misconceptions_data = load_prompt("polish_struggles.yaml")
+    template = prompts.get("learning_path")
 
     # Build assessment fields with fallbacks
     determined_level = student_info.get("current_level", "pending")
@@ -49,8 +39,8 @@ async def generate_learning_path(
             if misconceptions:
                 math_misconceptions = json.dumps(misconceptions, indent=2)
 
-    if math_misconceptions == "No math misconceptions data available." and misconceptions_data:
-        math_misconceptions = yaml.dump(misconceptions_data, default_flow_style=False, allow_unicode=True)
+    if math_misconceptions == "No math misconceptions data available.":
+        math_misconceptions = prompts.fragment("math_misconceptions") or math_misconceptions
 
     # Build profile fields with fallbacks
     profile_summary = "No diagnostic profile available."
@@ -64,7 +54,7 @@ async def generate_learning_path(
         if profile_data.get("gaps"):
             gaps = json.dumps(profile_data["gaps"], indent=2)
 
-    user_message = prompt_data["user_template"].format(
+    messages = template.messages(
         name=student_info.get("name", "Unknown"),
         age=student_info.get("age", "Not specified"),
         current_level=student_info.get("current_level", "pending"),
@@ -80,17 +70,7 @@ async def generate_learning_path(
         math_misconceptions=math_misconceptions,
     )
 
-    client = AsyncOpenAI(api_key=settings.api_key)
-
-    response = await client.chat.completions.create(
-        model=settings.model_name,
-        messages=[
-            {"role": "system", "content": prompt_data["system_prompt"]},
-            {"role": "user", "content": user_message},
-        ],
+    return await llm.complete_json(
+        messages,
         temperature=0.5,
-        response_format={"type": "json_object"},
     )
-
-    result_text = response.choices[0].message.content
-    return json.loads(result_text)
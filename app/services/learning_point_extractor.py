@@ -1,22 +1,9 @@
-import json
-import yaml
-from pathlib import Path
-from openai import AsyncOpenAI
-from app.config import settings
-
-PROMPTS_DIR = Path(__file__).parent.parent.parent / "prompts"
-
-
-def load_prompt(name: str) -> dict:
-    with open(PROMPTS_DIR / name, "r") as f:
-        return yaml.safe_load(f)
+from app.services.llm import llm
+from app.services.prompts import prompts
 
 
 async def extract_learning_points(lesson_content: dict, student_level: str) -> list[dict]:
-    prompt = load_prompt("extract_learning_points.yaml")
-
-    system_prompt = prompt["system_prompt"]
-    user_template = prompt["user_template"]
+    template = prompts.get("extract_learning_points")
 
     # Build presentation text
     presentation_text = ""
@@ -60,7 +47,7 @@ async def extract_learning_points(lesson_content: dict, student_level: str) -> l
     if formulas:
         practice_text += "\nKey Formulas: " + "; ".join(formulas)
 
-    user_message = user_template.format(
+    messages = template.messages(
         student_level=student_level,
         objective=lesson_content.get("objective", ""),
         presentation_text=presentation_text or "No presentation data.",
@@ -68,17 +55,9 @@ async def extract_learning_points(lesson_content: dict, student_level: str) -> l
         practice_text=practice_text or "No practice data.",
     )
 
-    client = AsyncOpenAI(api_key=settings.api_key)
-
-    response = await client.chat.completions.create(
-        model=settings.model_name,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_message},
-        ],
+    result = await llm.complete_json(
+        messages,
         temperature=0.3,
-        response_format={"type": "json_object"},
+        cache="extract_learning_points",
     )
-
-    result = json.loads(response.choices[0].message.content)
     return result.get("learning_points", [])
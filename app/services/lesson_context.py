@@ -0,0 +1,180 @@
+"""Bounded student history for the lesson prompt.
+
+``generate_lesson`` used to send the whole progress history as indented
+JSON and every previous lesson objective, so the prompt (and with it
+latency and cost) grew with every lesson the student finished.
+``compact_lesson_context`` turns the history into two bounded blocks:
+
+- progress: the ``LESSON_CONTEXT_RECENT`` newest entries in full (one
+  compact JSON line each, keeping ``areas_struggling`` for the prompt
+  rules), then the older entries as a count, an average score and one
+  line of statistics per skill area, areas the student still struggles
+  with first;
+- previous topics: newest first, with repeated and near-identical
+  objectives merged into one line with a count ("- Ulamki zwykle (x3)").
+
+Both blocks together stay within ``LESSON_CONTEXT_TOKEN_BUDGET`` tokens
+as counted by ``estimate_tokens``, a local estimate that errs on the high
+side for Polish text and JSON. The newest progress entry is always kept;
+whatever else does not fit is dropped from the oldest end and replaced by
+a note saying how much was left out.
+"""
+
+import json
+import math
+import re
+import unicodedata
+from dataclasses import dataclass
+
+# Share of the budget held for previous topics while progress is packed
+TOPICS_SHARE = 0.35
+# Word-set overlap at which two objectives count as the same topic
+TOPIC_SIMILARITY = 0.6
+# Held back from each block for the note on what was left out
+NOTE_TOKENS = 12
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+# Words that say nothing about the topic of an objective
+_TOPIC_STOPWORDS = {
+    "sie", "dla", "jak", "uczen", "uczniowie", "nauczy", "naucza", "bedzie", "potrafil", "potrafi", "umial",
+    "lekcja", "lekcji", "zrozumie", "rozumie", "oraz", "przez", "pomoca", "sposob",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count: a word is about one token per four characters, punctuation one each."""
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in _TOKEN.findall(text))
+
+
+@dataclass(frozen=True)
+class LessonContext:
+    progress_history: str
+    previous_topics: str
+    tokens: int
+    # Lines left out to stay within the budget
+    omitted: int
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower().replace("ł", "l"))
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def _topic_words(topic: str) -> frozenset[str]:
+    # Five-letter stems so inflections ("ulamki", "ulamkow") still match
+    return frozenset(
+        word[:5] for word in re.findall(r"[a-z0-9]+", _fold(topic))
+        if len(word) > 2 and word not in _TOPIC_STOPWORDS
+    )
+
+
+def cluster_topics(topics: list[str]) -> list[tuple[str, int]]:
+    """(newest wording, count) per distinct topic, newest first; ``topics`` is oldest first."""
+    clusters: list[list] = []  # [topic, count, words]
+    for topic in reversed(topics):
+        topic = " ".join(topic.split())
+        if not topic:
+            continue
+        words = _topic_words(topic) or frozenset([_fold(topic)])
+        for cluster in clusters:
+            overlap = len(words & cluster[2]) / len(words | cluster[2])
+            if overlap >= TOPIC_SIMILARITY:
+                cluster[1] += 1
+                break
+        else:
+            clusters.append([topic, 1, words])
+    return [(topic, count) for topic, count, _ in clusters]
+
+
+def skill_stats(progress_history: list[dict]) -> list[str]:
+    """One line per skill area of ``progress_history`` (newest first), weakest areas first."""
+    stats: dict[str, dict] = {}
+    for age, entry in enumerate(progress_history):
+        for key, field in (("improved", "areas_improved"), ("struggling", "areas_struggling")):
+            for area in entry.get(field) or []:
+                stat = stats.setdefault(str(area), {"improved": 0, "struggling": 0, "scores": [], "last": age})
+                stat[key] += 1
+                if entry.get("score") is not None:
+                    stat["scores"].append(entry["score"])
+
+    def weakness(item):
+        area, stat = item
+        return (-(stat["struggling"] - stat["improved"]), -stat["struggling"], stat["last"], area)
+
+    lines = []
+    for area, stat in sorted(stats.items(), key=weakness):
+        line = f"- {area}: trudnosci {stat['struggling']}x, poprawa {stat['improved']}x"
+        if stat["scores"]:
+            line += f", sredni wynik {sum(stat['scores']) / len(stat['scores']):.0f}%"
+        lines.append(line)
+    return lines
+
+
+def _fit(lines: list[str], budget: int, keep: int = 0) -> tuple[list[str], int]:
+    """Longest prefix of ``lines`` within ``budget`` tokens (at least ``keep`` lines) and its cost."""
+    used = 0
+    for index, line in enumerate(lines):
+        cost = estimate_tokens(line)
+        if used + cost > budget and index >= keep:
+            return lines[:index], used
+        used += cost
+    return lines, used
+
+
+def _progress_lines(progress_history: list[dict], recent: int) -> tuple[list[str], int]:
+    """Lines of the progress block in order of importance, and how many must be kept."""
+    lines = ["Ostatnie lekcje (od najnowszej):"]
+    lines += [json.dumps(entry, ensure_ascii=False) for entry in progress_history[:recent]]
+    older = progress_history[recent:]
+    if older:
+        scores = [entry["score"] for entry in older if entry.get("score") is not None]
+        summary = f"Wczesniejsze lekcje: {len(older)}"
+        if scores:
+            summary += f", sredni wynik {sum(scores) / len(scores):.0f}%"
+        lines.append(summary)
+        skills = skill_stats(older)
+        if skills:
+            lines.append("Obszary z wczesniejszych lekcji:")
+            lines += skills
+    return lines, 2
+
+
+def compact_lesson_context(
+    progress_history: list[dict],
+    previous_topics: list[str] | None,
+    recent: int = 5,
+    token_budget: int = 1500,
+) -> LessonContext:
+    """Render ``progress_history`` (newest first) and ``previous_topics`` (oldest first) within the budget."""
+    topic_lines = [f"- {topic}" if count == 1 else f"- {topic} (x{count})"
+                   for topic, count in cluster_topics(previous_topics or [])]
+    topics_cost = sum(estimate_tokens(line) for line in topic_lines)
+
+    omitted = 0
+    if progress_history:
+        lines, keep = _progress_lines(progress_history, max(1, recent))
+        progress_budget = token_budget - min(topics_cost, int(token_budget * TOPICS_SHARE))
+        kept, progress_cost = _fit(lines, progress_budget - NOTE_TOKENS, keep)
+        if len(kept) < len(lines):
+            omitted += len(lines) - len(kept)
+            kept.append(f"(pominieto {len(lines) - len(kept)} starszych wpisow)")
+            progress_cost += estimate_tokens(kept[-1])
+        progress_text = "\n".join(kept)
+    else:
+        progress_text, progress_cost = "No previous lessons.", 0
+
+    if topic_lines:
+        kept, _ = _fit(topic_lines, token_budget - progress_cost - NOTE_TOKENS)
+        if len(kept) < len(topic_lines):
+            omitted += len(topic_lines) - len(kept)
+            kept.append(f"- (oraz {len(topic_lines) - len(kept)} starszych tematow)")
+        topics_text = "\n".join(kept)
+    else:
+        topics_text = "None (first lesson)."
+
+    return LessonContext(
+        progress_history=progress_text,
+        previous_topics=topics_text,
+        tokens=estimate_tokens(progress_text) + estimate_tokens(topics_text),
+        omitted=omitted,
+    )
@@ -1,8 +1,14 @@
+import hashlib
 import json
-import yaml
-from pathlib import Path
-from openai import AsyncOpenAI
+from typing import Any, AsyncIterator
+
+from pydantic import ValidationError
+
 from app.config import settings
+from app.services.json_stream import JsonObjectStream
+from app.services.lesson_context import compact_lesson_context
+from app.services.llm import llm
+from app.services.prompts import prompts
 from app.models.lesson import (
     LessonContent,
     Rozgrzewka,
@@ -12,15 +18,136 @@ from app.models.lesson import (
     Podsumowanie,
 )
 
-PROMPTS_DIR = Path(__file__).parent.parent.parent / "prompts"
 
+async def load_lesson_inputs(db, student_id: int) -> dict | None:
+    """Collect the keyword arguments of ``generate_lesson`` for the student's next session.
 
-def load_prompt(name: str) -> dict:
-    with open(PROMPTS_DIR / name, "r") as f:
-        return yaml.safe_load(f)
+    Returns None if the student does not exist.
+    """
+    cursor = await db.execute("SELECT * FROM students WHERE id = ?", (student_id,))
+    student = await cursor.fetchone()
+    if not student:
+        return None
 
+    # Get learner profile
+    cursor = await db.execute(
+        "SELECT * FROM learner_profiles WHERE student_id = ? ORDER BY created_at DESC LIMIT 1",
+        (student_id,),
+    )
+    profile_row = await cursor.fetchone()
+    if not profile_row:
+        # Fallback: build a default profile from student data so lessons can still be generated
+        current_level = student["current_level"] or "podstawowy"
+        problem_areas = []
+        if student["problem_areas"]:
+            try:
+                problem_areas = json.loads(student["problem_areas"])
+            except (json.JSONDecodeError, TypeError):
+                problem_areas = [student["problem_areas"]]
+
+        profile_data = {
+            "gaps": [{"area": area, "severity": "medium", "description": f"Zgloszony problem: {area}"} for area in problem_areas],
+            "priorities": problem_areas or ["arytmetyka", "algebra"],
+            "profile_summary": f"Profil domyslny (diagnostyka nie zostala ukonczona). Poziom: {current_level}.",
+            "recommended_start_level": current_level if current_level != "pending" else "podstawowy",
+        }
+    else:
+        profile_data = {
+            "gaps": json.loads(profile_row["gaps"]) if profile_row["gaps"] else [],
+            "priorities": json.loads(profile_row["priorities"]) if profile_row["priorities"] else [],
+            "profile_summary": profile_row["profile_summary"] or "",
+            "recommended_start_level": profile_row["recommended_start_level"],
+        }
+
+    # Get progress history
+    cursor = await db.execute(
+        "SELECT * FROM progress WHERE student_id = ? ORDER BY completed_at DESC",
+        (student_id,),
+    )
+    progress_rows = await cursor.fetchall()
+    progress_history = [
+        {
+            "lesson_id": row["lesson_id"],
+            "score": row["score"],
+            "areas_improved": json.loads(row["areas_improved"]) if row["areas_improved"] else [],
+            "areas_struggling": json.loads(row["areas_struggling"]) if row["areas_struggling"] else [],
+        }
+        for row in progress_rows
+    ]
+
+    # Get existing lessons for session count and topic history. Only the
+    # objective is read from the content, not the whole lesson.
+    cursor = await db.execute(
+        """SELECT COALESCE(CASE WHEN json_valid(content) THEN json_extract(content, '$.objective') END,
+                           objective) AS objective
+           FROM lessons WHERE student_id = ? ORDER BY session_number""",
+        (student_id,),
+    )
+    lesson_rows = await cursor.fetchall()
+    session_number = len(lesson_rows) + 1
+
+    # Previous lesson topics from objectives
+    previous_topics = [lr["objective"] for lr in lesson_rows if lr["objective"]]
+
+    # Check for recall weak areas from most recent completed recall session
+    recall_weak_areas = None
+    cursor = await db.execute(
+        """SELECT weak_areas FROM recall_sessions
+           WHERE student_id = ? AND status = 'completed'
+           ORDER BY completed_at DESC LIMIT 1""",
+        (student_id,),
+    )
+    recall_row = await cursor.fetchone()
+    if recall_row and recall_row["weak_areas"]:
+        try:
+            recall_weak_areas = json.loads(recall_row["weak_areas"])
+            if not recall_weak_areas:
+                recall_weak_areas = None
+        except (json.JSONDecodeError, TypeError):
+            recall_weak_areas = None
+
+    return {
+        "student_id": student_id,
+        "profile": profile_data,
+        "progress_history": progress_history,
+        "session_number": session_number,
+        "current_level": student["current_level"] or "podstawowy",
+        "previous_topics": previous_topics,
+        "recall_weak_areas": recall_weak_areas,
+    }
+
+
+def lesson_inputs_fingerprint(inputs: dict, fields: tuple[str, ...] | None = None) -> str:
+    """Hash of the lesson inputs (optionally only ``fields``), the model and the prompt.
+
+    Two equal fingerprints mean ``generate_lesson`` would be sent the same request.
+    """
+    template = prompts.get("lesson_generator")
+    selected = inputs if fields is None else {k: inputs.get(k) for k in fields}
+    payload = json.dumps(
+        {
+            "inputs": selected,
+            "model": llm.model,
+            "prompt": [template.system_prompt, template.user_template],
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
-async def generate_lesson(
+
+# Lesson phases in teaching order -> model of their content
+LESSON_PHASES = {
+    "rozgrzewka": Rozgrzewka,
+    "wyjasnienie_tematu": WyjasnienieTematu,
+    "przyklady_rozwiazane": PrzykladyRozwiazane,
+    "zadania_do_praktyki": ZadaniaDoPraktyki,
+    "podsumowanie": Podsumowanie,
+}
+
+
+def lesson_messages(
     student_id: int,
     profile: dict,
     progress_history: list[dict],
@@ -28,63 +155,35 @@ async def generate_lesson(
     current_level: str,
     previous_topics: list[str] | None = None,
     recall_weak_areas: list[str] | None = None,
-) -> LessonContent:
-    lesson_prompt = load_prompt("lesson_generator.yaml")
-
-    system_prompt = lesson_prompt["system_prompt"]
-    user_template = lesson_prompt["user_template"]
-
-    progress_text = "No previous lessons." if not progress_history else json.dumps(progress_history, indent=2)
-    topics_text = "None (first lesson)." if not previous_topics else ", ".join(previous_topics)
+) -> list[dict]:
+    template = prompts.get("lesson_generator")
+
+    # Bounded however long the student has been enrolled
+    context = compact_lesson_context(
+        progress_history,
+        previous_topics,
+        recent=settings.lesson_context_recent,
+        token_budget=settings.lesson_context_token_budget,
+    )
 
     recall_text = "None." if not recall_weak_areas else ", ".join(recall_weak_areas)
 
-    user_message = user_template.format(
+    return template.messages(
         session_number=session_number,
         current_level=current_level,
         profile_summary=profile.get("profile_summary", "No profile summary available"),
         priorities=", ".join(profile.get("priorities", [])),
         gaps=json.dumps(profile.get("gaps", []), indent=2),
-        progress_history=progress_text,
-        previous_topics=topics_text,
+        progress_history=context.progress_history,
+        previous_topics=context.previous_topics,
         recall_weak_areas=recall_text,
     )
 
-    client = AsyncOpenAI(api_key=settings.api_key)
-
-    response = await client.chat.completions.create(
-        model=settings.model_name,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_message},
-        ],
-        temperature=0.7,
-        response_format={"type": "json_object"},
-    )
-
-    result_text = response.choices[0].message.content
-    result = json.loads(result_text)
 
+def build_lesson_content(result: dict, current_level: str) -> LessonContent:
     # Build 5-phase sub-models from AI response (if present)
-    rozgrzewka = None
-    if result.get("rozgrzewka"):
-        rozgrzewka = Rozgrzewka(**result["rozgrzewka"])
-
-    wyjasnienie_tematu = None
-    if result.get("wyjasnienie_tematu"):
-        wyjasnienie_tematu = WyjasnienieTematu(**result["wyjasnienie_tematu"])
-
-    przyklady_rozwiazane = None
-    if result.get("przyklady_rozwiazane"):
-        przyklady_rozwiazane = PrzykladyRozwiazane(**result["przyklady_rozwiazane"])
-
-    zadania_do_praktyki = None
-    if result.get("zadania_do_praktyki"):
-        zadania_do_praktyki = ZadaniaDoPraktyki(**result["zadania_do_praktyki"])
-
-    podsumowanie = None
-    if result.get("podsumowanie"):
-        podsumowanie = Podsumowanie(**result["podsumowanie"])
+    phases = {name: model(**result[name]) if result.get(name) else None
+              for name, model in LESSON_PHASES.items()}
 
     return LessonContent(
         objective=result.get("objective", ""),
@@ -94,9 +193,44 @@ async def generate_lesson(
         key_formulas=result.get("key_formulas", []),
         difficulty=result.get("difficulty", current_level),
         math_domain=result.get("math_domain", ""),
-        rozgrzewka=rozgrzewka,
-        wyjasnienie_tematu=wyjasnienie_tematu,
-        przyklady_rozwiazane=przyklady_rozwiazane,
-        zadania_do_praktyki=zadania_do_praktyki,
-        podsumowanie=podsumowanie,
+        **phases,
+    )
+
+
+async def generate_lesson(
+    student_id: int,
+    profile: dict,
+    progress_history: list[dict],
+    session_number: int,
+    current_level: str,
+    previous_topics: list[str] | None = None,
+    recall_weak_areas: list[str] | None = None,
+) -> LessonContent:
+    messages = lesson_messages(
+        student_id, profile, progress_history, session_number, current_level,
+        previous_topics, recall_weak_areas,
     )
+    result = await llm.complete_json(messages, temperature=0.7)
+    return build_lesson_content(result, current_level)
+
+
+async def stream_lesson(**inputs) -> AsyncIterator[tuple[str, Any]]:
+    """Like ``generate_lesson``, but streamed: yields top-level fields as they complete.
+
+    Phases are yielded as their models. The last item is ``("lesson",
+    LessonContent)`` built from the whole response. Raises
+    ``JsonStreamError`` if the response is not a valid JSON object.
+    """
+    parser = JsonObjectStream()
+    async for delta in llm.stream(lesson_messages(**inputs), temperature=0.7, json_mode=True):
+        for key, value in parser.feed(delta):
+            if key in LESSON_PHASES:
+                if not isinstance(value, dict):
+                    continue
+                try:
+                    value = LESSON_PHASES[key](**value)
+                except ValidationError:
+                    # Reported by build_lesson_content at the end
+                    continue
+            yield key, value
+    yield "lesson", build_lesson_content(parser.finish(), inputs["current_level"])
@@ -0,0 +1,176 @@
+"""Background pre-generation of each student's next lesson.
+
+``POST /api/lessons/{student_id}/generate`` used to wait on the model every
+time. Now, when a lesson is completed or a recall session is submitted, a
+``lessons.pregenerate`` job (app/services/jobs.py) builds the inputs of the
+next session(s) and stores the generated lessons in ``pending_lessons``
+(migration 0010). The generate endpoint rebuilds the inputs, and if the
+pending lesson for that session still has the same fingerprint it is moved
+into ``lessons`` without calling the model.
+
+- ``LESSON_PREGEN_LOOKAHEAD`` is how many upcoming sessions to keep ready.
+  Session N+k is generated with the objectives of the pending sessions
+  before it added to ``previous_topics``.
+- Staleness: a pending lesson is only served while it is younger than
+  ``LESSON_PREGEN_MAX_AGE_HOURS`` and its fingerprint matches. With
+  ``LESSON_PREGEN_MATCH=full`` the fingerprint covers every input,
+  including scores and recall weak areas, so any new result forces a fresh
+  lesson. ``plan`` covers only the profile, level, session number and
+  topic history, which keeps look-ahead slots usable after the student
+  finishes the lesson before them.
+- The model name and the ``lesson_generator`` prompt are always part of
+  the fingerprint, so a prompt edit invalidates every pending lesson.
+"""
+
+import json
+import logging
+from datetime import timedelta
+
+from app.config import settings
+from app.db.database import db_pool
+from app.db.timestamps import db_now
+from app.db.write_queue import execute_write
+from app.models.lesson import LessonContent
+from app.services.jobs import JobError, enqueue, job_handler, job_pool
+from app.services.lesson_generator import generate_lesson, lesson_inputs_fingerprint, load_lesson_inputs
+
+logger = logging.getLogger(__name__)
+
+# LESSON_PREGEN_MATCH -> inputs covered by the fingerprint (None = all of them)
+MATCH_FIELDS = {
+    "full": None,
+    "plan": ("student_id", "profile", "session_number", "current_level", "previous_topics"),
+}
+
+
+class LessonPregenerator:
+    def __init__(self, enabled: bool = True, lookahead: int = 1, max_age_hours: float = 24.0, match: str = "full"):
+        self.enabled = enabled
+        self.lookahead = max(1, lookahead)
+        self.max_age_hours = max_age_hours
+        self.match = match
+        self._served = 0
+        self._missed = 0
+        self._generated = 0
+
+    def fingerprint(self, inputs: dict) -> str:
+        return lesson_inputs_fingerprint(inputs, MATCH_FIELDS[self.match])
+
+    def _fresh_after(self) -> str:
+        return db_now(-timedelta(hours=self.max_age_hours))
+
+    async def schedule(self, student_id: int) -> None:
+        """Queue a pre-generation job for the student; never raises."""
+        if not self.enabled or not job_pool.enabled:
+            return
+        try:
+            # Below interactive jobs: this is speculative work
+            await enqueue("lessons.pregenerate", {"student_id": student_id}, priority=-1, student_id=student_id)
+        except Exception:
+            logger.exception("Could not schedule lesson pre-generation for student %s", student_id)
+
+    async def take(self, db, inputs: dict) -> LessonContent | None:
+        """Remove and return the pending lesson matching ``inputs``, if any.
+
+        Runs on the caller's connection so the caller can insert the lesson
+        in the same transaction. Pending rows for this and earlier sessions
+        are dropped either way: the caller is about to create that session.
+        """
+        if not self.enabled:
+            return None
+        student_id, session_number = inputs["student_id"], inputs["session_number"]
+        cursor = await db.execute(
+            """DELETE FROM pending_lessons
+               WHERE student_id = ? AND session_number = ? AND fingerprint = ? AND created_at > ?
+               RETURNING content""",
+            (student_id, session_number, self.fingerprint(inputs), self._fresh_after()),
+        )
+        row = await cursor.fetchone()
+        await db.execute(
+            "DELETE FROM pending_lessons WHERE student_id = ? AND session_number <= ?",
+            (student_id, session_number),
+        )
+        if row is None:
+            self._missed += 1
+            return None
+        self._served += 1
+        return LessonContent(**json.loads(row["content"]))
+
+    async def pregenerate(self, student_id: int) -> dict:
+        """Make sure the next ``lookahead`` sessions have a fresh pending lesson."""
+        async with db_pool.acquire() as db:
+            inputs = await load_lesson_inputs(db, student_id)
+            if inputs is None:
+                raise JobError(f"Student {student_id} not found")
+            cursor = await db.execute(
+                """SELECT session_number, fingerprint, objective FROM pending_lessons
+                   WHERE student_id = ? AND created_at > ?""",
+                (student_id, self._fresh_after()),
+            )
+            existing = {row["session_number"]: dict(row) for row in await cursor.fetchall()}
+
+        kept, generated = [], []
+        for _ in range(self.lookahead):
+            session_number, fingerprint = inputs["session_number"], self.fingerprint(inputs)
+            row = existing.get(session_number)
+            if row and row["fingerprint"] == fingerprint:
+                objective = row["objective"]
+                kept.append(session_number)
+            else:
+                lesson = await generate_lesson(**inputs)
+                await execute_write(
+                    """INSERT OR REPLACE INTO pending_lessons
+                       (student_id, session_number, fingerprint, objective, content, difficulty, created_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                    (student_id, session_number, fingerprint, lesson.objective,
+                     json.dumps(lesson.model_dump()), lesson.difficulty, db_now()),
+                )
+                self._generated += 1
+                objective = lesson.objective
+                generated.append(session_number)
+            inputs = {
+                **inputs,
+                "session_number": session_number + 1,
+                "previous_topics": inputs["previous_topics"] + ([objective] if objective else []),
+            }
+
+        # Anything outside the window is for a session already taken or no longer wanted
+        await execute_write(
+            "DELETE FROM pending_lessons WHERE student_id = ? AND (session_number < ? OR session_number >= ?)",
+            (student_id, inputs["session_number"] - self.lookahead, inputs["session_number"]),
+        )
+        return {"student_id": student_id, "generated": generated, "kept": kept}
+
+    async def stats(self) -> dict:
+        async with db_pool.acquire() as db:
+            cursor = await db.execute(
+                "SELECT COUNT(*) AS n, SUM(created_at <= ?) AS stale FROM pending_lessons",
+                (self._fresh_after(),),
+            )
+            row = await cursor.fetchone()
+        lookups = self._served + self._missed
+        return {
+            "enabled": self.enabled,
+            "lookahead": self.lookahead,
+            "max_age_hours": self.max_age_hours,
+            "match": self.match,
+            "pending": row["n"],
+            "stale": row["stale"] or 0,
+            "generated": self._generated,
+            "served": self._served,
+            "missed": self._missed,
+            "hit_rate": round(self._served / lookups, 3) if lookups else 0.0,
+        }
+
+
+lesson_pregen = LessonPregenerator(
+    enabled=settings.lesson_pregen_enabled,
+    lookahead=settings.lesson_pregen_lookahead,
+    max_age_hours=settings.lesson_pregen_max_age_hours,
+    match=settings.lesson_pregen_match,
+)
+
+
+@job_handler("lessons.pregenerate")
+async def _pregenerate_job(payload: dict) -> dict:
+    return await lesson_pregen.pregenerate(payload["student_id"])
@@ -0,0 +1,213 @@
+"""Shared LLM gateway.
+
+Every AI call in the app goes through the module-level ``llm`` instead of
+constructing its own ``AsyncOpenAI``. One client means one httpx connection
+pool: keep-alive connections and TLS sessions to the provider are reused
+across requests instead of being set up again on every round trip.
+
+The gateway is started and closed in the FastAPI lifespan. Scripts that
+skip the lifespan still work: the client is created lazily on first use.
+
+Retries of rate-limit (429), 5xx and connection errors use the SDK's
+exponential backoff (``LLM_MAX_RETRIES``). Replies that fail to parse as
+JSON are retried once more here.
+
+``LLM_PROVIDER=fake`` swaps the network transport for the offline
+stand-in in app/services/fake_llm.py.
+
+``complete_json(..., cache="<policy>")`` serves repeat requests from the
+response cache in app/services/llm_cache.py.
+"""
+
+import json
+import logging
+import time
+from typing import AsyncIterator
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.config import settings
+from app.services.llm_cache import cache_key, llm_cache
+
+logger = logging.getLogger(__name__)
+
+
+class LLMGateway:
+    JSON_FORMAT = {"type": "json_object"}
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        provider: str = "openai",
+        base_url: str | None = None,
+        timeout_seconds: float = 60.0,
+        connect_timeout_seconds: float = 10.0,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        max_retries: int = 2,
+    ):
+        self.api_key = api_key
+        self.model = model
+        self.provider = provider
+        self.base_url = base_url or None
+        self.timeout = httpx.Timeout(timeout_seconds, connect=connect_timeout_seconds)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=60.0,
+        )
+        self.max_retries = max_retries
+        self._client: AsyncOpenAI | None = None
+        self._fake_transport = None
+        self._calls = 0
+        self._errors = 0
+        self._json_retries = 0
+        self._total_ms = 0.0
+
+    def _build_client(self) -> AsyncOpenAI:
+        base_url = self.base_url
+        if self.provider == "fake":
+            from app.services.fake_llm import FAKE_BASE_URL, transport_from_settings
+
+            self._fake_transport = transport_from_settings()
+            http_client = httpx.AsyncClient(transport=self._fake_transport, timeout=self.timeout)
+            base_url = FAKE_BASE_URL
+        else:
+            http_client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+        return AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=base_url,
+            http_client=http_client,
+            max_retries=self.max_retries,
+            timeout=self.timeout,
+        )
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        if self._client is None:
+            self._client = self._build_client()
+        return self._client
+
+    async def start(self) -> None:
+        _ = self.client
+
+    async def stop(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def complete_json(
+        self,
+        messages: list[dict],
+        *,
+        temperature: float = 0.7,
+        model: str | None = None,
+        max_tokens: int | None = None,
+        cache: str | None = None,
+        cache_ttl: float | None = None,
+    ) -> dict:
+        """Run a JSON-mode chat completion and return the parsed object.
+
+        ``cache`` opts the call into the response cache under that policy
+        name (see app/services/llm_cache.py); ``cache_ttl`` overrides the
+        policy's TTL in seconds.
+        """
+        model = model or self.model
+        key = None
+        if cache and llm_cache.enabled:
+            key = cache_key(model, messages, temperature, self.JSON_FORMAT)
+            cached = await llm_cache.get(key)
+            if cached is not None:
+                return cached
+        result = await self._complete_json(messages, temperature, model, max_tokens)
+        if key is not None:
+            await llm_cache.set(key, cache, model, result, cache_ttl)
+        return result
+
+    async def _complete_json(self, messages: list[dict], temperature: float, model: str, max_tokens: int | None) -> dict:
+        extra = {"max_tokens": max_tokens} if max_tokens else {}
+        for attempt in range(2):
+            started = time.perf_counter()
+            self._calls += 1
+            try:
+                response = await self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    response_format=self.JSON_FORMAT,
+                    **extra,
+                )
+            except Exception:
+                self._errors += 1
+                raise
+            finally:
+                self._total_ms += (time.perf_counter() - started) * 1000
+            content = response.choices[0].message.content or ""
+            try:
+                return json.loads(content)
+            except json.JSONDecodeError:
+                if attempt:
+                    self._errors += 1
+                    raise
+                self._json_retries += 1
+                logger.warning("LLM returned invalid JSON (%d chars); retrying once", len(content))
+
+    async def stream(
+        self,
+        messages: list[dict],
+        *,
+        temperature: float = 0.7,
+        model: str | None = None,
+        json_mode: bool = False,
+    ) -> AsyncIterator[str]:
+        """Yield content deltas of a streamed chat completion."""
+        extra = {"response_format": self.JSON_FORMAT} if json_mode else {}
+        self._calls += 1
+        started = time.perf_counter()
+        try:
+            stream = await self.client.chat.completions.create(
+                model=model or self.model,
+                messages=messages,
+                temperature=temperature,
+                stream=True,
+                **extra,
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception:
+            self._errors += 1
+            raise
+        finally:
+            self._total_ms += (time.perf_counter() - started) * 1000
+
+    def stats(self) -> dict:
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "base_url": self.base_url,
+            "client_open": self._client is not None,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "max_retries": self.max_retries,
+            "calls": self._calls,
+            "errors": self._errors,
+            "json_retries": self._json_retries,
+            "avg_ms": round(self._total_ms / self._calls, 1) if self._calls else 0.0,
+            "fake": self._fake_transport.stats() if self._fake_transport else None,
+        }
+
+
+llm = LLMGateway(
+    api_key=settings.api_key,
+    model=settings.model_name,
+    provider=settings.llm_provider,
+    base_url=settings.llm_base_url,
+    timeout_seconds=settings.llm_timeout_seconds,
+    connect_timeout_seconds=settings.llm_connect_timeout_seconds,
+    max_connections=settings.llm_max_connections,
+    max_keepalive_connections=settings.llm_max_keepalive_connections,
+    max_retries=settings.llm_max_retries,
+)
@@ -0,0 +1,164 @@
+"""Content-addressed cache for LLM responses.
+
+Call sites opt in by passing a cache policy name to ``llm.complete_json``.
+The key is a SHA-256 of (model, messages, temperature, response_format),
+so any change to the prompt text, the inputs or the model is a miss.
+
+There are two tiers:
+- an in-process LRU (``LLM_CACHE_MEMORY_ENTRIES``) answering repeat hits
+  without touching the database;
+- the ``llm_cache`` table (migration 0008), which survives restarts and is
+  shared by all workers.
+
+Entries expire after the TTL of their policy in ``CACHE_TTLS``. Expired rows
+are ignored on read and removed by the admin purge.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from app.config import settings
+from app.db.database import db_pool
+from app.db.timestamps import db_now, parse_db_timestamp, utc_now
+from app.db.write_queue import execute_write
+
+logger = logging.getLogger(__name__)
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# policy (usually the prompt name) -> time to live in seconds
+CACHE_TTLS = {
+    "extract_learning_points": 30 * DAY,
+    "assessment_analyzer": 7 * DAY,
+    "evaluate_recall": 7 * DAY,
+    "game_equations": 6 * HOUR,
+    "game_calc_problems": 6 * HOUR,
+}
+
+
+def cache_key(model: str, messages: list[dict], temperature: float, response_format: dict | None) -> str:
+    payload = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature, "response_format": response_format},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, max_memory_entries: int = 1000, default_ttl_seconds: float = DAY, enabled: bool = True):
+        self.max_memory_entries = max(0, max_memory_entries)
+        self.default_ttl_seconds = default_ttl_seconds
+        self.enabled = enabled
+        # key -> (monotonic expiry, serialised response). Hits are decoded
+        # fresh so callers can mutate what they get back.
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._memory_hits = 0
+        self._db_hits = 0
+        self._misses = 0
+        self._writes = 0
+
+    def ttl_for(self, policy: str) -> float:
+        return CACHE_TTLS.get(policy, self.default_ttl_seconds)
+
+    def _remember(self, key: str, value: str, ttl_seconds: float) -> None:
+        if not self.max_memory_entries:
+            return
+        self._memory[key] = (time.monotonic() + ttl_seconds, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> dict | None:
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires, value = entry
+            if expires > time.monotonic():
+                self._memory.move_to_end(key)
+                self._memory_hits += 1
+                return json.loads(value)
+            del self._memory[key]
+
+        async with db_pool.acquire() as db:
+            cursor = await db.execute(
+                "SELECT response, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?",
+                (key, db_now()),
+            )
+            row = await cursor.fetchone()
+        if row is None:
+            self._misses += 1
+            return None
+        remaining = (parse_db_timestamp(row["expires_at"]) - utc_now()).total_seconds()
+        self._remember(key, row["response"], max(0.0, remaining))
+        self._db_hits += 1
+        return json.loads(row["response"])
+
+    async def set(self, key: str, policy: str, model: str, value: dict, ttl_seconds: float | None = None) -> None:
+        ttl_seconds = self.ttl_for(policy) if ttl_seconds is None else ttl_seconds
+        serialised = json.dumps(value, ensure_ascii=False)
+        self._remember(key, serialised, ttl_seconds)
+        try:
+            await execute_write(
+                """INSERT OR REPLACE INTO llm_cache (key, prompt, model, response, created_at, expires_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (key, policy, model, serialised, db_now(), db_now(timedelta(seconds=ttl_seconds))),
+            )
+            self._writes += 1
+        except Exception:
+            # The response was already served; a failed cache write only costs a future miss.
+            logger.exception("Could not persist LLM cache entry for %s", policy)
+
+    async def purge(self, prompt: str | None = None, expired_only: bool = False) -> int:
+        """Delete entries (all, one policy's, or only expired ones); returns rows removed."""
+        where, params = [], []
+        if prompt:
+            where.append("prompt = ?")
+            params.append(prompt)
+        if expired_only:
+            where.append("expires_at <= ?")
+            params.append(db_now())
+        sql = "DELETE FROM llm_cache" + (" WHERE " + " AND ".join(where) if where else "")
+        result = await execute_write(sql, tuple(params))
+        if expired_only:
+            now = time.monotonic()
+            for key in [k for k, (expires, _v) in self._memory.items() if expires <= now]:
+                del self._memory[key]
+        else:
+            # Memory entries don't record their policy; dropping them all is cheap
+            self._memory.clear()
+        return result.rowcount
+
+    async def stats(self) -> dict:
+        async with db_pool.acquire() as db:
+            cursor = await db.execute(
+                """SELECT prompt, COUNT(*) AS entries, SUM(expires_at <= ?) AS expired
+                   FROM llm_cache GROUP BY prompt ORDER BY prompt""",
+                (db_now(),),
+            )
+            by_prompt = {row["prompt"]: {"entries": row["entries"], "expired": row["expired"]}
+                         for row in await cursor.fetchall()}
+        lookups = self._memory_hits + self._db_hits + self._misses
+        return {
+            "enabled": self.enabled,
+            "memory_entries": len(self._memory),
+            "max_memory_entries": self.max_memory_entries,
+            "memory_hits": self._memory_hits,
+            "db_hits": self._db_hits,
+            "misses": self._misses,
+            "writes": self._writes,
+            "hit_rate": round((self._memory_hits + self._db_hits) / lookups, 3) if lookups else 0.0,
+            "by_prompt": by_prompt,
+        }
+
+
+llm_cache = LLMCache(
+    max_memory_entries=settings.llm_cache_memory_entries,
+    default_ttl_seconds=settings.llm_cache_default_ttl_seconds,
+    enabled=settings.llm_cache_enabled,
+)
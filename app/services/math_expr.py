@@ -0,0 +1,284 @@
+"""Small exact parser for school-level math expressions and equations.
+
+Handles numbers (``3``, ``2.5``, ``2,5``, ``12 500`` with a space between
+thousands), single-letter variables,
+``+ - * · × : /``, powers (``^``, ``²``, ``³``), brackets, implicit
+multiplication (``2x``, ``3(x + 1)``, ``(x - 1)(x + 2)``, but not between
+two numbers: ``3 4`` is an error) and one ``=``.
+All arithmetic uses ``Fraction``, so results are exact.
+
+Used to split equations into draggable parts for the equation-builder
+game, and to decide whether two expressions or equations are
+mathematically equivalent. Equivalence is tested by exact evaluation at
+fixed sample points. For the low-degree polynomials and rational
+expressions seen in school this is reliable, and it needs no CAS.
+"""
+
+import re
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import NamedTuple
+
+
+class MathExprError(ValueError):
+    """The text is not an expression this parser understands."""
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str  # canonical, e.g. "*" for "·"
+    raw: str  # as written
+
+
+_TOKEN = re.compile(
+    r"\s*(?:(?P<num>(?:\d{1,3}(?: \d{3}(?!\d))+|\d+)(?:[.,]\d+)?)|(?P<var>[a-zA-Z])|(?P<op>[-+*·×:/^=()²³−]))"
+)
+_OPERATOR_ALIASES = {"·": "*", "×": "*", ":": "/", "−": "-"}
+
+# Sample values for variables; odd fractions avoid accidental coincidences
+_SAMPLES = [
+    Fraction(3, 7), Fraction(-5, 3), Fraction(11, 5), Fraction(-13, 4), Fraction(7, 2),
+    Fraction(17, 6), Fraction(-2, 9), Fraction(19, 8), Fraction(-23, 10), Fraction(29, 11),
+]
+
+
+def tokenize(text: str) -> list[Token]:
+    tokens, pos, text = [], 0, text.strip()
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if not match or match.end() == pos:
+            raise MathExprError(f"Unexpected character {text[pos]!r} at position {pos}")
+        pos = match.end()
+        kind = match.lastgroup
+        raw = value = match.group(kind)
+        if kind == "num":
+            value = value.replace(" ", "")
+        elif kind == "op":
+            value = _OPERATOR_ALIASES.get(value, value)
+            kind = {"(": "lparen", ")": "rparen", "=": "eq", "²": "sup", "³": "sup"}.get(value, "op")
+        tokens.append(Token(kind, value, raw))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens: list[Token]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> Token | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self) -> Token:
+        token = self.peek()
+        if token is None:
+            raise MathExprError("Unexpected end of expression")
+        self.pos += 1
+        return token
+
+    def expr(self):
+        node = self.term()
+        while (token := self.peek()) and token.kind == "op" and token.text in "+-":
+            self.take()
+            node = ("add" if token.text == "+" else "sub", node, self.term())
+        return node
+
+    def term(self):
+        node = self.unary()
+        while token := self.peek():
+            if token.kind == "op" and token.text in "*/":
+                self.take()
+                node = ("mul" if token.text == "*" else "div", node, self.unary())
+            elif token.kind in ("num", "var", "lparen"):
+                # Implicit multiplication: 2x, 3(x + 1), (x + 1)(x - 1)
+                if token.kind == "num" and self.tokens[self.pos - 1].kind == "num":
+                    # "3 4" is a typo or a badly grouped number, not 12
+                    raise MathExprError(f"Two numbers in a row: {token.raw!r}")
+                node = ("mul", node, self.power())
+            else:
+                break
+        return node
+
+    def unary(self):
+        token = self.peek()
+        if token and token.kind == "op" and token.text in "+-":
+            self.take()
+            operand = self.unary()
+            return ("neg", operand) if token.text == "-" else operand
+        return self.power()
+
+    def power(self):
+        node = self.atom()
+        while token := self.peek():
+            if token.kind == "sup":
+                self.take()
+                node = ("pow", node, ("num", Fraction(2 if token.text == "²" else 3)))
+            elif token.kind == "op" and token.text == "^":
+                self.take()
+                node = ("pow", node, self.unary())
+            else:
+                break
+        return node
+
+    def atom(self):
+        token = self.take()
+        if token.kind == "num":
+            return ("num", Fraction(token.text.replace(",", ".")))
+        if token.kind == "var":
+            return ("var", token.text)
+        if token.kind == "lparen":
+            node = self.expr()
+            if self.take().kind != "rparen":
+                raise MathExprError("Missing closing bracket")
+            return node
+        raise MathExprError(f"Unexpected {token.text!r}")
+
+
+def _evaluate(node, env: dict[str, Fraction]) -> Fraction:
+    kind = node[0]
+    if kind == "num":
+        return node[1]
+    if kind == "var":
+        return env[node[1]]
+    if kind == "neg":
+        return -_evaluate(node[1], env)
+    left, right = _evaluate(node[1], env), _evaluate(node[2], env)
+    if kind == "add":
+        return left + right
+    if kind == "sub":
+        return left - right
+    if kind == "mul":
+        return left * right
+    if kind == "div":
+        if right == 0:
+            raise ZeroDivisionError
+        return left / right
+    if right.denominator != 1 or abs(right) > 12:
+        raise MathExprError("Only small whole-number exponents are supported")
+    if left == 0 and right < 0:
+        raise ZeroDivisionError
+    return left ** int(right)
+
+
+def _variables(node) -> set[str]:
+    if node[0] == "var":
+        return {node[1]}
+    if node[0] == "num":
+        return set()
+    return set().union(*(_variables(child) for child in node[1:]))
+
+
+@dataclass(frozen=True)
+class Expression:
+    """A parsed expression, or an equation when ``rhs`` is set."""
+
+    lhs: tuple
+    rhs: tuple | None = None
+
+    @property
+    def is_equation(self) -> bool:
+        return self.rhs is not None
+
+    @property
+    def variables(self) -> set[str]:
+        return _variables(self.lhs) | (_variables(self.rhs) if self.rhs else set())
+
+    def evaluate(self, env: dict[str, Fraction] | None = None) -> Fraction:
+        """Value of the expression; for an equation, of ``lhs - rhs``."""
+        env = env or {}
+        value = _evaluate(self.lhs, env)
+        return value - _evaluate(self.rhs, env) if self.rhs is not None else value
+
+
+def parse(text: str) -> Expression:
+    tokens = tokenize(text)
+    if not tokens:
+        raise MathExprError("Empty expression")
+    sides, start = [], 0
+    for i, token in enumerate(tokens + [Token("eq", "=", "=")]):
+        if token.kind == "eq":
+            parser = _Parser(tokens[start:i])
+            node = parser.expr()
+            if parser.peek() is not None:
+                raise MathExprError(f"Unexpected {parser.peek().text!r}")
+            sides.append(node)
+            start = i + 1
+    if len(sides) > 2:
+        raise MathExprError("More than one '=' sign")
+    return Expression(*sides)
+
+
+def _sample_values(expression: Expression, variables: list[str]) -> list[Fraction | None]:
+    values = []
+    for i in range(len(_SAMPLES)):
+        env = {name: _SAMPLES[(i + 3 * j) % len(_SAMPLES)] for j, name in enumerate(variables)}
+        try:
+            values.append(expression.evaluate(env))
+        except ZeroDivisionError:
+            values.append(None)
+    return values
+
+
+def equivalent(a: str | Expression, b: str | Expression) -> bool:
+    """True if both expressions always agree, or both equations have the same solutions.
+
+    Equations count as equivalent when ``lhs - rhs`` of one is a non-zero
+    constant multiple of the other's, which covers swapped sides,
+    reordered terms and both sides multiplied by a number.
+    """
+    a = parse(a) if isinstance(a, str) else a
+    b = parse(b) if isinstance(b, str) else b
+    if a.is_equation != b.is_equation:
+        return False
+    variables = sorted(a.variables | b.variables)
+    pairs = [(x, y) for x, y in zip(_sample_values(a, variables), _sample_values(b, variables))
+             if x is not None and y is not None]
+    if len(pairs) < 3:
+        return False
+    if not a.is_equation:
+        return all(x == y for x, y in pairs)
+    ratio = next((y / x for x, y in pairs if x != 0), None)
+    if ratio is None:
+        return all(y == 0 for _x, y in pairs)
+    return ratio != 0 and all(y == ratio * x for x, y in pairs)
+
+
+def split_parts(text: str) -> list[str]:
+    """Split into draggable parts: terms, ``+``/``-``, ``=`` and brackets.
+
+    A term keeps its coefficient, variable, power and any ``*``/``/`` inside
+    it together ("2x", "x²", "x/4"). A leading minus stays on its term.
+    """
+    parts: list[str] = []
+    current = ""
+    previous: Token | None = None
+    for token in tokenize(text):
+        splitter = token.kind in ("eq", "lparen", "rparen") or (
+            token.kind == "op" and token.text in "+-"
+            and previous is not None and previous.kind not in ("eq", "lparen")
+            and not (previous.kind == "op" and previous.text in "*/^")
+        )
+        if splitter:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(token.raw)
+        else:
+            current += token.raw
+        previous = token
+    if current:
+        parts.append(current)
+    return parts
+
+
+def join_parts(parts: list[str]) -> str:
+    """Inverse of ``split_parts`` with conventional spacing: "3(x + 1) = 12"."""
+    text, previous = "", None
+    for part in parts:
+        glued = previous is not None and (
+            part == ")" or previous == "("
+            # Implicit multiplication: 3(x + 1), (x - 1)(x + 2)
+            or (part == "(" and previous not in ("+", "-", "=", "−"))
+        )
+        text += part if glued or previous is None else " " + part
+        previous = part
+    return text
@@ -1,30 +1,73 @@
-import json
 from app.db.database import get_db
 
+# Observation sources that feed skill averages; 'difficulty' rows only
+# appear in the analytics breakdown.
+AREA_SOURCES = ("improved", "struggling")
 
-async def get_skill_averages(student_id: int) -> dict[str, float]:
-    """Calculate running averages per skill area from progress history."""
-    db = await get_db()
-    try:
-        cursor = await db.execute(
-            "SELECT * FROM progress WHERE student_id = ? ORDER BY completed_at",
-            (student_id,),
-        )
-        rows = await cursor.fetchall()
 
-        skill_scores: dict[str, list[float]] = {}
+async def record_skill_observations(
+    db,
+    student_id: int,
+    progress_id: int,
+    score: float | None,
+    areas_improved: list[str] | None,
+    areas_struggling: list[str] | None,
+    difficulty: str | None = None,
+) -> None:
+    """Write one skill_observations row per skill touched by a progress entry.
+
+    Struggling areas are scored 20 points below the lesson score, matching
+    how skill averages have always been computed.
+    """
+    score = score or 0.0
+    rows = [(area, score, "improved") for area in areas_improved or []]
+    rows += [(area, max(0, score - 20), "struggling") for area in areas_struggling or []]
+    if difficulty:
+        rows.append((f"level_{difficulty}", score, "difficulty"))
+    if not rows:
+        return
+    await db.executemany(
+        """INSERT INTO skill_observations (student_id, progress_id, skill, score, source)
+           VALUES (?, ?, ?, ?, ?)""",
+        [(student_id, progress_id, skill, value, source) for skill, value, source in rows],
+    )
 
-        for row in rows:
-            score = row["score"] or 0.0
-            areas_improved = json.loads(row["areas_improved"]) if row["areas_improved"] else []
-            areas_struggling = json.loads(row["areas_struggling"]) if row["areas_struggling"] else []
 
-            for area in areas_improved:
-                skill_scores.setdefault(area, []).append(score)
-            for area in areas_struggling:
-                skill_scores.setdefault(area, []).append(max(0, score - 20))
+async def get_skill_stats(db, student_id: int, sources: tuple[str, ...] = AREA_SOURCES) -> dict[str, dict]:
+    """Per-skill average, count, and first/last score in observation order."""
+    placeholders = ", ".join("?" for _ in sources)
+    cursor = await db.execute(
+        f"""SELECT skill, AVG(score) AS average, COUNT(*) AS count,
+                   MAX(first_score) AS first_score, MAX(last_score) AS last_score
+            FROM (
+                SELECT skill, score,
+                       FIRST_VALUE(score) OVER w AS first_score,
+                       LAST_VALUE(score) OVER w AS last_score
+                FROM skill_observations
+                WHERE student_id = ? AND source IN ({placeholders})
+                WINDOW w AS (PARTITION BY skill ORDER BY observed_at, id
+                             ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+            )
+            GROUP BY skill""",
+        (student_id, *sources),
+    )
+    return {
+        row["skill"]: {
+            "average": row["average"],
+            "count": row["count"],
+            "first": row["first_score"],
+            "last": row["last_score"],
+        }
+        for row in await cursor.fetchall()
+    }
 
-        return {k: round(sum(v) / len(v), 1) for k, v in skill_scores.items()}
+
+async def get_skill_averages(student_id: int) -> dict[str, float]:
+    """Calculate running averages per skill area from progress history."""
+    db = await get_db()
+    try:
+        stats = await get_skill_stats(db, student_id)
+        return {k: round(v["average"], 1) for k, v in stats.items()}
     finally:
         await db.close()
 
@@ -0,0 +1,222 @@
+"""Prompt registry.
+
+All YAML files in ``prompts/`` are parsed once and kept in memory, so AI
+request paths no longer open and ``yaml.safe_load`` a file per call.
+
+Files with a ``user_template`` become ``PromptTemplate`` objects. Their
+``{placeholders}`` are checked at load time against ``EXPECTED_PLACEHOLDERS``
+(what the calling code passes), so a typo in a prompt fails at startup
+instead of as a KeyError in the middle of a lesson request. Static
+fragments derived from data files, such as the YAML dump of
+``polish_struggles.yaml``, are rendered once per load.
+
+File mtimes are re-checked at most every ``PROMPT_RELOAD_INTERVAL_SECONDS``
+(0 disables this). Edited files are reloaded without a restart. An edit
+that fails validation is logged and the previous version stays live.
+"""
+
+import logging
+import string
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import yaml
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROMPTS_DIR = Path(__file__).parent.parent.parent / "prompts"
+
+# prompt name -> placeholders the code supplies to user_template
+EXPECTED_PLACEHOLDERS = {
+    "assessment_analyzer": {
+        "student_id", "name", "age", "bracket", "placement_score", "diagnostic_responses",
+        "arytmetyka_score", "algebra_score", "geometria_score", "overall_score",
+        "incorrect_details", "math_misconceptions",
+    },
+    "conversation_partner": {"level", "name", "scenario_title", "scenario_description", "weak_areas"},
+    "diagnostic": {
+        "name", "age", "current_level", "goals", "problem_areas", "filler", "additional_notes",
+        "math_misconceptions",
+    },
+    "evaluate_recall": {"student_level", "qa_text"},
+    "extract_learning_points": {
+        "student_level", "objective", "presentation_text", "exercises_text", "practice_text",
+    },
+    "generate_recall_questions": {"student_level", "learning_points_text"},
+    "learning_path": {
+        "name", "age", "current_level", "goals", "problem_areas", "determined_level",
+        "confidence_score", "sub_skill_breakdown", "weak_areas", "profile_summary", "priorities",
+        "gaps", "math_misconceptions",
+    },
+    "lesson_generator": {
+        "session_number", "current_level", "profile_summary", "priorities", "gaps",
+        "progress_history", "previous_topics", "recall_weak_areas",
+    },
+}
+
+# fragment name -> (source prompt file, renderer)
+FRAGMENTS = {
+    "math_misconceptions": (
+        "polish_struggles",
+        lambda data: yaml.dump(data, default_flow_style=False, allow_unicode=True),
+    ),
+}
+
+
+class PromptError(ValueError):
+    """A prompt file is missing, malformed or uses unexpected placeholders."""
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    name: str
+    system_prompt: str
+    user_template: str
+    placeholders: frozenset
+    data: dict
+
+    def render(self, **values) -> str:
+        missing = self.placeholders - values.keys()
+        if missing:
+            raise PromptError(f"Prompt {self.name!r} is missing values for: {', '.join(sorted(missing))}")
+        return self.user_template.format(**values)
+
+    def messages(self, **values) -> list[dict]:
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": self.render(**values)},
+        ]
+
+
+def _placeholders(template: str) -> frozenset:
+    return frozenset(field.split(".")[0].split("[")[0]
+                     for _, field, _, _ in string.Formatter().parse(template) if field)
+
+
+def _parse(path: Path) -> tuple[dict, PromptTemplate | None]:
+    name = path.stem
+    try:
+        with open(path, "r") as f:
+            data = yaml.safe_load(f)
+    except (OSError, yaml.YAMLError) as exc:
+        raise PromptError(f"{path.name}: {exc}") from exc
+    if not isinstance(data, dict):
+        raise PromptError(f"{path.name}: expected a mapping at the top level")
+    if "user_template" not in data:
+        return data, None
+
+    for key in ("system_prompt", "user_template"):
+        if not isinstance(data.get(key), str):
+            raise PromptError(f"{path.name}: {key} must be a string")
+    try:
+        placeholders = _placeholders(data["user_template"])
+    except ValueError as exc:
+        raise PromptError(f"{path.name}: malformed user_template: {exc}") from exc
+    expected = EXPECTED_PLACEHOLDERS.get(name)
+    if expected is not None and not placeholders <= expected:
+        unknown = ", ".join(sorted(placeholders - expected))
+        raise PromptError(f"{path.name}: user_template uses unknown placeholders: {unknown}")
+    return data, PromptTemplate(name, data["system_prompt"], data["user_template"], placeholders, data)
+
+
+class PromptRegistry:
+    def __init__(self, directory: Path, reload_interval_seconds: float = 2.0):
+        self.directory = Path(directory)
+        self.reload_interval_seconds = reload_interval_seconds
+        self._data: dict[str, dict] = {}
+        self._templates: dict[str, PromptTemplate] = {}
+        self._fragments: dict[str, str] = {}
+        self._mtimes: dict[str, float] = {}
+        self._loaded = False
+        self._last_check = 0.0
+        self._reloads = 0
+        self._lock = threading.Lock()
+
+    def load_all(self) -> None:
+        """Load and validate every prompt file; raises PromptError on the first bad one."""
+        with self._lock:
+            data, templates, mtimes = {}, {}, {}
+            for path in sorted(self.directory.glob("*.yaml")):
+                mtimes[path.stem] = path.stat().st_mtime
+                data[path.stem], template = _parse(path)
+                if template is not None:
+                    templates[path.stem] = template
+            missing = set(EXPECTED_PLACEHOLDERS) - set(templates)
+            if missing:
+                raise PromptError(f"Missing prompt templates: {', '.join(sorted(missing))}")
+            self._data, self._templates, self._mtimes = data, templates, mtimes
+            self._fragments = {name: render(data[source]) for name, (source, render) in FRAGMENTS.items()
+                               if source in data}
+            self._loaded = True
+            self._last_check = time.monotonic()
+
+    def _refresh(self) -> None:
+        if not self._loaded:
+            self.load_all()
+            return
+        if self.reload_interval_seconds <= 0:
+            return
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval_seconds:
+            return
+        with self._lock:
+            self._last_check = now
+            for path in self.directory.glob("*.yaml"):
+                try:
+                    mtime = path.stat().st_mtime
+                except OSError:
+                    continue
+                if self._mtimes.get(path.stem) == mtime:
+                    continue
+                self._mtimes[path.stem] = mtime
+                try:
+                    data, template = _parse(path)
+                except PromptError as exc:
+                    logger.error("Not reloading prompt %s: %s", path.name, exc)
+                    continue
+                self._data[path.stem] = data
+                if template is not None:
+                    self._templates[path.stem] = template
+                for name, (source, render) in FRAGMENTS.items():
+                    if source == path.stem:
+                        self._fragments[name] = render(data)
+                self._reloads += 1
+                logger.info("Reloaded prompt %s", path.name)
+
+    def get(self, name: str) -> PromptTemplate:
+        self._refresh()
+        try:
+            return self._templates[name]
+        except KeyError:
+            raise PromptError(f"Unknown prompt template: {name}") from None
+
+    def data(self, name: str) -> dict:
+        self._refresh()
+        try:
+            return self._data[name]
+        except KeyError:
+            raise PromptError(f"Unknown prompt file: {name}") from None
+
+    def fragment(self, name: str) -> str:
+        self._refresh()
+        try:
+            return self._fragments[name]
+        except KeyError:
+            raise PromptError(f"Unknown prompt fragment: {name}") from None
+
+    def stats(self) -> dict:
+        return {
+            "directory": str(self.directory),
+            "files": sorted(self._data),
+            "templates": sorted(self._templates),
+            "fragments": sorted(self._fragments),
+            "reload_interval_seconds": self.reload_interval_seconds,
+            "reloads": self._reloads,
+        }
+
+
+prompts = PromptRegistry(PROMPTS_DIR, reload_interval_seconds=settings.prompt_reload_interval_seconds)
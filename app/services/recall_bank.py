@@ -0,0 +1,159 @@
+"""Per-learning-point bank of recall questions.
+
+Every question written by ``generate_recall_questions`` is stored in
+``recall_questions`` (migration 0011) as a variant of its learning point,
+up to ``RECALL_BANK_MAX_VARIANTS`` per point. ``build_recall_quiz`` asks one
+question per point. It takes the least-used available stored variant and
+only calls the model for the points that have none. Once the points have
+been quizzed a few times, most recall sessions need no model call at all.
+
+A variant is available while it has been asked fewer than
+``RECALL_BANK_MAX_USES`` times, and not within the last
+``RECALL_BANK_REUSE_AFTER_DAYS`` days. Usage is counted when a session is
+actually created (``mark_used``), not when a quiz is only prefetched. A
+used-up variant is retired when a new one for its point needs the slot,
+so the bank keeps refilling instead of freezing at the cap.
+"""
+
+import json
+import logging
+from datetime import timedelta
+
+from app.config import settings
+from app.db.database import db_pool
+from app.db.timestamps import db_now
+from app.db.write_queue import run_write
+from app.services.recall_generator import generate_recall_questions
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCOURAGEMENT = "Rozgrzejmy sie!"
+
+
+def _point_id(question: dict) -> int | None:
+    try:
+        return int(question.get("point_id"))
+    except (TypeError, ValueError):
+        return None
+
+
+async def _available_variants(point_ids: list[int]) -> dict[int, dict]:
+    """Least-used available variant per point."""
+    placeholders = ",".join("?" * len(point_ids))
+    reuse_before = db_now(-timedelta(days=settings.recall_bank_reuse_after_days))
+    async with db_pool.acquire() as db:
+        cursor = await db.execute(
+            f"""SELECT * FROM recall_questions
+                WHERE learning_point_id IN ({placeholders})
+                  AND times_used < ?
+                  AND (last_used_at IS NULL OR last_used_at <= ?)
+                ORDER BY times_used, id""",
+            (*point_ids, settings.recall_bank_max_uses, reuse_before),
+        )
+        rows = await cursor.fetchall()
+    variants = {}
+    for row in rows:
+        variants.setdefault(row["learning_point_id"], dict(row))
+    return variants
+
+
+def _to_question(row: dict) -> dict:
+    return {
+        "point_id": row["learning_point_id"],
+        "question_id": row["id"],
+        "question_type": row["question_type"],
+        "question_text": row["question_text"],
+        "options": json.loads(row["options"]) if row["options"] else None,
+        "correct_answer": row["correct_answer"],
+        "hint": row["hint"],
+    }
+
+
+async def store_questions(questions: list[dict], point_ids: set[int]) -> dict[int, int]:
+    """Save generated questions as variants; returns {position in questions: question_id}.
+
+    A question identical to a stored variant maps to that variant. At the
+    variant cap the point's oldest used-up variant makes room; if none is
+    used up the question is not stored. Questions for points outside
+    ``point_ids`` (the model inventing an id) are never stored.
+    """
+
+    async def _insert(uow):
+        stored = {}
+        for index, question in enumerate(questions):
+            point_id = _point_id(question)
+            if point_id not in point_ids or not question.get("question_text"):
+                continue
+            await uow.execute(
+                """DELETE FROM recall_questions
+                   WHERE id = (SELECT id FROM recall_questions
+                               WHERE learning_point_id = ? AND times_used >= ?
+                               ORDER BY last_used_at, id LIMIT 1)
+                     AND (SELECT COUNT(*) FROM recall_questions WHERE learning_point_id = ?) >= ?""",
+                (point_id, settings.recall_bank_max_uses, point_id, settings.recall_bank_max_variants),
+            )
+            cursor = await uow.execute(
+                """INSERT INTO recall_questions
+                   (learning_point_id, question_type, question_text, options, correct_answer, hint, created_at)
+                   SELECT ?, ?, ?, ?, ?, ?, ?
+                   WHERE (SELECT COUNT(*) FROM recall_questions WHERE learning_point_id = ?) < ?
+                   ON CONFLICT (learning_point_id, question_text)
+                       DO UPDATE SET hint = COALESCE(excluded.hint, recall_questions.hint)
+                   RETURNING id""",
+                (
+                    point_id,
+                    question.get("question_type") or "solve",
+                    question["question_text"],
+                    json.dumps(question["options"]) if question.get("options") else None,
+                    None if question.get("correct_answer") is None else str(question["correct_answer"]),
+                    question.get("hint"),
+                    db_now(),
+                    point_id,
+                    settings.recall_bank_max_variants,
+                ),
+            )
+            row = await cursor.fetchone()
+            if row:
+                stored[index] = row["id"]
+        return stored
+
+    return await run_write(_insert)
+
+
+async def build_recall_quiz(points: list[dict], student_level: str) -> dict:
+    """One question per point: stored variants first, the model for the rest."""
+    point_ids = [p["id"] for p in points]
+    variants = await _available_variants(point_ids) if settings.recall_bank_enabled and point_ids else {}
+
+    questions = {point_id: _to_question(row) for point_id, row in variants.items()}
+    encouragement = DEFAULT_ENCOURAGEMENT
+    missing = [p for p in points if p["id"] not in questions]
+    if missing:
+        result = await generate_recall_questions(missing, student_level)
+        generated = result.get("questions", [])
+        encouragement = result.get("encouragement", encouragement)
+        stored = await store_questions(generated, {p["id"] for p in missing}) if settings.recall_bank_enabled else {}
+        for index, question in enumerate(generated):
+            point_id = _point_id(question)
+            if point_id is None or point_id in questions:
+                continue
+            questions[point_id] = {**question, "point_id": point_id, "question_id": stored.get(index)}
+
+    logger.debug("Recall quiz: %d banked, %d generated", len(variants), len(questions) - len(variants))
+    return {
+        "questions": [questions[point_id] for point_id in point_ids if point_id in questions],
+        "encouragement": encouragement,
+        "banked": len(variants),
+    }
+
+
+async def mark_used(db, questions: list[dict]) -> None:
+    """Count the banked questions of a started session as used (caller commits)."""
+    ids = [q["question_id"] for q in questions if q.get("question_id")]
+    if not ids:
+        return
+    await db.execute(
+        f"""UPDATE recall_questions SET times_used = times_used + 1, last_used_at = ?
+            WHERE id IN ({",".join("?" * len(ids))})""",
+        (db_now(), *ids),
+    )
@@ -1,18 +1,12 @@
-import json
-import yaml
-from pathlib import Path
-from datetime import datetime
-from openai import AsyncOpenAI
-from app.config import settings
+from app.services.answer_grader import grade_answer
+from app.services.llm import llm
+from app.services.prompts import prompts
 from app.db.database import get_db
+from app.db.unit_of_work import UnitOfWork, unit_of_work
 from app.services.srs_engine import sm2_update
 
-PROMPTS_DIR = Path(__file__).parent.parent.parent / "prompts"
-
-
-def load_prompt(name: str) -> dict:
-    with open(PROMPTS_DIR / name, "r") as f:
-        return yaml.safe_load(f)
+# Learning points asked about in one recall quiz
+QUIZ_POINTS = 5
 
 
 async def get_points_due_for_review(student_id: int) -> list[dict]:
@@ -51,10 +45,7 @@ async def get_points_due_for_review(student_id: int) -> list[dict]:
 
 
 async def generate_recall_questions(points: list[dict], student_level: str) -> dict:
-    prompt = load_prompt("generate_recall_questions.yaml")
-
-    system_prompt = prompt["system_prompt"]
-    user_template = prompt["user_template"]
+    template = prompts.get("generate_recall_questions")
 
     points_text = ""
     for p in points:
@@ -65,69 +56,109 @@ async def generate_recall_questions(points: list[dict], student_level: str) -> d
             points_text += f", Example Problem: {p['example_problem']}"
         points_text += "\n"
 
-    user_message = user_template.format(
+    messages = template.messages(
         student_level=student_level,
         learning_points_text=points_text,
     )
 
-    client = AsyncOpenAI(api_key=settings.api_key)
-
-    response = await client.chat.completions.create(
-        model=settings.model_name,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_message},
-        ],
+    return await llm.complete_json(
+        messages,
         temperature=0.5,
-        response_format={"type": "json_object"},
     )
 
-    result = json.loads(response.choices[0].message.content)
-    return result
-
 
-async def evaluate_recall_answers(questions: list[dict], answers: list, student_level: str) -> dict:
-    prompt = load_prompt("evaluate_recall.yaml")
+def _student_answer(answers: list, index: int) -> str:
+    # Support both formats: list of strings or list of dicts with point_id
+    if index >= len(answers):
+        return "(no answer)"
+    ans = answers[index]
+    if isinstance(ans, dict):
+        return ans.get("answer", "(no answer)")
+    return str(ans)
 
-    system_prompt = prompt["system_prompt"]
-    user_template = prompt["user_template"]
 
-    qa_text = ""
+def _local_evaluation(question: dict, grade) -> dict:
+    if grade.correct:
+        feedback = "Dobrze!"
+    elif grade.method == "blank":
+        feedback = f"Brak odpowiedzi. Poprawna odpowiedz: {question.get('correct_answer')}."
+    else:
+        feedback = f"Niestety nie. Poprawna odpowiedz: {question.get('correct_answer')}."
+    return {
+        "point_id": question.get("point_id"),
+        "score": 100 if grade.correct else 0,
+        "correct": grade.correct,
+        "feedback": feedback,
+    }
+
+
+async def evaluate_recall_answers(
+    questions: list[dict], answers: list, student_level: str, topics: dict[int, str] | None = None
+) -> dict:
+    """Grade recall answers: locally where possible (app/services/answer_grader.py), the rest by the model.
+
+    ``topics`` maps point ids to the learning point's content; a locally
+    graded wrong answer adds its point's topic to ``weak_areas``.
+    """
+    local, remaining = {}, []
     for i, q in enumerate(questions):
-        # Support both formats: list of strings or list of dicts with point_id
-        if i < len(answers):
-            ans = answers[i]
-            if isinstance(ans, dict):
-                student_answer = ans.get("answer", "(no answer)")
-            else:
-                student_answer = str(ans)
+        student_answer = _student_answer(answers, i)
+        grade = grade_answer(student_answer, q.get("correct_answer"), q.get("options"))
+        if grade is not None:
+            local[i] = _local_evaluation(q, grade)
         else:
-            student_answer = "(no answer)"
-
-        qa_text += f"Question (point_id={q.get('point_id')}): {q.get('question_text', '')}\n"
-        qa_text += f"  Type: {q.get('question_type', '')}\n"
-        qa_text += f"  Correct answer: {q.get('correct_answer', '')}\n"
-        qa_text += f"  Student answer: {student_answer}\n\n"
-
-    user_message = user_template.format(
-        student_level=student_level,
-        qa_text=qa_text,
-    )
+            remaining.append((i, q, student_answer))
+
+    evaluation = {}
+    if remaining:
+        template = prompts.get("evaluate_recall")
+
+        qa_text = ""
+        for _i, q, student_answer in remaining:
+            qa_text += f"Question (point_id={q.get('point_id')}): {q.get('question_text', '')}\n"
+            qa_text += f"  Type: {q.get('question_type', '')}\n"
+            qa_text += f"  Correct answer: {q.get('correct_answer', '')}\n"
+            qa_text += f"  Student answer: {student_answer}\n\n"
+
+        messages = template.messages(
+            student_level=student_level,
+            qa_text=qa_text,
+        )
 
-    client = AsyncOpenAI(api_key=settings.api_key)
+        evaluation = await llm.complete_json(
+            messages,
+            temperature=0.3,
+            cache="evaluate_recall",
+        )
+        if not local:
+            return {**evaluation, "graded_locally": 0}
 
-    response = await client.chat.completions.create(
-        model=settings.model_name,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_message},
-        ],
-        temperature=0.3,
-        response_format={"type": "json_object"},
+    # Merge in question order; the model's evaluations are matched by point_id
+    model_evaluations = {str(ev.get("point_id")): ev for ev in evaluation.get("evaluations", [])}
+    evaluations = []
+    for i, q in enumerate(questions):
+        ev = local.get(i) or model_evaluations.pop(str(q.get("point_id")), None)
+        if ev is not None:
+            evaluations.append(ev)
+    evaluations.extend(model_evaluations.values())
+
+    scores = [ev.get("score", 0) for ev in evaluations]
+    overall_score = round(sum(scores) / len(scores)) if scores else 0
+    weak_areas = list(evaluation.get("weak_areas", []))
+    for i, ev in local.items():
+        topic = (topics or {}).get(questions[i].get("point_id"))
+        if not ev["correct"] and topic and topic not in weak_areas:
+            weak_areas.append(topic)
+    encouragement = evaluation.get("encouragement") or (
+        "Swietnie! Tak trzymaj!" if overall_score >= 80 else "Dobra robota, powtorzymy to jeszcze razem."
     )
-
-    result = json.loads(response.choices[0].message.content)
-    return result
+    return {
+        "overall_score": overall_score,
+        "evaluations": evaluations,
+        "weak_areas": [area for area in weak_areas if area],
+        "encouragement": encouragement,
+        "graded_locally": len(local),
+    }
 
 
 def _score_to_quality(score: float) -> int:
@@ -145,9 +176,9 @@ def _score_to_quality(score: float) -> int:
         return 5
 
 
-async def update_review_schedule(point_id: int, score: float):
-    db = await get_db()
-    try:
+async def update_review_schedule(point_id: int, score: float, uow: UnitOfWork | None = None):
+    async with unit_of_work(uow) as uow:
+        db = uow.db
         cursor = await db.execute(
             "SELECT ease_factor, interval_days, repetitions, times_reviewed FROM learning_points WHERE id = ?",
             (point_id,),
@@ -183,6 +214,3 @@ async def update_review_schedule(point_id: int, score: float):
                 point_id,
             ),
         )
-        await db.commit()
-    finally:
-        await db.close()
@@ -0,0 +1,129 @@
+"""Speculative recall-quiz generation.
+
+The frontend calls ``GET /api/recall/{student_id}/check`` before it offers a
+quiz. When points are due, ``check`` starts ``build_recall_quiz``
+(app/services/recall_bank.py) in the background for exactly the quiz points it found. ``POST /start``
+looks up the same points again. If their hash is unchanged it takes the
+prepared questions, or awaits the in-flight task, instead of starting a
+new model call.
+
+Entries live in process memory, one per student, and expire after
+``RECALL_PREFETCH_TTL_SECONDS``. Each entry is used at most once. A worker
+that did not see the ``check`` call simply generates inline, as before.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.config import settings
+from app.services.recall_bank import build_recall_quiz
+
+logger = logging.getLogger(__name__)
+
+# Point fields that reach the prompt; anything else may change freely
+_PROMPT_FIELDS = ("id", "point_type", "content", "explanation", "example_problem")
+
+
+def point_set_key(points: list[dict], student_level: str) -> str:
+    payload = json.dumps(
+        {"level": student_level, "points": [{k: p.get(k) for k in _PROMPT_FIELDS} for p in points]},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Prefetch:
+    key: str
+    task: asyncio.Task
+    expires: float
+
+
+def _consume_exception(task: asyncio.Task) -> None:
+    # Keep asyncio from warning about failed prefetches nobody awaited
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Recall quiz prefetch failed: %s", task.exception())
+
+
+class RecallPrefetcher:
+    def __init__(self, enabled: bool = True, ttl_seconds: float = 300.0, max_entries: int = 1000):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict[int, _Prefetch] = OrderedDict()
+        self._started = 0
+        self._hits = 0
+        self._misses = 0
+
+    def _drop(self, student_id: int) -> None:
+        entry = self._entries.pop(student_id, None)
+        if entry is not None and not entry.task.done():
+            entry.task.cancel()
+
+    def prefetch(self, student_id: int, points: list[dict], student_level: str) -> None:
+        """Start generating the quiz for ``points`` unless that is already under way."""
+        if not self.enabled or not points:
+            return
+        key = point_set_key(points, student_level)
+        entry = self._entries.get(student_id)
+        if entry is not None and entry.key == key and entry.expires > time.monotonic():
+            return
+        self._drop(student_id)
+        task = asyncio.create_task(build_recall_quiz(points, student_level))
+        task.add_done_callback(_consume_exception)
+        self._entries[student_id] = _Prefetch(key, task, time.monotonic() + self.ttl_seconds)
+        self._started += 1
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    async def take(self, student_id: int, points: list[dict], student_level: str) -> dict | None:
+        """Return the prefetched quiz for exactly ``points``, or None."""
+        entry = self._entries.pop(student_id, None)
+        if entry is None:
+            self._misses += 1
+            return None
+        if entry.key != point_set_key(points, student_level) or entry.expires <= time.monotonic():
+            if not entry.task.done():
+                entry.task.cancel()
+            self._misses += 1
+            return None
+        try:
+            result = await entry.task
+        except Exception:
+            self._misses += 1
+            return None
+        self._hits += 1
+        return result
+
+    async def stop(self) -> None:
+        tasks = [entry.task for entry in self._entries.values()]
+        self._entries.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        lookups = self._hits + self._misses
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl_seconds,
+            "entries": len(self._entries),
+            "in_flight": sum(not entry.task.done() for entry in self._entries.values()),
+            "started": self._started,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+recall_prefetch = RecallPrefetcher(
+    enabled=settings.recall_prefetch_enabled,
+    ttl_seconds=settings.recall_prefetch_ttl_seconds,
+    max_entries=settings.recall_prefetch_max_entries,
+)
@@ -0,0 +1,105 @@
+"""Full-text search over students and learning content (FTS5).
+
+The ``*_fts`` tables are created and kept in sync by migration
+0006_search_index. Queries are tokenised here and every token becomes a
+prefix match, so ``"ulam"`` finds ``"Ułamki zwykłe"``: unicode61 strips
+most diacritics itself, and ł/Ł are folded on both sides by ``fold``.
+"""
+
+import re
+
+MAX_QUERY_TOKENS = 8
+
+# kind -> (SELECT returning kind, id, title, detail, student_id, rank;
+#          column that owns the row, for per-student filtering).
+# The single placeholder is the MATCH expression.
+SEARCH_SOURCES = {
+    "student": ("""
+        SELECT 'student' AS kind, s.id AS id, s.name AS title, s.current_level AS detail,
+               s.id AS student_id, bm25(students_fts) AS rank
+        FROM students_fts JOIN students s ON s.id = students_fts.rowid
+        WHERE students_fts MATCH ? AND s.role = 'student'""", "s.id"),
+    "lesson": ("""
+        SELECT 'lesson' AS kind, l.id AS id, l.objective AS title, l.math_domain AS detail,
+               l.student_id AS student_id, bm25(lessons_fts) AS rank
+        FROM lessons_fts JOIN lessons l ON l.id = lessons_fts.rowid
+        WHERE lessons_fts MATCH ?""", "l.student_id"),
+    "learning_point": ("""
+        SELECT 'learning_point' AS kind, lp.id AS id, lp.content AS title, lp.point_type AS detail,
+               lp.student_id AS student_id, bm25(learning_points_fts) AS rank
+        FROM learning_points_fts JOIN learning_points lp ON lp.id = learning_points_fts.rowid
+        WHERE learning_points_fts MATCH ?""", "lp.student_id"),
+    "concept_card": ("""
+        SELECT 'concept_card' AS kind, c.id AS id, c.concept AS title, c.formula AS detail,
+               c.student_id AS student_id, bm25(concept_cards_fts) AS rank
+        FROM concept_cards_fts JOIN math_concept_cards c ON c.id = concept_cards_fts.rowid
+        WHERE concept_cards_fts MATCH ?""", "c.student_id"),
+}
+
+
+def fold(text: str) -> str:
+    """Fold the letters unicode61 cannot strip (mirrors the FTS triggers)."""
+    return text.replace("ł", "l").replace("Ł", "L")
+
+
+def build_match_query(q: str | None) -> str | None:
+    """Turn free text into an FTS5 prefix query, or None if it has no words."""
+    if not q:
+        return None
+    tokens = re.findall(r"\w+", fold(q))[:MAX_QUERY_TOKENS]
+    if not tokens:
+        return None
+    # Quoting keeps FTS5 operators (AND, NEAR, -, :) in user input literal
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+async def search(
+    db,
+    q: str,
+    kinds: list[str] | None = None,
+    student_id: int | None = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> dict:
+    """Ranked, paginated search across the requested kinds."""
+    kinds = kinds or list(SEARCH_SOURCES)
+    match = build_match_query(q)
+    if match is None:
+        return {"query": q, "results": [], "limit": limit, "offset": offset, "has_more": False}
+
+    parts = []
+    params: list = []
+    for kind in kinds:
+        sql, student_column = SEARCH_SOURCES[kind]
+        params.append(match)
+        if student_id is not None:
+            sql += f" AND {student_column} = ?"
+            params.append(student_id)
+        parts.append(sql)
+
+    query = f"""SELECT kind, id, title, detail, student_id, rank
+                FROM ({" UNION ALL ".join(parts)})
+                ORDER BY rank, kind, id
+                LIMIT ? OFFSET ?"""
+    # One extra row tells us whether there is a next page
+    cursor = await db.execute(query, (*params, limit + 1, offset))
+    rows = [dict(row) for row in await cursor.fetchall()]
+    has_more = len(rows) > limit
+    results = rows[:limit]
+    for row in results:
+        row["rank"] = round(row["rank"], 4)
+    return {"query": q, "results": results, "limit": limit, "offset": offset, "has_more": has_more}
+
+
+def match_student_ids_clause(q: str | None) -> tuple[str, list]:
+    """SQL fragment restricting ``s.id`` to students whose name matches ``q``.
+
+    No ``q`` means no filter; a ``q`` without any words (``"!!"``) matches
+    no student rather than all of them.
+    """
+    if not q:
+        return "", []
+    match = build_match_query(q)
+    if match is None:
+        return " AND 0", []
+    return " AND s.id IN (SELECT rowid FROM students_fts WHERE students_fts MATCH ?)", [match]
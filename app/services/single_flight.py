@@ -0,0 +1,114 @@
+"""Coalescing of duplicate generation requests.
+
+Double-clicks and frontend retries often send the same generation request
+twice at once (``POST /api/lessons/{id}/generate``,
+``/api/learning-path/{id}/generate``, ``/api/diagnostic/{id}``,
+``/api/recall/{id}/start``). Each one paid for a full model call, and
+lessons were saved twice with the same ``session_number``.
+
+``single_flight.run(operation, student_id, fn)`` runs ``fn`` once per
+(operation, student) at a time. Calls that arrive while it runs await the
+same task and get the same result (or the same exception). A successful
+result is also handed to calls arriving up to
+``SINGLE_FLIGHT_GRACE_SECONDS`` after it finished, which covers a retry
+sent just after the first response. Failures are never reused.
+
+The work runs in its own task, so a caller that disconnects does not
+cancel it for the others. Coalescing is per process: with several workers
+a duplicate that lands on another worker still runs.
+"""
+
+import asyncio
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from app.config import settings
+
+
+@dataclass
+class _Flight:
+    task: asyncio.Task
+    # Set when the task succeeds; the result is reused until then
+    expires: float | None = None
+
+
+class SingleFlight:
+    def __init__(self, enabled: bool = True, grace_seconds: float = 2.0):
+        self.enabled = enabled
+        self.grace_seconds = max(0.0, grace_seconds)
+        self._flights: dict[tuple[str, Any], _Flight] = {}
+        self._started: Counter[str] = Counter()
+        self._coalesced: Counter[str] = Counter()
+        self._reused: Counter[str] = Counter()
+        self._failed: Counter[str] = Counter()
+
+    def _finished(self, key: tuple[str, Any], flight: _Flight) -> None:
+        task = flight.task
+        if task.cancelled() or task.exception() is not None:
+            self._failed[key[0]] += 1
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        elif self.grace_seconds > 0:
+            flight.expires = time.monotonic() + self.grace_seconds
+        elif self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def _sweep(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, f in self._flights.items() if f.expires is not None and f.expires <= now]:
+            del self._flights[key]
+
+    async def run(self, operation: str, student_id: Any, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Result of ``fn()``, shared with identical calls in flight or just finished."""
+        if not self.enabled:
+            return await fn()
+        self._sweep()
+        key = (operation, student_id)
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.create_task(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _task: self._finished(key, flight))
+            self._started[operation] += 1
+        elif flight.expires is None:
+            self._coalesced[operation] += 1
+        else:
+            self._reused[operation] += 1
+        # shield: one caller going away must not cancel the work for the rest
+        return await asyncio.shield(flight.task)
+
+    async def stop(self) -> None:
+        tasks = [flight.task for flight in self._flights.values()]
+        self._flights.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        operations = sorted(set(self._started) | set(self._coalesced) | set(self._reused))
+        return {
+            "enabled": self.enabled,
+            "grace_seconds": self.grace_seconds,
+            "in_flight": sum(not flight.task.done() for flight in self._flights.values()),
+            "started": sum(self._started.values()),
+            "coalesced": sum(self._coalesced.values()),
+            "reused": sum(self._reused.values()),
+            "failed": sum(self._failed.values()),
+            "operations": {
+                operation: {
+                    "started": self._started[operation],
+                    "coalesced": self._coalesced[operation],
+                    "reused": self._reused[operation],
+                    "failed": self._failed[operation],
+                }
+                for operation in operations
+            },
+        }
+
+
+single_flight = SingleFlight(
+    enabled=settings.single_flight_enabled,
+    grace_seconds=settings.single_flight_grace_seconds,
+)
@@ -0,0 +1,320 @@
+"""Procedural problems for the speed-calc game.
+
+Mental-arithmetic problems like "15 · 4" need no model call. Each level in
+``LEVELS`` sets an operation mix (weights), operand ranges per operation
+and a difficulty curve. Problem i of n draws its operands from the lower
+``start``..``end`` share of each range, rising along ``t ** exponent``.
+Answers are exact ``Fraction`` values.
+
+A game is fully determined by (level, count, seed). The seed is returned
+to the client, so ``check_answers`` can regenerate the game and grade it
+on the server without storing anything.
+"""
+
+import math
+import random
+import re
+import secrets
+from dataclasses import dataclass
+from fractions import Fraction
+
+
+@dataclass(frozen=True)
+class LevelSpec:
+    # operation -> relative weight
+    mix: dict[str, float]
+    # operation -> (low, high) operand range
+    ranges: dict[str, tuple[int, int]]
+    # (start, end, exponent): share of each range in play from first to last problem
+    curve: tuple[float, float, float] = (0.3, 1.0, 1.0)
+    allow_negative: bool = False
+
+
+LEVELS = {
+    "podstawowy": LevelSpec(
+        mix={"add": 3, "sub": 3, "mul": 3, "div": 2, "order": 1},
+        ranges={"add": (2, 100), "sub": (2, 100), "mul": (2, 12), "div": (2, 10), "order": (1, 10)},
+    ),
+    "gimnazjalny": LevelSpec(
+        mix={"add": 1, "sub": 2, "mul": 2, "div": 1, "order": 2, "frac_add": 2, "percent": 2, "square": 1},
+        ranges={
+            "add": (10, 500), "sub": (10, 500), "mul": (3, 25), "div": (3, 15), "order": (2, 15),
+            "frac_add": (2, 8), "percent": (1, 10), "square": (2, 15),
+        },
+        curve=(0.4, 1.0, 1.0),
+        allow_negative=True,
+    ),
+    "licealny": LevelSpec(
+        mix={"order": 2, "frac_add": 2, "frac_mul": 2, "percent": 2, "square": 1, "sqrt": 1, "power": 2},
+        ranges={
+            "order": (2, 20), "frac_add": (2, 12), "frac_mul": (2, 10), "percent": (1, 20),
+            "square": (5, 25), "sqrt": (4, 20), "power": (2, 10),
+        },
+        curve=(0.5, 1.0, 1.2),
+        allow_negative=True,
+    ),
+    "licealny_rozszerzony": LevelSpec(
+        mix={"frac_add": 2, "frac_mul": 2, "percent": 1, "sqrt": 1, "power": 2, "log": 2, "order": 1},
+        ranges={
+            "frac_add": (3, 15), "frac_mul": (2, 12), "percent": (1, 20), "sqrt": (10, 30),
+            "power": (2, 12), "log": (2, 10), "order": (5, 25),
+        },
+        curve=(0.6, 1.0, 1.5),
+        allow_negative=True,
+    ),
+}
+DEFAULT_LEVEL = "podstawowy"
+
+NICE_PERCENTS = (10, 20, 25, 50, 5, 75, 15, 40, 30, 60, 12.5, 80, 90, 35, 45, 65)
+
+HINTS = {
+    "add": "Dodaj osobno dziesiatki i jednosci.",
+    "sub": "Odejmij najpierw dziesiatki, potem jednosci.",
+    "mul": "Rozbij jeden z czynnikow na dziesiatki i jednosci.",
+    "div": "Pomysl, jaka liczba razy dzielnik daje dzielna.",
+    "order": "Najpierw mnozenie i dzielenie, potem dodawanie i odejmowanie.",
+    "frac_add": "Sprowadz ulamki do wspolnego mianownika.",
+    "frac_mul": "Pomnoz liczniki i mianowniki, potem skroc.",
+    "percent": "1% to setna czesc liczby.",
+    "square": "Kwadrat to liczba pomnozona przez siebie.",
+    "sqrt": "Jaka liczba pomnozona przez siebie daje te liczbe?",
+    "power": "Potega to wielokrotne mnozenie tej samej liczby.",
+    "log": "Do jakiej potegi trzeba podniesc podstawe?",
+}
+
+
+@dataclass
+class Problem:
+    operation: str
+    problem: str
+    answer: Fraction
+    hint: str = ""
+
+    def to_dict(self, index: int) -> dict:
+        return {
+            "id": index,
+            "problem": self.problem,
+            "answer": format_answer(self.answer),
+            "hint": self.hint,
+            "operation": self.operation,
+        }
+
+
+def format_answer(value: Fraction) -> str:
+    return str(value.numerator) if value.denominator == 1 else f"{value.numerator}/{value.denominator}"
+
+
+def _num(n: int | Fraction) -> str:
+    """Operand as shown in a problem; negatives in brackets."""
+    text = format_answer(Fraction(n))
+    return f"({text})" if text.startswith("-") else text
+
+
+def _percent(p: float) -> str:
+    return f"{p:g}".replace(".", ",") + "%"
+
+
+def _scaled(rng: random.Random, bounds: tuple[int, int], scale: float) -> int:
+    low, high = bounds
+    return rng.randint(low, max(low, round(low + (high - low) * scale)))
+
+
+def _signed(rng: random.Random, value: int, spec: LevelSpec, chance: float = 0.3) -> int:
+    return -value if spec.allow_negative and rng.random() < chance else value
+
+
+def _add(rng, bounds, scale, spec):
+    a, b = _signed(rng, _scaled(rng, bounds, scale), spec), _scaled(rng, bounds, scale)
+    return f"{a} + {b}", Fraction(a + b)
+
+
+def _sub(rng, bounds, scale, spec):
+    a, b = _scaled(rng, bounds, scale), _scaled(rng, bounds, scale)
+    if not spec.allow_negative:
+        a, b = max(a, b), min(a, b)
+    else:
+        b = _signed(rng, b, spec, 0.25)
+    return f"{a} - {_num(b)}", Fraction(a - b)
+
+
+def _mul(rng, bounds, scale, spec):
+    a, b = _scaled(rng, bounds, scale), rng.randint(2, 9 if scale < 0.6 else max(9, bounds[1]))
+    a = _signed(rng, a, spec, 0.2)
+    return f"{_num(a)} · {b}", Fraction(a * b)
+
+
+def _div(rng, bounds, scale, spec):
+    divisor, quotient = _scaled(rng, bounds, scale), _scaled(rng, bounds, scale)
+    dividend = _signed(rng, divisor * quotient, spec, 0.2)
+    return f"{_num(dividend)} : {divisor}", Fraction(dividend, divisor)
+
+
+def _order(rng, bounds, scale, spec):
+    a, b, c = (_scaled(rng, bounds, scale) for _ in range(3))
+    form = rng.randrange(3)
+    if form == 0:
+        return f"{a} + {b} · {c}", Fraction(a + b * c)
+    if form == 1:
+        return f"({a} + {b}) · {c}", Fraction((a + b) * c)
+    if not spec.allow_negative:
+        a, b = max(a, b), min(a, b)
+    return f"{a * c} : {c} - {b}", Fraction(a - b)
+
+
+def _fraction(rng, bounds, scale) -> Fraction:
+    denominator = _scaled(rng, bounds, scale)
+    return Fraction(rng.randint(1, denominator - 1), denominator)
+
+
+def _frac_add(rng, bounds, scale, spec):
+    a, b = _fraction(rng, bounds, scale), _fraction(rng, bounds, scale)
+    if rng.random() < 0.5:
+        return f"{_num(a)} + {_num(b)}", a + b
+    if not spec.allow_negative and b > a:
+        a, b = b, a
+    return f"{_num(a)} - {_num(b)}", a - b
+
+
+def _frac_mul(rng, bounds, scale, spec):
+    a, b = _fraction(rng, bounds, scale), _fraction(rng, bounds, scale)
+    if rng.random() < 0.5:
+        return f"{_num(a)} · {_num(b)}", a * b
+    return f"{_num(a)} : {_num(b)}", a / b
+
+
+def _percent_of(rng, bounds, scale, spec):
+    pool = NICE_PERCENTS[:max(2, round(len(NICE_PERCENTS) * scale))]
+    p = Fraction(rng.choice(pool)).limit_denominator(10)
+    # Base chosen so that the answer is a whole number
+    base = (p / 100).denominator * _scaled(rng, bounds, scale)
+    return f"{_percent(float(p))} z {base}", p * base / 100
+
+
+def _square(rng, bounds, scale, spec):
+    n = _signed(rng, _scaled(rng, bounds, scale), spec, 0.15)
+    return f"{_num(n)}²", Fraction(n * n)
+
+
+def _sqrt(rng, bounds, scale, spec):
+    n = _scaled(rng, bounds, scale)
+    return f"√{n * n}", Fraction(n)
+
+
+def _power(rng, bounds, scale, spec):
+    base = rng.randint(2, 5 if scale < 0.7 else 10)
+    # Keep the result small enough to work out mentally
+    top = max(2, min(bounds[1], int(math.log(100 + 900 * scale, base))))
+    if spec.allow_negative and scale > 0.7 and rng.random() < 0.25:
+        exponent = rng.randint(1, min(3, top))
+        return f"{base}^(-{exponent})", Fraction(1, base ** exponent)
+    exponent = rng.randint(2, top)
+    return f"{base}^{exponent}", Fraction(base ** exponent)
+
+
+def _log(rng, bounds, scale, spec):
+    base = rng.choice((2, 3, 5, 10) if scale > 0.5 else (2, 10))
+    exponent = rng.randint(1, max(1, min(_scaled(rng, bounds, scale), int(math.log(100000, base)))))
+    return f"log_{base} {base ** exponent}", Fraction(exponent)
+
+
+OPERATIONS = {
+    "add": _add,
+    "sub": _sub,
+    "mul": _mul,
+    "div": _div,
+    "order": _order,
+    "frac_add": _frac_add,
+    "frac_mul": _frac_mul,
+    "percent": _percent_of,
+    "square": _square,
+    "sqrt": _sqrt,
+    "power": _power,
+    "log": _log,
+}
+
+
+def level_spec(level: str | None) -> LevelSpec:
+    return LEVELS.get(level or DEFAULT_LEVEL, LEVELS[DEFAULT_LEVEL])
+
+
+def new_seed() -> int:
+    return secrets.randbelow(2 ** 31)
+
+
+def generate_problems(
+    level: str | None,
+    count: int = 8,
+    seed: int | None = None,
+    mix: dict[str, float] | None = None,
+) -> list[Problem]:
+    """``count`` problems for ``level``; the same seed always gives the same problems."""
+    spec = level_spec(level)
+    mix = {op: weight for op, weight in (mix or spec.mix).items() if op in OPERATIONS and weight > 0}
+    if not mix:
+        raise ValueError("Operation mix selects no known operation")
+    rng = random.Random(seed)
+    start, end, exponent = spec.curve
+    operations, weights = list(mix), list(mix.values())
+
+    problems, seen = [], set()
+    for i in range(count):
+        t = i / (count - 1) if count > 1 else 1.0
+        scale = start + (end - start) * t ** exponent
+        for _attempt in range(5):
+            operation = rng.choices(operations, weights)[0]
+            bounds = spec.ranges.get(operation, (2, 10))
+            text, answer = OPERATIONS[operation](rng, bounds, scale, spec)
+            if text not in seen:
+                break
+        seen.add(text)
+        problems.append(Problem(operation, text, answer, HINTS.get(operation, "")))
+    return problems
+
+
+_NUMBER = re.compile(r"^[+-]?\d+(?:\.\d+)?$")
+_FRACTION = re.compile(r"^([+-]?)(?:(\d+) )?(\d+)/(\d+)$")
+
+
+def parse_answer(text: str) -> Fraction | None:
+    """Parse "12", "-3", "0,75", "3/4" or "1 1/2"; None if it is none of those."""
+    text = " ".join(str(text).strip().replace("−", "-").replace(",", ".").split())
+    text = re.sub(r"\s*/\s*", "/", text)
+    if _NUMBER.match(text):
+        return Fraction(text)
+    match = _FRACTION.match(text)
+    if match and int(match.group(4)):
+        sign, whole, numerator, denominator = match.groups()
+        value = int(whole or 0) + Fraction(int(numerator), int(denominator))
+        return -value if sign == "-" else value
+    return None
+
+
+def is_correct(expected: Fraction, given: str) -> bool:
+    value = parse_answer(given)
+    if value is None:
+        return False
+    if value == expected:
+        return True
+    # A decimal rounded to 2+ places is fine for answers like 2/3
+    decimals = given.replace(",", ".").partition(".")[2].strip()
+    return len(decimals) >= 2 and abs(value - expected) <= Fraction(1, 2 * 10 ** len(decimals))
+
+
+def check_answers(level: str | None, seed: int, answers: list[str], count: int = 8) -> dict:
+    """Grade a played game by regenerating it from its seed."""
+    problems = generate_problems(level, count, seed)
+    results = []
+    for index, problem in enumerate(problems):
+        given = answers[index] if index < len(answers) else ""
+        results.append({
+            "id": index,
+            "correct": is_correct(problem.answer, given or ""),
+            "expected": format_answer(problem.answer),
+        })
+    correct = sum(r["correct"] for r in results)
+    return {
+        "results": results,
+        "correct": correct,
+        "total": len(results),
+        "score": round(100 * correct / len(results)) if results else 0,
+    }
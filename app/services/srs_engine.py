@@ -1,4 +1,6 @@
-from datetime import datetime, timedelta
+from datetime import timedelta
+
+from app.db.timestamps import db_now
 
 
 def sm2_update(
@@ -39,11 +41,11 @@ def sm2_update(
         interval_days = 1
         # ease_factor stays the same
 
-    next_review = datetime.utcnow() + timedelta(days=interval_days)
+    next_review = db_now(timedelta(days=interval_days))
 
     return {
         "ease_factor": round(ease_factor, 2),
         "interval_days": interval_days,
         "repetitions": repetitions,
-        "next_review": next_review.isoformat(),
+        "next_review": next_review,
     }
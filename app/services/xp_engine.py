@@ -1,6 +1,6 @@
 import json
 from datetime import datetime, date
-from app.db.database import get_db
+from app.db.unit_of_work import UnitOfWork, unit_of_work
 
 # XP awards for different activities
 XP_AWARDS = {
@@ -83,9 +83,15 @@ def get_xp_for_next_level(level: int, total_xp: int) -> dict:
     }
 
 
-async def award_xp(student_id: int, amount: int, source: str, detail: str = None) -> dict:
-    db = await get_db()
-    try:
+async def award_xp(
+    student_id: int,
+    amount: int,
+    source: str,
+    detail: str = None,
+    uow: UnitOfWork | None = None,
+) -> dict:
+    async with unit_of_work(uow) as uow:
+        db = uow.db
         # Log XP
         await db.execute(
             "INSERT INTO xp_log (student_id, amount, source, detail) VALUES (?, ?, ?, ?)",
@@ -97,7 +103,6 @@ async def award_xp(student_id: int, amount: int, source: str, detail: str = None
             "UPDATE students SET total_xp = total_xp + ? WHERE id = ?",
             (amount, student_id),
         )
-        await db.commit()
 
         # Get new total
         cursor = await db.execute(
@@ -117,7 +122,6 @@ async def award_xp(student_id: int, amount: int, source: str, detail: str = None
                 "UPDATE students SET xp_level = ? WHERE id = ?",
                 (new_level, student_id),
             )
-            await db.commit()
 
         title_pl, title_en = get_title_for_level(new_level)
         progress = get_xp_for_next_level(new_level, total_xp)
@@ -132,13 +136,11 @@ async def award_xp(student_id: int, amount: int, source: str, detail: str = None
             "title_pl": title_pl,
             "progress": progress,
         }
-    finally:
-        await db.close()
 
 
-async def update_streak(student_id: int) -> dict:
-    db = await get_db()
-    try:
+async def update_streak(student_id: int, uow: UnitOfWork | None = None) -> dict:
+    async with unit_of_work(uow) as uow:
+        db = uow.db
         cursor = await db.execute(
             "SELECT streak, last_activity_date, freeze_tokens FROM students WHERE id = ?",
             (student_id,),
@@ -189,24 +191,21 @@ async def update_streak(student_id: int) -> dict:
             "UPDATE students SET streak = ?, last_activity_date = ? WHERE id = ?",
             (current_streak, today, student_id),
         )
-        await db.commit()
 
         # Award streak bonus XP
         if streak_bonus > 0:
-            await award_xp(student_id, streak_bonus, "streak_bonus", f"Day {current_streak} streak")
+            await award_xp(student_id, streak_bonus, "streak_bonus", f"Day {current_streak} streak", uow=uow)
 
         return {
             "streak": current_streak,
             "streak_bonus": streak_bonus,
             "freeze_tokens_remaining": freeze_tokens,
         }
-    finally:
-        await db.close()
 
 
-async def get_student_xp_profile(student_id: int) -> dict:
-    db = await get_db()
-    try:
+async def get_student_xp_profile(student_id: int, uow: UnitOfWork | None = None) -> dict:
+    async with unit_of_work(uow) as uow:
+        db = uow.db
         cursor = await db.execute(
             "SELECT total_xp, xp_level, streak, freeze_tokens, last_activity_date, avatar_id, theme_preference, display_title, name FROM students WHERE id = ?",
             (student_id,),
@@ -246,5 +245,3 @@ async def get_student_xp_profile(student_id: int) -> dict:
             "display_title": row["display_title"],
             "xp_history": xp_history,
         }
-    finally:
-        await db.close()
@@ -82,7 +82,7 @@ function renderConceptMatch(data) {
     gameTotal = pairs.length;
 
     const concepts = pairs.map(p => p.concept).sort(() => Math.random() - 0.5);
-    const definitions = pairs.map(p => p.definition).sort(() => Math.random() - 0.5);
+    const definitions = pairs.map(p => p.formula || p.definition).sort(() => Math.random() - 0.5);
 
     content.innerHTML = `
         <div class="match-game">
@@ -116,7 +116,7 @@ function selectMatchItem(el, type) {
 
     if (window._matchSelected.word && window._matchSelected.trans) {
         const pair = window._matchPairs.find(p => p.concept === window._matchSelected.word);
-        if (pair && pair.definition === window._matchSelected.trans) {
+        if (pair && (pair.formula || pair.definition) === window._matchSelected.trans) {
             gameCorrect++;
             document.querySelectorAll('.match-item.selected').forEach(e => {
                 e.classList.remove('selected');
@@ -142,7 +142,7 @@ function selectMatchItem(el, type) {
 // ===== ULOZ ROWNANIE =====
 function renderEquationBuilder(data) {
     const content = document.getElementById('game-content');
-    const sentences = data.sentences || [];
+    const sentences = data.equations || data.sentences || [];
     gameTotal = sentences.length;
 
     content.innerHTML = `
@@ -168,7 +168,7 @@ function renderNextSentence() {
 
     const s = sentences[idx];
     const equation = s.equation || s.sentence || '';
-    const words = equation.split(' ').sort(() => Math.random() - 0.5);
+    const words = (s.parts || equation.split(' ')).slice().sort(() => Math.random() - 0.5);
     const container = document.getElementById('sentence-items');
 
     container.innerHTML = `
@@ -207,13 +207,28 @@ function clearSentence() {
     document.querySelectorAll('.sb-word').forEach(w => w.classList.remove('used'));
 }
 
-function checkSentence() {
+async function checkSentence() {
     const placed = Array.from(document.querySelectorAll('.sb-placed-word')).map(w => w.textContent);
     const answer = placed.join(' ');
     const s = window._sentences[window._sentenceIdx];
     const correct = s.equation || s.sentence || '';
 
-    if (answer.toLowerCase().trim() === correct.toLowerCase().trim()) {
+    let isCorrect = answer.replace(/\s/g, '').toLowerCase() === correct.replace(/\s/g, '').toLowerCase();
+    if (!isCorrect && s.parts) {
+        // Any equivalent ordering counts, e.g. "7 = 2x + 3" for "2x + 3 = 7"
+        try {
+            const resp = await apiFetch(`/api/games/${studentId}/equation-builder/check`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ equation: correct, parts: placed }),
+            });
+            isCorrect = (await resp.json()).correct === true;
+        } catch (err) {
+            isCorrect = false;
+        }
+    }
+
+    if (isCorrect) {
         gameCorrect++;
         updateScoreDisplay();
     }
@@ -225,7 +240,7 @@ function checkSentence() {
 // ===== ZNAJDZ BLAD =====
 function renderErrorHunt(data) {
     const content = document.getElementById('game-content');
-    const sentences = data.sentences || [];
+    const sentences = data.solutions || data.sentences || [];
     gameTotal = sentences.length;
 
     content.innerHTML = `
@@ -254,7 +269,7 @@ function renderNextError() {
 
     container.innerHTML = `
         <div class="sb-progress">Zadanie ${idx + 1} z ${sentences.length}</div>
-        <div class="eh-sentence">"${escapeHtml(s.sentence)}"</div>
+        <div class="eh-sentence">${s.problem ? `<p>${escapeHtml(s.problem)}</p>` : ''}"${escapeHtml(s.shown_solution || s.sentence || '')}"</div>
         <div class="eh-actions">
             <button onclick="ehAnswer(true)" class="btn btn-danger">Ma blad</button>
             <button onclick="ehAnswer(false)" class="btn btn-secondary">Poprawne</button>
@@ -280,7 +295,7 @@ function ehAnswer(saidError) {
     if (s.has_error) {
         fb.innerHTML = `
             <p>${correct ? 'Dobrze!' : 'Zle!'} To rozwiazanie zawiera blad.</p>
-            <p>Poprawnie: <strong>${escapeHtml(s.corrected || '')}</strong></p>
+            <p>Poprawnie: <strong>${escapeHtml(s.correct_solution || s.corrected || '')}</strong></p>
             <p>${escapeHtml(s.explanation || '')}</p>
         `;
     } else {
@@ -300,7 +315,7 @@ function ehAnswer(saidError) {
 // ===== SZYBKIE LICZENIE =====
 function renderSpeedCalc(data) {
     const content = document.getElementById('game-content');
-    const phrases = data.phrases || [];
+    const phrases = data.problems || data.phrases || [];
     gameTotal = phrases.length;
 
     content.innerHTML = `
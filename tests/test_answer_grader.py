@@ -0,0 +1,161 @@
+"""
+Unit tests for the local math answer grader.
+Run with: python tests/test_answer_grader.py
+
+Tests:
+1. Numbers: fractions, mixed numbers, rounded decimals, percentages, units,
+   thousands separators
+2. Solution lists and assignments
+3. Expressions and equations
+4. Multiple choice, true/false and blank answers
+5. Undecidable answers (words, functions, unit conversions) are left to the caller
+6. Recall evaluation reports the topics of wrong answers
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret-for-unit-tests-min32chars")
+os.environ.setdefault("ADMIN_SECRET", "admin-secret-1234567890")
+
+from app.services.answer_grader import answers_match, grade_answer
+from app.services.recall_generator import evaluate_recall_answers
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+def graded(given, expected, options=None):
+    """True/False when graded locally, None when left to the caller."""
+    grade = grade_answer(given, expected, options)
+    return None if grade is None else grade.correct
+
+
+print("\n=== Answer Grader Tests ===\n")
+
+# ── 1. Numbers ───────────────────────────────────────────────────────
+print("=== 1. Numbers ===")
+
+check("Mixed number equals improper fraction", graded("2 2/3", "8/3") is True)
+check("Rounded decimal accepted", graded("2.667", "8/3") is True)
+check("Decimal comma accepted", graded("2,67", "8/3") is True)
+check("Too coarse decimal rejected", graded("2.7", "8/3") is False)
+check("Wrong number rejected", graded("35", "34") is False)
+check("Percentage as decimal", graded("0,375", "37.5%") is True)
+check("Percentage without sign", graded("37,5", "37.5%") is True)
+check("Decimal as percentage", graded("50%", "0.5") is True)
+check("Value rounding to a rounded expected answer", graded("31.42", "31.4 cm^2") is True)
+check("Unit on the answer only", graded("30 cm²", "30") is True)
+check("Thousands separated by a space", graded("2 500", "2500 cm") is True and graded("1 200", "1200 m^2") is True)
+check("Two numbers are not a product", graded("3 4", "12") is not True and graded("2 5", "10") is not True)
+check("Spaced digits are not one number", graded("2 3", "23") is not True and graded("23", "2 3") is not True)
+check("Scientific notation", graded("4.5 * 10^-4", "0.00045") is True)
+
+
+# ── 2. Solution lists ────────────────────────────────────────────────
+print("\n=== 2. Solution Lists ===")
+
+check("Bare value for an assignment", graded("5", "x = 5") is True)
+check("Solutions in any order", graded("x = -2 lub x = 2", "x = 2 lub x = -2") is True)
+check("Missing solution rejected", graded("x = 2", "x = 2 lub x = -2") is False)
+check("Swapped variables rejected", graded("x = 3 i y = 2", "x = 2 i y = 3") is False)
+
+
+# ── 3. Expressions ───────────────────────────────────────────────────
+print("\n=== 3. Expressions ===")
+
+check("Factored form is equivalent", graded("2(3x+1)", "6x + 2") is True)
+check("Missing term rejected", graded("6x", "6x + 2") is False)
+check("Reordered equation", graded("y = 3 + 2x", "y = 2x + 3") is True)
+check("Right side of an assignment", graded("2x + 3", "y = 2x + 3") is True)
+check("Spacing ignored in expressions", graded("2x+3", "2x + 3") is True)
+check("Unsolved equation is not a solution", graded("2x+3=7", "x = 2") is None and graded("2x = 4", "x = 2") is None)
+check("Solution for another variable", graded("y = 2", "x = 2") is not True)
+check("Equivalent right side of an assignment", graded("y = 2(x + 1)", "y = 2x + 2") is True
+      and graded("y = 2x", "y = 2x + 2") is False)
+check("Equation not equivalent to an assignment", graded("2y = 4x + 4", "y = 2x + 2") is None)
+check("Powers with ^ and ²", graded("3x² - 3", "3x^2 - 3") is True)
+
+
+# ── 4. Choices, booleans, blanks ─────────────────────────────────────
+print("\n=== 4. Choices, Booleans, Blanks ===")
+
+options = ["5", "7", "9"]
+check("Choice letter mapped to its option", graded("b", "7", options) is True)
+check("Wrong choice letter", graded("C)", "7", options) is False)
+trig = ["sin(x) + C", "-sin(x) + C", "cos(x) + C", "-cos(x) + C"]
+check("Different non-numeric option rejected", graded("-sin(x) + C", "-cos(x) + C", trig) is False)
+notation = ["4.5 * 10^-4", "45 * 10^-5", "4.5 * 10^-3"]
+check("Equal-valued distractor rejected", graded("45 * 10^-5", "4.5 * 10^-4", notation) is False)
+check("Matching non-numeric option", graded("-COS(x) + C", "-cos(x) + C", trig) is True)
+check("Polish true/false words", graded("Prawda", "tak") is True and graded("nie", "prawda") is False)
+check("Blank answer is wrong", graded("", "5") is False and graded("(no answer)", "x = 2") is False)
+
+
+# ── 5. Left to the caller ────────────────────────────────────────────
+print("\n=== 5. Undecidable Answers ===")
+
+check("Inequalities are not graded", graded("x < -2 lub x > 2", "x > 2 lub x < -2") is None)
+check("Words are not graded", graded("trojkat prostokatny", "prostokatny trojkat") is None)
+check("Functions are not graded", graded("pi*r^2", "P = pi * r^2") is None)
+check("Different units are not graded", graded("120 mm", "12 cm") is None and graded("1,5 h", "90 min") is None
+      and graded("30 m", "30 cm") is None)
+check("Unreadable numbers are not graded", graded("1e3", "1000") is None)
+check("answers_match falls back to text", answers_match("Prostokatnym", "prostokatnym")
+      and not answers_match("rozwartym", "prostokatnym"))
+
+
+started = time.perf_counter()
+for _ in range(1000):
+    grade_answer("2.667", "8/3")
+per_call_us = (time.perf_counter() - started) * 1000
+check("Numeric grading takes well under a millisecond", per_call_us < 1000, f"{per_call_us:.0f} µs")
+
+
+# ── 6. Recall evaluation ─────────────────────────────────────────────
+print("\n=== 6. Recall Evaluation ===")
+
+questions = [
+    {"point_id": 1, "question_text": "Ile wynosi 1/2 + 1/4? Podaj wynik jako ulamek.", "correct_answer": "3/4"},
+    {"point_id": 2, "question_text": "Rozwiaz rownanie 2x + 3 = 7.", "correct_answer": "x = 2"},
+    {"point_id": 3, "question_text": "Ile to 15% z 200?", "correct_answer": "30"},
+]
+topics = {1: "Dodawanie ulamkow", 2: "Rownania liniowe", 3: "Procenty"}
+evaluation = asyncio.run(evaluate_recall_answers(questions, ["2/6", "x = 2", "31"], "podstawowy", topics))
+check("All answers graded locally", evaluation["graded_locally"] == 3)
+check("Weak areas are the topics of wrong answers",
+      evaluation["weak_areas"] == ["Dodawanie ulamkow", "Procenty"], str(evaluation["weak_areas"]))
+evaluation = asyncio.run(evaluate_recall_answers(questions[:1], ["2/6"], "podstawowy"))
+check("No topic, no weak area", evaluation["weak_areas"] == [])
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
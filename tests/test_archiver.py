@@ -0,0 +1,172 @@
+"""
+Unit tests for hot/cold archival.
+Run with: python tests/test_archiver.py
+
+Tests:
+1. Old rows move to the archive file, recent and protected rows stay
+2. Recall rollups keep bests and totals exact
+3. A run interrupted after the copy is finished by the next one;
+   a cancelled run still detaches the archive
+4. Horizon never drops below the weekly XP window
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret-for-unit-tests-min32chars")
+os.environ.setdefault("ADMIN_SECRET", "admin-secret-1234567890")
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(), "archiver.db")
+
+from app.db.database import close_db, db_pool, init_db
+from app.services.archiver import MIN_AFTER_DAYS, Archiver, archive_database_path
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+OLD = "2020-01-01 00:00:00"
+
+
+async def scalar(sql, params=()):
+    async with db_pool.acquire() as db:
+        cursor = await db.execute(sql, params)
+        return (await cursor.fetchone())[0]
+
+
+def archived(sql):
+    con = sqlite3.connect(archive_database_path())
+    try:
+        return con.execute(sql).fetchone()[0]
+    finally:
+        con.close()
+
+
+async def main():
+    await init_db()
+    async with db_pool.acquire() as db:
+        cursor = await db.execute("INSERT INTO students (name, total_xp) VALUES ('Ola', 75)")
+        student_id = cursor.lastrowid
+        for amount in (10, 20, 30):
+            await db.execute(
+                "INSERT INTO xp_log (student_id, amount, source, created_at) VALUES (?, ?, 'lesson', ?)",
+                (student_id, amount, OLD),
+            )
+        await db.execute("INSERT INTO xp_log (student_id, amount, source) VALUES (?, 15, 'recall')", (student_id,))
+        for score in (40, 90, 60):
+            await db.execute(
+                """INSERT INTO recall_sessions (student_id, status, overall_score, created_at, completed_at)
+                   VALUES (?, 'completed', ?, ?, ?)""",
+                (student_id, score, OLD, OLD),
+            )
+        await db.execute(
+            "INSERT INTO learning_paths (student_id, title, status, updated_at) VALUES (?, 'Stara', 'superseded', ?)",
+            (student_id, OLD),
+        )
+        await db.execute(
+            "INSERT INTO learning_paths (student_id, title, status, updated_at) VALUES (?, 'Aktywna', 'active', ?)",
+            (student_id, OLD),
+        )
+        await db.commit()
+
+    # ── 1. Move ──────────────────────────────────────────────────────
+    print("=== 1. Move ===")
+    archiver = Archiver(after_days=180, batch_size=2, interval_seconds=3600, enabled=False)
+    moved = await archiver.run_once()
+    check("Rows moved per table", moved == {"xp_log": 3, "recall_sessions": 2, "learning_paths": 1}, str(moved))
+    check("Recent XP stays hot", await scalar("SELECT COUNT(*) FROM xp_log") == 1)
+    check("Archived XP in the archive file", archived("SELECT SUM(amount) FROM xp_log") == 60)
+    check("Latest completed recall stays hot",
+          await scalar("SELECT overall_score FROM recall_sessions") == 60)
+    check("Active learning path untouched", await scalar("SELECT title FROM learning_paths") == "Aktywna")
+    check("Lifetime XP unchanged", await scalar("SELECT total_xp FROM students WHERE id = ?", (student_id,)) == 75)
+
+    # ── 2. Rollups ───────────────────────────────────────────────────
+    print("\n=== 2. Rollups ===")
+    async with db_pool.acquire() as db:
+        cursor = await db.execute("SELECT * FROM recall_rollups WHERE student_id = ?", (student_id,))
+        rollup = dict(await cursor.fetchone())
+    check("Archived sessions rolled up", rollup["sessions_completed"] == 2 and rollup["score_total"] == 130, str(rollup))
+    check("Best score kept", rollup["best_score"] == 90)
+    check("Second run moves nothing", sum((await archiver.run_once()).values()) == 0)
+
+    # ── 3. Interrupted run ───────────────────────────────────────────
+    print("\n=== 3. Interrupted Run ===")
+    async with db_pool.acquire() as db:
+        cursor = await db.execute(
+            "INSERT INTO xp_log (student_id, amount, source, created_at) VALUES (?, 5, 'game', ?)",
+            (student_id, OLD),
+        )
+        copied_id = cursor.lastrowid
+        await db.commit()
+    # The copy committed, then the process died before the delete
+    con = sqlite3.connect(archive_database_path())
+    con.execute("INSERT INTO xp_log (id, student_id, amount, source, created_at) VALUES (?, ?, 5, 'game', ?)",
+                (copied_id, student_id, OLD))
+    con.commit()
+    con.close()
+    moved = await archiver.run_once()
+    check("Next run finishes the move", moved["xp_log"] == 1 and await scalar("SELECT COUNT(*) FROM xp_log") == 1)
+    check("No duplicate in the archive", archived(f"SELECT COUNT(*) FROM xp_log WHERE id = {copied_id}") == 1)
+
+    async def cancelled_batch(db, *args):
+        # Shutdown cancels the run in the middle of a batch
+        await db.execute("BEGIN IMMEDIATE")
+        raise asyncio.CancelledError
+
+    real_archive_table = archiver._archive_table
+    archiver._archive_table = cancelled_batch
+    try:
+        await archiver.run_once()
+        cancelled = False
+    except asyncio.CancelledError:
+        cancelled = True
+    finally:
+        archiver._archive_table = real_archive_table
+    check("Cancellation mid-batch still cancels the run", cancelled)
+    check("Archive detached for the next run", sum((await archiver.run_once()).values()) == 0)
+
+    # ── 4. Horizon ───────────────────────────────────────────────────
+    print("\n=== 4. Horizon ===")
+    check("Horizon clamped to the weekly window",
+          Archiver(after_days=1, batch_size=10, interval_seconds=60).after_days == MIN_AFTER_DAYS)
+    check("No XP rollup table",
+          await scalar("SELECT COUNT(*) FROM sqlite_master WHERE name = 'xp_log_rollups'") == 0)
+
+    await close_db()
+
+
+print("\n=== Archiver Tests ===\n")
+asyncio.run(main())
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
@@ -0,0 +1,140 @@
+"""
+Unit tests for online backups.
+Run with: python tests/test_backup.py
+
+Tests:
+1. A backup finishes while a writer keeps committing
+2. Verify, rotation and restore
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret-for-unit-tests-min32chars")
+os.environ.setdefault("ADMIN_SECRET", "admin-secret-1234567890")
+TMP = tempfile.mkdtemp()
+os.environ["DATABASE_PATH"] = os.path.join(TMP, "backup.db")
+os.environ["BACKUP_DIR"] = os.path.join(TMP, "backups")
+os.environ["BACKUP_RETENTION"] = "2"
+
+from app.config import settings
+from app.db.backup import create_backup, create_backup_async, list_backups, restore_backup, verify_backup
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+def count_rows(path):
+    con = sqlite3.connect(path)
+    try:
+        return con.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+    finally:
+        con.close()
+
+
+def seed():
+    con = sqlite3.connect(settings.database_path)
+    con.execute("PRAGMA journal_mode = WAL")
+    con.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, payload BLOB)")
+    # ~40 MB, so the copy takes long enough to overlap many commits
+    con.executemany("INSERT INTO events (payload) VALUES (?)", ((os.urandom(4000),) for _ in range(10000)))
+    con.commit()
+    con.close()
+
+
+async def busy_writer(stop: asyncio.Event, commits: list):
+    con = sqlite3.connect(settings.database_path, timeout=5)
+    try:
+        while not stop.is_set():
+            con.execute("INSERT INTO events (payload) VALUES (?)", (b"w",))
+            con.commit()
+            commits.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+    finally:
+        con.close()
+
+
+async def backup_under_load():
+    print("=== 1. Backup Under Write Load ===")
+    before = count_rows(settings.database_path)
+    stop = asyncio.Event()
+    commits = []
+    writer = asyncio.create_task(busy_writer(stop, commits))
+    await asyncio.sleep(0.05)
+    started = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(create_backup_async(compress=False), timeout=60)
+    finally:
+        finished = time.perf_counter()
+        stop.set()
+        await writer
+    during = [t for t in commits if started <= t <= finished]
+    check("Backup finished", len(result["created"]) == 1, f"{(finished - started) * 1000:.0f} ms")
+    check("Writer kept committing during the copy", len(during) > 0, f"{len(during)} commits")
+    backup = result["created"][0]
+    copied = count_rows(backup["path"])
+    check("Backup is a consistent snapshot", before <= copied <= count_rows(settings.database_path),
+          f"{before} <= {copied}")
+    check("Backup has no -wal dependency", not os.path.exists(backup["path"] + "-wal"))
+    return backup
+
+
+def verify_rotate_restore(first):
+    print("\n=== 2. Verify, Rotate, Restore ===")
+    check("Backup verifies", verify_backup(first["file"])["ok"])
+    time.sleep(1.1)
+    second = create_backup(compress=True)["created"][0]
+    check("Compressed backup verifies", second["file"].endswith(".db.gz") and verify_backup(second["file"])["ok"])
+    time.sleep(1.1)
+    result = create_backup(compress=False)
+    check("Oldest backup rotated out", result["rotated"] == [first["file"]] and len(list_backups()) == 2,
+          str(result["rotated"]))
+
+    target = os.path.join(TMP, "restored.db")
+    restore_backup(second["file"], target=target)
+    check("Restore copies the snapshot", count_rows(target) >= 10000)
+
+    broken = os.path.join(settings.backup_dir, "backup-19990101T000000Z.db")
+    with open(broken, "wb") as f:
+        f.write(b"not a database" * 100)
+    check("Corrupt file fails verification", not verify_backup(broken)["ok"])
+
+
+print("\n=== Backup Tests ===\n")
+seed()
+first_backup = asyncio.run(backup_under_load())
+verify_rotate_restore(first_backup)
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
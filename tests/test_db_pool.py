@@ -0,0 +1,163 @@
+"""
+Unit tests for the pooled SQLite connections.
+Run with: python tests/test_db_pool.py
+
+Tests:
+1. Connections are reused and pre-configured
+2. Concurrent checkouts beyond the pool size use overflow connections
+3. Exhausted pool waits, then times out
+4. Half-finished transactions are rolled back on release
+5. The pool survives a new event loop
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret-for-unit-tests-min32chars")
+os.environ.setdefault("ADMIN_SECRET", "admin-secret-1234567890")
+
+from app.db.database import ConnectionPool, PooledConnection, PoolTimeoutError
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "pool.db")
+
+
+async def reuse_and_pragmas():
+    print("=== 1. Reuse and Configuration ===")
+    pool = ConnectionPool(DB_PATH, size=2, max_overflow=0)
+    async with pool.acquire() as db:
+        first = db
+        cursor = await db.execute("PRAGMA journal_mode")
+        mode = (await cursor.fetchone())[0]
+        cursor = await db.execute("PRAGMA busy_timeout")
+        busy = (await cursor.fetchone())[0]
+        await db.execute("CREATE TABLE IF NOT EXISTS t (id INTEGER PRIMARY KEY, v TEXT)")
+        await db.commit()
+    async with pool.acquire() as db:
+        check("Released connection is reused", db is first)
+    check("WAL journal mode", mode == "wal", mode)
+    check("Busy timeout set", busy > 0, str(busy))
+    check("Only one connection opened", pool.stats()["connections_opened"] == 1)
+    await pool.close()
+
+
+async def overflow():
+    print("\n=== 2. Concurrency and Overflow ===")
+    pool = ConnectionPool(DB_PATH, size=2, max_overflow=3)
+    peak = {"in_use": 0, "overflow": 0}
+
+    async def worker(i):
+        async with pool.acquire() as db:
+            stats = pool.stats()
+            peak["in_use"] = max(peak["in_use"], stats["in_use"])
+            peak["overflow"] = max(peak["overflow"], stats["overflow_in_use"])
+            await db.execute("INSERT INTO t (v) VALUES (?)", (f"w{i}",))
+            await db.commit()
+            await asyncio.sleep(0.05)
+
+    await asyncio.gather(*(worker(i) for i in range(5)))
+    stats = pool.stats()
+    check("Five concurrent checkouts served", peak["in_use"] == 5, str(peak))
+    check("Three of them were overflow connections", peak["overflow"] == 3, str(peak))
+    check("Overflow connections closed on release", stats["open"] == 2 and stats["overflow_in_use"] == 0, str(stats))
+    async with pool.acquire() as db:
+        cursor = await db.execute("SELECT COUNT(*) FROM t WHERE v LIKE 'w%'")
+        check("Every write landed", (await cursor.fetchone())[0] == 5)
+
+    # More concurrent users than size + overflow: the rest wait their turn
+    await asyncio.gather(*(worker(i) for i in range(12)))
+    stats = pool.stats()
+    check("Callers beyond the limit waited instead of failing", stats["waited_total"] > 0, str(stats["waited_total"]))
+    check("Nothing left checked out", stats["in_use"] == 0)
+    await pool.close()
+
+
+async def timeout():
+    print("\n=== 3. Timeout ===")
+    pool = ConnectionPool(DB_PATH, size=1, max_overflow=0, timeout=0.1)
+    held, overflow_flag = await pool.checkout()
+    try:
+        await pool.checkout()
+        check("Exhausted pool raises PoolTimeoutError", False)
+    except PoolTimeoutError:
+        check("Exhausted pool raises PoolTimeoutError", True)
+    await pool.release(held, overflow_flag)
+    db, overflow_flag = await pool.checkout()
+    check("Connection usable again after release", db is held)
+    await pool.release(db, overflow_flag)
+    await pool.close()
+
+
+async def rollback_on_release():
+    print("\n=== 4. Rollback on Release ===")
+    pool = ConnectionPool(DB_PATH, size=1, max_overflow=0)
+    db, overflow_flag = await pool.checkout()
+    handle = PooledConnection(pool, db, overflow_flag)
+    await handle.execute("INSERT INTO t (v) VALUES ('uncommitted')")
+    await handle.close()
+    await handle.close()
+    check("Double close releases once", pool.stats()["in_use"] == 0 and pool.stats()["idle"] == 1)
+    async with pool.acquire() as db:
+        cursor = await db.execute("SELECT COUNT(*) FROM t WHERE v = 'uncommitted'")
+        check("Uncommitted insert rolled back", (await cursor.fetchone())[0] == 0)
+        check("Connection handed out outside a transaction", not db.in_transaction)
+    await pool.close()
+
+
+POOL = ConnectionPool(DB_PATH, size=2, max_overflow=0)
+
+
+async def use_shared_pool():
+    async with POOL.acquire() as db:
+        cursor = await db.execute("SELECT COUNT(*) FROM t")
+        return (await cursor.fetchone())[0]
+
+
+print("\n=== Connection Pool Tests ===\n")
+asyncio.run(reuse_and_pragmas())
+asyncio.run(overflow())
+asyncio.run(timeout())
+asyncio.run(rollback_on_release())
+
+print("\n=== 5. New Event Loop ===")
+first = asyncio.run(use_shared_pool())
+second = asyncio.run(use_shared_pool())
+check("Pool usable from a second asyncio.run", first == second, f"{first} / {second}")
+check("Connections of the old loop were replaced", POOL.stats()["connections_opened"] == 2)
+asyncio.run(POOL.close())
+check("Closed from another loop", POOL.stats()["open"] == 0)
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
@@ -0,0 +1,130 @@
+"""
+Unit tests for the offline stand-in LLM provider.
+Run with: python tests/test_fake_llm.py
+
+Tests:
+1. Every registered prompt gets a schema-shaped JSON reply
+2. Game generators and free conversation
+3. Transport: completions, streaming, injected errors, latency
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret-for-unit-tests-min32chars")
+os.environ.setdefault("ADMIN_SECRET", "admin-secret-1234567890")
+
+import httpx
+
+from app.services.fake_llm import (
+    CONVERSATION_REPLY, FAKE_BASE_URL, PROMPT_BUILDERS, FakeLLMTransport, build_reply,
+)
+from app.services.prompts import prompts
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+# top-level keys the calling code reads from each reply
+EXPECTED_KEYS = {
+    "lesson_generator": {"objective", "exercises", "zadania_do_praktyki", "podsumowanie"},
+    "diagnostic": {"identified_gaps", "priority_areas", "recommended_start_level"},
+    "assessment_analyzer": {"determined_level", "sub_skill_breakdown", "weak_areas"},
+    "learning_path": {"title", "weeks", "milestones"},
+    "extract_learning_points": {"learning_points"},
+    "generate_recall_questions": {"questions"},
+    "evaluate_recall": {"overall_score", "evaluations"},
+}
+
+
+def messages_for(name, user="ID: 3\nID: 5\npoint_id=3\npoint_id=5"):
+    return [{"role": "system", "content": prompts.get(name).system_prompt}, {"role": "user", "content": user}]
+
+
+def request(transport, body, path="/v1/chat/completions"):
+    async def send():
+        async with httpx.AsyncClient(transport=transport, base_url=FAKE_BASE_URL.rsplit("/v1", 1)[0]) as client:
+            return await client.post(path, json=body)
+    return asyncio.run(send())
+
+
+print("\n=== Fake LLM Tests ===\n")
+
+# ── 1. Prompts ───────────────────────────────────────────────────────
+print("=== 1. Registered Prompts ===")
+check("Every builder has expected keys listed", set(PROMPT_BUILDERS) == set(EXPECTED_KEYS))
+for name, keys in EXPECTED_KEYS.items():
+    reply = json.loads(build_reply(messages_for(name)))
+    check(f"{name} reply has {', '.join(sorted(keys))}", keys <= set(reply))
+questions = json.loads(build_reply(messages_for("generate_recall_questions")))["questions"]
+check("Learning point ids echoed back", [q["point_id"] for q in questions] == [3, 5])
+
+# ── 2. Games and conversation ────────────────────────────────────────
+print("\n=== 2. Games and Conversation ===")
+reply = json.loads(build_reply([{"role": "user", "content": 'Wygeneruj 4 pary. Format: {"pairs": [...]}'}]))
+check("Requested count honoured", len(reply["pairs"]) == 4)
+check("Free conversation gets plain text", build_reply([{"role": "user", "content": "Cześć"}]) == CONVERSATION_REPLY)
+
+# ── 3. Transport ─────────────────────────────────────────────────────
+print("\n=== 3. Transport ===")
+body = {"model": "m", "messages": messages_for("evaluate_recall")}
+response = request(FakeLLMTransport(latency_ms=0), body)
+data = response.json()
+check("Completion shaped like the real API", response.status_code == 200
+      and data["object"] == "chat.completion" and data["usage"]["total_tokens"] > 0)
+check("Content is the built reply", json.loads(data["choices"][0]["message"]["content"])["overall_score"] >= 0)
+
+response = request(FakeLLMTransport(latency_ms=0, stream_tokens=5), {**body, "stream": True})
+events = [line[6:] for line in response.text.split("\n\n") if line.startswith("data: ")]
+pieces = [json.loads(e)["choices"][0]["delta"]["content"] for e in events[:-1]]
+check("Stream ends with [DONE]", events[-1] == "[DONE]" and len(pieces) == 5, f"{len(pieces)} chunks")
+check("Chunks join to the reply", "overall_score" in json.loads("".join(pieces)))
+
+failing = FakeLLMTransport(latency_ms=0, error_rate=1.0, seed=1)
+statuses = {request(failing, body).status_code for _ in range(10)}
+check("Injected errors are 429/500", statuses <= {429, 500} and failing.stats()["injected_errors"] == 10,
+      str(statuses))
+check("Unknown path is a 404", request(FakeLLMTransport(latency_ms=0), body, "/v1/embeddings").status_code == 404)
+
+a, b = FakeLLMTransport(seed=7), FakeLLMTransport(seed=7)
+check("Seeded latency is reproducible", [a._latency_seconds() for _ in range(5)]
+      == [b._latency_seconds() for _ in range(5)])
+lognormal = FakeLLMTransport(latency_ms=100, seed=3)
+mean = sum(lognormal._latency_seconds() for _ in range(2000)) / 2000
+check("Lognormal latency centred on the mean", 0.08 < mean < 0.12, f"{mean * 1000:.0f} ms")
+started = time.perf_counter()
+request(FakeLLMTransport(latency_ms=50, latency_distribution="fixed"), body)
+check("Fixed latency applied", time.perf_counter() - started >= 0.05)
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
@@ -0,0 +1,176 @@
+"""
+Unit tests for the game content pools.
+Run with: python tests/test_game_content.py
+
+Tests:
+1. Empty pools fall back to the seed file
+2. Draws prefer unseen items, then the least recently seen
+3. Refill tops up to the target, skips repeats, stops at max_items
+"""
+
+import asyncio
+import dataclasses
+import os
+import sys
+import tempfile
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret-for-unit-tests-min32chars")
+os.environ.setdefault("ADMIN_SECRET", "admin-secret-1234567890")
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(), "game_content.db")
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["LLM_FAKE_LATENCY_MS"] = "0"
+
+from app.db.database import close_db, db_pool, init_db
+from app.services.game_content import GAMES, GameContentPool, seed_items
+from app.services.llm import llm
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+LEVEL = "podstawowy"
+counter = {"n": 0}
+
+
+async def numbered_pairs(level, count, avoid=None):
+    """A model that always writes new concepts."""
+    start = counter["n"]
+    counter["n"] += count
+    return [{"concept": f"Pojecie {n}", "formula": f"f = {n}"} for n in range(start, start + count)]
+
+
+async def broken_pairs(level, count, avoid=None):
+    raise RuntimeError("model down")
+
+
+async def pool_size(game_type):
+    async with db_pool.acquire() as db:
+        cursor = await db.execute(
+            "SELECT COUNT(*) FROM game_content WHERE game_type = ? AND level = ?", (game_type, LEVEL)
+        )
+        return (await cursor.fetchone())[0]
+
+
+def concepts(items):
+    return {item["concept"] for item in items}
+
+
+async def main():
+    await init_db()
+    async with db_pool.acquire() as db:
+        ids = []
+        for name in ("Ola", "Jan"):
+            cursor = await db.execute("INSERT INTO students (name, current_level) VALUES (?, ?)", (name, LEVEL))
+            ids.append(cursor.lastrowid)
+        await db.commit()
+    seed = seed_items("concept_match", LEVEL)
+
+    # ── 1. Seed fallback ─────────────────────────────────────────────
+    print("=== 1. Seed Fallback ===")
+    pool = GameContentPool(target=4, max_items=30)
+    items = await pool.draw(ids[0], "concept_match", LEVEL, 5)
+    check("Empty pool served from the seed file", len(items) == 5 and concepts(items) <= concepts(seed))
+    check("Fallback counted and refill requested", pool._seed_fallbacks == 1
+          and ("concept_match", LEVEL) in pool._requested)
+    items = await pool.draw(ids[0], "concept_match", "nieznany", 2)
+    check("Unknown level uses the default pool", len(items) == 2 and concepts(items) <= concepts(seed))
+    added = await pool.seed()
+    check("Seed loaded once", added > 0 and await pool.seed() == 0 and await pool_size("concept_match") == len(seed))
+
+    # ── 2. Draws ─────────────────────────────────────────────────────
+    print("\n=== 2. Draws ===")
+    first = await pool.draw(ids[0], "concept_match", LEVEL, 4)
+    second = await pool.draw(ids[0], "concept_match", LEVEL, 4)
+    check("Second draw has only unseen items", not concepts(first) & concepts(second))
+    third = await pool.draw(ids[0], "concept_match", LEVEL, 4)
+    check("Unseen items served before seen ones", concepts(seed) - concepts(first) - concepts(second) <= concepts(third))
+    async with db_pool.acquire() as db:
+        await db.execute(
+            f"""UPDATE game_content_served SET served_at = '2020-01-01 00:00:00'
+                WHERE student_id = ? AND content_id IN (
+                    SELECT id FROM game_content WHERE json_extract(content, '$.concept') IN ({",".join("?" * 4)}))""",
+            (ids[0], *concepts(second)),
+        )
+        await db.commit()
+    fourth = await pool.draw(ids[0], "concept_match", LEVEL, 4)
+    check("Then the least recently seen", concepts(fourth) == concepts(second))
+    other = await pool.draw(ids[1], "concept_match", LEVEL, 4)
+    check("Seen items tracked per student", len(other) == 4 and pool._seed_fallbacks == 2)
+    async with db_pool.acquire() as db:
+        cursor = await db.execute("SELECT COUNT(*) FROM game_content_served WHERE student_id = ?", (ids[0],))
+        served = (await cursor.fetchone())[0]
+    check("Served items recorded", served == len(seed))
+
+    # ── 3. Refill ────────────────────────────────────────────────────
+    print("\n=== 3. Refill ===")
+    hungry = GameContentPool(target=50, max_items=100)
+    calls = llm.stats()["calls"]
+    added = await hungry.refill("error_hunt", LEVEL)
+    check("Refill through the model", 0 < added <= GAMES["error_hunt"].batch_size and llm.stats()["calls"] == calls + 2,
+          f"{added} added")
+    check("Repeated items not stored twice", await hungry.refill("error_hunt", LEVEL) == 0)
+
+    real_spec = GAMES["concept_match"]
+    try:
+        GAMES["concept_match"] = dataclasses.replace(real_spec, generate=numbered_pairs)
+        added = await pool.refill("concept_match", LEVEL)
+        unserved, total, _recent = await pool._pool_state("concept_match", LEVEL)
+        check("Topped up to the target", added == real_spec.batch_size and unserved >= pool.target,
+              f"{unserved} unserved")
+        check("Full pool is left alone", await pool.refill("concept_match", LEVEL) == 0)
+        capped = GameContentPool(target=40, max_items=40)
+        await capped.refill("concept_match", LEVEL)
+        size = await pool_size("concept_match")
+        unserved, _total, _recent = await capped._pool_state("concept_match", LEVEL)
+        check("Growth stops at max_items", capped.max_items <= size < capped.max_items + real_spec.batch_size
+              and unserved < capped.target and await capped.refill("concept_match", LEVEL) == 0, f"{size} items")
+
+        GAMES["concept_match"] = dataclasses.replace(real_spec, generate=broken_pairs)
+        small = GameContentPool(target=100, max_items=1000)
+        check("Model failure counted, not raised",
+              await small.refill("concept_match", LEVEL) == 0 and small._model_failures == 1)
+    finally:
+        GAMES["concept_match"] = real_spec
+
+    pool.request_refill("error_hunt", LEVEL)
+    await pool.run_once()
+    check("Run clears requests and records the run", not pool._requested and pool.last_run is not None)
+    stats = await pool.stats()
+    check("Stats list every stored pool", f"concept_match/{LEVEL}" in stats["pools"] and stats["draws"] == 7)
+
+    await llm.stop()
+    await close_db()
+
+
+print("\n=== Game Content Pool Tests ===\n")
+asyncio.run(main())
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
@@ -0,0 +1,202 @@
+"""
+Unit tests for the procedural game generators.
+Run with: python tests/test_game_generators.py
+
+Tests:
+1. Speed-calc problems are reproducible from their seed
+2. Speed-calc answers are exact and respect each level's rules
+3. Speed-calc answer parsing and server-side checking
+4. Expression tokenizer, parts splitting and equivalence
+5. Equation-builder equations are solvable and checkable in any valid order
+"""
+
+import os
+import re
+import sys
+from fractions import Fraction
+from math import isqrt
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+from app.services.equation_builder import (
+    LEVELS as EQUATION_LEVELS,
+    check_arrangement,
+    generate_equations,
+    normalize_parts,
+)
+from app.services.math_expr import MathExprError, equivalent, join_parts, parse, split_parts
+from app.services.speed_calc import (
+    LEVELS,
+    check_answers,
+    format_answer,
+    generate_problems,
+    is_correct,
+    parse_answer,
+)
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+print("\n=== Game Generator Tests ===\n")
+
+# ── 1. Speed-calc reproducibility ────────────────────────────────────
+print("=== 1. Speed-calc Reproducibility ===")
+
+first = [p.problem for p in generate_problems("gimnazjalny", 8, seed=1234)]
+second = [p.problem for p in generate_problems("gimnazjalny", 8, seed=1234)]
+other = [p.problem for p in generate_problems("gimnazjalny", 8, seed=4321)]
+check("Same seed gives the same problems", first == second)
+check("Different seed gives different problems", first != other)
+check("Requested number of problems", len(first) == 8, str(len(first)))
+check("Unknown level falls back to podstawowy",
+      [p.problem for p in generate_problems("nieznany", 8, 5)] == [p.problem for p in generate_problems("podstawowy", 8, 5)])
+
+
+# ── 2. Speed-calc answers ────────────────────────────────────────────
+print("\n=== 2. Speed-calc Answers ===")
+
+def _evaluate(text):
+    """Evaluate a problem's text independently of the generator."""
+    if " z " in text:
+        percent, base = text.split(" z ")
+        return Fraction(percent.rstrip("%").replace(",", ".")) * Fraction(base) / 100
+    if text.startswith("√"):
+        return Fraction(isqrt(int(text[1:])))
+    if text.startswith("log_"):
+        base, value = (int(n) for n in text[4:].split())
+        result = 0
+        while base ** result < value:
+            result += 1
+        return Fraction(result)
+    # a/b is a fraction literal, ":" is division
+    expr = re.sub(r"(\d+)/(\d+)", r"Fraction(\1, \2)", text)
+    expr = re.sub(r"(\d+)\^", r"Fraction(\1)^", expr)
+    expr = expr.replace("·", "*").replace(":", "/").replace("²", "**2").replace("^", "**")
+    return Fraction(eval(expr))
+
+
+mismatches = []
+negatives_at_basic = []
+for level in LEVELS:
+    for seed in range(200):
+        for p in generate_problems(level, 8, seed):
+            if _evaluate(p.problem) != p.answer:
+                mismatches.append((level, p.problem, format_answer(p.answer)))
+            if level == "podstawowy" and p.answer < 0:
+                negatives_at_basic.append(p.problem)
+check("Every answer matches its problem (4 levels x 200 seeds)", not mismatches, str(mismatches[:3]))
+check("podstawowy never produces negative answers", not negatives_at_basic, str(negatives_at_basic[:3]))
+
+easy = generate_problems("podstawowy", 8, 99, mix={"add": 1})
+check("Custom operation mix is honoured", all(p.operation == "add" for p in easy))
+sizes = [max(int(n) for n in p.problem.split(" + ")) for p in generate_problems("podstawowy", 40, 3, mix={"add": 1})]
+check("Difficulty curve raises operand size", sum(sizes[:10]) < sum(sizes[-10:]), f"{sizes[:10]} vs {sizes[-10:]}")
+
+
+# ── 3. Answer parsing and checking ───────────────────────────────────
+print("\n=== 3. Speed-calc Answer Checking ===")
+
+check("Parse integer", parse_answer(" 60 ") == 60)
+check("Parse negative with unicode minus", parse_answer("−7") == -7)
+check("Parse decimal comma", parse_answer("0,75") == Fraction(3, 4))
+check("Parse fraction", parse_answer("8 / 3") == Fraction(8, 3))
+check("Parse mixed number", parse_answer("2 2/3") == Fraction(8, 3))
+check("Reject garbage", parse_answer("abc") is None)
+check("Reject zero denominator", parse_answer("1/0") is None)
+check("Rounded decimal accepted for 2/3", is_correct(Fraction(2, 3), "0.67"))
+check("Too coarse decimal rejected for 2/3", not is_correct(Fraction(2, 3), "0.7"))
+check("Wrong value rejected", not is_correct(Fraction(1, 2), "0.6"))
+
+game = generate_problems("licealny", 8, 77)
+answers = [format_answer(p.answer) for p in game]
+answers[1] = "999999"
+graded = check_answers("licealny", 77, answers)
+check("Server check grades a replayed game", graded["correct"] == 7 and graded["total"] == 8, str(graded["correct"]))
+check("Missing answers count as wrong", check_answers("licealny", 77, answers[:3])["correct"] == 2)
+
+
+# ── 4. Expression parsing ────────────────────────────────────────────
+print("\n=== 4. Expression Parsing ===")
+
+check("Implicit multiplication and powers", parse("3(x + 1)²").evaluate({"x": Fraction(1)}) == 12)
+check("Unary minus binds looser than power", parse("-x^2").evaluate({"x": Fraction(3)}) == -9)
+check("Polish operators", parse("12 : 4 · 2").evaluate() == 6)
+check("Decimal comma", parse("2,5 + 0,5").evaluate() == 3)
+try:
+    parse("2x + = 7")
+    check("Malformed expression raises", False)
+except MathExprError:
+    check("Malformed expression raises", True)
+
+check("Terms stay whole", split_parts("2x + 3 = 7") == ["2x", "+", "3", "=", "7"], str(split_parts("2x + 3 = 7")))
+check("Brackets are separate parts", split_parts("3(x - 1) = 12") == ["3", "(", "x", "-", "1", ")", "=", "12"])
+check("Negative number stays one part", split_parts("x = -3") == ["x", "=", "-3"])
+check("Fraction term stays one part", split_parts("x/4 + 2 = 5")[0] == "x/4")
+check("join_parts inverts split_parts", join_parts(split_parts("(x - 1)(x + 2) = 0")) == "(x - 1)(x + 2) = 0")
+
+check("Expanded square is equivalent", equivalent("(x + 1)^2", "x² + 2x + 1"))
+check("Wrong expansion is not", not equivalent("(x + 1)^2", "x² + 1"))
+check("Swapped equation sides are equivalent", equivalent("2x + 3 = 7", "7 = 3 + 2x"))
+check("Scaled equation is equivalent", equivalent("2x + 3 = 7", "4x + 6 = 14"))
+check("Different equation is not", not equivalent("2x - 3 = 7", "3 - 2x = 7"))
+check("Expression vs equation is not", not equivalent("2x + 3", "2x + 3 = 0"))
+
+
+# ── 5. Equation builder ──────────────────────────────────────────────
+print("\n=== 5. Equation Builder ===")
+
+unsolved, bad_parts, unstable = [], [], []
+for level in EQUATION_LEVELS:
+    for seed in range(200):
+        for eq in generate_equations(level, 5, seed):
+            expression = parse(eq.equation)
+            if any(expression.evaluate({"x": Fraction(x)}) != 0 for x in eq.solutions):
+                unsolved.append(eq.equation)
+            if not 4 <= len(eq.parts) <= 8:
+                bad_parts.append(eq.parts)
+            if normalize_parts(eq.equation) != eq.parts:
+                unstable.append(eq.equation)
+check("Stated solutions solve every equation", not unsolved, str(unsolved[:3]))
+check("Every equation has 4-8 parts", not bad_parts, str(bad_parts[:3]))
+check("Parts match the tokenizer's split", not unstable, str(unstable[:3]))
+check("Same seed gives the same equations",
+      [e.equation for e in generate_equations("licealny", 5, 8)] == [e.equation for e in generate_equations("licealny", 5, 8)])
+check("Quadratics appear at licealny",
+      any(e.family == "quadratic" for seed in range(20) for e in generate_equations("licealny", 5, seed)))
+check("No quadratics at podstawowy",
+      not any(e.family == "quadratic" for seed in range(50) for e in generate_equations("podstawowy", 5, seed)))
+
+check("Original order accepted", check_arrangement("2x + 3 = 7", ["2x", "+", "3", "=", "7"]))
+check("Swapped sides accepted", check_arrangement("2x + 3 = 7", ["7", "=", "2x", "+", "3"]))
+check("Reordered terms accepted", check_arrangement("2x + 3 = 7", ["3", "+", "2x", "=", "7"]))
+check("Non-equivalent order rejected", not check_arrangement("2x - 3 = 7", ["3", "-", "2x", "=", "7"]))
+check("Missing part rejected", not check_arrangement("2x + 3 = 7", ["2x", "=", "7"]))
+check("Foreign part rejected", not check_arrangement("2x + 3 = 7", ["2x", "+", "4", "=", "7"]))
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
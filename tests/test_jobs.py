@@ -0,0 +1,197 @@
+"""
+Unit tests for the durable job queue.
+Run with: python tests/test_jobs.py
+
+Tests:
+1. Success, retry with backoff, permanent failure
+2. 408/429 are retried, other 4xx are not
+3. Idempotency keys: dedupe, scoping, failed jobs replaced
+4. Lease expiry and heartbeat errors
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import timedelta
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret-for-unit-tests-min32chars")
+os.environ.setdefault("ADMIN_SECRET", "admin-secret-1234567890")
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(), "jobs.db")
+
+from fastapi import HTTPException
+
+from app.db.database import close_db, db_pool, init_db
+from app.db.timestamps import db_now
+from app.services import jobs
+from app.services.jobs import JobError, enqueue, get_job, job_handler, job_pool
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+calls = {}
+
+
+def fails_first(kind, n, exc_factory):
+    """Handler that raises ``exc_factory()`` on its first ``n`` calls."""
+    @job_handler(kind)
+    async def handler(payload):
+        calls[kind] = calls.get(kind, 0) + 1
+        if calls[kind] <= n:
+            raise exc_factory()
+        return {"ok": True, "value": payload.get("value")}
+    return handler
+
+
+fails_first("test.ok", 0, None)
+fails_first("test.flaky", 2, lambda: RuntimeError("model timed out"))
+fails_first("test.rate_limited", 1, lambda: HTTPException(status_code=429, detail="slow down"))
+fails_first("test.timeout", 1, lambda: HTTPException(status_code=408, detail="timeout"))
+fails_first("test.not_found", 5, lambda: HTTPException(status_code=404, detail="Lesson not found"))
+fails_first("test.job_error", 5, lambda: JobError("bad input"))
+fails_first("test.always", 99, lambda: RuntimeError("down"))
+fails_first("test.once", 1, lambda: RuntimeError("provider outage"))
+
+
+async def finished(job_id, timeout=10.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        job = await get_job(job_id)
+        if job["status"] in jobs.TERMINAL_STATUSES or asyncio.get_running_loop().time() > deadline:
+            return job
+        await asyncio.sleep(0.02)
+
+
+async def main():
+    await init_db()
+    job_pool.concurrency = 2
+    job_pool.poll_interval_seconds = 0.02
+    job_pool.backoff_base_seconds = 0
+    job_pool.enabled = True
+    await job_pool.start()
+
+    # ── 1. Retries ───────────────────────────────────────────────────
+    print("=== 1. Success and Retries ===")
+    job = await finished((await enqueue("test.ok", {"value": 7}))["id"])
+    check("Job succeeds with its result", job["status"] == "succeeded" and job["result"]["value"] == 7)
+    job = await finished((await enqueue("test.flaky", {}, max_attempts=3))["id"])
+    check("Transient failures retried until success", job["status"] == "succeeded" and job["attempts"] == 3,
+          f"{job['attempts']} attempts")
+    job = await finished((await enqueue("test.always", {}, max_attempts=2))["id"])
+    check("Gives up after max_attempts", job["status"] == "failed" and job["attempts"] == 2
+          and "down" in job["error"])
+
+    # ── 2. Status codes ──────────────────────────────────────────────
+    print("\n=== 2. Status Codes ===")
+    for kind, status in (("test.rate_limited", 429), ("test.timeout", 408)):
+        job = await finished((await enqueue(kind, {}))["id"])
+        check(f"{status} retried", job["status"] == "succeeded" and job["attempts"] == 2)
+    job = await finished((await enqueue("test.not_found", {}))["id"])
+    check("404 fails at once", job["status"] == "failed" and job["attempts"] == 1 and job["error"] == "Lesson not found")
+    job = await finished((await enqueue("test.job_error", {}))["id"])
+    check("JobError fails at once", job["status"] == "failed" and job["attempts"] == 1)
+
+    # ── 3. Idempotency ───────────────────────────────────────────────
+    print("\n=== 3. Idempotency ===")
+    async with db_pool.acquire() as db:
+        ids = []
+        for name in ("Ola", "Jan"):
+            cursor = await db.execute("INSERT INTO students (name) VALUES (?)", (name,))
+            ids.append(cursor.lastrowid)
+        await db.commit()
+    first = await enqueue("test.ok", {"value": 1}, student_id=ids[0], idempotency_key="abc")
+    again = await enqueue("test.ok", {"value": 2}, student_id=ids[0], idempotency_key="abc")
+    check("Same key returns the same job", again["id"] == first["id"])
+    other_student = await enqueue("test.ok", {"value": 3}, student_id=ids[1], idempotency_key="abc")
+    other_kind = await enqueue("test.flaky", {"value": 4}, student_id=ids[0], idempotency_key="abc")
+    check("Key scoped by student and kind", len({first["id"], other_student["id"], other_kind["id"]}) == 3)
+    await finished(first["id"])
+    check("Succeeded job still deduplicated",
+          (await enqueue("test.ok", {}, student_id=ids[0], idempotency_key="abc"))["id"] == first["id"])
+
+    failed = await finished((await enqueue("test.once", {"value": 5}, student_id=ids[0],
+                                           idempotency_key="retry-me", max_attempts=1))["id"])
+    requeued = await enqueue("test.once", {"value": 6}, student_id=ids[0], idempotency_key="retry-me")
+    check("Failed job is replaced by a new enqueue", requeued["id"] == failed["id"]
+          and requeued["status"] == "queued" and requeued["attempts"] == 0 and requeued["error"] is None)
+    job = await finished(requeued["id"])
+    check("Replaced job runs with the new payload", job["status"] == "succeeded" and job["result"]["value"] == 6)
+
+    await job_pool.stop()
+
+    # ── 4. Leases ────────────────────────────────────────────────────
+    print("\n=== 4. Leases ===")
+    past = db_now(-timedelta(minutes=5))
+    async with db_pool.acquire() as db:
+        lost = []
+        for attempts in (1, 3):
+            cursor = await db.execute(
+                """INSERT INTO jobs (kind, status, attempts, max_attempts, lease_owner, lease_expires_at)
+                   VALUES ('test.ok', 'running', ?, 3, 'dead-worker', ?)""",
+                (attempts, past),
+            )
+            lost.append(cursor.lastrowid)
+        await db.commit()
+    reclaimed = await job_pool.reclaim_expired()
+    retry, final = await get_job(lost[0]), await get_job(lost[1])
+    check("Expired lease re-queued", reclaimed == 1 and retry["status"] == "queued" and retry["lease_owner"] is None)
+    check("Expired lease on the last attempt fails", final["status"] == "failed")
+    await job_pool.start()
+    job = await finished(lost[0])
+    check("Re-queued job finished by a live worker", job["status"] == "succeeded")
+    await job_pool.stop()
+
+    beats = {"n": 0}
+    real_run_write = jobs.run_write
+
+    async def flaky_run_write(fn):
+        beats["n"] += 1
+        if beats["n"] == 1:
+            raise RuntimeError("database is locked")
+        return await real_run_write(fn)
+
+    job_pool.lease_seconds = 0.06
+    jobs.run_write = flaky_run_write
+    heartbeat = asyncio.create_task(job_pool._heartbeat(lost[0]))
+    await asyncio.sleep(0.1)
+    alive = not heartbeat.done()
+    heartbeat.cancel()
+    jobs.run_write = real_run_write
+    check("Heartbeat survives a failed beat", alive and beats["n"] >= 2, f"{beats['n']} beats")
+
+    await close_db()
+
+
+print("\n=== Job Queue Tests ===\n")
+asyncio.run(main())
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
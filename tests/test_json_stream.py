@@ -0,0 +1,136 @@
+"""
+Unit tests for the incremental JSON object parser.
+Run with: python tests/test_json_stream.py
+
+Tests:
+1. Members reported as soon as they are complete
+2. Same members for every chunking of the text
+3. Invalid text raises JsonStreamError
+"""
+
+import json
+import os
+import random
+import sys
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+from app.services.json_stream import JsonObjectStream, JsonStreamError
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+LESSON = {
+    "objective": "Dodawanie ulamkow o roznych mianownikach",
+    "difficulty": "podstawowy",
+    "warm_up": {"description": "Przypomnij: 1/2 = 2/4", "items": ["1/2 + 1/2", "{nawias}", "\"cudzyslow\""]},
+    "presentation": {"steps": [{"n": 1, "text": "Wspolny mianownik, np. [2, 4] -> 4"}]},
+    "score": 0.75,
+    "count": -3,
+    "done": True,
+    "extra": None,
+    "escaped": "linia\\nukosnik \\\\ i \\\" w srodku",
+    "polskie": "zażółć gęślą jaźń",
+    "empty": {},
+    "list": [],
+}
+TEXT = json.dumps(LESSON, ensure_ascii=False, indent=2)
+
+
+def feed_in_chunks(text, sizes):
+    """Feed ``text`` in chunks of the given sizes (cycled); returns (members, finish())."""
+    parser = JsonObjectStream()
+    members, pos, i = [], 0, 0
+    while pos < len(text):
+        size = sizes[i % len(sizes)]
+        members += parser.feed(text[pos:pos + size])
+        pos += size
+        i += 1
+    return members, parser.finish()
+
+
+print("\n=== JSON Stream Tests ===\n")
+
+# ── 1. Early reporting ───────────────────────────────────────────────
+print("=== 1. Early Reporting ===")
+parser = JsonObjectStream()
+check("Nothing before a member is complete", parser.feed('{"objective": "Ulam') == [])
+check("String member reported at the comma", parser.feed('ki", "warm') == [("objective", "Ulamki")])
+check("Object member reported at its closing brace",
+      parser.feed('_up": {"a": [1, {"b": "}"}]}') == [("warm_up", {"a": [1, {"b": "}"}]})])
+check("Scalar member reported at the closing brace", parser.feed(', "score": 5}') == [("score", 5)])
+check("Finish decodes the whole object", parser.finish() == {"objective": "Ulamki", "warm_up": {"a": [1, {"b": "}"}]},
+                                                               "score": 5})
+
+# ── 2. Chunking ──────────────────────────────────────────────────────
+print("\n=== 2. Any Chunking ===")
+expected = list(LESSON.items())
+for sizes in ([1], [2], [3], [7], [len(TEXT)], [1, 5, 2, 13]):
+    members, whole = feed_in_chunks(TEXT, sizes)
+    check(f"Chunks of {sizes}", members == expected and whole == LESSON)
+
+rng = random.Random(42)
+bad = []
+for trial in range(200):
+    sizes = [rng.randint(1, 40) for _ in range(rng.randint(1, 8))]
+    members, whole = feed_in_chunks(TEXT, sizes)
+    if members != expected or whole != LESSON:
+        bad.append(sizes)
+check("200 random chunkings", not bad, f"first failure: {bad[0]}" if bad else "")
+
+compact = json.dumps(LESSON, separators=(",", ":"))
+members, whole = feed_in_chunks(compact, [1])
+check("Compact ASCII-escaped text", members == expected and whole == LESSON)
+parser = JsonObjectStream()
+parser.feed(TEXT[:40])
+check("Text keeps everything fed", parser.text == TEXT[:40])
+
+# ── 3. Errors ────────────────────────────────────────────────────────
+print("\n=== 3. Errors ===")
+
+
+def raises(fn):
+    try:
+        fn()
+    except JsonStreamError:
+        return True
+    return False
+
+
+check("Top-level array rejected", raises(lambda: JsonObjectStream().feed("[1, 2]")))
+check("Unbalanced brackets rejected", raises(lambda: JsonObjectStream().feed('{"a": 1}}')))
+truncated = JsonObjectStream()
+truncated.feed(TEXT[:len(TEXT) // 2])
+check("Truncated text fails at finish", raises(truncated.finish))
+broken = JsonObjectStream()
+members = broken.feed('{"a": nope, "b": 2}')
+check("Invalid member skipped, then reported by finish", members == [("b", 2)] and raises(broken.finish))
+check("JsonStreamError is a ValueError", issubclass(JsonStreamError, ValueError))
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
@@ -0,0 +1,127 @@
+"""
+Unit tests for the lesson prompt context compaction.
+Run with: python tests/test_lesson_context.py
+
+Tests:
+1. Token estimator
+2. Topic clustering
+3. Progress window and per-skill statistics
+4. Token budget
+"""
+
+import json
+import os
+import sys
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+from app.services.lesson_context import cluster_topics, compact_lesson_context, estimate_tokens, skill_stats
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+AREAS = ["ulamki", "procenty", "rownania liniowe", "geometria", "potegi"]
+
+
+def history(count):
+    """``count`` progress entries, newest first."""
+    return [
+        {
+            "lesson_id": count - i,
+            "score": 40 + (i * 7) % 60,
+            "areas_improved": [AREAS[i % 5]],
+            "areas_struggling": [AREAS[(i + 2) % 5]],
+        }
+        for i in range(count)
+    ]
+
+
+TOPICS = ["Dodawanie ulamkow", "Obliczanie procentow", "Rownania liniowe z jedna niewiadoma", "Pole trojkata"]
+
+
+print("\n=== Lesson Context Tests ===\n")
+
+# ── 1. Estimator ─────────────────────────────────────────────────────
+print("=== 1. Token Estimator ===")
+
+check("Empty text is free", estimate_tokens("") == 0)
+check("Short words are one token each", estimate_tokens("to jest kot") == 3)
+check("Long words and punctuation count more", estimate_tokens('{"score": 85}') == 8)
+text = json.dumps(history(20), indent=2)
+check("Not below four characters per token", estimate_tokens(text) >= len(text) / 4,
+      f"{estimate_tokens(text)} for {len(text)} chars")
+
+
+# ── 2. Topics ────────────────────────────────────────────────────────
+print("\n=== 2. Topic Clustering ===")
+
+clusters = cluster_topics(["Dodawanie ułamków", "Procenty", "dodawanie  ulamkow", "Uczeń nauczy się dodawania ułamków"])
+check("Repeats and inflections merge", len(clusters) == 2, str(clusters))
+check("Newest wording first", clusters[0] == ("Uczeń nauczy się dodawania ułamków", 3), str(clusters[0]))
+check("Different topics stay apart", len(cluster_topics(["Dodawanie ulamkow o roznych mianownikach",
+                                                         "Mnozenie ulamkow"])) == 2)
+check("Blank objectives skipped", cluster_topics(["", "  "]) == [])
+
+
+# ── 3. Progress ──────────────────────────────────────────────────────
+print("\n=== 3. Progress Window ===")
+
+context = compact_lesson_context(history(3), TOPICS, recent=5)
+check("Short history sent in full", context.progress_history.count("lesson_id") == 3 and context.omitted == 0)
+check("Topics listed newest first", context.previous_topics.splitlines()[0] == "- Pole trojkata")
+
+context = compact_lesson_context(history(40), TOPICS, recent=5)
+check("Only the recent window in full", context.progress_history.count("lesson_id") == 5)
+check("Newest entry first", '"lesson_id": 40' in context.progress_history.splitlines()[1])
+check("Older entries summarised", "Wczesniejsze lekcje: 35" in context.progress_history)
+check("Struggling areas kept for the prompt rules", "areas_struggling" in context.progress_history)
+
+stats = skill_stats([
+    {"score": 50, "areas_improved": [], "areas_struggling": ["potegi"]},
+    {"score": 90, "areas_improved": ["ulamki"], "areas_struggling": []},
+    {"score": 30, "areas_improved": [], "areas_struggling": ["potegi"]},
+])
+check("Weakest area first", stats[0] == "- potegi: trudnosci 2x, poprawa 0x, sredni wynik 40%", stats[0])
+check("Empty history", compact_lesson_context([], None).progress_history == "No previous lessons.")
+
+
+# ── 4. Budget ────────────────────────────────────────────────────────
+print("\n=== 4. Token Budget ===")
+
+topics = [f"Lekcja {i:04d}: {AREAS[i % 5]} w praktyce" for i in range(1000)]
+sizes = [compact_lesson_context(history(n), topics[:n], token_budget=800).tokens for n in (20, 150, 1000)]
+check("Stays within the budget", max(sizes) <= 800, str(sizes))
+check("Flat however long the history", abs(sizes[2] - sizes[1]) < 20, str(sizes))
+context = compact_lesson_context(history(300), topics[:300], token_budget=800)
+check("Dropped topics are noted", "starszych tematow)" in context.previous_topics and context.omitted > 0)
+check("Newest topic kept", "Lekcja 0299" in context.previous_topics)
+context = compact_lesson_context(history(300), topics, token_budget=10)
+check("Newest entry kept even over budget", '"lesson_id": 300' in context.progress_history)
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
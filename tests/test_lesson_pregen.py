@@ -0,0 +1,130 @@
+"""
+Unit tests for next-lesson pre-generation.
+Run with: python tests/test_lesson_pregen.py
+
+Tests:
+1. Pre-generated lesson served by /generate without a model call
+2. Changed inputs make the pending lesson stale
+3. Look-ahead slots and the ``plan`` match mode
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret-for-unit-tests-min32chars")
+os.environ.setdefault("ADMIN_SECRET", "admin-secret-1234567890")
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(), "pregen.db")
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["LLM_FAKE_LATENCY_MS"] = "0"
+
+from app.db.database import close_db, db_pool, init_db
+from app.routes.lessons import generate_next_lesson
+from app.services.lesson_pregen import lesson_pregen
+from app.services.llm import llm
+from app.services.single_flight import single_flight
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+async def pending(student_id):
+    async with db_pool.acquire() as db:
+        cursor = await db.execute(
+            "SELECT session_number FROM pending_lessons WHERE student_id = ? ORDER BY session_number", (student_id,)
+        )
+        return [row[0] for row in await cursor.fetchall()]
+
+
+async def add_progress(student_id, lesson_id, score):
+    async with db_pool.acquire() as db:
+        await db.execute(
+            "INSERT INTO progress (student_id, lesson_id, score, areas_struggling) VALUES (?, ?, ?, '[\"ulamki\"]')",
+            (student_id, lesson_id, score),
+        )
+        await db.commit()
+
+
+async def main():
+    await init_db()
+    single_flight.grace_seconds = 0
+    async with db_pool.acquire() as db:
+        cursor = await db.execute("INSERT INTO students (name, current_level) VALUES ('Ola', 'podstawowy')")
+        student_id = cursor.lastrowid
+        await db.commit()
+
+    # ── 1. Served ────────────────────────────────────────────────────
+    print("=== 1. Served From Pending ===")
+    result = await lesson_pregen.pregenerate(student_id)
+    check("Next session generated ahead", result["generated"] == [1] and await pending(student_id) == [1])
+    again = await lesson_pregen.pregenerate(student_id)
+    check("Unchanged inputs keep the pending lesson", again["kept"] == [1] and again["generated"] == [])
+    calls = llm.stats()["calls"]
+    lesson = await generate_next_lesson(student_id)
+    check("Served without a model call", llm.stats()["calls"] == calls and lesson.session_number == 1)
+    check("Pending row consumed", await pending(student_id) == [])
+
+    # ── 2. Stale ─────────────────────────────────────────────────────
+    print("\n=== 2. Stale Inputs ===")
+    await lesson_pregen.pregenerate(student_id)
+    await add_progress(student_id, lesson.id, 35)
+    calls = llm.stats()["calls"]
+    second = await generate_next_lesson(student_id)
+    check("New result forces a fresh lesson", llm.stats()["calls"] == calls + 1 and second.session_number == 2)
+    check("Stale row dropped", await pending(student_id) == [])
+    stats = await lesson_pregen.stats()
+    check("Hits and misses counted", stats["served"] == 1 and stats["missed"] == 1)
+
+    # ── 3. Look-ahead ────────────────────────────────────────────────
+    print("\n=== 3. Look-Ahead ===")
+    lesson_pregen.lookahead = 2
+    lesson_pregen.match = "plan"
+    result = await lesson_pregen.pregenerate(student_id)
+    check("Two sessions ready", result["generated"] == [3, 4] and await pending(student_id) == [3, 4])
+    third = await generate_next_lesson(student_id)
+    await add_progress(student_id, third.id, 90)
+    calls = llm.stats()["calls"]
+    fourth = await generate_next_lesson(student_id)
+    check("Plan mode serves the slot after a new result", llm.stats()["calls"] == calls
+          and fourth.session_number == 4)
+    lesson_pregen.match = "full"
+    result = await lesson_pregen.pregenerate(student_id)
+    check("Window refilled for the next sessions", result["generated"] == [5, 6] and await pending(student_id) == [5, 6])
+
+    await llm.stop()
+    await close_db()
+
+
+print("\n=== Lesson Pre-generation Tests ===\n")
+asyncio.run(main())
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
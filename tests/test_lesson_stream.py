@@ -0,0 +1,173 @@
+"""
+Unit tests for the streamed lesson endpoint.
+Run with: python tests/test_lesson_stream.py
+
+Tests:
+1. Fields streamed as events, then the saved lesson
+2. A client disconnect does not lose the lesson
+3. Pending lessons are consumed only with the lesson saved from them
+4. Concurrent /generate and /generate/stream share one generation
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret-for-unit-tests-min32chars")
+os.environ.setdefault("ADMIN_SECRET", "admin-secret-1234567890")
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(), "lesson_stream.db")
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["LLM_FAKE_LATENCY_MS"] = "0"
+
+from fastapi import HTTPException
+
+from app.db.database import close_db, db_pool, init_db
+from app.routes import lessons as lesson_routes
+from app.routes.lessons import generate_next_lesson, stream_next_lesson
+from app.services.lesson_generator import LESSON_PHASES
+from app.services.lesson_pregen import lesson_pregen
+from app.services.llm import llm
+from app.services.single_flight import single_flight
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+async def read_events(response):
+    """(event, data) pairs of a server-sent events response."""
+    events = []
+    async for chunk in response.body_iterator:
+        for block in chunk.strip().split("\n\n"):
+            lines = dict(line.split(": ", 1) for line in block.split("\n"))
+            data = lines["data"]
+            events.append((lines.get("event"), data if data == "[DONE]" else json.loads(data)))
+    return events
+
+
+async def lessons(student_id):
+    async with db_pool.acquire() as db:
+        cursor = await db.execute(
+            "SELECT id, session_number FROM lessons WHERE student_id = ? ORDER BY session_number", (student_id,)
+        )
+        return [tuple(row) for row in await cursor.fetchall()]
+
+
+async def pending(student_id):
+    async with db_pool.acquire() as db:
+        cursor = await db.execute("SELECT session_number FROM pending_lessons WHERE student_id = ?", (student_id,))
+        return [row[0] for row in await cursor.fetchall()]
+
+
+async def detached_done():
+    await asyncio.gather(*lesson_routes._detached, return_exceptions=True)
+
+
+async def main():
+    await init_db()
+    single_flight.grace_seconds = 0
+    async with db_pool.acquire() as db:
+        cursor = await db.execute("INSERT INTO students (name, current_level) VALUES ('Ola', 'podstawowy')")
+        student_id = cursor.lastrowid
+        await db.commit()
+
+    # ── 1. Events ────────────────────────────────────────────────────
+    print("=== 1. Events ===")
+    calls = llm.stats()["calls"]
+    events = await read_events(await stream_next_lesson(student_id))
+    names = [event for event, _data in events]
+    check("Meta and phases before the lesson", names.index("lesson") > max(
+        i for i, name in enumerate(names) if name in ("meta", "phase")) and "error" not in names, str(names))
+    check("Every phase streamed once", sorted(d["phase"] for e, d in events if e == "phase") == sorted(LESSON_PHASES))
+    lesson = dict(events)["lesson"]
+    check("Saved lesson sent", lesson["session_number"] == 1 and await lessons(student_id) == [(lesson["id"], 1)])
+    check("One model call, stream ends with [DONE]", llm.stats()["calls"] == calls + 1 and events[-1][1] == "[DONE]")
+    try:
+        await stream_next_lesson(999999)
+        check("Unknown student is a 404", False)
+    except HTTPException as exc:
+        check("Unknown student is a 404", exc.status_code == 404)
+
+    # ── 2. Disconnect ────────────────────────────────────────────────
+    print("\n=== 2. Disconnect ===")
+    response = await stream_next_lesson(student_id)
+    first = await response.body_iterator.__anext__()
+    await response.body_iterator.aclose()
+    await detached_done()
+    check("Lesson saved after the client left", first.startswith("event: ")
+          and [s for _id, s in await lessons(student_id)] == [1, 2])
+
+    # ── 3. Pending ───────────────────────────────────────────────────
+    print("\n=== 3. Pending Lessons ===")
+    await lesson_pregen.pregenerate(student_id)
+    real_save = lesson_routes._save_lesson
+
+    async def failing_save(*args):
+        raise RuntimeError("disk full")
+
+    lesson_routes._save_lesson = failing_save
+    try:
+        events = await read_events(await stream_next_lesson(student_id))
+    finally:
+        lesson_routes._save_lesson = real_save
+    check("Failed save reported as an error event", [e for e, _d in events][-2:] == ["error", None])
+    check("Pending lesson kept when the save fails", await pending(student_id) == [3])
+
+    calls = llm.stats()["calls"]
+    events = await read_events(await stream_next_lesson(student_id))
+    names = [event for event, _data in events]
+    check("Pending lesson streamed without a model call", llm.stats()["calls"] == calls
+          and names.count("phase") == len(LESSON_PHASES) and names.count("meta") == 3)
+    check("Pending row consumed with the save", await pending(student_id) == []
+          and dict(events)["lesson"]["session_number"] == 3)
+
+    # ── 4. Concurrency ───────────────────────────────────────────────
+    print("\n=== 4. Concurrent Requests ===")
+    calls = llm.stats()["calls"]
+
+    async def streamed():
+        return await read_events(await stream_next_lesson(student_id))
+
+    plain, events = await asyncio.gather(generate_next_lesson(student_id), streamed())
+    check("One generation for both requests", llm.stats()["calls"] == calls + 1
+          and dict(events)["lesson"]["id"] == plain.id, f"{llm.stats()['calls'] - calls} calls")
+    check("Joined stream still gets every phase", [e for e, _d in events].count("phase") == len(LESSON_PHASES))
+    check("Session created once", [s for _id, s in await lessons(student_id)] == [1, 2, 3, 4])
+
+    await llm.stop()
+    await close_db()
+
+
+print("\n=== Lesson Stream Tests ===\n")
+asyncio.run(main())
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
@@ -0,0 +1,126 @@
+"""
+Unit tests for the LLM response cache.
+Run with: python tests/test_llm_cache.py
+
+Tests:
+1. Cache keys follow the request content
+2. Memory tier: hits, LRU eviction, TTL expiry
+3. Database tier survives a new process and is purged
+4. Gateway serves repeat requests from the cache
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret-for-unit-tests-min32chars")
+os.environ.setdefault("ADMIN_SECRET", "admin-secret-1234567890")
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(), "cache.db")
+os.environ["LLM_FAKE_LATENCY_MS"] = "0"
+
+from app.db.database import close_db, db_pool, init_db
+from app.services.llm import LLMGateway
+from app.services.llm_cache import LLMCache, cache_key
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+MESSAGES = [{"role": "system", "content": "Jesteś nauczycielem."},
+            {"role": "user", "content": "Wygeneruj 2 zadania. Format: {\"problems\": []}"}]
+JSON = {"type": "json_object"}
+
+
+async def rows():
+    async with db_pool.acquire() as db:
+        cursor = await db.execute("SELECT COUNT(*) FROM llm_cache")
+        return (await cursor.fetchone())[0]
+
+
+async def main():
+    # ── 1. Keys ──────────────────────────────────────────────────────
+    print("=== 1. Keys ===")
+    key = cache_key("m", MESSAGES, 0.7, JSON)
+    check("Same request, same key", key == cache_key("m", [dict(m) for m in MESSAGES], 0.7, JSON))
+    changed = [
+        cache_key("other", MESSAGES, 0.7, JSON),
+        cache_key("m", MESSAGES[:1] + [{"role": "user", "content": "2 + 3"}], 0.7, JSON),
+        cache_key("m", MESSAGES, 0.2, JSON),
+        cache_key("m", MESSAGES, 0.7, None),
+    ]
+    check("Model, prompt, temperature and format all change the key", len({key, *changed}) == 5)
+
+    await init_db()
+
+    # ── 2. Memory tier ───────────────────────────────────────────────
+    print("\n=== 2. Memory Tier ===")
+    cache = LLMCache(max_memory_entries=2)
+    await cache.set("a", "test", "m", {"v": 1})
+    first = await cache.get("a")
+    first["v"] = 99
+    check("Hit served from memory", (await cache.get("a")) == {"v": 1} and cache._memory_hits == 2)
+    await cache.set("b", "test", "m", {"v": 2})
+    await cache.get("a")
+    await cache.set("c", "test", "m", {"v": 3})
+    check("Least recently used entry evicted", list(cache._memory) == ["a", "c"])
+    await cache.set("short", "test", "m", {"v": 4}, ttl_seconds=0.05)
+    await asyncio.sleep(0.1)
+    check("Expired entry is a miss", await cache.get("short") is None)
+
+    # ── 3. Database tier ─────────────────────────────────────────────
+    print("\n=== 3. Database Tier ===")
+    restarted = LLMCache(max_memory_entries=10)
+    check("Entry survives a restart", await restarted.get("b") == {"v": 2} and restarted._db_hits == 1)
+    check("Then answered from memory", await restarted.get("b") == {"v": 2} and restarted._memory_hits == 1)
+    check("Policy TTLs applied", restarted.ttl_for("extract_learning_points") > restarted.ttl_for("unknown"))
+    removed = await restarted.purge(expired_only=True)
+    check("Purge of expired entries", removed == 1 and await rows() == 3, f"{removed} removed")
+    removed = await restarted.purge(prompt="test")
+    check("Purge of one policy", removed == 3 and await rows() == 0 and not restarted._memory)
+
+    # ── 4. Gateway ───────────────────────────────────────────────────
+    print("\n=== 4. Gateway ===")
+    gateway = LLMGateway(api_key="sk-test", model="fake-model", provider="fake")
+    first = await gateway.complete_json(MESSAGES, cache="test")
+    second = await gateway.complete_json(MESSAGES, cache="test")
+    check("Repeat request served from cache", first == second and gateway.stats()["calls"] == 1)
+    await gateway.complete_json(MESSAGES)
+    check("Calls without a policy bypass the cache", gateway.stats()["calls"] == 2)
+    await gateway.stop()
+
+    await close_db()
+
+
+print("\n=== LLM Cache Tests ===\n")
+asyncio.run(main())
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
@@ -0,0 +1,135 @@
+"""
+Unit tests for the shared LLM gateway.
+Run with: python tests/test_llm_gateway.py
+
+Tests:
+1. One lazily built client serves every call
+2. JSON replies, the invalid-JSON retry and SDK retries of 429
+3. Streaming
+4. No other module builds its own client
+"""
+
+import asyncio
+import json
+import os
+import re
+import sys
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret-for-unit-tests-min32chars")
+os.environ.setdefault("ADMIN_SECRET", "admin-secret-1234567890")
+os.environ["LLM_FAKE_LATENCY_MS"] = "0"
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.services.llm import LLMGateway
+from app.services.prompts import prompts
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+def scripted_client(replies: list):
+    """AsyncOpenAI whose transport answers with ``replies`` in order: (status, content)."""
+    seen = []
+
+    def handler(request):
+        status, content = replies[min(len(seen), len(replies) - 1)]
+        seen.append(request)
+        if status != 200:
+            return httpx.Response(status, headers={"retry-after-ms": "1"}, json={"error": {"message": "busy"}})
+        return httpx.Response(200, json={
+            "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "test",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        })
+
+    client = AsyncOpenAI(api_key="sk-test", base_url="http://llm.test/v1", max_retries=2,
+                         http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    return client, seen
+
+
+async def main():
+    # ── 1. Shared client ─────────────────────────────────────────────
+    print("=== 1. Shared Client ===")
+    gateway = LLMGateway(api_key="sk-test", model="fake-model", provider="fake")
+    check("No client before first use", gateway.stats()["client_open"] is False)
+    messages = prompts.get("evaluate_recall").messages(student_level="podstawowy", qa_text="point_id=7: 3/4")
+    client = gateway.client
+    results = await asyncio.gather(*(gateway.complete_json(messages) for _ in range(5)))
+    check("Concurrent calls reuse one client", gateway.client is client and gateway.stats()["calls"] == 5)
+    check("Replies parsed", all(r["evaluations"][0]["point_id"] == 7 for r in results))
+    await gateway.stop()
+    check("Stop closes the client", gateway.stats()["client_open"] is False and client.is_closed())
+
+    # ── 2. Retries ───────────────────────────────────────────────────
+    print("\n=== 2. Retries ===")
+    gateway = LLMGateway(api_key="sk-test", model="test")
+    gateway._client, seen = scripted_client([(200, "not json"), (200, '{"ok": true}')])
+    check("Invalid JSON retried once", await gateway.complete_json(messages) == {"ok": True}
+          and gateway.stats()["json_retries"] == 1 and len(seen) == 2)
+
+    gateway._client, seen = scripted_client([(200, "nope")])
+    try:
+        await gateway.complete_json(messages)
+        check("Second invalid reply raises", False)
+    except json.JSONDecodeError:
+        check("Second invalid reply raises", len(seen) == 2)
+
+    gateway._client, seen = scripted_client([(429, ""), (200, '{"ok": 1}')])
+    check("429 retried by the SDK", await gateway.complete_json(messages) == {"ok": 1} and len(seen) == 2)
+    await gateway.stop()
+
+    # ── 3. Streaming ─────────────────────────────────────────────────
+    print("\n=== 3. Streaming ===")
+    gateway = LLMGateway(api_key="sk-test", model="fake-model", provider="fake")
+    pieces = [piece async for piece in gateway.stream(messages, json_mode=True)]
+    check("Reply arrives in several pieces", len(pieces) > 1, f"{len(pieces)} pieces")
+    check("Pieces join to the full reply", json.loads("".join(pieces))["evaluations"][0]["point_id"] == 7)
+    await gateway.stop()
+
+    # ── 4. Single construction site ──────────────────────────────────
+    print("\n=== 4. Single Construction Site ===")
+    builders = []
+    for root, _dirs, files in os.walk(os.path.join(project_dir, "app")):
+        for name in files:
+            if name.endswith(".py"):
+                path = os.path.join(root, name)
+                with open(path) as f:
+                    if re.search(r"\bAsyncOpenAI\(", f.read()):
+                        builders.append(os.path.relpath(path, project_dir))
+    check("Only the gateway constructs AsyncOpenAI", builders == [os.path.join("app", "services", "llm.py")],
+          str(builders))
+
+
+print("\n=== LLM Gateway Tests ===\n")
+asyncio.run(main())
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
@@ -0,0 +1,150 @@
+"""
+Unit tests for the versioned migration runner.
+Run with: python tests/test_migrations.py
+
+Tests:
+1. Fresh database
+2. Database created by the old boot-time schema replay
+3. Edited migrations are refused
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret-for-unit-tests-min32chars")
+os.environ.setdefault("ADMIN_SECRET", "admin-secret-1234567890")
+
+from app.db.database import ConnectionPool
+from app.db.indexes import check_query_plans
+from app.db.migrate import MIGRATIONS_DIR, MigrationError, apply_migrations, discover_migrations
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+LATEST = discover_migrations()[-1].version
+TMP = tempfile.mkdtemp()
+
+
+def columns(path, table):
+    con = sqlite3.connect(path)
+    try:
+        return {row[1] for row in con.execute(f"PRAGMA table_info({table})")}
+    finally:
+        con.close()
+
+
+def query(path, sql, params=()):
+    con = sqlite3.connect(path)
+    try:
+        return con.execute(sql, params).fetchall()
+    finally:
+        con.close()
+
+
+async def migrate_file(path):
+    pool = ConnectionPool(path, size=1, max_overflow=0)
+    try:
+        async with pool.acquire() as db:
+            done = await apply_migrations(db)
+            offenders = await check_query_plans(db)
+        return done, offenders
+    finally:
+        await pool.close()
+
+
+def legacy_database(path):
+    """Schema as the old init_db left it before later columns were added."""
+    con = sqlite3.connect(path)
+    con.executescript((MIGRATIONS_DIR / "0001_baseline.sql").read_text())
+    for table, column in [("students", "total_xp"), ("students", "streak"), ("students", "exam_target"),
+                          ("lessons", "math_domain"), ("sessions", "homework")]:
+        con.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+    con.execute("ALTER TABLE learning_points RENAME COLUMN explanation TO polish_explanation")
+    con.execute("INSERT INTO students (name, created_at) VALUES ('Ola', '2024-01-02T03:04:05.123456')")
+    con.commit()
+    con.close()
+
+
+async def main():
+    # ── 1. Fresh ─────────────────────────────────────────────────────
+    print("=== 1. Fresh Database ===")
+    fresh = os.path.join(TMP, "fresh.db")
+    done, offenders = await migrate_file(fresh)
+    check("Every migration applied", [m.version for m in done] == [m.version for m in discover_migrations()])
+    check("user_version is the latest", query(fresh, "PRAGMA user_version")[0][0] == LATEST)
+    check("Hot queries use indexes", offenders == [], str(offenders))
+    indexes = {row[0] for row in query(fresh, "SELECT name FROM sqlite_master WHERE type = 'index'")}
+    check("Index pack created", {"idx_xp_log_student_created", "idx_recall_sessions_student_completed",
+                                 "idx_students_teachers"} <= indexes)
+    done, _ = await migrate_file(fresh)
+    check("Second run is a no-op", done == [])
+
+    # ── 2. Legacy ────────────────────────────────────────────────────
+    print("\n=== 2. Legacy Database ===")
+    legacy = os.path.join(TMP, "legacy.db")
+    legacy_database(legacy)
+    done, offenders = await migrate_file(legacy)
+    check("Every migration applied", len(done) == len(discover_migrations()))
+    check("Missing columns added", {"total_xp", "streak", "exam_target"} <= columns(legacy, "students")
+          and "math_domain" in columns(legacy, "lessons") and "homework" in columns(legacy, "sessions"))
+    check("Old column names renamed", "explanation" in columns(legacy, "learning_points")
+          and "polish_explanation" not in columns(legacy, "learning_points"))
+    check("ISO timestamps normalized",
+          query(legacy, "SELECT created_at FROM students")[0][0] == "2024-01-02 03:04:05")
+    check("Hot queries use indexes", offenders == [], str(offenders))
+    check("Same schema as a fresh database",
+          query(legacy, "SELECT name FROM sqlite_master WHERE type = 'index' ORDER BY name")
+          == query(fresh, "SELECT name FROM sqlite_master WHERE type = 'index' ORDER BY name"))
+
+    # ── 3. Checksums ─────────────────────────────────────────────────
+    print("\n=== 3. Checksums ===")
+    edited = os.path.join(TMP, "edited.db")
+    await migrate_file(edited)
+    con = sqlite3.connect(edited)
+    con.execute("UPDATE schema_migrations SET checksum = 'edited' WHERE version = 2")
+    con.execute("PRAGMA user_version = 1")
+    con.commit()
+    con.close()
+    try:
+        await migrate_file(edited)
+        check("Edited migration refused", False)
+    except MigrationError as exc:
+        check("Edited migration refused", "0002_" in str(exc))
+
+
+print("\n=== Migration Tests ===\n")
+asyncio.run(main())
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
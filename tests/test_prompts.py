@@ -0,0 +1,127 @@
+"""
+Unit tests for the prompt registry.
+Run with: python tests/test_prompts.py
+
+Tests:
+1. Every shipped prompt loads and renders
+2. Bad placeholders fail at load time
+3. Hot reload picks up edits and keeps the last good version
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret-for-unit-tests-min32chars")
+os.environ.setdefault("ADMIN_SECRET", "admin-secret-1234567890")
+
+from app.services.prompts import EXPECTED_PLACEHOLDERS, PROMPTS_DIR, PromptError, PromptRegistry
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+def copy_prompts() -> Path:
+    directory = Path(tempfile.mkdtemp()) / "prompts"
+    shutil.copytree(PROMPTS_DIR, directory)
+    return directory
+
+
+def edit(path: Path, old: str, new: str) -> None:
+    path.write_text(path.read_text().replace(old, new, 1))
+    # Make sure the mtime moves even on coarse-grained filesystems
+    stamp = time.time() + 5
+    os.utime(path, (stamp, stamp))
+
+
+# ── 1. Shipped prompts ───────────────────────────────────────────────
+print("\n=== Prompt Registry Tests ===\n")
+print("=== 1. Shipped Prompts ===")
+registry = PromptRegistry(PROMPTS_DIR, reload_interval_seconds=0)
+registry.load_all()
+check("Every expected template present", set(EXPECTED_PLACEHOLDERS) <= set(registry.stats()["templates"]))
+rendered = []
+for name, expected in EXPECTED_PLACEHOLDERS.items():
+    messages = registry.get(name).messages(**{key: f"<{key}>" for key in expected})
+    rendered.append(messages[0]["role"] == "system" and all(f"<{key}>" in messages[1]["content"]
+                                                             for key in registry.get(name).placeholders))
+check("Every template renders with the values the code passes", all(rendered))
+check("Derived fragment rendered", "kolejnosc_dzialan" in registry.fragment("math_misconceptions"))
+check("Same object served on every call", registry.get("diagnostic") is registry.get("diagnostic"))
+try:
+    registry.get("evaluate_recall").render(student_level="podstawowy")
+    check("Missing value raises PromptError", False)
+except PromptError as exc:
+    check("Missing value raises PromptError", "qa_text" in str(exc))
+try:
+    registry.get("no_such_prompt")
+    check("Unknown prompt raises PromptError", False)
+except PromptError:
+    check("Unknown prompt raises PromptError", True)
+
+# ── 2. Load-time validation ──────────────────────────────────────────
+print("\n=== 2. Load-Time Validation ===")
+broken = copy_prompts()
+edit(broken / "evaluate_recall.yaml", "{qa_text}", "{qa_txt}")
+try:
+    PromptRegistry(broken).load_all()
+    check("Typo in a placeholder fails at load", False)
+except PromptError as exc:
+    check("Typo in a placeholder fails at load", "qa_txt" in str(exc), str(exc))
+(broken / "evaluate_recall.yaml").unlink()
+try:
+    PromptRegistry(broken).load_all()
+    check("Missing template fails at load", False)
+except PromptError as exc:
+    check("Missing template fails at load", "evaluate_recall" in str(exc))
+
+# ── 3. Hot reload ────────────────────────────────────────────────────
+print("\n=== 3. Hot Reload ===")
+live = copy_prompts()
+registry = PromptRegistry(live, reload_interval_seconds=0.01)
+registry.load_all()
+before = registry.get("evaluate_recall")
+edit(live / "evaluate_recall.yaml", "Poziom ucznia:", "Poziom:")
+time.sleep(0.02)
+after = registry.get("evaluate_recall")
+check("Edited file reloaded without restart", after is not before and "Poziom:" in after.user_template
+      and registry.stats()["reloads"] == 1)
+edit(live / "evaluate_recall.yaml", "{qa_text}", "{oops}")
+time.sleep(0.02)
+check("Bad edit keeps the last good version", registry.get("evaluate_recall") is after)
+edit(live / "polish_struggles.yaml", "czesste_bledy_matematyczne:", "extra_note: test\nczesste_bledy_matematyczne:")
+time.sleep(0.02)
+check("Fragment re-rendered with its source", "extra_note" in registry.fragment("math_misconceptions"))
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
@@ -0,0 +1,129 @@
+"""
+Unit tests for the recall question bank.
+Run with: python tests/test_recall_bank.py
+
+Tests:
+1. Stored variants are reused before the model is asked again
+2. Used-up variants are retired so the bank keeps refilling
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret-for-unit-tests-min32chars")
+os.environ.setdefault("ADMIN_SECRET", "admin-secret-1234567890")
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(), "recall_bank.db")
+
+from app.config import settings
+from app.db.database import close_db, db_pool, init_db
+from app.services import recall_bank
+from app.services.recall_bank import build_recall_quiz, mark_used
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+generated = {"n": 0}
+
+
+async def fake_generate(points, level):
+    """Writes a new question text on every call, like the real model."""
+    generated["n"] += 1
+    return {"questions": [{"point_id": p["id"], "question_type": "solve",
+                           "question_text": f"Pytanie {generated['n']} o {p['content']}",
+                           "correct_answer": "3/4"} for p in points]}
+
+
+async def session(points):
+    """Build a quiz and start it, as /start does."""
+    quiz = await build_recall_quiz(points, "podstawowy")
+    async with db_pool.acquire() as db:
+        await mark_used(db, quiz["questions"])
+        await db.commit()
+    return quiz
+
+
+async def variants(point_id):
+    async with db_pool.acquire() as db:
+        cursor = await db.execute(
+            "SELECT times_used FROM recall_questions WHERE learning_point_id = ? ORDER BY id", (point_id,)
+        )
+        return [row[0] for row in await cursor.fetchall()]
+
+
+async def main():
+    await init_db()
+    settings.recall_bank_max_variants = 3
+    settings.recall_bank_max_uses = 3
+    settings.recall_bank_reuse_after_days = 0
+    recall_bank.generate_recall_questions = fake_generate
+    async with db_pool.acquire() as db:
+        cursor = await db.execute("INSERT INTO students (name, current_level) VALUES ('Ola', 'podstawowy')")
+        student_id = cursor.lastrowid
+        cursor = await db.execute("INSERT INTO lessons (student_id, objective) VALUES (?, 'Ulamki')", (student_id,))
+        cursor = await db.execute(
+            """INSERT INTO learning_points (student_id, lesson_id, point_type, content)
+               VALUES (?, ?, 'metoda', 'Dodawanie ulamkow')""",
+            (student_id, cursor.lastrowid),
+        )
+        point = {"id": cursor.lastrowid, "content": "Dodawanie ulamkow"}
+        await db.commit()
+
+    # ── 1. Reuse ─────────────────────────────────────────────────────
+    print("=== 1. Reuse ===")
+    first = await session([point])
+    check("First session asks the model", first["banked"] == 0 and generated["n"] == 1)
+    check("Generated question stored", first["questions"][0]["question_id"] is not None)
+    second = await session([point])
+    check("Next session served from the bank", second["banked"] == 1 and generated["n"] == 1
+          and second["questions"][0]["question_id"] == first["questions"][0]["question_id"])
+
+    # ── 2. Retirement ────────────────────────────────────────────────
+    print("\n=== 2. Retirement ===")
+    sessions = settings.recall_bank_max_variants * settings.recall_bank_max_uses * 2
+    for _ in range(sessions - 2):
+        quiz = await session([point])
+    check("One model call per max_uses sessions", generated["n"] == sessions // settings.recall_bank_max_uses,
+          f"{generated['n']} calls for {sessions} sessions")
+    stored = await variants(point["id"])
+    check("Bank stays within max_variants", len(stored) == settings.recall_bank_max_variants, str(stored))
+    check("Newest variant still stored past the cap", quiz["questions"][0]["question_id"] is not None)
+    check("Only used-up variants retired", stored.count(settings.recall_bank_max_uses) == len(stored))
+
+    await close_db()
+
+
+print("\n=== Recall Bank Tests ===\n")
+asyncio.run(main())
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
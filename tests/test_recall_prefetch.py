@@ -0,0 +1,152 @@
+"""
+Unit tests for speculative recall-quiz generation.
+Run with: python tests/test_recall_prefetch.py
+
+Tests:
+1. A prefetched quiz is handed over once, in flight or finished
+2. Changed points, expiry and failures fall back to inline generation
+3. /check then /start makes a single model call
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret-for-unit-tests-min32chars")
+os.environ.setdefault("ADMIN_SECRET", "admin-secret-1234567890")
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(), "prefetch.db")
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["LLM_FAKE_LATENCY_MS"] = "0"
+
+from app.db.database import close_db, db_pool, init_db
+from app.routes import recall as recall_routes
+from app.services import recall_prefetch as prefetch_module
+from app.services.llm import llm
+from app.services.recall_prefetch import RecallPrefetcher, recall_prefetch
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+POINTS = [{"id": 1, "point_type": "metoda", "content": "Dodawanie ulamkow"},
+          {"id": 2, "point_type": "wzor_formula", "content": "a/b + c/d"}]
+
+
+async def slow_build(points, level):
+    await asyncio.sleep(0.05)
+    if level == "broken":
+        raise RuntimeError("model down")
+    return {"questions": [{"point_id": p["id"]} for p in points]}
+
+
+async def unit_tests():
+    real_build = prefetch_module.build_recall_quiz
+    prefetch_module.build_recall_quiz = slow_build
+    try:
+        # ── 1. Handover ──────────────────────────────────────────────
+        print("=== 1. Handover ===")
+        prefetcher = RecallPrefetcher(ttl_seconds=60)
+        prefetcher.prefetch(1, POINTS, "podstawowy")
+        prefetcher.prefetch(1, [dict(p, times_reviewed=3) for p in POINTS], "podstawowy")
+        check("Repeat /check does not start a second build", prefetcher.stats()["started"] == 1)
+        result = await prefetcher.take(1, POINTS, "podstawowy")
+        check("In-flight build awaited and handed over", [q["point_id"] for q in result["questions"]] == [1, 2])
+        check("Entry used once", await prefetcher.take(1, POINTS, "podstawowy") is None)
+
+        prefetcher.prefetch(2, POINTS, "podstawowy")
+        await asyncio.sleep(0.1)
+        check("Finished build handed over", await prefetcher.take(2, POINTS, "podstawowy") is not None)
+
+        # ── 2. Fallbacks ─────────────────────────────────────────────
+        print("\n=== 2. Fallbacks ===")
+        prefetcher.prefetch(3, POINTS, "podstawowy")
+        task = prefetcher._entries[3].task
+        check("Different points are a miss", await prefetcher.take(3, POINTS[:1], "podstawowy") is None)
+        await asyncio.sleep(0)
+        check("Unwanted build cancelled", task.cancelled() or task.cancelling())
+        prefetcher.prefetch(4, POINTS, "podstawowy")
+        check("Different level is a miss", await prefetcher.take(4, POINTS, "rozszerzony") is None)
+
+        expiring = RecallPrefetcher(ttl_seconds=0.01)
+        expiring.prefetch(5, POINTS, "podstawowy")
+        await asyncio.sleep(0.02)
+        check("Expired entry is a miss", await expiring.take(5, POINTS, "podstawowy") is None)
+
+        prefetcher.prefetch(6, POINTS, "broken")
+        check("Failed build is a miss", await prefetcher.take(6, POINTS, "broken") is None)
+
+        small = RecallPrefetcher(max_entries=2)
+        for student_id in (7, 8, 9):
+            small.prefetch(student_id, POINTS, "podstawowy")
+        check("Oldest entry evicted past max_entries", list(small._entries) == [8, 9])
+        stats = prefetcher.stats()
+        check("Hits and misses counted", stats["hits"] == 2 and stats["misses"] == 4)
+        for p in (prefetcher, expiring, small):
+            await p.stop()
+    finally:
+        prefetch_module.build_recall_quiz = real_build
+
+
+async def route_tests():
+    # ── 3. Routes ────────────────────────────────────────────────────
+    print("\n=== 3. Check Then Start ===")
+    await init_db()
+    async with db_pool.acquire() as db:
+        cursor = await db.execute("INSERT INTO students (name, current_level) VALUES ('Ola', 'podstawowy')")
+        student_id = cursor.lastrowid
+        cursor = await db.execute("INSERT INTO lessons (student_id, objective) VALUES (?, 'Ulamki')", (student_id,))
+        lesson_id = cursor.lastrowid
+        for content in ("Wspolny mianownik", "Skracanie ulamkow"):
+            await db.execute(
+                "INSERT INTO learning_points (student_id, lesson_id, point_type, content) VALUES (?, ?, 'metoda', ?)",
+                (student_id, lesson_id, content),
+            )
+        await db.commit()
+
+    status = await recall_routes.check_recall(student_id)
+    check("Check reports due points", status["points_count"] == 2)
+    await asyncio.sleep(0.1)
+    calls = llm.stats()["calls"]
+    started = await recall_routes.start_recall(student_id)
+    check("Start uses the prefetched quiz", llm.stats()["calls"] == calls and len(started["questions"]) == 2)
+    check("Prefetch recorded a hit", recall_prefetch.stats()["hits"] == 1)
+
+    await recall_prefetch.stop()
+    await llm.stop()
+    await close_db()
+
+
+print("\n=== Recall Prefetch Tests ===\n")
+asyncio.run(unit_tests())
+asyncio.run(route_tests())
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
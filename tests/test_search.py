@@ -0,0 +1,115 @@
+"""
+Unit tests for full-text search.
+Run with: python tests/test_search.py
+
+Tests:
+1. Query building
+2. Ranked search across kinds, per-student filtering, pagination
+3. Student-name filter used by the teacher student list
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret-for-unit-tests-min32chars")
+os.environ.setdefault("ADMIN_SECRET", "admin-secret-1234567890")
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(), "search.db")
+
+from app.db.database import close_db, db_pool, init_db
+from app.routes import scheduling, search as search_routes
+from app.services.search import build_match_query, match_student_ids_clause, search
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+async def student_names(q):
+    clause, params = match_student_ids_clause(q)
+    async with db_pool.acquire() as db:
+        cursor = await db.execute(
+            "SELECT s.name FROM students s WHERE s.role = 'student'" + clause + " ORDER BY s.name", params
+        )
+        return [row[0] for row in await cursor.fetchall()]
+
+
+async def main():
+    # ── 1. Query building ────────────────────────────────────────────
+    print("=== 1. Query Building ===")
+    check("Words become quoted prefix matches", build_match_query("Ułamki zwykłe") == '"Ulamki"* "zwykle"*')
+    check("FTS operators stay literal", build_match_query("NEAR -x") == '"NEAR"* "x"*')
+    check("No words, no query", build_match_query("!!") is None and build_match_query("") is None)
+
+    await init_db()
+    async with db_pool.acquire() as db:
+        ids = []
+        for name in ("Łukasz Nowak", "Ola Kowalska", "Ela Nowakowska"):
+            cursor = await db.execute("INSERT INTO students (name, current_level) VALUES (?, 'podstawowy')", (name,))
+            ids.append(cursor.lastrowid)
+        for i, student_id in enumerate(ids):
+            await db.execute(
+                "INSERT INTO lessons (student_id, session_number, objective, math_domain) VALUES (?, 1, ?, 'arytmetyka')",
+                (student_id, f"Ułamki zwykłe, część {i}"),
+            )
+        await db.commit()
+
+    # ── 2. Search ────────────────────────────────────────────────────
+    print("\n=== 2. Search ===")
+    async with db_pool.acquire() as db:
+        result = await search(db, "ulamki")
+        check("Diacritics ignored", len(result["results"]) == 3
+              and {r["kind"] for r in result["results"]} == {"lesson"})
+        result = await search(db, "lukasz", kinds=["student"])
+        check("Ł folded in names", [r["title"] for r in result["results"]] == ["Łukasz Nowak"])
+        result = await search(db, "ulamki", student_id=ids[1])
+        check("Restricted to one student", [r["student_id"] for r in result["results"]] == [ids[1]])
+        page = await search(db, "ulamki", limit=2)
+        rest = await search(db, "ulamki", limit=2, offset=2)
+        check("Pagination", page["has_more"] and len(page["results"]) == 2
+              and not rest["has_more"] and len(rest["results"]) == 1)
+        result = await search(db, "!!")
+        check("Query without words finds nothing", result["results"] == [] and not result["has_more"])
+
+    # ── 3. Student-name filter ───────────────────────────────────────
+    print("\n=== 3. Student Filter ===")
+    check("Prefix match on names", await student_names("nowak") == ["Ela Nowakowska", "Łukasz Nowak"])
+    check("No q, no filter", len(await student_names(None)) == 3)
+    check("q without words matches nobody", await student_names("!!") == [])
+    check("Search route shares the teacher check", search_routes._require_teacher is scheduling._require_teacher)
+
+    await close_db()
+
+
+print("\n=== Search Tests ===\n")
+asyncio.run(main())
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
@@ -0,0 +1,131 @@
+"""
+Unit tests for coalescing of duplicate generation requests.
+Run with: python tests/test_single_flight.py
+
+Tests:
+1. Concurrent identical calls share one run
+2. Grace window after completion
+3. Failures and cancellation
+4. Disabled
+"""
+
+import asyncio
+import os
+import sys
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret-for-unit-tests-min32chars")
+os.environ.setdefault("ADMIN_SECRET", "admin-secret-1234567890")
+
+from app.services.single_flight import SingleFlight
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+class Generator:
+    """Counts runs; each run takes ``delay`` seconds and returns a new object."""
+
+    def __init__(self, delay=0.05, error=None):
+        self.delay = delay
+        self.error = error
+        self.runs = 0
+
+    async def __call__(self):
+        self.runs += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {"run": self.runs}
+
+
+async def main():
+    # ── 1. Coalescing ────────────────────────────────────────────────
+    print("=== 1. Concurrent Calls ===")
+    flights = SingleFlight(grace_seconds=0.2)
+    generate = Generator()
+    results = await asyncio.gather(*(flights.run("lessons.generate", 1, generate) for _ in range(5)))
+    check("One run for five identical calls", generate.runs == 1, f"{generate.runs} runs")
+    check("All callers get the same result", all(r is results[0] for r in results))
+    stats = flights.stats()
+    check("Coalesced calls counted", stats["started"] == 1 and stats["coalesced"] == 4, str(stats))
+
+    other = Generator()
+    await asyncio.gather(flights.run("lessons.generate", 2, other), flights.run("recall.start", 1, other))
+    check("Other students and operations run separately", other.runs == 2)
+    check("Per-operation counts", stats["operations"]["lessons.generate"]["coalesced"] == 4)
+
+    # ── 2. Grace window ──────────────────────────────────────────────
+    print("\n=== 2. Grace Window ===")
+    again = await flights.run("lessons.generate", 1, generate)
+    check("Result reused right after completion", again is results[0] and generate.runs == 1)
+    check("Reuse counted", flights.stats()["reused"] == 1)
+    await asyncio.sleep(0.25)
+    again = await flights.run("lessons.generate", 1, generate)
+    check("Runs again after the grace window", generate.runs == 2 and again == {"run": 2})
+    no_grace = SingleFlight(grace_seconds=0)
+    await no_grace.run("x", 1, generate)
+    await no_grace.run("x", 1, generate)
+    check("No reuse without a grace window", generate.runs == 4)
+
+    # ── 3. Failures ──────────────────────────────────────────────────
+    print("\n=== 3. Failures and Cancellation ===")
+    failing = Generator(error=RuntimeError("model down"))
+    outcomes = await asyncio.gather(*(flights.run("diagnostic.run", 1, failing) for _ in range(3)),
+                                    return_exceptions=True)
+    check("Waiters share the failure", failing.runs == 1
+          and all(isinstance(o, RuntimeError) for o in outcomes))
+    failing.error = None
+    check("Failures are not reused", await flights.run("diagnostic.run", 1, failing) == {"run": 2})
+    check("Failure counted", flights.stats()["failed"] == 1)
+
+    slow = Generator(delay=0.1)
+    first = asyncio.create_task(flights.run("learning_path.generate", 1, slow))
+    await asyncio.sleep(0.01)
+    second = asyncio.create_task(flights.run("learning_path.generate", 1, slow))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    result = await second
+    check("A cancelled caller does not cancel the others", result == {"run": 1} and slow.runs == 1)
+    await flights.stop()
+    check("Stop clears everything", flights.stats()["in_flight"] == 0)
+
+    # ── 4. Disabled ──────────────────────────────────────────────────
+    print("\n=== 4. Disabled ===")
+    disabled = SingleFlight(enabled=False)
+    plain = Generator()
+    await asyncio.gather(*(disabled.run("lessons.generate", 1, plain) for _ in range(3)))
+    check("Every call runs when disabled", plain.runs == 3)
+
+
+print("\n=== Single Flight Tests ===\n")
+asyncio.run(main())
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
@@ -0,0 +1,122 @@
+"""
+Unit tests for per-skill observations.
+Run with: python tests/test_skill_observations.py
+
+Tests:
+1. One row per skill touched by a progress entry
+2. Averages, counts and first/last scores
+3. Backfill from legacy JSON columns
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret-for-unit-tests-min32chars")
+os.environ.setdefault("ADMIN_SECRET", "admin-secret-1234567890")
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(), "skills.db")
+
+from app.db.database import close_db, db_pool, init_db
+from app.db.migrate import MIGRATIONS_DIR, split_sql
+from app.services.progress_tracker import AREA_SOURCES, get_skill_stats, record_skill_observations
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+async def add_progress(db, student_id, score, improved, struggling):
+    cursor = await db.execute(
+        "INSERT INTO progress (student_id, lesson_id, score, areas_improved, areas_struggling) VALUES (?, 1, ?, ?, ?)",
+        (student_id, score, json.dumps(improved), json.dumps(struggling)),
+    )
+    return cursor.lastrowid
+
+
+async def main():
+    await init_db()
+    async with db_pool.acquire() as db:
+        cursor = await db.execute("INSERT INTO students (name) VALUES ('Ola')")
+        student_id = cursor.lastrowid
+
+        # ── 1. Recording ─────────────────────────────────────────────
+        print("=== 1. Recording ===")
+        progress_id = await add_progress(db, student_id, 80, ["ulamki"], ["geometria"])
+        await record_skill_observations(db, student_id, progress_id, 80, ["ulamki"], ["geometria"], "podstawowy")
+        cursor = await db.execute(
+            "SELECT skill, score, source FROM skill_observations WHERE progress_id = ? ORDER BY id", (progress_id,))
+        rows = [tuple(row) for row in await cursor.fetchall()]
+        check("Improved, struggling and difficulty rows", rows == [
+            ("ulamki", 80.0, "improved"), ("geometria", 60.0, "struggling"), ("level_podstawowy", 80.0, "difficulty"),
+        ], str(rows))
+        await record_skill_observations(db, student_id, progress_id, None, [], [])
+        cursor = await db.execute("SELECT COUNT(*) FROM skill_observations")
+        check("Nothing written for an empty entry", (await cursor.fetchone())[0] == 3)
+
+        # ── 2. Stats ─────────────────────────────────────────────────
+        print("\n=== 2. Stats ===")
+        for score in (50, 90):
+            progress_id = await add_progress(db, student_id, score, ["ulamki"], [])
+            await record_skill_observations(db, student_id, progress_id, score, ["ulamki"], [])
+        stats = await get_skill_stats(db, student_id)
+        ulamki = stats["ulamki"]
+        check("Average over all observations", round(ulamki["average"], 2) == round((80 + 50 + 90) / 3, 2))
+        check("Count", ulamki["count"] == 3)
+        check("First and last in observation order", ulamki["first"] == 80 and ulamki["last"] == 90, str(ulamki))
+        check("Difficulty rows left out by default", "level_podstawowy" not in stats)
+        stats = await get_skill_stats(db, student_id, AREA_SOURCES + ("difficulty",))
+        check("Difficulty rows on request", stats["level_podstawowy"]["count"] == 1)
+        check("Other students unaffected", await get_skill_stats(db, student_id + 1) == {})
+
+        # ── 3. Backfill ──────────────────────────────────────────────
+        print("\n=== 3. Backfill ===")
+        await db.execute("DELETE FROM skill_observations")
+        await add_progress(db, student_id, 70, ["procenty", "potegi"], ["funkcje"])
+        await db.execute(
+            "INSERT INTO progress (student_id, lesson_id, score, areas_improved) VALUES (?, 1, 40, 'not json')",
+            (student_id,))
+        backfill = (MIGRATIONS_DIR / "0005_skill_observations.sql").read_text()
+        for statement in split_sql(backfill):
+            if "INSERT INTO skill_observations" in statement:
+                await db.execute(statement)
+        stats = await get_skill_stats(db, student_id)
+        check("Backfilled from JSON arrays", stats["procenty"]["average"] == 70 and stats["funkcje"]["average"] == 50,
+              str({k: v["average"] for k, v in stats.items()}))
+        check("Invalid JSON skipped", "not json" not in stats)
+        await db.commit()
+    await close_db()
+
+
+print("\n=== Skill Observation Tests ===\n")
+asyncio.run(main())
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
@@ -0,0 +1,75 @@
+"""
+Unit tests for the canonical database timestamp format.
+Run with: python tests/test_timestamps.py
+
+Tests:
+1. Formatting from datetimes, dates and ISO strings
+2. Ordering against SQLite's own timestamps
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import date, datetime, timedelta, timezone
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+from app.db.timestamps import db_now, parse_db_timestamp, to_db_timestamp
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+print("\n=== Timestamp Tests ===\n")
+
+# ── 1. Formatting ────────────────────────────────────────────────────
+print("=== 1. Formatting ===")
+
+check("Naive datetime", to_db_timestamp(datetime(2024, 3, 5, 7, 8, 9, 123456)) == "2024-03-05 07:08:09")
+aware = datetime(2024, 3, 5, 9, 8, 9, tzinfo=timezone(timedelta(hours=2)))
+check("Aware datetime converted to UTC", to_db_timestamp(aware) == "2024-03-05 07:08:09")
+check("Date at midnight", to_db_timestamp(date(2024, 3, 5)) == "2024-03-05 00:00:00")
+check("Legacy ISO string", to_db_timestamp("2024-03-05T07:08:09.5Z") == "2024-03-05 07:08:09")
+check("None stays None", to_db_timestamp(None) is None and parse_db_timestamp("") is None)
+check("Round trip", to_db_timestamp(parse_db_timestamp("2024-03-05 07:08:09")) == "2024-03-05 07:08:09")
+
+# ── 2. Ordering ──────────────────────────────────────────────────────
+print("\n=== 2. Ordering ===")
+
+con = sqlite3.connect(":memory:")
+sqlite_now = con.execute("SELECT datetime('now')").fetchone()[0]
+check("Same format as SQLite", len(db_now()) == len(sqlite_now) and db_now()[10] == sqlite_now[10] == " ")
+check("Future offset sorts after SQLite's now", db_now(timedelta(minutes=5)) > sqlite_now)
+check("Past offset sorts before SQLite's now", db_now(-timedelta(minutes=5)) < sqlite_now)
+# The old isoformat() output sorted after a later canonical value
+check("Canonical text compares correctly where isoformat did not",
+      "2024-03-05T07:00:00" > "2024-03-05 08:00:00"
+      and to_db_timestamp("2024-03-05T07:00:00") < "2024-03-05 08:00:00")
+con.close()
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
@@ -0,0 +1,131 @@
+"""
+Unit tests for the request-scoped unit of work.
+Run with: python tests/test_unit_of_work.py
+
+Tests:
+1. Nested service calls share one connection and commit once
+2. An exception rolls everything back
+3. Recall submission holds no connection during the model call
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret-for-unit-tests-min32chars")
+os.environ.setdefault("ADMIN_SECRET", "admin-secret-1234567890")
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(), "uow.db")
+
+from fastapi import HTTPException
+
+from app.db.database import close_db, db_pool, init_db
+from app.db.unit_of_work import unit_of_work
+from app.routes import recall as recall_routes
+from app.services.xp_engine import award_xp
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+async def scalar(sql, params=()):
+    async with db_pool.acquire() as db:
+        cursor = await db.execute(sql, params)
+        return (await cursor.fetchone())[0]
+
+
+async def main():
+    await init_db()
+    async with db_pool.acquire() as db:
+        cursor = await db.execute("INSERT INTO students (name, current_level) VALUES ('Ola', 'podstawowy')")
+        student_id = cursor.lastrowid
+        await db.commit()
+
+    # ── 1. Shared connection ─────────────────────────────────────────
+    print("=== 1. Nested Calls ===")
+    async with unit_of_work() as uow:
+        await award_xp(student_id, 10, "test", uow=uow)
+        await award_xp(student_id, 5, "test", uow=uow)
+        check("Nested calls do not commit", uow.commits == 0)
+        check("Only one connection checked out", db_pool.stats()["in_use"] == 1)
+        check("Other connections do not see the writes yet",
+              await scalar("SELECT COUNT(*) FROM xp_log WHERE student_id = ?", (student_id,)) == 0)
+    check("Owner commits on exit", await scalar("SELECT total_xp FROM students WHERE id = ?", (student_id,)) == 15)
+
+    # ── 2. Rollback ──────────────────────────────────────────────────
+    print("\n=== 2. Rollback ===")
+    try:
+        async with unit_of_work() as uow:
+            await award_xp(student_id, 100, "test", uow=uow)
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    check("Failed unit of work leaves no XP", await scalar("SELECT total_xp FROM students WHERE id = ?", (student_id,)) == 15)
+    check("Connection returned to the pool", db_pool.stats()["in_use"] == 0)
+
+    # ── 3. Recall submission ─────────────────────────────────────────
+    print("\n=== 3. Recall Submission ===")
+    questions = [{"point_id": None, "question_text": "2 + 2", "correct_answer": "4"}]
+    async with db_pool.acquire() as db:
+        cursor = await db.execute(
+            "INSERT INTO recall_sessions (student_id, questions, status) VALUES (?, ?, 'in_progress')",
+            (student_id, json.dumps(questions)),
+        )
+        session_id = cursor.lastrowid
+        await db.commit()
+
+    seen = {}
+
+    async def slow_evaluation(questions, answers, level, topics=None):
+        seen["in_use"] = db_pool.stats()["in_use"]
+        await asyncio.sleep(0.05)
+        return {"overall_score": 100, "evaluations": [], "weak_areas": [], "encouragement": "Brawo"}
+
+    recall_routes.evaluate_recall_answers = slow_evaluation
+    result = await recall_routes.submit_recall(session_id, {"answers": ["4"]})
+    check("No connection held during evaluation", seen.get("in_use") == 0, str(seen))
+    check("Session completed", result["overall_score"] == 100
+          and await scalar("SELECT status FROM recall_sessions WHERE id = ?", (session_id,)) == "completed")
+    check("XP awarded in the same commit", await scalar("SELECT total_xp FROM students WHERE id = ?", (student_id,)) == 45)
+    try:
+        await recall_routes.submit_recall(session_id, {"answers": ["4"]})
+        check("Second submit rejected", False)
+    except HTTPException as exc:
+        check("Second submit rejected", exc.status_code == 400)
+
+    await close_db()
+
+
+print("\n=== Unit of Work Tests ===\n")
+asyncio.run(main())
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
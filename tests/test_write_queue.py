@@ -0,0 +1,118 @@
+"""
+Unit tests for the single-writer write queue.
+Run with: python tests/test_write_queue.py
+
+Tests:
+1. Concurrent writes are batched into few transactions
+2. A failing write is rolled back alone
+3. Stop flushes queued writes
+4. Fallback when the queue is not running
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add project root to path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret-for-unit-tests-min32chars")
+os.environ.setdefault("ADMIN_SECRET", "admin-secret-1234567890")
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(), "queue.db")
+
+from app.db.database import close_db, db_pool
+from app.db.write_queue import WriteQueue, execute_write, write_queue
+
+PASS = 0
+FAIL = 0
+
+
+def check(label, ok, detail=""):
+    global PASS, FAIL
+    tag = "[PASS]" if ok else "[FAIL]"
+    if ok:
+        PASS += 1
+    else:
+        FAIL += 1
+    extra = f"  ({detail})" if detail else ""
+    print(f"  {tag} {label}{extra}")
+    return ok
+
+
+async def count(where="1"):
+    async with db_pool.acquire() as db:
+        cursor = await db.execute(f"SELECT COUNT(*) FROM items WHERE {where}")
+        return (await cursor.fetchone())[0]
+
+
+def insert(value):
+    async def write(uow):
+        cursor = await uow.execute("INSERT INTO items (v) VALUES (?)", (value,))
+        return cursor.lastrowid
+    return write
+
+
+async def main():
+    async with db_pool.acquire() as db:
+        await db.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, v TEXT UNIQUE)")
+        await db.commit()
+
+    # ── 1. Batching ──────────────────────────────────────────────────
+    print("=== 1. Batching ===")
+    queue = WriteQueue(db_pool, enabled=True, flush_interval_ms=5, batch_size=64)
+    await queue.start()
+    ids = await asyncio.gather(*(queue.submit(insert(f"a{i}")) for i in range(100)))
+    stats = queue.stats()
+    check("Every caller gets its own row id", len(set(ids)) == 100)
+    check("All rows written", await count("v LIKE 'a%'") == 100)
+    check("Writes batched", stats["batches"] < 10, f"{stats['batches']} batches for {stats['writes']} writes")
+
+    # ── 2. Failures ──────────────────────────────────────────────────
+    print("\n=== 2. Failing Write ===")
+
+    async def half_then_fail(uow):
+        await uow.execute("INSERT INTO items (v) VALUES ('partial')")
+        await uow.execute("INSERT INTO items (v) VALUES ('a0')")  # duplicate
+
+    outcomes = await asyncio.gather(queue.submit(insert("b1")), queue.submit(half_then_fail),
+                                    queue.submit(insert("b2")), return_exceptions=True)
+    check("Failing caller gets its exception", isinstance(outcomes[1], Exception), repr(outcomes[1]))
+    check("Its partial write rolled back", await count("v = 'partial'") == 0)
+    check("Rest of the batch committed", await count("v IN ('b1', 'b2')") == 2)
+    check("Failure counted", queue.stats()["failed"] == 1)
+
+    # ── 3. Stop ──────────────────────────────────────────────────────
+    print("\n=== 3. Stop ===")
+    pending = [asyncio.create_task(queue.submit(insert(f"c{i}"))) for i in range(20)]
+    await asyncio.sleep(0)
+    await queue.stop()
+    await asyncio.gather(*pending)
+    check("Queued writes flushed on stop", await count("v LIKE 'c%'") == 20)
+    check("Writer stopped", not queue.running)
+
+    # ── 4. Fallback ──────────────────────────────────────────────────
+    print("\n=== 4. Fallback ===")
+    check("Shared queue not running here", not write_queue.running)
+    result = await execute_write("INSERT INTO items (v) VALUES (?)", ("direct",))
+    check("execute_write commits on its own", result.rowcount == 1 and await count("v = 'direct'") == 1)
+    await close_db()
+
+
+print("\n=== Write Queue Tests ===\n")
+asyncio.run(main())
+
+
+# ── Summary ──────────────────────────────────────────────────────────
+print(f"\n=== Summary ===")
+print(f"Total: {PASS + FAIL} tests")
+print(f"Passed: {PASS}")
+print(f"Failed: {FAIL}")
+
+if FAIL > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)